@@ -3,16 +3,47 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import time
 from collections.abc import Callable, Coroutine
 from typing import Any
 
+from agent_receiver.metrics import record_request
 from fastapi import APIRouter, FastAPI, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.status import HTTP_400_BAD_REQUEST
 
 
-class _UUIDValidationRoute(APIRoute):
+class _MeasuredRoute(APIRoute):
+    @staticmethod
+    def _content_length(request: Request) -> int:
+        try:
+            return int(request.headers.get("content-length", 0))
+        except ValueError:
+            return 0
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+
+        async def measured_route_handler(request: Request) -> Response:
+            start = time.monotonic()
+            failed = True
+            try:
+                response: Response = await original_route_handler(request)
+                failed = response.status_code >= 400
+                return response
+            finally:
+                record_request(
+                    self.path,
+                    time.monotonic() - start,
+                    self._content_length(request),
+                    failed,
+                )
+
+        return measured_route_handler
+
+
+class _UUIDValidationRoute(_MeasuredRoute):
     @staticmethod
     def _mismatch_header_vs_url_uuid_response(request: Request) -> JSONResponse | None:
         return (
@@ -40,4 +71,5 @@ class _UUIDValidationRoute(APIRoute):
 
 
 AGENT_RECEIVER_APP = FastAPI(title="Checkmk Agent Receiver")
+AGENT_RECEIVER_APP.router.route_class = _MeasuredRoute
 UUID_VALIDATION_ROUTER = APIRouter(route_class=_UUIDValidationRoute)
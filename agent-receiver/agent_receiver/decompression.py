@@ -3,8 +3,9 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from collections.abc import Iterator
 from enum import Enum
-from zlib import decompress
+from zlib import decompress, decompressobj
 from zlib import error as zlibError
 
 
@@ -23,6 +24,16 @@ class Decompressor(Enum):
         """
         return {Decompressor.ZLIB: Decompressor._zlib_decompress}[self](data)
 
+    def incremental(self, max_length: int) -> "IncrementalDecompressor":
+        """
+        >>> from zlib import compress
+        >>> decompressor = Decompressor("zlib").incremental(4)
+        >>> list(decompressor.decompress(compress(b"blablub")))
+        [b'blab', b'lub']
+        >>> decompressor.finish()
+        """
+        return {Decompressor.ZLIB: IncrementalDecompressor}[self](max_length)
+
     @staticmethod
     def _zlib_decompress(data: bytes) -> bytes:
         """
@@ -38,3 +49,47 @@ class Decompressor(Enum):
             return decompress(data)
         except zlibError as e:
             raise DecompressionError(f"Decompression with zlib failed: {e}") from e
+
+
+class IncrementalDecompressor:
+    """Decompress data passed in chunks, giving at most max_length bytes at once"""
+
+    def __init__(self, max_length: int) -> None:
+        self._decompressobj = decompressobj()
+        self._max_length = max_length
+
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        """
+        >>> from zlib import compress
+        >>> list(IncrementalDecompressor(4).decompress(b"blablub"))
+        Traceback (most recent call last):
+            ...
+        agent_receiver.decompression.DecompressionError: ...
+        """
+        try:
+            while True:
+                chunk = self._decompressobj.decompress(data, self._max_length)
+                data = self._decompressobj.unconsumed_tail
+                if chunk:
+                    yield chunk
+                # A chunk of the full size may be followed by output pending in zlib
+                if not data and len(chunk) < self._max_length:
+                    return
+        except zlibError as e:
+            raise DecompressionError(f"Decompression with zlib failed: {e}") from e
+
+    def finish(self) -> None:
+        """
+        >>> from zlib import compress
+        >>> decompressor = IncrementalDecompressor(4)
+        >>> list(decompressor.decompress(compress(b"blablub")[:-2]))
+        [b'blab', b'lub']
+        >>> decompressor.finish()
+        Traceback (most recent call last):
+            ...
+        agent_receiver.decompression.DecompressionError: ...
+        """
+        if not self._decompressobj.eof:
+            raise DecompressionError(
+                "Decompression with zlib failed: incomplete or truncated stream"
+            )
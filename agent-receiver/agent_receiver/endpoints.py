@@ -3,10 +3,10 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import functools
 import json
 import os
 import tempfile
-from contextlib import suppress
 from pathlib import Path
 from uuid import UUID
 
@@ -20,7 +20,7 @@ from agent_receiver.checkmk_rest_api import (
     parse_error_response_body,
     post_csr,
 )
-from agent_receiver.decompression import DecompressionError, Decompressor
+from agent_receiver.decompression import DecompressionError, Decompressor, IncrementalDecompressor
 from agent_receiver.log import logger
 from agent_receiver.models import (
     HostTypeEnum,
@@ -32,13 +32,24 @@ from agent_receiver.models import (
     RegistrationWithLabelsBody,
 )
 from agent_receiver.site_context import r4r_dir, site_name
-from agent_receiver.utils import get_registration_status_from_file, Host, uuid_from_pem_csr
+from agent_receiver.utils import (
+    DirectoryChangeCache,
+    get_registration_status_from_file,
+    Host,
+    registered_host,
+    uuid_from_pem_csr,
+)
 from fastapi import Depends, File, Header, HTTPException, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from starlette.status import HTTP_204_NO_CONTENT, HTTP_403_FORBIDDEN, HTTP_501_NOT_IMPLEMENTED
 
 security = HTTPBasic()
 
+# Size of the chunks of the uploaded agent data read at once and the decompressed data written at
+# once. This bounds the memory needed per upload.
+_AGENT_DATA_CHUNK_SIZE = 1024 * 1024
+
 
 @AGENT_RECEIVER_APP.post("/pairing", response_model=PairingResponse)
 async def pairing(
@@ -180,28 +191,66 @@ async def register_with_labels(
     return Response(status_code=HTTP_204_NO_CONTENT)
 
 
-def _store_agent_data(
+class _AgentOutputWriter:
+    """Decompress the agent data chunk by chunk into a temporary file and move it into place
+
+    The methods are blocking and meant to be run in the thread pool.
+    """
+
+    def __init__(self, target_dir: Path, decompressor: IncrementalDecompressor) -> None:
+        target_dir.resolve().mkdir(parents=True, exist_ok=True)
+        self._target_dir = target_dir
+        self._decompressor = decompressor
+        self._temp_file = tempfile.NamedTemporaryFile(  # pylint: disable=consider-using-with
+            dir=target_dir,
+            delete=False,
+        )
+
+    def write(self, compressed_data: bytes) -> None:
+        for decompressed_data in self._decompressor.decompress(compressed_data):
+            self._temp_file.write(decompressed_data)
+
+    def commit(self) -> None:
+        self._decompressor.finish()
+        self._temp_file.close()
+        os.rename(self._temp_file.name, self._target_dir / "agent_output")
+
+    def cleanup(self) -> None:
+        self._temp_file.close()
+        Path(self._temp_file.name).unlink(missing_ok=True)
+
+
+async def _store_agent_data(
     target_dir: Path,
-    decompressed_data: bytes,
+    decompressor: Decompressor,
+    monitoring_data: UploadFile,
 ) -> None:
-    target_dir.resolve().mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile(
-        dir=target_dir,
-        delete=False,
-    ) as temp_file:
-        try:
-            temp_file.write(decompressed_data)
-            os.rename(temp_file.name, target_dir / "agent_output")
-        finally:
-            Path(temp_file.name).unlink(missing_ok=True)
+    writer = await run_in_threadpool(
+        _AgentOutputWriter,
+        target_dir,
+        decompressor.incremental(_AGENT_DATA_CHUNK_SIZE),
+    )
+    try:
+        while compressed_data := await monitoring_data.read(_AGENT_DATA_CHUNK_SIZE):
+            await run_in_threadpool(writer.write, compressed_data)
+        await run_in_threadpool(writer.commit)
+    finally:
+        await run_in_threadpool(writer.cleanup)
+
+
+@functools.lru_cache
+def _missing_ready_files() -> DirectoryChangeCache[bool]:
+    return DirectoryChangeCache(r4r_dir() / RegistrationStatusEnum.READY.name)
 
 
 def _move_ready_file(uuid: UUID) -> None:
     (dir_discoverable := r4r_dir() / RegistrationStatusEnum.DISCOVERABLE.name).mkdir(exist_ok=True)
-    with suppress(FileNotFoundError):
+    try:
         (r4r_dir() / RegistrationStatusEnum.READY.name / f"{uuid}.json").rename(
             dir_discoverable / f"{uuid}.json"
         )
+    except FileNotFoundError:
+        _missing_ready_files().set(str(uuid), True)
 
 
 @UUID_VALIDATION_ROUTER.post(
@@ -214,7 +263,7 @@ async def agent_data(
     compression: str = Header(...),
     monitoring_data: UploadFile = File(...),
 ) -> Response:
-    host = Host(uuid)
+    host = registered_host(uuid)
     if not host.registered:
         logger.error(
             "uuid=%s Host is not registered",
@@ -248,7 +297,11 @@ async def agent_data(
         )
 
     try:
-        decompressed_agent_data = decompressor(monitoring_data.file.read())
+        await _store_agent_data(
+            host.source_path,
+            decompressor,
+            monitoring_data,
+        )
     except DecompressionError as e:
         logger.error(
             "uuid=%s Decompression of agent data failed: %s",
@@ -260,12 +313,8 @@ async def agent_data(
             detail="Decompression of agent data failed",
         ) from e
 
-    _store_agent_data(
-        host.source_path,
-        decompressed_agent_data,
-    )
-
-    _move_ready_file(uuid)
+    if not _missing_ready_files().get(str(uuid)):
+        await run_in_threadpool(_move_ready_file, uuid)
 
     logger.info(
         "uuid=%s Agent data saved",
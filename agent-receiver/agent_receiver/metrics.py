@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Latency and throughput of the endpoints
+
+The metrics are collected per worker process and regularly summarized in the log.
+"""
+
+import time
+from dataclasses import dataclass
+
+from agent_receiver.log import logger
+
+REPORT_INTERVAL = 300.0
+
+
+@dataclass
+class EndpointMetrics:
+    requests: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    bytes_received: int = 0
+
+    def summary(self, interval: float) -> str:
+        """
+        >>> EndpointMetrics(30, 1, 15.0, 1.5, 30 * 2**20).summary(60.0)
+        '30 requests (1 failed, 0.5/s), 500.0 ms avg, 1500.0 ms max, 30.0 MiB received (2.0 MiB/s per request)'
+        """
+        return (
+            f"{self.requests} requests ({self.failed} failed, {self.requests / interval:.1f}/s), "
+            f"{self.seconds / self.requests * 1000:.1f} ms avg, "
+            f"{self.max_seconds * 1000:.1f} ms max, "
+            f"{self.bytes_received / 2**20:.1f} MiB received "
+            f"({self.bytes_received / 2**20 / self.seconds if self.seconds else 0.0:.1f} MiB/s "
+            "per request)"
+        )
+
+
+_METRICS: dict[str, EndpointMetrics] = {}
+_interval_start: float | None = None
+
+
+def record_request(endpoint: str, seconds: float, bytes_received: int, failed: bool) -> None:
+    global _interval_start
+
+    metrics = _METRICS.setdefault(endpoint, EndpointMetrics())
+    metrics.requests += 1
+    metrics.failed += failed
+    metrics.seconds += seconds
+    metrics.max_seconds = max(metrics.max_seconds, seconds)
+    metrics.bytes_received += bytes_received
+
+    now = time.monotonic()
+    if _interval_start is None:
+        _interval_start = now
+    elif (interval := now - _interval_start) >= REPORT_INTERVAL:
+        for name, endpoint_metrics in sorted(_METRICS.items()):
+            logger.info("Metrics of %s: %s", name, endpoint_metrics.summary(interval))
+        _METRICS.clear()
+        _interval_start = now
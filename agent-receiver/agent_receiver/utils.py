@@ -3,9 +3,12 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import functools
 import json
 import os
+import time
 from pathlib import Path
+from typing import Generic, TypeVar
 from uuid import UUID
 
 from agent_receiver.models import HostTypeEnum, RegistrationData, RegistrationStatusEnum
@@ -13,6 +16,13 @@ from agent_receiver.site_context import agent_output_dir, r4r_dir
 from cryptography.x509 import load_pem_x509_csr
 from cryptography.x509.oid import NameOID
 
+_T = TypeVar("_T")
+
+# Seconds between checking the directories for changes
+_POLL_INTERVAL = 1.0
+# Changes within this many seconds may not have changed the modification time yet
+_RACY_SECONDS = 2.0
+
 
 class Host:
     def __init__(self, uuid: UUID) -> None:
@@ -54,6 +64,63 @@ class Host:
         return self._host_type
 
 
+class DirectoryChangeCache(Generic[_T]):
+    """Cache values derived from the entries of a directory
+
+    All values are dropped when the modification time of the directory changes, which is
+    checked at most once per poll interval. As long as the directory has been modified
+    recently, nothing is cached, so changes within the granularity of the modification time
+    are not missed.
+    """
+
+    def __init__(self, path: Path, poll_interval: float = _POLL_INTERVAL) -> None:
+        self._path = path
+        self._poll_interval = poll_interval
+        self._values: dict[str, _T] = {}
+        self._mtime_ns: int | None = None
+        self._next_poll = 0.0
+        self._cacheable = False
+
+    def get(self, key: str) -> _T | None:
+        self._poll()
+        return self._values.get(key)
+
+    def set(self, key: str, value: _T) -> None:
+        if self._cacheable:
+            self._values[key] = value
+
+    def _poll(self) -> None:
+        if (now := time.monotonic()) < self._next_poll:
+            return
+        self._next_poll = now + self._poll_interval
+
+        try:
+            mtime_ns = self._path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+
+        if mtime_ns != self._mtime_ns:
+            self._values.clear()
+            self._mtime_ns = mtime_ns
+        self._cacheable = (
+            mtime_ns is not None and time.time_ns() - mtime_ns > _RACY_SECONDS * 1_000_000_000
+        )
+
+
+@functools.lru_cache
+def _registered_hosts() -> DirectoryChangeCache[Host]:
+    return DirectoryChangeCache(agent_output_dir())
+
+
+def registered_host(uuid: UUID) -> Host:
+    """Same as Host(uuid), but registered hosts are cached until a registration changes"""
+    if (host := _registered_hosts().get(str(uuid))) is not None:
+        return host
+    if (host := Host(uuid)).registered:
+        _registered_hosts().set(str(uuid), host)
+    return host
+
+
 def read_rejection_notice_from_file(path: Path) -> str | None:
     try:
         registration_request = json.loads(path.read_text())
@@ -3,6 +3,7 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import marshal
 from ast import literal_eval
 from contextlib import contextmanager
 from pathlib import Path
@@ -33,7 +34,9 @@ from cmk.utils.type_defs import CheckPluginName, HostName, Item, ServiceID
 
 _PluginName = str
 _UserKey = str
-_ValueStoreKey = Tuple[HostName, _PluginName, Item, _UserKey]
+# The values of one service are stored in one name space
+_NamespaceKey = Tuple[HostName, _PluginName, Item]
+_Namespace = Mapping[_UserKey, Any]
 
 _TKey = TypeVar("_TKey", bound=Hashable)
 _TValue = TypeVar("_TValue")
@@ -69,11 +72,55 @@ class _DynamicDiskSyncedMapping(Dict[_TKey, _TValue]):
         return super().pop(key, *args)
 
 
-class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
+# Version header of the value store files. Files without it are in the
+# legacy format: the repr() of a dict {(host, plugin, item, user key): value}.
+_FILE_MAGIC: Final = b"CMKVS"
+_FILE_HEADER: Final = _FILE_MAGIC + b"\x01"
+# Marshal can not handle all values repr() and literal_eval() can, e.g. str subclasses
+_NAMESPACE_MARSHAL: Final = b"m"
+_NAMESPACE_REPR: Final = b"r"
+
+
+def _serialize_namespace(namespace: _Namespace) -> bytes:
+    try:
+        return _NAMESPACE_MARSHAL + marshal.dumps(dict(namespace))
+    except ValueError:
+        return _NAMESPACE_REPR + repr(dict(namespace)).encode("utf-8")
+
+
+def _deserialize_namespace(raw: bytes) -> _Namespace:
+    if raw[:1] == _NAMESPACE_MARSHAL:
+        return marshal.loads(raw[1:])
+    if raw[:1] == _NAMESPACE_REPR:
+        return literal_eval(raw[1:].decode("utf-8"))
+    raise ValueError(f"Unknown value store name space encoding: {raw[:1]!r}")
+
+
+def _serialize(namespaces: Mapping[_NamespaceKey, bytes]) -> bytes:
+    return _FILE_HEADER + marshal.dumps(dict(namespaces))
+
+
+def _deserialize(raw: bytes) -> Mapping[_NamespaceKey, bytes]:
+    """Split the file content into the (still serialized) name spaces"""
+    if raw.startswith(_FILE_HEADER):
+        return marshal.loads(raw[len(_FILE_HEADER) :])
+    if raw.startswith(_FILE_MAGIC):
+        raise ValueError(f"Unknown value store version: {raw[len(_FILE_MAGIC)]}")
+
+    namespaces: Dict[_NamespaceKey, Dict[_UserKey, Any]] = {}
+    for (host_name, plugin_name, item, user_key), value in literal_eval(
+        raw.decode("utf-8") or "{}"
+    ).items():
+        namespaces.setdefault((host_name, plugin_name, item), {})[user_key] = value
+    return {key: _serialize_namespace(namespace) for key, namespace in namespaces.items()}
+
+
+class _StaticDiskSyncedMapping(Mapping[_NamespaceKey, _Namespace]):
     """Represents the values stored on disk
 
-    This class provides a Mapping-interface for the values stored
-    on disk.
+    This class provides a Mapping-interface for the name spaces stored
+    on disk. A name space is only deserialized when it is accessed, and
+    only the changed name spaces are serialized when writing.
 
     The only way to modify the values is the disksync method.
     """
@@ -83,31 +130,36 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
         *,
         path: Path,
         log_debug: Callable[[str], None],
-        serializer: Callable[[Mapping[_TKey, _TValue]], str],
-        deserializer: Callable[[str], Mapping[_TKey, _TValue]],
     ) -> None:
         self._path: Final = path
         self._last_sync: Optional[float] = None
-        self._data: Mapping[_TKey, _TValue] = {}
+        self._raw: Mapping[_NamespaceKey, bytes] = {}
+        self._data: Dict[_NamespaceKey, _Namespace] = {}
         self._log_debug = log_debug
-        self._serializer: Final = serializer
-        self._deserializer: Final = deserializer
         self.disksync()
 
-    def __getitem__(self, key: _TKey) -> _TValue:
-        return self._data.__getitem__(key)
+    def __getitem__(self, key: _NamespaceKey) -> _Namespace:
+        try:
+            return self._data[key]
+        except KeyError:
+            pass
+        namespace = self._data[key] = _deserialize_namespace(self._raw[key])
+        return namespace
 
-    def __iter__(self) -> Iterator[_TKey]:
-        return self._data.__iter__()
+    def __iter__(self) -> Iterator[_NamespaceKey]:
+        return self._raw.__iter__()
 
     def __len__(self) -> int:
-        return len(self._data)
+        return len(self._raw)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._raw
 
     def disksync(
         self,
         *,
-        removed: Container[_TKey] = (),
-        updated: Iterable[Tuple[_TKey, _TValue]] = (),
+        removed: Container[_NamespaceKey] = (),
+        updated: Iterable[Tuple[_NamespaceKey, _Namespace]] = (),
     ) -> None:
         """Re-load and write the changes of the stored values
 
@@ -128,15 +180,19 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
                 self._log_debug("already loaded")
             else:
                 self._log_debug("loading from disk")
-                self._data = self._deserializer(
-                    store.load_text_from_file(self._path, default="{}", lock=False)
-                )
+                self._raw = _deserialize(store.load_bytes_from_file(self._path, lock=False))
+                self._data = {}
 
+            updated = list(updated)
             if removed or updated:
+                raw = {k: v for k, v in self._raw.items() if k not in removed}
                 data = {k: v for k, v in self._data.items() if k not in removed}
-                data.update(updated)
+                for key, namespace in updated:
+                    raw[key] = _serialize_namespace(namespace)
+                    data[key] = dict(namespace)
                 self._log_debug("writing to disk")
-                store.save_text_to_file(self._path, self._serializer(data))
+                store.save_bytes_to_file(self._path, _serialize(raw))
+                self._raw = raw
                 self._data = data
 
             self._last_sync = self._path.stat().st_mtime
@@ -146,7 +202,9 @@ class _StaticDiskSyncedMapping(Mapping[_TKey, _TValue]):
             store.release_lock(self._path)
 
 
-class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too-many-ancestors
+class _DiskSyncedMapping(
+    MutableMapping[_NamespaceKey, _Namespace]
+):  # pylint: disable=too-many-ancestors
     """Implements the overlay logic between dynamic and static value store"""
 
     @classmethod
@@ -155,36 +213,29 @@ class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too
         *,
         path: Path,
         log_debug: Callable[[str], None],
-        serializer: Callable[[Mapping[_TKey, _TValue]], str],
-        deserializer: Callable[[str], Mapping[_TKey, _TValue]],
     ) -> "_DiskSyncedMapping":
         return cls(
             dynamic=_DynamicDiskSyncedMapping(),
-            static=_StaticDiskSyncedMapping(
-                path=path,
-                log_debug=log_debug,
-                serializer=serializer,
-                deserializer=deserializer,
-            ),
+            static=_StaticDiskSyncedMapping(path=path, log_debug=log_debug),
         )
 
     def __init__(
         self,
         *,
-        dynamic: _DynamicDiskSyncedMapping[_TKey, _TValue],
-        static: _StaticDiskSyncedMapping[_TKey, _TValue],
+        dynamic: _DynamicDiskSyncedMapping[_NamespaceKey, _Namespace],
+        static: _StaticDiskSyncedMapping,
     ) -> None:
         self._dynamic = dynamic
         self.static = static
 
-    def _keys(self) -> Set[_TKey]:
+    def _keys(self) -> Set[_NamespaceKey]:
         return {
             k
             for k in (set(self._dynamic) | set(self.static))
             if k not in self._dynamic.removed_keys
         }
 
-    def __getitem__(self, key: _TKey) -> _TValue:
+    def __getitem__(self, key: _NamespaceKey) -> _Namespace:
         if key in self._dynamic.removed_keys:
             raise KeyError(key)
         try:
@@ -192,7 +243,7 @@ class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too
         except KeyError:
             return self.static.__getitem__(key)
 
-    def __delitem__(self, key: _TKey) -> None:
+    def __delitem__(self, key: _NamespaceKey) -> None:
         if key in self._dynamic.removed_keys:
             raise KeyError(key)
         try:
@@ -201,17 +252,19 @@ class _DiskSyncedMapping(MutableMapping[_TKey, _TValue]):  # pylint: disable=too
         except KeyError:
             _ = self.static[key]
 
-    def pop(self, key: _TKey, *args: Union[_TValue, _TDefault]) -> Union[_TValue, _TDefault]:
+    def pop(
+        self, key: _NamespaceKey, *args: Union[_Namespace, _TDefault]
+    ) -> Union[_Namespace, _TDefault]:
         try:
             return self._dynamic.pop(key)
             # key is now marked as removed.
         except KeyError:
             return self.static[key] if key in self.static else args[0]
 
-    def __setitem__(self, key: _TKey, value: _TValue) -> None:
+    def __setitem__(self, key: _NamespaceKey, value: _Namespace) -> None:
         self._dynamic.__setitem__(key, value)
 
-    def __iter__(self) -> Iterator[_TKey]:
+    def __iter__(self) -> Iterator[_NamespaceKey]:
         return iter(self._keys())
 
     def __len__(self) -> int:
@@ -229,43 +282,61 @@ class _ValueStore(MutableMapping[_UserKey, Any]):  # pylint: disable=too-many-an
     """Implements the mutable mapping that is exposed to the plugins
 
     This class ensures that every service has its own name space in the
-    persisted values, by adding the service ID (check plugin name and item) to
-    the user supplied keys.
+    persisted values, identified by the host name and the service ID
+    (check plugin name and item).
     """
 
     def __init__(
         self,
         *,
-        data: MutableMapping[_ValueStoreKey, Any],
+        data: MutableMapping[_NamespaceKey, _Namespace],
         service_id: Tuple[CheckPluginName, Item],
         host_name: HostName,
     ) -> None:
-        self._prefix = (host_name, str(service_id[0]), service_id[1])
+        item = service_id[1]
+        # Make sure to use plain strings, they end up in the serialized keys
+        self._key = (str(host_name), str(service_id[0]), None if item is None else str(item))
         self._data = data
+        # Our copy of the name space, the stored one must not be changed in place
+        self._namespace: Optional[Dict[_UserKey, Any]] = None
+
+    def _get_namespace(self) -> _Namespace:
+        return self._data.get(self._key, {})
+
+    def _get_mutable_namespace(self) -> Dict[_UserKey, Any]:
+        if self._namespace is None or self._data.get(self._key) is not self._namespace:
+            self._namespace = dict(self._get_namespace())
+            self._data[self._key] = self._namespace
+        return self._namespace
 
-    def _map_key(self, user_key: _UserKey) -> _ValueStoreKey:
+    @staticmethod
+    def _check_key(user_key: _UserKey) -> None:
         if not isinstance(user_key, _UserKey):
             raise TypeError(f"value store key must be {_UserKey}")
-        return (self._prefix[0], self._prefix[1], self._prefix[2], user_key)
 
     def __getitem__(self, key: _UserKey) -> Any:
-        return self._data.__getitem__(self._map_key(key))
+        self._check_key(key)
+        return self._get_namespace()[key]
 
-    def __setitem__(self, key: _UserKey, value: Any) -> Any:
-        return self._data.__setitem__(self._map_key(key), value)
+    def __setitem__(self, key: _UserKey, value: Any) -> None:
+        self._check_key(key)
+        self._get_mutable_namespace()[key] = value
 
-    def __delitem__(self, key: _UserKey) -> Any:
-        return self._data.__delitem__(self._map_key(key))
+    def __delitem__(self, key: _UserKey) -> None:
+        self._check_key(key)
+        if key not in self._get_namespace():
+            raise KeyError(key)
+        namespace = self._get_mutable_namespace()
+        del namespace[key]
+        if not namespace:
+            del self._data[self._key]
+            self._namespace = None
 
     def __iter__(self) -> Iterator[_UserKey]:
-        return (
-            user_key
-            for (host_name, check_name, item, user_key) in self._data
-            if (host_name, check_name, item) == self._prefix
-        )
+        return iter(list(self._get_namespace()))
 
     def __len__(self) -> int:
-        return sum(1 for _ in self)
+        return len(self._get_namespace())
 
 
 class ValueStoreManager:
@@ -284,11 +355,9 @@ class ValueStoreManager:
     STORAGE_PATH = Path(cmk.utils.paths.counters_dir)
 
     def __init__(self, host_name: HostName) -> None:
-        self._value_store: _DiskSyncedMapping[_ValueStoreKey, Any] = _DiskSyncedMapping.make(
+        self._value_store = _DiskSyncedMapping.make(
             path=self.STORAGE_PATH / str(host_name),
             log_debug=lambda x: logger.debug("value store: %s", x),
-            serializer=repr,
-            deserializer=literal_eval,
         )
         self.active_service_interface: Optional[_ValueStore] = None
         self._host_name = host_name
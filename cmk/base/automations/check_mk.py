@@ -26,6 +26,7 @@ import cmk.utils.debug
 import cmk.utils.log as log
 import cmk.utils.man_pages as man_pages
 import cmk.utils.password_store
+import cmk.utils.piggyback as piggyback
 from cmk.utils.diagnostics import deserialize_cl_parameters, DiagnosticsCLParameters
 from cmk.utils.encoding import ensure_str_with_fallback
 from cmk.utils.exceptions import MKBailOut, MKGeneralException, MKSNMPError, OnError
@@ -470,15 +471,12 @@ class AutomationRenameHosts(Automation):
             if self._rename_host_file(tmp_dir + "/" + d + "/", oldname, newname):
                 actions.append(d)
 
-        if self._rename_host_dir(tmp_dir + "/piggyback/", oldname, newname):
+        if piggyback.rename_piggybacked_host(HostName(oldname), HostName(newname)):
             actions.append("piggyback-load")
 
         # Rename piggy files *created* by the host
-        piggybase = tmp_dir + "/piggyback/"
-        if os.path.exists(piggybase):
-            for piggydir in os.listdir(piggybase):
-                if self._rename_host_file(piggybase + piggydir, oldname, newname):
-                    actions.append("piggyback-pig")
+        if self._rename_host_file(tmp_dir + "/piggyback/", oldname, newname):
+            actions.append("piggyback-pig")
 
         # Logwatch
         if self._rename_host_dir(logwatch_dir, oldname, newname):
@@ -930,16 +928,13 @@ class ABCDeleteHosts:
                 self._delete_if_exists(f"{folder}/{hostname}")
 
     def _delete_logwatch_and_piggyback_dirs(self, hostname: HostName) -> None:
-        # logwatch and piggyback folders
-        for what_dir in [
-            f"{logwatch_dir}/{hostname}",
-            f"{tmp_dir}/piggyback/{hostname}",
-        ]:
-            try:
-                shutil.rmtree(what_dir)
-            except OSError as e:
-                if e.errno != errno.ENOENT:
-                    raise
+        # logwatch folder and piggyback data
+        try:
+            shutil.rmtree(f"{logwatch_dir}/{hostname}")
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+        piggyback.remove_piggybacked_host_data(hostname)
 
     def _delete_if_exists(self, path: str) -> None:
         """Delete the given file or folder in case it exists"""
@@ -12,6 +12,7 @@ import ipaddress
 import itertools
 import logging
 import marshal
+import mmap
 import numbers
 import os
 import pickle
@@ -20,6 +21,8 @@ import socket
 import struct
 import sys
 import types
+from array import array
+from bisect import bisect_left
 from collections import Counter, OrderedDict
 from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
 from dataclasses import dataclass
@@ -1027,8 +1030,101 @@ class PackedConfigGenerator:
         return helper_config
 
 
+_PACKED_CONFIG_MAGIC: Final = 0x434D4B5041434B31
+# magic, offset of the index of the host records, number of hosts
+_PACKED_CONFIG_HEADER: Final = struct.Struct("=QQQ")
+
+
+class _PackedHostRecords:
+    """The per host part of the packed configuration, unpickled host by host
+
+    The records are sorted by the host names. The offsets of the records and the
+    variables found in them are arrays in the memory mapped file."""
+
+    def __init__(
+        self,
+        data: mmap.mmap,
+        host_names: Sequence[HostName],
+        offsets: Sequence[int],
+        variables: Sequence[int],
+    ) -> None:
+        self.host_names: Final = host_names
+        self.variables: Final = variables
+        self._data = data
+        self._offsets = offsets
+        self._records: dict[HostName, Mapping[str, Any]] = {}
+
+    def _position(self, host_name: object) -> int | None:
+        if not isinstance(host_name, str):
+            return None
+        position = bisect_left(self.host_names, host_name)
+        if position < len(self.host_names) and self.host_names[position] == host_name:
+            return position
+        return None
+
+    def variables_of(self, host_name: object) -> int:
+        return 0 if (position := self._position(host_name)) is None else self.variables[position]
+
+    def record(self, host_name: HostName) -> Mapping[str, Any]:
+        try:
+            return self._records[host_name]
+        except KeyError:
+            pass
+        position = self._position(host_name)
+        assert position is not None
+        record = self._records[host_name] = pickle.loads(  # nosec B301 # BNS:c3c5e9
+            self._data[self._offsets[position] : self._offsets[position + 1]]
+        )
+        return record
+
+
+class _PackedHostVariable(Mapping[HostName, Any]):
+    """A configuration variable mapping the host names to their settings"""
+
+    def __init__(self, records: _PackedHostRecords, varname: str, bit: int) -> None:
+        self._records = records
+        self._varname = varname
+        self._bit = bit
+
+    def __getitem__(self, host_name: HostName) -> Any:
+        if not self._records.variables_of(host_name) & self._bit:
+            raise KeyError(host_name)
+        return self._records.record(host_name)[self._varname]
+
+    def __contains__(self, host_name: object) -> bool:
+        return bool(self._records.variables_of(host_name) & self._bit)
+
+    def __iter__(self) -> Iterator[HostName]:
+        return itertools.compress(
+            self._records.host_names, (v & self._bit for v in self._records.variables)
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _host_name in self)
+
+
 class PackedConfigStore:
-    """Caring about persistence of the packed configuration"""
+    """Caring about persistence of the packed configuration
+
+    The settings of the hosts are stored per host behind the other variables and are
+    only unpickled for the hosts actually looked up. This way a helper handling some
+    of the hosts does not need to load the attributes of all the hosts.
+
+    File layout: header, pickled global variables, one pickled record per host and
+    the pickled index of the host records."""
+
+    # These variables only map the host names to settings of the very host
+    _host_variable_names: Final = (
+        "host_attributes",
+        "ipaddresses",
+        "ipv6addresses",
+        "additional_ipv4addresses",
+        "additional_ipv6addresses",
+        "explicit_snmp_communities",
+        "management_protocol",
+        "management_snmp_credentials",
+        "management_ipmi_credentials",
+    )
 
     def __init__(self, path: Path) -> None:
         self.path: Final = path
@@ -1042,15 +1138,68 @@ class PackedConfigStore:
         return Path(config_path) / "precompiled_check_config.mk"
 
     def write(self, helper_config: Mapping[str, Any]) -> None:
+        host_variable_names = [n for n in self._host_variable_names if n in helper_config]
+        global_variables = {
+            varname: value
+            for varname, value in helper_config.items()
+            if varname not in host_variable_names
+        }
+        records: dict[HostName, dict[str, Any]] = {}
+        for varname in host_variable_names:
+            for host_name, value in helper_config[varname].items():
+                records.setdefault(host_name, {})[varname] = value
+        host_names = sorted(records)
+
         self.path.parent.mkdir(parents=True, exist_ok=True)
         tmp_path = self.path.with_suffix(self.path.suffix + ".compiled")
         with tmp_path.open("wb") as compiled_file:
-            pickle.dump(helper_config, compiled_file)
+            compiled_file.write(bytes(_PACKED_CONFIG_HEADER.size))
+            pickle.dump(global_variables, compiled_file)
+            offsets = array("Q")
+            variables = array("H")
+            for host_name in host_names:
+                offsets.append(compiled_file.tell())
+                pickle.dump(record := records[host_name], compiled_file)
+                variables.append(
+                    sum(1 << nr for nr, n in enumerate(host_variable_names) if n in record)
+                )
+            offsets.append(compiled_file.tell())
+            # Align the arrays to their items
+            compiled_file.write(bytes(-compiled_file.tell() % offsets.itemsize))
+            index_offset = compiled_file.tell()
+            compiled_file.write(offsets.tobytes())
+            compiled_file.write(variables.tobytes())
+            pickle.dump((host_variable_names, host_names), compiled_file)
+            compiled_file.seek(0)
+            compiled_file.write(
+                _PACKED_CONFIG_HEADER.pack(_PACKED_CONFIG_MAGIC, index_offset, len(host_names))
+            )
         tmp_path.rename(self.path)
 
     def read(self) -> Mapping[str, Any]:
         with self.path.open("rb") as f:
-            return pickle.load(f)  # nosec B301 # BNS:c3c5e9
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, num_hosts = _PACKED_CONFIG_HEADER.unpack_from(data)
+        if magic != _PACKED_CONFIG_MAGIC:
+            raise MKGeneralException(f"Invalid packed configuration: {self.path}")
+
+        view = memoryview(data)
+        offsets_end = index_offset + (num_hosts + 1) * array("Q").itemsize
+        variables_end = offsets_end + num_hosts * array("H").itemsize
+        offsets = view[index_offset:offsets_end].cast("Q")
+        # The global variables end where the first host record starts
+        helper_config = pickle.loads(  # nosec B301 # BNS:c3c5e9
+            data[_PACKED_CONFIG_HEADER.size : offsets[0]]
+        )
+        host_variable_names, host_names = pickle.loads(  # nosec B301 # BNS:c3c5e9
+            data[variables_end:]
+        )
+        records = _PackedHostRecords(
+            data, host_names, offsets, view[offsets_end:variables_end].cast("H")
+        )
+        for nr, varname in enumerate(host_variable_names):
+            helper_config[varname] = _PackedHostVariable(records, varname, 1 << nr)
+        return helper_config
 
 
 @contextlib.contextmanager
@@ -3724,6 +3873,8 @@ class ConfigCache:
                 return SNMPBackendEnum.INLINE
             if host_backend == "classic":
                 return SNMPBackendEnum.CLASSIC
+            if host_backend == "native":
+                return SNMPBackendEnum.NATIVE
             raise MKGeneralException("Bad Host SNMP Backend configuration: %s" % host_backend)
 
         # TODO(sk): remove this when netsnmp is fixed
@@ -3734,6 +3885,9 @@ class ConfigCache:
         if with_inline_snmp and snmp_backend_default == "inline":
             return SNMPBackendEnum.INLINE
 
+        if snmp_backend_default == "native":
+            return SNMPBackendEnum.NATIVE
+
         return SNMPBackendEnum.CLASSIC
 
     def snmp_credentials_of_version(
@@ -198,6 +198,14 @@ def timeperiod_active(timeperiod: TimeperiodName) -> bool | None:
     return _config_cache.get("timeperiods_cache").get(timeperiod)
 
 
+def timeperiod_states() -> dict[TimeperiodName, bool]:
+    """Returns the activity of all time periods
+
+    Raises an exception like timeperiod_active."""
+    update_timeperiods_cache()
+    return dict(_config_cache.get("timeperiods_cache"))
+
+
 def update_timeperiods_cache() -> None:
     # { "last_update": 1498820128, "timeperiods": [{"24x7": True}] }
     # The value is store within the config cache since we need a fresh start on reload
@@ -81,7 +81,7 @@ http_proxies: dict[str, dict[str, str]] = {}
 # SNMP communities and encoding
 
 # Global config for SNMP Backend
-snmp_backend_default: Literal["inline", "classic"] = "inline"
+snmp_backend_default: Literal["inline", "classic", "native"] = "inline"
 # Deprecated: Replaced by snmp_backend_hosts
 use_inline_snmp: bool = True
 
@@ -24,6 +24,10 @@ notification_rules: list[EventRule] = []
 # Check every 10 seconds for ripe bulks
 notification_bulk_interval = 10
 notification_plugin_timeout = 60
+# Number of notification plugins called in parallel, 1 calls them one after another
+notification_plugin_workers = 1
+# Maximum number of parallel calls of single plugins
+notification_plugin_limits: list[tuple[str, int]] = []
 
 # Notification Spooling.
 
@@ -15,19 +15,25 @@
 #    => These already bear all information about the contact, the plugin
 #       to call and its parameters.
 
+import heapq
 import io
+import json
 import logging
 import os
 import re
 import subprocess
 import sys
+import threading
 import time
 import traceback
 import uuid
-from collections.abc import Mapping, Sequence
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, cast, Literal, overload, Union
+from typing import Any, cast, Literal, NamedTuple, overload, Union
 
 import cmk.utils.debug
 import cmk.utils.log as log
@@ -57,6 +63,7 @@ from cmk.utils.type_defs import (
     EventRule,
     NotificationContext,
     NotifyAnalysisInfo,
+    NotifyBulk,
     NotifyBulkParameters,
     NotifyBulks,
     NotifyPluginInfo,
@@ -119,6 +126,11 @@ notification_spooldir = cmk.utils.paths.var_dir + "/notify/spool"
 notification_bulkdir = cmk.utils.paths.var_dir + "/notify/bulk"
 notification_log = cmk.utils.paths.log_dir + "/notify.log"
 
+# Seconds between logging the statistics of the notification plugins
+_STATISTICS_INTERVAL = 300.0
+# Seconds after which the index of the bulks is rebuilt from the bulk directories
+_BULK_INDEX_MAX_AGE = 3600.0
+
 notification_log_template = (
     "$CONTACTNAME$ - $NOTIFICATIONTYPE$ - "
     "$HOSTNAME$ $HOSTSTATE$ - "
@@ -256,6 +268,8 @@ def do_notify(  # pylint: disable=too-many-branches
         else:
             notify_notify(raw_context_from_env(os.environ))
 
+        shutdown_dispatcher()
+
     except Exception:
         crash_dir = Path(cmk.utils.paths.var_dir) / "notify"
         if not crash_dir.exists():
@@ -394,6 +408,7 @@ def notify_keepalive() -> None:
         event_function=notify_notify,
         call_every_loop=send_ripe_bulks,
         loop_interval=config.notification_bulk_interval,
+        shutdown_function=shutdown_dispatcher,
     )
 
 
@@ -552,7 +567,7 @@ def _process_notifications(  # pylint: disable=too-many-branches
                     else rbn_split_plugin_context(plugin_context)
                 )
                 for context in plugin_contexts:
-                    call_notification_script(plugin_name, context)
+                    deliver_notification(plugin_name, context)
             else:
                 logger.info("No rule matched, would notify fallback contacts, but none configured")
     else:
@@ -603,7 +618,7 @@ def _process_notifications(  # pylint: disable=too-many-branches
                             NotificationViaPlugin({"context": context, "plugin": plugin_name}),
                         )
                     else:
-                        call_notification_script(plugin_name, context)
+                        deliver_notification(plugin_name, context)
 
             except Exception as e:
                 if cmk.utils.debug.enabled():
@@ -1296,10 +1311,17 @@ def call_notification_script(
         output_lines: list[str] = []
         assert p.stdout is not None
 
-        with Timeout(
-            config.notification_plugin_timeout,
-            message="Notification plugin timed out",
-        ) as timeout_guard:
+        # The alarm signal can only be handled in the main thread, the workers of the
+        # dispatcher kill the plugin from a timer thread instead.
+        timeout_guard: Timeout | _KillTimer = (
+            Timeout(
+                config.notification_plugin_timeout,
+                message="Notification plugin timed out",
+            )
+            if threading.current_thread() is threading.main_thread()
+            else _KillTimer(p, config.notification_plugin_timeout)
+        )
+        with timeout_guard:
             try:
                 while True:
                     # read and output stdout linewise to ensure we don't force python to produce
@@ -1312,12 +1334,14 @@ def call_notification_script(
                     if _log_to_stdout:
                         out.output(line)
             except MKTimeout:
-                plugin_log(
-                    "Notification plugin did not finish within %d seconds. Terminating."
-                    % config.notification_plugin_timeout
-                )
                 p.kill()
 
+        if timeout_guard.signaled:
+            plugin_log(
+                "Notification plugin did not finish within %d seconds. Terminating."
+                % config.notification_plugin_timeout
+            )
+
     if exitcode := 1 if timeout_guard.signaled else p.returncode:
         plugin_log("Plugin exited with code %d" % exitcode)
 
@@ -1336,6 +1360,197 @@ def call_notification_script(
     return exitcode
 
 
+class _KillTimer:
+    """Kill the plugin after the timeout, usable outside of the main thread"""
+
+    def __init__(self, process: subprocess.Popen, timeout: int) -> None:
+        self._process = process
+        self._timer = threading.Timer(timeout, self._kill)
+        self.signaled = False
+
+    def _kill(self) -> None:
+        self.signaled = True
+        self._process.kill()
+
+    def __enter__(self) -> "_KillTimer":
+        self._timer.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._timer.cancel()
+
+
+@dataclass
+class PluginStatistics:
+    calls: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def summary(self) -> str:
+        """
+        >>> PluginStatistics(4, 1, 2.0, 1.25).summary()
+        '4 calls (1 failed), 500.0 ms avg, 1250.0 ms max'
+        """
+        return (
+            f"{self.calls} calls ({self.failed} failed), "
+            f"{self.seconds / self.calls * 1000:.1f} ms avg, {self.max_seconds * 1000:.1f} ms max"
+        )
+
+
+@dataclass(eq=False)
+class _Delivery:
+    plugin_name: NotificationPluginNameStr
+    plugin_context: NotificationContext
+    contacts: Sequence[str]
+
+
+class NotificationDispatcher:
+    """Call the notification plugins in a pool of worker threads
+
+    The notifications of one contact are delivered one after another in the order they
+    have been dispatched, the ones of different contacts in parallel. A notification to
+    several contacts waits for the ones dispatched before to any of them. The number of
+    parallel calls of a plugin can be limited per plugin.
+    """
+
+    def __init__(self, workers: int, plugin_limits: Mapping[str, int]) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notify")
+        self._plugin_limits = plugin_limits
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # The notifications of every contact which are not delivered yet. The first one is
+        # in delivery, or waits for its other contacts or for a free slot of its plugin.
+        self._lanes: dict[str, deque[_Delivery]] = {}
+        # The notifications which may be delivered, but wait for a free slot of their plugin
+        self._waiting_for_slot: dict[NotificationPluginNameStr, deque[_Delivery]] = {}
+        self._running: Counter[NotificationPluginNameStr] = Counter()
+        self._statistics: dict[NotificationPluginNameStr, PluginStatistics] = {}
+        self._interval_start = time.monotonic()
+
+    def dispatch(
+        self, plugin_name: NotificationPluginNameStr, plugin_context: NotificationContext
+    ) -> None:
+        delivery = _Delivery(
+            plugin_name,
+            plugin_context,
+            # Notifications which are not split per contact go to "ding,dong"
+            list(dict.fromkeys(plugin_context.get("CONTACTNAME", "").split(","))),
+        )
+        with self._lock:
+            for contact in delivery.contacts:
+                self._lanes.setdefault(contact, deque()).append(delivery)
+            self._start_if_ready(delivery)
+
+    def wait(self) -> None:
+        """Wait until all dispatched notifications have been delivered"""
+        with self._idle:
+            self._idle.wait_for(lambda: not self._lanes)
+
+    def shutdown(self) -> None:
+        self.wait()
+        self._executor.shutdown()
+        self.log_statistics()
+
+    def log_statistics(self) -> None:
+        with self._lock:
+            statistics, self._statistics = self._statistics, {}
+            queued = len({id(d) for lane in self._lanes.values() for d in lane}) - sum(
+                self._running.values()
+            )
+            self._interval_start = time.monotonic()
+        for plugin_name, plugin_statistics in sorted(statistics.items()):
+            logger.info("Plugin %s: %s", plugin_name, plugin_statistics.summary())
+        if queued:
+            logger.info("%d notifications waiting for delivery", queued)
+
+    def _start_if_ready(self, delivery: _Delivery) -> None:
+        """Start the delivery once it is the next one of all its contacts (lock held)"""
+        if any(self._lanes[contact][0] is not delivery for contact in delivery.contacts):
+            return
+        limit = self._plugin_limits.get(delivery.plugin_name)
+        if limit is not None and self._running[delivery.plugin_name] >= limit:
+            self._waiting_for_slot.setdefault(delivery.plugin_name, deque()).append(delivery)
+            return
+        self._start(delivery)
+
+    def _start(self, delivery: _Delivery) -> None:
+        self._running[delivery.plugin_name] += 1
+        self._executor.submit(self._deliver, delivery)
+
+    def _deliver(self, delivery: _Delivery) -> None:
+        start = time.monotonic()
+        try:
+            exitcode = call_notification_script(delivery.plugin_name, delivery.plugin_context)
+        except Exception as e:
+            logger.exception("    ERROR:")
+            log_to_history(
+                notification_result_message(
+                    NotificationPluginName(delivery.plugin_name),
+                    delivery.plugin_context,
+                    NotificationResultCode(2),
+                    [str(e)],
+                )
+            )
+            exitcode = 2
+        self._record(delivery.plugin_name, time.monotonic() - start, exitcode != 0)
+        self._finish(delivery)
+
+    def _finish(self, delivery: _Delivery) -> None:
+        with self._lock:
+            self._running[delivery.plugin_name] -= 1
+            if waiting := self._waiting_for_slot.get(delivery.plugin_name):
+                self._start(waiting.popleft())
+
+            # Submitted after the ones of the other contacts, which have been waiting longer
+            for contact in delivery.contacts:
+                lane = self._lanes[contact]
+                lane.popleft()
+                if lane:
+                    self._start_if_ready(lane[0])
+                else:
+                    del self._lanes[contact]
+
+            if not self._lanes:
+                self._idle.notify_all()
+
+    def _record(self, plugin_name: NotificationPluginNameStr, seconds: float, failed: bool) -> None:
+        with self._lock:
+            statistics = self._statistics.setdefault(plugin_name, PluginStatistics())
+            statistics.calls += 1
+            statistics.failed += failed
+            statistics.seconds += seconds
+            statistics.max_seconds = max(statistics.max_seconds, seconds)
+            report = time.monotonic() - self._interval_start >= _STATISTICS_INTERVAL
+        if report:
+            self.log_statistics()
+
+
+_dispatcher: NotificationDispatcher | None = None
+
+
+def deliver_notification(
+    plugin_name: NotificationPluginNameStr, plugin_context: NotificationContext
+) -> None:
+    """Call the plugin right away or hand the notification over to the worker pool"""
+    global _dispatcher
+    if config.notification_plugin_workers <= 1:
+        call_notification_script(plugin_name, plugin_context)
+        return
+    if _dispatcher is None:
+        _dispatcher = NotificationDispatcher(
+            config.notification_plugin_workers, dict(config.notification_plugin_limits)
+        )
+    _dispatcher.dispatch(plugin_name, plugin_context)
+
+
+def shutdown_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.shutdown()
+        _dispatcher = None
+
+
 # Construct the environment for the notification script
 def notification_script_env(plugin_context: NotificationContext) -> PluginNotificationContext:
     # Use half of the maximum allowed string length MAX_ARG_STRLEN
@@ -1572,6 +1787,16 @@ def do_bulk_notify(  # pylint: disable=too-many-branches
     filename_new.rename(filename_final)  # We need an atomic creation!
     logger.info("        - stored in %s", filename_final)
 
+    try:
+        BulkIndex(Path(notification_bulkdir)).add(
+            (bulk_path[0], bulk_path[1], bulk_dir.name), filename_final.stat().st_mtime
+        )
+    except Exception:
+        if cmk.utils.debug.enabled():
+            raise
+        # The bulk is found again when the index is rebuilt
+        logger.exception("        - cannot add it to the bulk index:")
+
 
 def _create_bulk_dir(bulk_path: Sequence[str]) -> Path:
     bulk_dir = Path(
@@ -1640,96 +1865,313 @@ def remove_if_orphaned(bulk_dir: str, max_age: float, ref_time: float | None = N
             logger.info("    -> Error removing it: %s", e)
 
 
-def find_bulks(only_ripe: bool) -> NotifyBulks:  # pylint: disable=too-many-branches
+# contact, plugin and bulk directory, e.g. 60,10,host,localhost
+BulkKey = tuple[str, str, str]
+
+
+class BulkIndexEntry(NamedTuple):
+    num_notifications: int
+    oldest: float
+    # None: Ripe when the time period of the bulk ends
+    next_ripe: float | None
+
+
+def _bulk_index_entry(key: BulkKey, count: int, oldest: float) -> BulkIndexEntry | None:
+    if (parts := bulk_parts(os.path.join(*key), key[2])) is None:
+        return None
+    interval, _timeperiod, max_count = parts
+    if count >= max_count:
+        return BulkIndexEntry(count, oldest, oldest)
+    return BulkIndexEntry(count, oldest, None if interval is None else oldest + interval)
+
+
+class BulkIndex:
+    """Number, age and time of ripeness of the bulks
+
+    The ripe bulks are found without looking into all bulk directories. The stored
+    notifications are added to a journal, which is merged into the index when looking
+    for ripe bulks. The index only selects the bulks to look at: their directories are
+    still checked before sending, which also corrects the index.
+    """
+
+    def __init__(self, bulk_dir: Path) -> None:
+        self._store = store.ObjectStore(
+            bulk_dir / ".index",
+            serializer=store.PickleSerializer[tuple[float, dict[BulkKey, BulkIndexEntry]]](),
+        )
+        self._journal_path = bulk_dir / ".journal"
+        self._built = 0.0
+
+    def add(self, key: BulkKey, mtime: float) -> None:
+        with store.locked(self._journal_path), self._journal_path.open("a") as journal:
+            journal.write(json.dumps([*key, mtime]) + "\n")
+
+    def load(self, now: float) -> dict[BulkKey, BulkIndexEntry] | None:
+        """None: the index has to be rebuilt"""
+        with store.locked(self._journal_path):
+            if (entries := self._load_entries(now)) is None:
+                return None
+            if self._merge_journal(entries):
+                self._save(entries)
+        return entries
+
+    def rebuild(self, entries: dict[BulkKey, BulkIndexEntry], now: float) -> None:
+        with store.locked(self._journal_path):
+            self._merge_journal(entries)
+            self._save(entries, now)
+
+    def update(self, changes: Mapping[BulkKey, BulkIndexEntry | None]) -> None:
+        """Set or remove the entries of bulks after looking at their directories"""
+        with store.locked(self._journal_path):
+            if (entries := self._load_entries(time.time())) is None:
+                return
+            for key, entry in changes.items():
+                if entry is None:
+                    entries.pop(key, None)
+                else:
+                    entries[key] = entry
+            # Notifications stored in the meantime count in addition
+            self._merge_journal(entries)
+            self._save(entries)
+
+    def _load_entries(self, now: float) -> dict[BulkKey, BulkIndexEntry] | None:
+        try:
+            built, entries = self._store.read_obj(default=(0.0, {}))
+        except Exception:
+            logger.exception("Cannot read the bulk index:")
+            return None
+        if not 0 <= now - built <= _BULK_INDEX_MAX_AGE:
+            return None
+        self._built = built
+        return entries
+
+    def _merge_journal(self, entries: dict[BulkKey, BulkIndexEntry]) -> bool:
+        try:
+            lines = self._journal_path.read_text().splitlines()
+        except FileNotFoundError:
+            return False
+        if not lines:
+            return False
+
+        for line in lines:
+            try:
+                contact, plugin_name, bulk, mtime = json.loads(line)
+            except ValueError:
+                logger.info("Skipping invalid entry of the bulk index journal: %r", line)
+                continue
+            key = (contact, plugin_name, bulk)
+            entry = entries.get(key)
+            if (
+                new_entry := _bulk_index_entry(
+                    key,
+                    entry.num_notifications + 1 if entry else 1,
+                    min(entry.oldest, mtime) if entry else mtime,
+                )
+            ) is not None:
+                entries[key] = new_entry
+
+        self._journal_path.write_text("")
+        return True
+
+    def _save(self, entries: Mapping[BulkKey, BulkIndexEntry], built: float | None = None) -> None:
+        if built is not None:
+            self._built = built
+        self._store.write_obj((self._built, dict(entries)))
+
+
+class _TimeperiodStates:
+    """The activity of the time periods, fetched from the core at most once"""
+
+    def __init__(self) -> None:
+        self._states: Mapping[str, bool] | None = None
+        self._failed = False
+
+    def active(self, timeperiod: str) -> bool | None:
+        if self._states is None:
+            try:
+                self._states = cmk.base.core.timeperiod_states()
+            except Exception:
+                # This prevents sending bulk notifications if a
+                # livestatus connection error appears. It also implies
+                # that an ongoing connection error will hold back bulk
+                # notifications.
+                logger.info("Error while checking activity of time periods: assuming active")
+                self._states = {}
+                self._failed = True
+        return True if self._failed else self._states.get(timeperiod)
+
+
+def _bulk_keys() -> Iterator[BulkKey]:
     if not os.path.exists(notification_bulkdir):
-        return []
+        return
 
     def listdir_visible(path: str) -> list[str]:
         return [x for x in os.listdir(path) if not x.startswith(".")]
 
-    bulks: NotifyBulks = []
-    now = time.time()
     for contact in listdir_visible(notification_bulkdir):
         contact_dir = os.path.join(notification_bulkdir, contact)
         for method in listdir_visible(contact_dir):
-            method_dir = os.path.join(contact_dir, method)
-            for bulk in listdir_visible(method_dir):
-                bulk_dir = os.path.join(method_dir, bulk)
+            for bulk in listdir_visible(os.path.join(contact_dir, method)):
+                yield contact, method, bulk
 
-                uuids, oldest = bulk_uuids(bulk_dir)
-                if not uuids:
-                    remove_if_orphaned(bulk_dir, max_age=60, ref_time=now)
-                    continue
-                age = now - oldest
 
-                # e.g. 60,10,host,localhost OR timeperiod:late_night,1000,host,localhost
-                parts = bulk_parts(method_dir, bulk)
-                if parts is None:
-                    continue
-                interval, timeperiod, count = parts
+def _check_bulk(
+    key: BulkKey, now: float, timeperiods: _TimeperiodStates
+) -> tuple[NotifyBulk, bool] | None:
+    """The bulk and whether it is ripe, None if there is nothing to send"""
+    method_dir = os.path.join(notification_bulkdir, key[0], key[1])
+    bulk_dir = os.path.join(method_dir, key[2])
 
-                if interval is not None:
-                    if age >= interval:
-                        logger.info("Bulk %s is ripe: age %d >= %d", bulk_dir, age, interval)
-                    elif len(uuids) >= count:
-                        logger.info("Bulk %s is ripe: count %d >= %d", bulk_dir, len(uuids), count)
-                    else:
-                        logger.info(
-                            "Bulk %s is not ripe yet (age: %d, count: %d)!",
-                            bulk_dir,
-                            age,
-                            len(uuids),
-                        )
-                        if only_ripe:
-                            continue
+    try:
+        uuids, oldest = bulk_uuids(bulk_dir)
+        if not uuids:
+            remove_if_orphaned(bulk_dir, max_age=60, ref_time=now)
+            return None
+    except FileNotFoundError:
+        return None
+    age = now - oldest
 
-                    bulks.append((bulk_dir, age, interval, "n.a.", count, uuids))
-                else:
-                    try:
-                        active = cmk.base.core.timeperiod_active(str(timeperiod))
-                    except Exception:
-                        # This prevents sending bulk notifications if a
-                        # livestatus connection error appears. It also implies
-                        # that an ongoing connection error will hold back bulk
-                        # notifications.
-                        logger.info(
-                            "Error while checking activity of time period %s: assuming active",
-                            timeperiod,
-                        )
-                        active = True
-
-                    if active is True and len(uuids) < count:
-                        # Only add a log entry every 10 minutes since timeperiods
-                        # can be very long (The default would be 10s).
-                        if now % 600 <= config.notification_bulk_interval:
-                            logger.info(
-                                "Bulk %s is not ripe yet (time period %s: active, count: %d)",
-                                bulk_dir,
-                                timeperiod,
-                                len(uuids),
-                            )
-
-                        if only_ripe:
-                            continue
-                    elif active is False:
-                        logger.info(
-                            "Bulk %s is ripe: time period %s has ended", bulk_dir, timeperiod
-                        )
-                    elif len(uuids) >= count:
-                        logger.info("Bulk %s is ripe: count %d >= %d", bulk_dir, len(uuids), count)
-                    else:
-                        logger.info(
-                            "Bulk %s is ripe: time period %s is not known anymore",
-                            bulk_dir,
-                            timeperiod,
-                        )
+    # e.g. 60,10,host,localhost OR timeperiod:late_night,1000,host,localhost
+    parts = bulk_parts(method_dir, key[2])
+    if parts is None:
+        return None
+    interval, timeperiod, count = parts
+
+    if interval is not None:
+        if age >= interval:
+            logger.info("Bulk %s is ripe: age %d >= %d", bulk_dir, age, interval)
+        elif len(uuids) >= count:
+            logger.info("Bulk %s is ripe: count %d >= %d", bulk_dir, len(uuids), count)
+        else:
+            logger.info(
+                "Bulk %s is not ripe yet (age: %d, count: %d)!",
+                bulk_dir,
+                age,
+                len(uuids),
+            )
+            return (bulk_dir, age, interval, "n.a.", count, uuids), False
+
+        return (bulk_dir, age, interval, "n.a.", count, uuids), True
+
+    active = timeperiods.active(str(timeperiod))
+    if active is True and len(uuids) < count:
+        # Only add a log entry every 10 minutes since timeperiods
+        # can be very long (The default would be 10s).
+        if now % 600 <= config.notification_bulk_interval:
+            logger.info(
+                "Bulk %s is not ripe yet (time period %s: active, count: %d)",
+                bulk_dir,
+                timeperiod,
+                len(uuids),
+            )
+        return (bulk_dir, age, "n.a.", timeperiod, count, uuids), False
 
-                    bulks.append((bulk_dir, age, "n.a.", timeperiod, count, uuids))
+    if active is False:
+        logger.info("Bulk %s is ripe: time period %s has ended", bulk_dir, timeperiod)
+    elif len(uuids) >= count:
+        logger.info("Bulk %s is ripe: count %d >= %d", bulk_dir, len(uuids), count)
+    else:
+        logger.info(
+            "Bulk %s is ripe: time period %s is not known anymore",
+            bulk_dir,
+            timeperiod,
+        )
+    return (bulk_dir, age, "n.a.", timeperiod, count, uuids), True
+
+
+def find_bulks(only_ripe: bool) -> NotifyBulks:
+    now = time.time()
+    timeperiods = _TimeperiodStates()
+    bulks: NotifyBulks = []
+    for key in _bulk_keys():
+        if (checked := _check_bulk(key, now, timeperiods)) is None:
+            continue
+        bulk, ripe = checked
+        if ripe or not only_ripe:
+            bulks.append(bulk)
     return bulks
 
 
+def _bulk_key(bulk_dir: str) -> BulkKey:
+    contact, plugin_name, bulk = bulk_dir.split("/")[-3:]
+    return contact, plugin_name, bulk
+
+
+def _bulk_index_entry_of(bulk: NotifyBulk) -> BulkIndexEntry | None:
+    bulk_dir, _age, _interval, _timeperiod, _count, uuids = bulk
+    return _bulk_index_entry(_bulk_key(bulk_dir), len(uuids), uuids[0][0])
+
+
+def _ripe_bulk_candidates(
+    entries: Mapping[BulkKey, BulkIndexEntry], now: float, timeperiods: _TimeperiodStates
+) -> Iterator[BulkKey]:
+    """The bulks which are ripe according to the index"""
+    queue = [
+        (entry.next_ripe, key) for key, entry in entries.items() if entry.next_ripe is not None
+    ]
+    heapq.heapify(queue)
+    while queue and queue[0][0] <= now:
+        yield heapq.heappop(queue)[1]
+    if queue:
+        logger.debug("Next bulk is ripe in %d seconds", queue[0][0] - now)
+
+    for key, entry in entries.items():
+        if entry.next_ripe is None and (parts := bulk_parts(os.path.join(*key), key[2])):
+            if timeperiods.active(str(parts[1])) is not True:
+                yield key
+
+
+def find_ripe_bulks() -> NotifyBulks:
+    """Same as find_bulks(True), but only looks at the bulks which are ripe by the index"""
+    index = BulkIndex(Path(notification_bulkdir))
+    now = time.time()
+    timeperiods = _TimeperiodStates()
+
+    if (entries := index.load(now)) is None:
+        logger.info("Building the index of the bulks")
+        checked_bulks = [
+            checked
+            for key in _bulk_keys()
+            if (checked := _check_bulk(key, now, timeperiods)) is not None
+        ]
+        index.rebuild(
+            {
+                _bulk_key(bulk[0]): entry
+                for bulk, _ripe in checked_bulks
+                if (entry := _bulk_index_entry_of(bulk)) is not None
+            },
+            now,
+        )
+        return [bulk for bulk, ripe in checked_bulks if ripe]
+
+    ripe_bulks: NotifyBulks = []
+    changes: dict[BulkKey, BulkIndexEntry | None] = {}
+    for key in _ripe_bulk_candidates(entries, now, timeperiods):
+        if (checked := _check_bulk(key, now, timeperiods)) is None:
+            changes[key] = None
+        elif checked[1]:
+            ripe_bulks.append(checked[0])
+        else:
+            changes[key] = _bulk_index_entry_of(checked[0])
+    if changes:
+        index.update(changes)
+    return ripe_bulks
+
+
+def _reindex_bulks(bulk_dirs: Iterable[str]) -> None:
+    changes: dict[BulkKey, BulkIndexEntry | None] = {}
+    for bulk_dir in bulk_dirs:
+        key = _bulk_key(bulk_dir)
+        try:
+            uuids, _oldest = bulk_uuids(bulk_dir)
+        except FileNotFoundError:
+            uuids = []
+        changes[key] = _bulk_index_entry(key, len(uuids), uuids[0][0]) if uuids else None
+    BulkIndex(Path(notification_bulkdir)).update(changes)
+
+
 def send_ripe_bulks() -> None:
-    ripe = find_bulks(True)
+    ripe = find_ripe_bulks()
     if ripe:
         logger.info("Sending out %d ripe bulk notifications", len(ripe))
         for bulk in ripe:
@@ -1739,6 +2181,8 @@ def send_ripe_bulks() -> None:
                 if cmk.utils.debug.enabled():
                     raise
                 logger.exception("Error sending bulk %s:", bulk[0])
+        # Notifications which could not be sent or have been stored in the meantime
+        _reindex_bulks(bulk[0] for bulk in ripe)
 
 
 def notify_bulk(dirname: str, uuids: UUIDs) -> None:  # pylint: disable=too-many-branches
@@ -6,11 +6,13 @@
 
 import json
 import logging
-import math
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from typing import Final, NamedTuple
 
+import numpy as np
+import numpy.typing as npt
+
 import cmk.utils.debug
 import cmk.utils.defines as defines
 from cmk.utils.exceptions import MKGeneralException
@@ -28,6 +30,7 @@ from cmk.utils.prediction import (
     RRDColumnFunction,
     Seconds,
     Timegroup,
+    TimeSeries,
     TimeSeriesValues,
     Timestamp,
     TimeWindow,
@@ -144,8 +147,10 @@ def _time_slices(
 def _retrieve_grouped_data_from_rrd(
     rrd_column: RRDColumnFunction,
     time_windows: _TimeSlices,
-) -> tuple[TimeWindow, list[TimeSeriesValues]]:
-    "Collect all time slices and up-sample them to same resolution"
+) -> tuple[TimeWindow, npt.NDArray[np.float64]]:
+    """Collect all time slices and up-sample them to same resolution
+
+    Returns one row per time slice, missing values are NaN."""
     from_time = time_windows[0][0]
 
     slices = [(rrd_column(start, end), from_time - start) for start, end in time_windows]
@@ -157,29 +162,31 @@ def _retrieve_grouped_data_from_rrd(
     if twindow[2] == 0:
         raise MKGeneralException("Got no historic metrics")
 
-    return twindow, [ts.bfill_upsample(twindow, shift) for ts, shift in slices]
+    upsampled = [ts.bfill_upsample_array(twindow, shift) for ts, shift in slices]
+    length = min(len(values) for values in upsampled)
+    return twindow, np.stack([values[:length] for values in upsampled])
 
 
-def _data_stats(slices: list[TimeSeriesValues]) -> DataStats:
+def _data_stats(slices: Sequence[TimeSeriesValues] | npt.NDArray[np.float64]) -> DataStats:
     "Statistically summarize all the upsampled RRD data"
-
-    descriptors: DataStats = []
-
-    for time_column in zip(*slices):
-        point_line = [x for x in time_column if x is not None]
-        if point_line:
-            average = sum(point_line) / float(len(point_line))
-            descriptors.append(
-                [
-                    average,
-                    min(point_line),
-                    max(point_line),
-                    _std_dev(point_line, average),
-                ]
-            )
-        else:
-            descriptors.append([None, None, None, None])
-
+    data = np.array(slices, dtype=np.float64, ndmin=2)
+    defined = np.logical_not(np.isnan(data))
+    samples = defined.sum(axis=0)
+
+    # Columns without samples are filled with NaN, they are replaced below.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        average = np.where(defined, data, 0.0).sum(axis=0) / samples
+        squares = np.where(defined, (data - average) ** 2, 0.0).sum(axis=0)
+        # In the case of a single data-point an unbiased standard deviation is
+        # undefined. In this case we take the magnitude of the measured value
+        # itself as a measure of the dispersion.
+        stdev = np.where(samples == 1, np.abs(average), np.sqrt(squares / (samples - 1)))
+    minimum = np.where(defined, data, np.inf).min(axis=0)
+    maximum = np.where(defined, data, -np.inf).max(axis=0)
+
+    descriptors: DataStats = np.stack([average, minimum, maximum, stdev], axis=1).tolist()
+    for index in np.flatnonzero(samples == 0):
+        descriptors[index] = [None, None, None, None]
     return descriptors
 
 
@@ -200,18 +207,6 @@ def _calculate_data_for_prediction(
     )
 
 
-def _std_dev(point_line: list[float], average: float) -> float:
-    samples = len(point_line)
-    # In the case of a single data-point an unbiased standard deviation is
-    # undefined. In this case we take the magnitude of the measured value
-    # itself as a measure of the dispersion.
-    if samples == 1:
-        return abs(average)
-    return math.sqrt(
-        abs(sum(p**2 for p in point_line) - average**2 * samples) / float(samples - 1)
-    )
-
-
 def _is_prediction_up_to_date(
     last_info: PredictionInfo | None,
     timegroup: Timegroup,
@@ -8,7 +8,7 @@ from __future__ import annotations
 import abc
 import logging
 import time
-from collections.abc import Iterator, Mapping, MutableMapping, Sequence
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping, Sequence
 from typing import final, Final, NamedTuple
 
 import cmk.utils.agent_simulator as agent_simulator
@@ -27,7 +27,8 @@ from .type_defs import AgentRawDataSection, NO_SELECTION, SectionNameCollection
 
 class SectionWithHeader(NamedTuple):
     header: SectionMarker
-    section: list[AgentRawData]
+    # The content is kept as views of the raw data, see `_tokenize()` and `_lines()`.
+    section: list[memoryview]
 
 
 MutableSection = list[SectionWithHeader]
@@ -90,7 +91,7 @@ class ParserState(abc.ABC):
         self._logger: Final = logger
 
     @abc.abstractmethod
-    def do_action(self, line: bytes) -> ParserState:
+    def do_action(self, content: memoryview) -> ParserState:
         raise NotImplementedError()
 
     @abc.abstractmethod
@@ -216,9 +217,7 @@ class ParserState(abc.ABC):
 
     @final
     def __call__(self, line: bytes) -> ParserState:
-        if not line.strip():
-            return self
-
+        """Handle a marker line, see `_is_marker()`"""
         try:
             if PiggybackMarker.is_header(line):
                 return self.on_piggyback_header(line)
@@ -228,7 +227,6 @@ class ParserState(abc.ABC):
                 return self.on_section_header(line)
             if SectionMarker.is_footer(line):
                 return self.on_section_footer(line)
-            return self.do_action(line)
         except Exception:
             if cmk.utils.debug.enabled():
                 raise
@@ -238,7 +236,7 @@ class ParserState(abc.ABC):
 
 
 class NOOPParser(ParserState):
-    def do_action(self, line: bytes) -> ParserState:
+    def do_action(self, content: memoryview) -> ParserState:
         return self
 
     def on_piggyback_header(self, line: bytes) -> ParserState:
@@ -285,8 +283,8 @@ class PiggybackParser(ParserState):
         )
         self.current_host: Final = current_host
 
-    def do_action(self, line: bytes) -> ParserState:
-        # We are not in a section -> ignore line.
+    def do_action(self, content: memoryview) -> ParserState:
+        # We are not in a section -> ignore content.
         return self
 
     def on_piggyback_header(self, line: bytes) -> ParserState:
@@ -338,9 +336,9 @@ class PiggybackSectionParser(ParserState):
         self.current_host: Final = current_host
         self.current_section: Final = current_section
 
-    def do_action(self, line: bytes) -> ParserState:
+    def do_action(self, content: memoryview) -> ParserState:
         assert self.piggyback_sections[self.current_host][-1].header == self.current_section
-        self.piggyback_sections[self.current_host][-1].section.append(AgentRawData(line))
+        self.piggyback_sections[self.current_host][-1].section.append(content)
         return self
 
     def on_piggyback_header(self, line: bytes) -> ParserState:
@@ -387,7 +385,7 @@ class PiggybackNOOPParser(ParserState):
         )
         self.current_host: Final = current_host
 
-    def do_action(self, line: bytes) -> PiggybackNOOPParser:
+    def do_action(self, content: memoryview) -> PiggybackNOOPParser:
         return self
 
     def on_piggyback_header(self, line: bytes) -> ParserState:
@@ -437,12 +435,9 @@ class HostSectionParser(ParserState):
         )
         self.current_section: Final = current_section
 
-    def do_action(self, line: bytes) -> ParserState:
-        if not self.current_section.nostrip:
-            line = line.strip()
-
+    def do_action(self, content: memoryview) -> ParserState:
         assert self.sections[-1].header == self.current_section
-        self.sections[-1].section.append(AgentRawData(line))
+        self.sections[-1].section.append(content)
         return self
 
     def on_piggyback_header(self, line: bytes) -> ParserState:
@@ -467,6 +462,45 @@ class HostSectionParser(ParserState):
         return self.to_noop_parser()
 
 
+def _is_marker(line: bytes) -> bool:
+    return (
+        PiggybackMarker.is_header(line)
+        or PiggybackMarker.is_footer(line)
+        or SectionMarker.is_header(line)
+        or SectionMarker.is_footer(line)
+    )
+
+
+def _tokenize(raw_data: bytes) -> Iterator[tuple[memoryview, bytes | None]]:
+    """Split the agent output at the section and piggyback markers
+
+    The raw data is scanned once for lines that may be markers. Yields the content
+    before each marker as a view of the raw data together with the marker line and
+    finally the remaining content without a marker.
+    """
+    view = memoryview(raw_data)
+    start = 0
+    pos = raw_data.find(b"<<<")
+    while pos != -1:
+        line_start = raw_data.rfind(b"\n", 0, pos) + 1
+        if (line_end := raw_data.find(b"\n", pos)) == -1:
+            line_end = len(raw_data)
+        if _is_marker(line := raw_data[line_start:line_end].rstrip(b"\r")):
+            yield view[start:line_start], line
+            start = line_end + 1
+        pos = raw_data.find(b"<<<", line_end)
+    yield view[start:], None
+
+
+def _lines(content: Iterable[memoryview], *, strip: bool) -> Iterator[bytes]:
+    """Split the content into its non-empty lines"""
+    for chunk in content:
+        for line in bytes(chunk).split(b"\n"):
+            if not (stripped := line.strip()):
+                continue
+            yield stripped if strip else line.rstrip(b"\r")
+
+
 class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
     """A parser for agent data."""
 
@@ -513,10 +547,16 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
 
         def decode_sections(
             sections: ImmutableSection,
+            *,
+            selection: SectionNameCollection,
         ) -> MutableMapping[SectionName, list[AgentRawDataSection]]:
             out: MutableMapping[SectionName, list[AgentRawDataSection]] = {}
             for header, content in sections:
-                out.setdefault(header.name, []).extend(header.parse_line(line) for line in content)
+                if not (selection is NO_SELECTION or header.name in selection):
+                    continue
+                out.setdefault(header.name, []).extend(
+                    header.parse_line(line) for line in _lines(content, strip=not header.nostrip)
+                )
             return out
 
         def flatten_piggyback_section(
@@ -544,13 +584,9 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
                             header.separator,
                         )
                     ).encode(header.encoding)
-                yield from (bytes(line) for line in content)
+                yield from _lines(content, strip=False)
 
-        sections = {
-            name: content
-            for name, content in decode_sections(raw_sections).items()
-            if selection is NO_SELECTION or name in selection
-        }
+        sections = decode_sections(raw_sections, selection=selection)
         piggybacked_raw_data = {
             header.hostname: list(
                 flatten_piggyback_section(
@@ -591,7 +627,7 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
         self,
         raw_data: AgentRawData,
     ) -> tuple[ImmutableSection, Mapping[PiggybackMarker, ImmutableSection]]:
-        """Split agent output in chunks, splits lines by whitespaces."""
+        """Split agent output in chunks, the lines are only split when decoding."""
         parser: ParserState = NOOPParser(
             self.hostname,
             [],
@@ -600,7 +636,10 @@ class AgentParser(Parser[AgentRawData, AgentRawDataSection]):
             encoding_fallback=self.encoding_fallback,
             logger=self._logger,
         )
-        for line in raw_data.split(b"\n"):
-            parser = parser(line.rstrip(b"\r"))
+        for content, marker in _tokenize(raw_data):
+            if content:
+                parser = parser.do_action(content)
+            if marker is not None:
+                parser = parser(marker)
 
         return parser.sections, parser.piggyback_sections
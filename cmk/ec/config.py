@@ -147,8 +147,10 @@ class Rule(TypedDict, total=False):
     cancel_application: str
     cancel_priority: tuple[int, int]
     contact_groups: ContactGroups
-    count: int
+    count: dict[str, int]
+    delay: int
     disabled: bool
+    drop: bool | Literal["skip_pack"]
     expect: Expect
     hits: int
     id: str
@@ -300,7 +302,7 @@ class SNMPCredential(SNMPCredentialBase, total=False):
 # This is what we get from the outside.
 class ConfigFromWATO(TypedDict):
     actions: Sequence[Action]
-    archive_mode: Literal["file", "mongodb"]
+    archive_mode: Literal["file", "mongodb", "segments"]
     archive_orphans: bool
     debug_rules: bool
     event_limit: EventLimits
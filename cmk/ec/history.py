@@ -21,6 +21,7 @@ from cmk.utils.render import date_and_time
 
 from .config import Config
 from .event import Event
+from .history_segments import SegmentedHistoryStore
 from .query import OperatorName, QueryGET
 from .settings import Settings
 
@@ -64,6 +65,7 @@ class History:
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._mongodb = MongoDB()
+        self._segments: SegmentedHistoryStore | None = None
         self._active_history_period = ActiveHistoryPeriod()
         self.reload_configuration(config)
 
@@ -71,29 +73,39 @@ class History:
         self._config = config
         if self._config["archive_mode"] == "mongodb":
             _reload_configuration_mongodb(self)
+        elif self._config["archive_mode"] == "segments":
+            _reload_configuration_segments(self)
         else:
             _reload_configuration_files(self)
 
     def flush(self) -> None:
         if self._config["archive_mode"] == "mongodb":
             _flush_mongodb(self)
+        elif self._config["archive_mode"] == "segments":
+            _flush_segments(self)
         else:
             _flush_files(self)
 
     def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
         if self._config["archive_mode"] == "mongodb":
             _add_mongodb(self, event, what, who, addinfo)
+        elif self._config["archive_mode"] == "segments":
+            _add_segments(self, event, what, who, addinfo)
         else:
             _add_files(self, event, what, who, addinfo)
 
     def get(self, query: QueryGET) -> Iterable[Any]:
         if self._config["archive_mode"] == "mongodb":
             return _get_mongodb(self, query)
+        if self._config["archive_mode"] == "segments":
+            return _get_segments(self, query)
         return _get_files(self, self._logger, query)
 
     def housekeeping(self) -> None:
         if self._config["archive_mode"] == "mongodb":
             _housekeeping_mongodb(self)
+        elif self._config["archive_mode"] == "segments":
+            _housekeeping_segments(self)
         else:
             _housekeeping_files(self)
 
@@ -306,6 +318,105 @@ def _get_mongodb(  # pylint: disable=too-many-branches
     return history_entries
 
 
+# .
+#   .--Segments------------------------------------------------------------.
+#   |            ____                                  _                   |
+#   |           / ___|  ___  __ _ _ __ ___   ___ _ __ | |_ ___             |
+#   |           \___ \ / _ \/ _` | '_ ` _ \ / _ \ '_ \| __/ __|            |
+#   |            ___) |  __/ (_| | | | | | |  __/ | | | |_\__ \            |
+#   |           |____/ \___|\__, |_| |_| |_|\___|_| |_|\__|___/            |
+#   |                       |___/                                          |
+#   +----------------------------------------------------------------------+
+#   | The Event Log Archive can be stored in indexed segment files, which  |
+#   | avoids scanning all history files for each query.                    |
+#   '----------------------------------------------------------------------'
+
+
+def _segment_span(config: Config) -> int:
+    return 7 * 86400 if config["history_rotation"] == "weekly" else 86400
+
+
+def _reload_configuration_segments(history: History) -> None:
+    with history._lock:
+        column_names = [name for name, _default in history._history_columns]
+        history._segments = SegmentedHistoryStore(
+            history._settings.paths.history_segments_dir.value,
+            history._logger.getChild("segments"),
+            # The stored rows lack the leading history_line
+            host_column=column_names.index("event_host") - 1,
+            rule_id_column=column_names.index("event_rule_id") - 1,
+            max_span=_segment_span(history._config),
+        )
+
+
+def _segments(history: History) -> SegmentedHistoryStore:
+    if history._segments is None:
+        raise Exception("History segments are not initialized")
+    return history._segments
+
+
+def _flush_segments(history: History) -> None:
+    _segments(history).expire(None)
+
+
+def _housekeeping_segments(history: History) -> None:
+    try:
+        _segments(history).expire(time.time() - history._config["history_lifetime"] * 86400)
+    except Exception as e:
+        if history._settings.options.debug:
+            raise
+        history._logger.warning(f"Error expiring history segments: {e}")
+
+
+def _add_segments(
+    history: History, event: Event, what: HistoryWhat, who: str, addinfo: str
+) -> None:
+    _log_event(history._config, history._logger, event, what, who, addinfo)
+    row: list[object] = [time.time(), what, who, addinfo]
+    row += [event.get(colname[6:], defval) for colname, defval in history._event_columns]
+    _segments(history).append(row)
+
+
+def _indexed_filter_values(
+    filters: Iterable[tuple[str, OperatorName, Callable[[Any], bool], Any]], column: str
+) -> set[str] | None:
+    """The values an indexed column can possibly have according to the filters
+
+    The indexes are case insensitive, the exact filtering is done afterwards."""
+    result: set[str] | None = None
+    for column_name, operator_name, _predicate, argument in filters:
+        if column_name != column:
+            continue
+        if operator_name in ("=", "=~"):
+            values = {str(argument).lower()}
+        elif operator_name == "in":
+            values = {str(a).lower() for a in argument}
+        else:
+            continue
+        result = values if result is None else result & values
+    return result
+
+
+def _get_segments(history: History, query: QueryGET) -> Iterable[Any]:
+    filters = query.filters
+    time_filters = [
+        (operator_name, argument)
+        for column_name, operator_name, _predicate, argument in filters
+        if column_name.split("_")[-1] == "time"
+    ]
+    return _segments(history).query(
+        (
+            _greatest_lower_bound_for_filters(time_filters),
+            _least_upper_bound_for_filters(time_filters),
+        ),
+        _indexed_filter_values(filters, "event_host"),
+        _indexed_filter_values(filters, "event_rule_id"),
+        query.filter_row,
+        # Like the other backends, return one more row to show that the limit is exceeded
+        None if query.limit is None else query.limit + 1,
+    )
+
+
 # .
 #   .--History-------------------------------------------------------------.
 #   |                   _   _ _     _                                      |
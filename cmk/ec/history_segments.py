@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Segmented storage of the event history
+
+The history entries are appended to segment files as length prefixed
+records. A segment is sealed when it is full or too old, and a sidecar
+index is written for it which contains the time span of the segment, the
+offsets of all records and the record numbers per host name and rule ID.
+The index of the single active segment is kept in memory.
+
+Queries use the indexes to skip segments which can not contain matching
+entries and to read only the records of the requested hosts or rules.
+"""
+
+from __future__ import annotations
+
+import marshal
+import os
+import struct
+import threading
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from logging import Logger
+from pathlib import Path
+from typing import Any, Final
+
+_SEGMENT_SUFFIX: Final = ".seg"
+_INDEX_SUFFIX: Final = ".idx"
+_INDEX_VERSION: Final = 1
+_MARSHAL_VERSION: Final = 4
+_RECORD_HEADER = struct.Struct("<I")
+
+TimeRange = tuple[float | None, float | None]
+
+
+def _intersects(interval1: TimeRange, interval2: TimeRange) -> bool:
+    lo1, hi1 = interval1
+    lo2, hi2 = interval2
+    return (lo2 is None or hi1 is None or lo2 <= hi1) and (lo1 is None or hi2 is None or lo1 <= hi2)
+
+
+@dataclass
+class SegmentIndex:
+    """Everything needed to prune a segment and to address its records"""
+
+    first_line: int
+    min_time: float | None = None
+    max_time: float | None = None
+    offsets: array = field(default_factory=lambda: array("Q"))
+    hosts: dict[str, array] = field(default_factory=dict)
+    rule_ids: dict[str, array] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def time_range(self) -> TimeRange:
+        return self.min_time, self.max_time
+
+    def add(self, offset: int, timestamp: float, host: str | None, rule_id: str | None) -> None:
+        recno = len(self.offsets)
+        self.offsets.append(offset)
+        self.min_time = timestamp if self.min_time is None else min(self.min_time, timestamp)
+        self.max_time = timestamp if self.max_time is None else max(self.max_time, timestamp)
+        self.hosts.setdefault((host or "").lower(), array("I")).append(recno)
+        self.rule_ids.setdefault((rule_id or "").lower(), array("I")).append(recno)
+
+    def serialize(self) -> bytes:
+        return marshal.dumps(
+            {
+                "version": _INDEX_VERSION,
+                "first_line": self.first_line,
+                "min_time": self.min_time,
+                "max_time": self.max_time,
+                "offsets": self.offsets.tobytes(),
+                "hosts": {k: v.tobytes() for k, v in self.hosts.items()},
+                "rule_ids": {k: v.tobytes() for k, v in self.rule_ids.items()},
+            },
+            _MARSHAL_VERSION,
+        )
+
+    @classmethod
+    def deserialize(cls, raw: bytes) -> SegmentIndex:
+        spec = marshal.loads(raw)
+        if spec["version"] != _INDEX_VERSION:
+            raise ValueError(f"Unknown history index version {spec['version']}")
+
+        def to_array(typecode: str, raw: bytes) -> array:
+            arr = array(typecode)
+            arr.frombytes(raw)
+            return arr
+
+        return cls(
+            first_line=spec["first_line"],
+            min_time=spec["min_time"],
+            max_time=spec["max_time"],
+            offsets=to_array("Q", spec["offsets"]),
+            hosts={k: to_array("I", v) for k, v in spec["hosts"].items()},
+            rule_ids={k: to_array("I", v) for k, v in spec["rule_ids"].items()},
+        )
+
+    def candidates(self, hosts: set[str] | None, rule_ids: set[str] | None) -> Sequence[int]:
+        """The record numbers which may match, youngest first"""
+        recnos: set[int] | None = None
+        if hosts is not None:
+            recnos = {n for host in hosts for n in self.hosts.get(host.lower(), ())}
+        if rule_ids is not None:
+            by_rule = {n for rule_id in rule_ids for n in self.rule_ids.get(rule_id.lower(), ())}
+            recnos = by_rule if recnos is None else recnos & by_rule
+        if recnos is None:
+            return range(len(self.offsets) - 1, -1, -1)
+        return sorted(recnos, reverse=True)
+
+
+class SegmentedHistoryStore:
+    """Append-only history segments with per segment indexes
+
+    The rows handed to append() and returned by query() are the history
+    table rows without the leading history_line, which is computed from
+    the position of the record in the store.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        logger: Logger,
+        *,
+        host_column: int,
+        rule_id_column: int,
+        max_records: int = 50000,
+        max_span: float = 86400,
+    ) -> None:
+        super().__init__()
+        self._directory = directory
+        self._logger = logger
+        self._host_column = host_column
+        self._rule_id_column = rule_id_column
+        self._max_records = max_records
+        self._max_span = max_span
+        # Protects the segment lists, the records are read without holding it
+        self._lock = threading.Lock()
+        self._sealed: list[tuple[Path, SegmentIndex]] = []
+        self._active: tuple[Path, SegmentIndex] | None = None
+        self._load()
+
+    def _segment_path(self, first_line: int) -> Path:
+        return self._directory / f"{first_line:012d}{_SEGMENT_SUFFIX}"
+
+    def _load(self) -> None:
+        self._sealed = []
+        self._active = None
+        if not self._directory.exists():
+            return
+        for path in sorted(self._directory.glob(f"*{_SEGMENT_SUFFIX}")):
+            index_path = path.with_suffix(_INDEX_SUFFIX)
+            try:
+                if index_path.exists():
+                    self._sealed.append((path, SegmentIndex.deserialize(index_path.read_bytes())))
+                    continue
+                index = self._scan(path)
+            except Exception:
+                self._logger.exception("Ignoring broken history segment %s", path)
+                continue
+            if self._active is not None:
+                # Should not happen, but never lose the index of a segment
+                self._seal(*self._active)
+            self._active = path, index
+
+    def _scan(self, path: Path) -> SegmentIndex:
+        """Rebuild the index of the active segment, cut off a partially written record"""
+        index = SegmentIndex(first_line=int(path.name[: -len(_SEGMENT_SUFFIX)]))
+        with path.open("rb") as f:
+            raw = f.read()
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(raw):
+            (length,) = _RECORD_HEADER.unpack_from(raw, offset)
+            end = offset + _RECORD_HEADER.size + length
+            if end > len(raw):
+                break
+            row = marshal.loads(raw[offset + _RECORD_HEADER.size : end])
+            index.add(offset, row[0], row[self._host_column], row[self._rule_id_column])
+            offset = end
+        if offset != len(raw):
+            self._logger.warning("Truncating incomplete record at end of %s", path)
+            os.truncate(path, offset)
+        return index
+
+    def _seal(self, path: Path, index: SegmentIndex) -> None:
+        tmp_path = path.with_suffix(_INDEX_SUFFIX + ".new")
+        tmp_path.write_bytes(index.serialize())
+        tmp_path.rename(path.with_suffix(_INDEX_SUFFIX))
+        self._sealed.append((path, index))
+
+    def _next_line(self) -> int:
+        if self._active is not None:
+            return self._active[1].first_line + len(self._active[1])
+        if self._sealed:
+            return self._sealed[-1][1].first_line + len(self._sealed[-1][1])
+        return 1
+
+    def _needs_new_segment(self, timestamp: float) -> bool:
+        if self._active is None:
+            return True
+        index = self._active[1]
+        return len(index) >= self._max_records or (
+            index.min_time is not None and timestamp - index.min_time >= self._max_span
+        )
+
+    def append(self, row: Sequence[Any]) -> None:
+        """Append a history row, its first column must be the history_time"""
+        with self._lock:
+            self._append(row)
+
+    def _append(self, row: Sequence[Any]) -> None:
+        timestamp = row[0]
+        if self._needs_new_segment(timestamp):
+            if self._active is not None:
+                self._seal(*self._active)
+            self._directory.mkdir(parents=True, exist_ok=True)
+            first_line = self._next_line()
+            self._active = self._segment_path(first_line), SegmentIndex(first_line=first_line)
+
+        assert self._active is not None
+        path, index = self._active
+        record = marshal.dumps(tuple(row), _MARSHAL_VERSION)
+        with path.open("ab") as f:
+            offset = f.tell()
+            f.write(_RECORD_HEADER.pack(len(record)) + record)
+        index.add(offset, timestamp, row[self._host_column], row[self._rule_id_column])
+
+    def _segments(self) -> Iterator[tuple[Path, SegmentIndex]]:
+        """Youngest segment first"""
+        if self._active is not None:
+            yield self._active
+        yield from reversed(self._sealed)
+
+    def query(
+        self,
+        time_range: TimeRange,
+        hosts: set[str] | None,
+        rule_ids: set[str] | None,
+        filter_row: Callable[[Sequence[Any]], bool],
+        limit: int | None,
+    ) -> list[list[Any]]:
+        """Find the matching history rows including history_line, youngest first
+
+        Hosts and rule IDs are compared case insensitively, the exact
+        comparison is left to filter_row."""
+        entries: list[list[Any]] = []
+        # Take a snapshot, the active segment may grow while we read it
+        with self._lock:
+            segments = [(path, index, len(index)) for path, index in self._segments()]
+        for path, index, num_records in segments:
+            if limit is not None and len(entries) >= limit:
+                break
+            if not num_records or not _intersects(time_range, index.time_range):
+                self._logger.debug("skipping history segment %s because of time filters", path)
+                continue
+            recnos = [n for n in index.candidates(hosts, rule_ids) if n < num_records]
+            if not recnos:
+                continue
+            try:
+                for recno, row in zip(recnos, self._read_records(path, index, recnos)):
+                    entry = [index.first_line + recno, *row]
+                    if filter_row(entry):
+                        entries.append(entry)
+                        if limit is not None and len(entries) >= limit:
+                            break
+            except FileNotFoundError:
+                pass  # expired in the meantime
+        return entries
+
+    def _read_records(
+        self, path: Path, index: SegmentIndex, recnos: Iterable[int]
+    ) -> Iterator[tuple[Any, ...]]:
+        with path.open("rb") as f:
+            for recno in recnos:
+                f.seek(index.offsets[recno])
+                (length,) = _RECORD_HEADER.unpack(f.read(_RECORD_HEADER.size))
+                yield marshal.loads(f.read(length))
+
+    def expire(self, min_time: float | None) -> None:
+        """Delete all segments with entries older than min_time only, all of them for None"""
+        with self._lock:
+            self._expire(min_time)
+
+    def _expire(self, min_time: float | None) -> None:
+        remaining: list[tuple[Path, SegmentIndex]] = []
+        for path, index in self._sealed:
+            if min_time is None or index.max_time is None or index.max_time < min_time:
+                self._logger.info("Deleting history segment %s", path)
+                path.with_suffix(_INDEX_SUFFIX).unlink(missing_ok=True)
+                path.unlink(missing_ok=True)
+            else:
+                remaining.append((path, index))
+        self._sealed = remaining
+        if self._active is not None:
+            path, index = self._active
+            if min_time is None or index.max_time is None or index.max_time < min_time:
+                self._logger.info("Deleting history segment %s", path)
+                path.unlink(missing_ok=True)
+                self._active = None
@@ -34,7 +34,7 @@ from functools import partial
 from logging import getLogger, Logger
 from pathlib import Path
 from types import FrameType
-from typing import Any, Literal, NamedTuple, Protocol, TypedDict
+from typing import Any, Literal, NamedTuple, Protocol, TypedDict, TypeVar
 
 from setproctitle import setthreadtitle
 
@@ -81,8 +81,10 @@ from .history import (
 )
 from .host_config import HostConfig
 from .perfcounters import Perfcounters
-from .query import filter_operator_in, MKClientError, Query, QueryCOMMAND, QueryGET, QueryREPLICATE
+from .pipeline import Handler, IngestionPipeline
+from .query import MKClientError, Query, QueryCOMMAND, QueryGET, QueryREPLICATE
 from .rule_packs import load_config as load_config_using
+from .rule_prefilter import RulePrefilter
 from .settings import FileDescriptor, PortNumber, Settings
 from .settings import settings as create_settings
 from .snmp import SNMPTrapEngine
@@ -404,14 +406,17 @@ class TimePeriods:
         self._logger = logger
         self._active: Mapping[TimeperiodName, bool] = {}
         self._cache_timestamp: Timestamp | None = None
+        # The rules are matched by the parser threads of the pipeline
+        self._lock = threading.Lock()
 
     def _update(self) -> None:
         try:
             timestamp = int(time.time())
             # update at most once a minute
-            if self._cache_timestamp is None or self._cache_timestamp + 60 <= timestamp:
-                self._active = query_timeperiods_in()
-                self._cache_timestamp = timestamp
+            with self._lock:
+                if self._cache_timestamp is None or self._cache_timestamp + 60 <= timestamp:
+                    self._active = query_timeperiods_in()
+                    self._cache_timestamp = timestamp
         except Exception as e:
             self._logger.info(f"Cannot update time period information: {e}")
             raise
@@ -451,6 +456,18 @@ class MatchSuccess:
 MatchResult = MatchFailure | MatchSuccess
 
 
+@dataclass(frozen=True)
+class RuleMatches:
+    """The rules hit by an event, see EventServer.match_rules()
+
+    All hits but the last one are rules which skip the rest of their rule pack."""
+
+    rules_generation: int
+    num_candidates: int
+    num_tries: int
+    hits: Sequence[tuple[Rule, MatchSuccess]]
+
+
 class EventServer(ECServerThread):
     """Processing and classification of incoming events."""
 
@@ -479,9 +496,13 @@ class EventServer(ECServerThread):
         self._syslog_udp: socket.socket | None = None
         self._syslog_tcp: socket.socket | None = None
         self._snmptrap: socket.socket | None = None
+        # Only set while serving, without it all messages are processed inline
+        self._pipeline: IngestionPipeline | None = None
 
         # TODO: Improve type!
         self._rules: list[Any] = []
+        # Changes whenever the rules have been compiled again
+        self._rules_generation = 0
         self._hash_stats = []
         for _unused_facility in range(32):
             self._hash_stats.append([0] * 8)
@@ -526,6 +547,7 @@ class EventServer(ECServerThread):
             ("status_config_load_time", 0),
             ("status_num_open_events", 0),
             ("status_virtual_memory_size", 0),
+            ("status_queue_length", 0),
         ]
 
     @classmethod
@@ -560,6 +582,7 @@ class EventServer(ECServerThread):
             self._config["last_reload"],
             self._event_status.num_existing_events,
             self._virtual_memory_size(),
+            0 if self._pipeline is None else self._pipeline.queue_length,
         ]
 
     def _virtual_memory_size(self) -> int:
@@ -673,7 +696,25 @@ class EventServer(ECServerThread):
     def handle_snmptrap(self, trap: Iterable[tuple[str, str]], ipaddress: str) -> None:
         self.process_event(create_event_from_trap(trap, ipaddress))
 
-    def serve(self) -> None:  # pylint: disable=too-many-branches
+    def serve(self) -> None:
+        if not self.settings.options.parser_threads:
+            self._receive()
+            return
+
+        self._pipeline = IngestionPipeline(
+            self._logger.getChild("pipeline"),
+            queue_len=self.settings.options.queue_len,
+            num_parsers=self.settings.options.parser_threads,
+            commit=self.process_raw_data,
+        )
+        self._pipeline.start()
+        try:
+            self._receive()
+        finally:
+            self._pipeline.stop()
+            self._pipeline = None
+
+    def _receive(self) -> None:  # pylint: disable=too-many-branches
         pipe_fragment = b""
         pipe = self.open_pipe()
         listen_list: list[FileDescriptorLike] = [pipe]
@@ -754,14 +795,14 @@ class EventServer(ECServerThread):
                         # Do we have any complete messages?
                         if b"\n" in data:
                             complete, rest = data.rsplit(b"\n", 1)
-                            self.process_raw_lines(complete + b"\n", address)
+                            self.receive_raw_lines(complete + b"\n", address)
                         else:
                             rest = data  # keep for next time
 
                     # Only complete messages
                     else:
                         if data:
-                            self.process_raw_lines(data, address)
+                            self.receive_raw_lines(data, address)
                         rest = b""
 
                     # Connection still open?
@@ -784,11 +825,11 @@ class EventServer(ECServerThread):
                         if data[-1:] != b"\n":
                             if b"\n" in data:  # at least one complete message contained
                                 messages, pipe_fragment = data.rsplit(b"\n", 1)
-                                self.process_raw_lines(messages + b"\n", None)  # got lost in split
+                                self.receive_raw_lines(messages + b"\n", None)  # got lost in split
                             else:
                                 pipe_fragment = data  # keep beginning of message, wait for \n
                         else:
-                            self.process_raw_lines(data, None)
+                            self.receive_raw_lines(data, None)
                     else:  # EOF
                         os.close(pipe)
                         pipe = self.open_pipe()
@@ -814,7 +855,7 @@ class EventServer(ECServerThread):
                     raise ValueError(
                         f"Invalid remote address '{address!r}' for syslog socket (UDP)"
                     )
-                self.process_raw_lines(message, address)
+                self.receive_raw_lines(message, address, lossy=True)
 
             # Read events from builtin snmptrap server
             if self._snmptrap is not None and self._snmptrap in readable:
@@ -828,10 +869,7 @@ class EventServer(ECServerThread):
                         and isinstance(address[1], int)
                     ):
                         raise ValueError(f"Invalid remote address '{address!r}' for SNMP trap")
-                    addr = address
-                    self.process_raw_data(
-                        partial(self._snmp_trap_engine.process_snmptrap, message, addr)
-                    )
+                    self.receive_snmptrap(message, address)
                 except Exception:
                     self._logger.exception(
                         "exception while handling an SNMP trap, skipping this one"
@@ -840,12 +878,46 @@ class EventServer(ECServerThread):
             if spool_files := sorted(
                 self.settings.paths.spool_dir.value.glob("[!.]*"), key=lambda x: x.stat().st_mtime
             ):
-                self.process_raw_lines(spool_files[0].read_bytes(), None)
+                self.receive_raw_lines(spool_files[0].read_bytes(), None)
                 spool_files[0].unlink()
                 select_timeout = 0  # enable fast processing to process further files
             else:
                 select_timeout = 1  # restore default select timeout
 
+    def receive_raw_lines(
+        self, data: bytes, address: tuple[str, int] | None, *, lossy: bool = False
+    ) -> None:
+        if self._pipeline is None:
+            self.process_raw_lines(data, address)
+        elif not self._pipeline.submit(partial(self.parse_raw_lines, data, address), lossy=lossy):
+            self._perfcounters.count("queue_drops")
+
+    def receive_snmptrap(self, message: bytes, address: tuple[str, int]) -> None:
+        # The SNMP engine is not thread safe, so the trap is parsed in the commit stage.
+        def parser() -> list[Handler]:
+            return [partial(self._snmp_trap_engine.process_snmptrap, message, address)]
+
+        if self._pipeline is None:
+            self.process_raw_data(parser()[0])
+        elif not self._pipeline.submit(parser, lossy=True):
+            self._perfcounters.count("queue_drops")
+
+    def parse_raw_lines(self, data: bytes, address: tuple[str, int] | None) -> list[Handler]:
+        """Parse stage of the pipeline: Create the events and match them against the rules,
+        but leave the processing to the commit stage"""
+        handlers: list[Handler] = []
+        for line_bytes in data.splitlines():
+            try:
+                if line := scrub_string(line_bytes.rstrip().decode("utf-8")):
+                    event = create_event_from_line(
+                        line, address, self._logger, verbose=self._config["debug_rules"]
+                    )
+                    self.do_translate_hostname(event)
+                    handlers.append(partial(self.process_event, event, self.match_rules(event)))
+            except Exception:
+                self._logger.exception("Exception parsing a log line (skipping this one)")
+        return handlers
+
     def process_raw_data(self, handler: Callable[[], None]) -> None:
         """
         Processes incoming data, just a wrapper between the real data and the
@@ -966,6 +1038,7 @@ class EventServer(ECServerThread):
                             event["last_token"] = (
                                 last_token + new_tokens * secs_per_token
                             )  # not now! would be unfair
+                            self._event_status.event_changed(event)
                             if event["count"] == 0:
                                 self._logger.info(
                                     "Rule %s/%s, event %d: again without allowed rate, dropping event",
@@ -1000,6 +1073,7 @@ class EventServer(ECServerThread):
                         event["rule_id"],
                     )
                     event["phase"] = "open"
+                    self._event_status.event_changed(event)
                     self._history.add(event, "DELAYOVER")
                     if rule:
                         event_has_opened(
@@ -1081,9 +1155,8 @@ class EventServer(ECServerThread):
                 # First look for case 1: rule that already have at least one hit
                 # and this events in the state "counting" exist.
                 events_to_delete: list[tuple[Event, HistoryWhat]] = []
-                events = self._event_status.events()
-                for event in events:
-                    if event["rule_id"] == rule["id"] and event["phase"] == "counting":
+                for event in self._event_status.events_of_rule(rule["id"]):
+                    if event["phase"] == "counting":
                         # time has elapsed. Now lets see if we have reached
                         # the necessary count:
                         if event["count"] < expected_count:  # no -> trigger alarm
@@ -1136,10 +1209,8 @@ class EventServer(ECServerThread):
             merge, reset_ack = merge
 
         if merge != "never":
-            for event in self._event_status.events():
-                if event["rule_id"] == rule["id"] and (
-                    event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked")
-                ):
+            for event in self._event_status.events_of_rule(rule["id"]):
+                if event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked"):
                     merge_event = event
                     break
 
@@ -1157,7 +1228,16 @@ class EventServer(ECServerThread):
             merge_event["text"] = text
             # Better rewrite (again). Rule might have changed. Also we have changed
             # the text and the user might have his own text added via set_text.
-            self.rewrite_event(rule, merge_event, {}, set_first=False)
+            rewritten = merge_event.copy()
+            self.rewrite_event(rule, rewritten, {}, set_first=False)
+            if (rewritten["host"], rewritten["application"]) != (
+                merge_event["host"],
+                merge_event["application"],
+            ):
+                self._event_status._reindex_event(merge_event, rewritten)
+            else:
+                merge_event.update(rewritten)
+                self._event_status.event_changed(merge_event)
             self._history.add(merge_event, "COUNTFAILED")
         else:
             # Create artificial event from scratch. Make sure that all important
@@ -1217,6 +1297,8 @@ class EventServer(ECServerThread):
         self._rule_by_id = {}
         # Speedup-Hash for rule execution
         self._rule_hash: dict[int, dict[int, Any]] = {}
+        # Literal based preselection of the rules within the hash buckets
+        self._rule_prefilters: dict[int, dict[int, RulePrefilter]] = {}
         count_disabled = 0
         count_rules = 0
         count_unspecific = 0
@@ -1295,6 +1377,7 @@ class EventServer(ECServerThread):
             "Compiled %d active rules (ignoring %d disabled rules)", count_rules, count_disabled
         )
         if self._config["rule_optimizer"]:
+            self.compile_rule_prefilters()
             self._logger.info(
                 "Rule hash: %d rules - %d hashed, %d unspecific",
                 len(self._rules),
@@ -1307,6 +1390,7 @@ class EventServer(ECServerThread):
                     for prio, entries in self._rule_hash[facility].items():
                         stats.append(f"{SyslogPriority(prio)}({len(entries)})")
                     self._logger.info(" %-12s: %s", SyslogFacility(facility), " ".join(stats))
+        self._rules_generation += 1
 
     @staticmethod
     def _compile_matching_value(key: str, val: str) -> TextPattern:
@@ -1356,6 +1440,24 @@ class EventServer(ECServerThread):
             if need:
                 prio_hash.setdefault(prio, []).append(rule)
 
+    def compile_rule_prefilters(self) -> None:
+        """Construct the literal prefilter of each facility/priority bucket
+
+        Buckets often share the very same rule list, e.g. for rules without a
+        priority condition, so the prefilters are shared as well."""
+        prefilters: dict[tuple[int, ...], RulePrefilter] = {}
+        for facility, prio_hash in self._rule_hash.items():
+            for prio, entries in prio_hash.items():
+                key = tuple(id(rule) for rule in entries)
+                if key not in prefilters:
+                    prefilters[key] = RulePrefilter(entries)
+                self._rule_prefilters.setdefault(facility, {})[prio] = prefilters[key]
+
+        for prefilter in prefilters.values():
+            self._logger.debug(
+                "Rule prefilter: %d rules, %d unfiltered", len(prefilter), prefilter.num_unfiltered
+            )
+
     def output_hash_stats(self) -> None:
         self._logger.info("Top 20 of facility/priority:")
         entries = []
@@ -1382,28 +1484,40 @@ class EventServer(ECServerThread):
             create_event_from_line(line, address, self._logger, verbose=self._config["debug_rules"])
         )
 
-    def process_event(self, event: Event) -> None:  # pylint: disable=too-many-branches
-        self.do_translate_hostname(event)
+    def match_rules(self, event: Event) -> RuleMatches:
+        """Find the rules hit by the event, its host name must already be translated
 
-        # Log all incoming messages into a syslog-like text file if that is enabled
-        if self._config["log_messages"]:
-            self.log_message(event)
+        This only reads the rules, so it can be done by the parser threads of the pipeline.
+        """
+        with self._lock_configuration:
+            # Read the generation first: Rules compiled meanwhile make the result outdated
+            rules_generation = self._rules_generation
+            rule_matcher = self._rule_matcher
+            if self._config["rule_optimizer"]:
+                prefilter = self._rule_prefilters.get(event["facility"], {}).get(event["priority"])
+                rules = None
+            else:
+                prefilter = None
+                rules = self._rules
 
         # Rule optimizer
-        if self._config["rule_optimizer"]:
-            self._hash_stats[event["facility"]][event["priority"]] += 1
-            rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+        rule_candidates: Sequence[Rule]
+        if rules is None:
+            rule_candidates = [] if prefilter is None else prefilter.candidates(event)
         else:
-            rule_candidates = self._rules
+            rule_candidates = rules
 
+        hits: list[tuple[Rule, MatchSuccess]] = []
+        num_tries = 0
         skip_pack = None
         for rule in rule_candidates:
             if skip_pack and rule["pack"] == skip_pack:
                 continue  # still in the rule pack that we want to skip
             skip_pack = None  # new pack, reset skipping
 
+            num_tries += 1
             try:
-                result = self.event_rule_matches(rule, event)
+                result = rule_matcher.event_rule_matches(rule, event)
             except Exception as e:
                 result = MatchFailure(
                     f"Rule would match, but due to inverted matching does not. {e}"
@@ -1411,114 +1525,114 @@ class EventServer(ECServerThread):
                 self._logger.exception(result.reason)
 
             if isinstance(result, MatchSuccess):
-                self._perfcounters.count("rule_hits")
-                if self._config["debug_rules"]:
-                    self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
+                hits.append((rule, result))
+                if rule.get("drop") != "skip_pack":
+                    break
+                skip_pack = rule["pack"]
 
-                self._event_status.count_rule_match(rule["id"])
-                if self._config["log_rulehits"]:
-                    self._logger.info(
-                        "Rule '%s/%s' hit by message %s/%s - '%s'.",
-                        rule["pack"],
-                        rule["id"],
-                        SyslogFacility(event["facility"]),
-                        SyslogPriority(event["priority"]),
-                        event["text"],
-                    )
+        return RuleMatches(
+            rules_generation=rules_generation,
+            num_candidates=len(rule_candidates),
+            num_tries=num_tries,
+            hits=hits,
+        )
 
-                if rule.get("drop"):
-                    if rule["drop"] == "skip_pack":
-                        skip_pack = rule["pack"]
-                        if self._config["debug_rules"]:
-                            self._logger.info("  skipping this rule pack (%s)", skip_pack)
-                        continue
-                    self._perfcounters.count("drops")
-                    return
-
-                if result.cancelling:
-                    self._event_status.cancel_events(
-                        self, self._event_columns, event, result.match_groups, rule
-                    )
-                    return
+    def process_event(  # pylint: disable=too-many-branches
+        self, event: Event, matches: RuleMatches | None = None
+    ) -> None:
+        """Process a new event, matches are the rules hit by the event if already known"""
+        if matches is None:
+            self.do_translate_hostname(event)
+        if matches is None or matches.rules_generation != self._rules_generation:
+            matches = self.match_rules(event)
 
-                # Remember the rule id that this event originated from
-                event["rule_id"] = rule["id"]
+        # Log all incoming messages into a syslog-like text file if that is enabled
+        if self._config["log_messages"]:
+            self.log_message(event)
 
-                # Attach optional contact group information for visibility
-                # and eventually for notifications
-                self._add_rule_contact_groups_to_event(rule, event)
+        if self._config["rule_optimizer"]:
+            self._hash_stats[event["facility"]][event["priority"]] += 1
+        self._perfcounters.count("rule_candidates", matches.num_candidates)
+        self._perfcounters.count("rule_tries", matches.num_tries)
 
-                # Store groups from matching this event. In order to make
-                # persistence easier, we do not save them as list but join
-                # them on ASCII-1.
-                match_groups_message = result.match_groups.get("match_groups_message", ())
-                assert match_groups_message is not False
-                event["match_groups"] = match_groups_message
+        for rule, result in matches.hits:
+            self._perfcounters.count("rule_hits")
+            if self._config["debug_rules"]:
+                self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
 
-                match_groups_syslog_application = result.match_groups.get(
-                    "match_groups_syslog_application", ()
+            self._event_status.count_rule_match(rule["id"])
+            if self._config["log_rulehits"]:
+                self._logger.info(
+                    "Rule '%s/%s' hit by message %s/%s - '%s'.",
+                    rule["pack"],
+                    rule["id"],
+                    SyslogFacility(event["facility"]),
+                    SyslogPriority(event["priority"]),
+                    event["text"],
                 )
-                assert match_groups_syslog_application is not False
-                event["match_groups_syslog_application"] = match_groups_syslog_application
-
-                self.rewrite_event(rule, event, result.match_groups)
-
-                # Lookup the monitoring core hosts and add the core host
-                # name to the event when one can be matched.
-                #
-                # Needs to be done AFTER event rewriting, because the rewriting
-                # may change the "host" field.
-                #
-                # For the moment we have no rule/condition matching on this
-                # field. So we only add the core host info for matched events.
-                self._add_core_host_to_new_event(event)
-
-                if "count" in rule:
-                    count = rule["count"]
-                    # Check if a matching event already exists that we need to
-                    # count up. If the count reaches the limit, the event will
-                    # be opened and its rule actions performed.
-                    existing_event = self._event_status.count_event(self, event, rule, count)
-                    if existing_event:
-                        if "delay" in rule:
-                            if self._config["debug_rules"]:
-                                self._logger.info(
-                                    "Event opening will be delayed for %d seconds", rule["delay"]
-                                )
-                            existing_event["delay_until"] = time.time() + rule["delay"]
-                            existing_event["phase"] = "delayed"
-                        else:
-                            event_has_opened(
-                                self._history,
-                                self.settings,
-                                self._config,
-                                self._logger,
-                                self.host_config,
-                                self._event_columns,
-                                rule,
-                                existing_event,
-                            )
 
-                        self._history.add(existing_event, "COUNTREACHED")
+            if rule.get("drop"):
+                if rule["drop"] == "skip_pack":
+                    if self._config["debug_rules"]:
+                        self._logger.info("  skipping this rule pack (%s)", rule["pack"])
+                    continue
+                self._perfcounters.count("drops")
+                return
 
-                        if "delay" not in rule and rule.get("autodelete"):
-                            existing_event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(existing_event, "AUTODELETE")
-                elif "expect" in rule:
-                    self._event_status.count_expected_event(self, event)
-                else:
+            if result.cancelling:
+                self._event_status.cancel_events(
+                    self, self._event_columns, event, result.match_groups, rule
+                )
+                return
+
+            # Remember the rule id that this event originated from
+            event["rule_id"] = rule["id"]
+
+            # Attach optional contact group information for visibility
+            # and eventually for notifications
+            self._add_rule_contact_groups_to_event(rule, event)
+
+            # Store groups from matching this event. In order to make
+            # persistence easier, we do not save them as list but join
+            # them on ASCII-1.
+            match_groups_message = result.match_groups.get("match_groups_message", ())
+            assert match_groups_message is not False
+            event["match_groups"] = match_groups_message
+
+            match_groups_syslog_application = result.match_groups.get(
+                "match_groups_syslog_application", ()
+            )
+            assert match_groups_syslog_application is not False
+            event["match_groups_syslog_application"] = match_groups_syslog_application
+
+            self.rewrite_event(rule, event, result.match_groups)
+
+            # Lookup the monitoring core hosts and add the core host
+            # name to the event when one can be matched.
+            #
+            # Needs to be done AFTER event rewriting, because the rewriting
+            # may change the "host" field.
+            #
+            # For the moment we have no rule/condition matching on this
+            # field. So we only add the core host info for matched events.
+            self._add_core_host_to_new_event(event)
+
+            if "count" in rule:
+                count = rule["count"]
+                # Check if a matching event already exists that we need to
+                # count up. If the count reaches the limit, the event will
+                # be opened and its rule actions performed.
+                existing_event = self._event_status.count_event(self, event, rule, count)
+                if existing_event:
                     if "delay" in rule:
                         if self._config["debug_rules"]:
                             self._logger.info(
                                 "Event opening will be delayed for %d seconds", rule["delay"]
                             )
-                        event["delay_until"] = time.time() + rule["delay"]
-                        event["phase"] = "delayed"
+                        existing_event["delay_until"] = time.time() + rule["delay"]
+                        existing_event["phase"] = "delayed"
+                        self._event_status.event_changed(existing_event)
                     else:
-                        event["phase"] = "open"
-
-                    if self.new_event_respecting_limits(event) and event["phase"] == "open":
                         event_has_opened(
                             self._history,
                             self.settings,
@@ -1527,13 +1641,44 @@ class EventServer(ECServerThread):
                             self.host_config,
                             self._event_columns,
                             rule,
-                            event,
+                            existing_event,
                         )
-                        if rule.get("autodelete"):
-                            event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(event, "AUTODELETE")
-                return
+
+                    self._history.add(existing_event, "COUNTREACHED")
+
+                    if "delay" not in rule and rule.get("autodelete"):
+                        existing_event["phase"] = "closed"
+                        with self._event_status.lock:
+                            self._event_status.remove_event(existing_event, "AUTODELETE")
+            elif "expect" in rule:
+                self._event_status.count_expected_event(self, event)
+            else:
+                if "delay" in rule:
+                    if self._config["debug_rules"]:
+                        self._logger.info(
+                            "Event opening will be delayed for %d seconds", rule["delay"]
+                        )
+                    event["delay_until"] = time.time() + rule["delay"]
+                    event["phase"] = "delayed"
+                else:
+                    event["phase"] = "open"
+
+                if self.new_event_respecting_limits(event) and event["phase"] == "open":
+                    event_has_opened(
+                        self._history,
+                        self.settings,
+                        self._config,
+                        self._logger,
+                        self.host_config,
+                        self._event_columns,
+                        rule,
+                        event,
+                    )
+                    if rule.get("autodelete"):
+                        event["phase"] = "closed"
+                        with self._event_status.lock:
+                            self._event_status.remove_event(event, "AUTODELETE")
+            return
 
         # End of loop over rules.
         if self._config["archive_orphans"]:
@@ -1574,18 +1719,6 @@ class EventServer(ECServerThread):
         except Exception:
             return False
 
-    def event_rule_matches(self, rule: Rule, event: Event) -> MatchResult:
-        """
-        Checks if an event matches a rule. Returns either MatchFailure (no match)
-        or a MatchSuccess with a pair of matchtype, groups, where matchtype is False for a
-        normal match and True for a cancelling match and the groups is a tuple
-        if matched regex groups in either text (normal) or match_ok (cancelling)
-        match.
-        """
-        self._perfcounters.count("rule_tries")
-        with self._lock_configuration:
-            return self._rule_matcher.event_rule_matches(rule, event)
-
     def rewrite_event(  # pylint: disable=too-many-branches
         self, rule: Rule, event: Event, groups: MatchGroups, set_first: bool = True
     ) -> None:
@@ -2328,12 +2461,14 @@ class StatusTableEvents(StatusTable):
         self._event_status = event_status
 
     def _enumerate(self, query: QueryGET) -> Iterable[list[Any]]:
-        for event in self._event_status.get_events():
-            # Optimize filters that are set by the check_mkevents active check. Since users
-            # may have a lot of those checks running, it is a good idea to optimize this.
-            if query.only_host and not filter_operator_in(event["host"], query.only_host):
-                continue
-
+        # Optimize filters that are set by the check_mkevents active check. Since users
+        # may have a lot of those checks running, it is a good idea to optimize this.
+        events = (
+            self._event_status.events_of_hosts(query.only_host)
+            if query.only_host
+            else self._event_status.get_events()
+        )
+        for event in events:
             row = []
             for column_name in self.column_names:
                 try:
@@ -2719,6 +2854,7 @@ class StatusServer(ECServerThread):
                 event["contact"] = contact
             if user:
                 event["owner"] = user
+            self._event_status.event_changed(event)
             self._history.add(event, "UPDATE", user)
 
     def handle_command_create(self, arguments: list[str]) -> None:
@@ -2739,6 +2875,7 @@ class StatusServer(ECServerThread):
             event["state"] = int(newstate)
             if user:
                 event["owner"] = user
+            self._event_status.event_changed(event)
             self._history.add(event, "CHANGESTATE", user)
 
     def handle_command_reload(self) -> None:
@@ -2786,6 +2923,7 @@ class StatusServer(ECServerThread):
         event: Event | None = self._event_status.event(int(event_id))
         if user and event is not None:
             event["owner"] = user
+            self._event_status.event_changed(event)
 
         # TODO: De-duplicate code from do_event_actions()
         if action_id == "@NOTIFY" and event is not None:
@@ -2969,6 +3107,32 @@ def run_eventd(  # pylint: disable=too-many-branches
 #   '----------------------------------------------------------------------'
 
 
+_IndexKey = TypeVar("_IndexKey")
+
+# Avoid rewriting the snapshot all the time when only a few events are open
+_MIN_JOURNAL_LENGTH_FOR_COMPACTION = 1000
+
+
+def _add_to_index(index: dict[_IndexKey, dict[int, Event]], key: _IndexKey, event: Event) -> None:
+    bucket = index.setdefault(key, {})
+    if bucket and event["id"] < next(reversed(bucket)):
+        # Only happens when an event is re-indexed, keep the order of the IDs
+        bucket[event["id"]] = event
+        index[key] = dict(sorted(bucket.items()))
+    else:
+        bucket[event["id"]] = event
+
+
+def _remove_from_index(
+    index: dict[_IndexKey, dict[int, Event]], key: _IndexKey, event: Event
+) -> None:
+    if (bucket := index.get(key)) is None:
+        return
+    bucket.pop(event["id"], None)
+    if not bucket:
+        del index[key]
+
+
 class EventStatus:
     """
     Keeps the current Event-Status.
@@ -2989,6 +3153,8 @@ class EventStatus:
         self.lock = threading.Lock()
         self._history = history
         self._logger = logger
+        # Journal entries are only valid for the snapshot of the same generation
+        self._journal_generation = 0
         self.flush()
 
     def reload_configuration(self, config: Config) -> None:
@@ -3001,7 +3167,9 @@ class EventStatus:
         self._rule_stats: dict[str, int] = {}
         # needed for expecting rules
         self._interval_starts: dict[str, int] = {}
+        self._index_events()
         self._initialize_event_limit_status()
+        self._reset_journal(needs_snapshot=True)
 
         # TODO: might introduce some performance counters, like:
         # - number of received messages
@@ -3013,10 +3181,56 @@ class EventStatus:
         return self._events
 
     def event(self, eid: int) -> Event | None:
+        return self._events_by_id.get(eid)
+
+    def events_of_rule(self, rule_id: str | None) -> list[Event]:
+        """The events of a rule, oldest first"""
+        return list(self._events_by_rule.get(rule_id, {}).values())
+
+    def events_of_hosts(self, hosts: Iterable[str]) -> list[Event]:
+        """The events of the given hosts (compared case insensitively), oldest first"""
+        events = [
+            event
+            for host in {host.lower() for host in hosts}
+            for event in self._events_by_host.get(host, {}).values()
+        ]
+        return sorted(events, key=lambda event: event["id"])
+
+    # The secondary indexes below map to insertion ordered dicts of the open events
+    # by their ID. Since the IDs are increasing, the iteration order of each index
+    # is the same as the one of self._events. All of them are updated by new_event()
+    # and remove_event(). Code changing the host or application of an open event has
+    # to use _reindex_event().
+    def _index_events(self) -> None:
+        self._events_by_id: dict[int, Event] = {}
+        self._events_by_rule: dict[str | None, dict[int, Event]] = {}
+        self._events_by_origin: dict[tuple[str | None, str, str], dict[int, Event]] = {}
+        self._events_by_host: dict[str, dict[int, Event]] = {}
         for event in self._events:
-            if event["id"] == eid:
-                return event
-        return None
+            self._index_add(event)
+
+    @staticmethod
+    def _origin_key(event: Event) -> tuple[str | None, str, str]:
+        return event["rule_id"], event["host"], event["application"]
+
+    def _index_add(self, event: Event) -> None:
+        self._events_by_id[event["id"]] = event
+        _add_to_index(self._events_by_rule, event["rule_id"], event)
+        _add_to_index(self._events_by_origin, self._origin_key(event), event)
+        _add_to_index(self._events_by_host, event["host"].lower(), event)
+
+    def _index_remove(self, event: Event) -> None:
+        self._events_by_id.pop(event["id"], None)
+        _remove_from_index(self._events_by_rule, event["rule_id"], event)
+        _remove_from_index(self._events_by_origin, self._origin_key(event), event)
+        _remove_from_index(self._events_by_host, event["host"].lower(), event)
+
+    def _reindex_event(self, event: Event, *changes: Event) -> None:
+        self._index_remove(event)
+        for change in changes:
+            event.update(change)
+        self._index_add(event)
+        self.event_changed(event)
 
     def interval_start(self, rule_id: str, interval: int) -> int:
         """
@@ -3075,10 +3289,45 @@ class EventStatus:
         self._events = status["events"]
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
+        self._index_events()
+        self._reset_journal(needs_snapshot=True)
+
+    # The event state is persisted as a snapshot of the complete status plus a journal
+    # of the events which have been created, changed or removed since then. Between two
+    # snapshots save_status() only appends the changes to the journal, the snapshot is
+    # rewritten when the journal has grown as large as the snapshot.
+    # New and removed events are tracked automatically, in-place changes of open events
+    # have to be announced via event_changed(). Missing that only loses the change if the
+    # EC is not stopped properly, the final save_status() writes a snapshot.
+
+    def event_changed(self, event: Event) -> None:
+        """Persist an in-place change of an open event with the next save_status()"""
+        self._changed_event_ids.add(event["id"])
+
+    def _reset_journal(self, *, needs_snapshot: bool) -> None:
+        self._changed_event_ids: set[int] = set()
+        self._removed_event_ids: set[int] = set()
+        self._journal_length = 0
+        self._needs_snapshot = needs_snapshot
+
+    def _needs_compaction(self) -> bool:
+        return self._needs_snapshot or self._journal_length >= max(
+            len(self._events), _MIN_JOURNAL_LENGTH_FOR_COMPACTION
+        )
+
+    def save_status(self, *, compact: bool = False) -> None:
+        if compact or self._needs_compaction():
+            self._save_snapshot()
+        else:
+            self._append_to_journal()
 
-    def save_status(self) -> None:
+    def _save_snapshot(self) -> None:
         now = time.time()
-        status = self.pack_status()
+        self._journal_generation += 1
+        status: dict[str, Any] = {
+            **self.pack_status(),
+            "journal_generation": self._journal_generation,
+        }
         path = self.settings.paths.status_file.value
         path_new = path.parent / (path.name + ".new")
         # Believe it or not: cPickle is more than two times slower than repr()
@@ -3087,9 +3336,77 @@ class EventStatus:
             f.flush()
             os.fsync(f.fileno())
         path_new.rename(path)
+        # A left over journal would be ignored because of its old generation
+        self.settings.paths.status_journal_file.value.unlink(missing_ok=True)
+        self._reset_journal(needs_snapshot=False)
         elapsed = time.time() - now
         self._logger.log(VERBOSE, "Saved event state to %s in %.3fms.", path, elapsed * 1000)
 
+    def _append_to_journal(self) -> None:
+        if not (self._changed_event_ids or self._removed_event_ids):
+            return
+        now = time.time()
+        changed_events = [
+            event
+            for event_id in sorted(self._changed_event_ids)
+            if (event := self._events_by_id.get(event_id)) is not None
+        ]
+        removed_event_ids = sorted(self._removed_event_ids)
+        entry = {
+            "journal_generation": self._journal_generation,
+            "next_event_id": self._next_event_id,
+            "events": changed_events,
+            "removed_event_ids": removed_event_ids,
+            "rule_stats": self._rule_stats,
+            "interval_starts": self._interval_starts,
+        }
+        path = self.settings.paths.status_journal_file.value
+        with path.open(mode="ab") as f:
+            f.write((repr(entry) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_length += len(changed_events) + len(removed_event_ids)
+        self._changed_event_ids = set()
+        self._removed_event_ids = set()
+        elapsed = time.time() - now
+        self._logger.log(
+            VERBOSE,
+            "Saved %d changed and %d removed events to %s in %.3fms.",
+            len(changed_events),
+            len(removed_event_ids),
+            path,
+            elapsed * 1000,
+        )
+
+    def _replay_journal(self) -> None:
+        path = self.settings.paths.status_journal_file.value
+        if not path.exists():
+            return
+        events_by_id = {event["id"]: event for event in self._events}
+        num_entries = 0
+        with path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = ast.literal_eval(line)
+                except (SyntaxError, ValueError):
+                    # Only the last entry can be incomplete
+                    self._logger.warning("Ignoring incomplete entry at the end of %s", path)
+                    break
+                if entry["journal_generation"] != self._journal_generation:
+                    continue
+                num_entries += 1
+                self._next_event_id = entry["next_event_id"]
+                self._rule_stats = entry["rule_stats"]
+                self._interval_starts = entry["interval_starts"]
+                for event in entry["events"]:
+                    events_by_id[event["id"]] = event
+                for event_id in entry["removed_event_ids"]:
+                    events_by_id.pop(event_id, None)
+                self._journal_length += len(entry["events"]) + len(entry["removed_event_ids"])
+        # New events have higher IDs, so this keeps the order of the events
+        self._events = list(events_by_id.values())
+        self._logger.info("Replayed %d entries of the event state journal %s.", num_entries, path)
+
     def reset_counters(self, rule_id: str | None) -> None:
         if rule_id:
             if rule_id in self._rule_stats:
@@ -3107,7 +3424,10 @@ class EventStatus:
                 self._events = status["events"]
                 self._rule_stats = status["rule_stats"]
                 self._interval_starts = status.get("interval_starts", {})
+                self._journal_generation = status.get("journal_generation", 0)
                 self._logger.info("Loaded event state from %s.", path)
+                self._reset_journal(needs_snapshot=False)
+                self._replay_journal()
             except Exception:
                 self._logger.exception(f"Error loading event state from {path}")
                 raise
@@ -3123,6 +3443,7 @@ class EventStatus:
                 event_server.add_core_host_to_event(event)
                 event["host_in_downtime"] = False
 
+        self._index_events()
         # core_host is needed to initialize the status
         self._initialize_event_limit_status()
 
@@ -3163,6 +3484,8 @@ class EventStatus:
         event["id"] = self._next_event_id
         self._next_event_id += 1
         self._events.append(event)
+        self._index_add(event)
+        self._changed_event_ids.add(event["id"])
         self.num_existing_events += 1
         self._count_event_add(event)
         self._history.add(event, "NEW")
@@ -3177,6 +3500,9 @@ class EventStatus:
     def remove_event(self, event: Event, delete_reason: HistoryWhat, user: str = "") -> None:
         try:
             self._events.remove(event)
+            self._index_remove(event)
+            self._changed_event_ids.discard(event["id"])
+            self._removed_event_ids.add(event["id"])
             self._history.add(event, delete_reason, user)
             self._count_event_remove(event)
         except ValueError:
@@ -3197,14 +3523,13 @@ class EventStatus:
 
     # protected by self.lock
     def _remove_oldest_event_of_rule(self, rule_id: str) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event, "AUTODELETE")
-                return
+        for event in self._events_by_rule.get(rule_id, {}).values():
+            self.remove_event(event, "AUTODELETE")
+            return
 
     # protected by self.lock
     def _remove_oldest_event_of_host(self, hostname: str) -> None:
-        for event in self._events:
+        for event in self._events_by_host.get(hostname.lower(), {}).values():
             if event["host"] == hostname:
                 self.remove_event(event, "AUTODELETE")
                 return
@@ -3233,10 +3558,8 @@ class EventStatus:
         """
         with self.lock:
             to_delete = []
-            for event in self._events:
-                if event["rule_id"] == rule["id"] and self.cancelling_match(
-                    match_groups, new_event, event, rule
-                ):
+            for event in self._cancelling_candidates(new_event, match_groups, rule):
+                if self.cancelling_match(match_groups, new_event, event, rule):
                     # Fill a few fields of the cancelled event with data from
                     # the cancelling event so that action scripts have useful
                     # values and the logfile entry if more relevant.
@@ -3283,6 +3606,34 @@ class EventStatus:
             for e in to_delete:
                 self.remove_event(e, "CANCELLED")
 
+    def _cancelling_candidates(
+        self, new_event: Event, match_groups: MatchGroups, rule: Rule
+    ) -> list[Event]:
+        """The events of the rule with the host (and application) the new event cancels
+
+        This has to be in sync with the host and application checks in cancelling_match(),
+        the remaining checks are done there."""
+        if self._config["debug_rules"]:
+            # Let cancelling_match() explain why the other events are not cancelled
+            return self.events_of_rule(rule["id"])
+        # Only the *_ok match groups are there, see cancelling_match(). They are missing if
+        # the rule has no such cancelling condition.
+        match_groups = match_groups.copy()
+        match_groups["match_groups_message"] = match_groups.get("match_groups_message_ok", False)
+        match_groups["match_groups_syslog_application"] = match_groups.get(
+            "match_groups_syslog_application_ok", False
+        )
+        host = new_event["host"]
+        if "set_host" in rule:
+            host = replace_groups(rule["set_host"], host, match_groups)
+        if "cancel_application" in rule:
+            return [event for event in self.events_of_rule(rule["id"]) if event["host"] == host]
+
+        application = new_event["application"]
+        if "set_application" in rule:
+            application = replace_groups(rule["set_application"], application, match_groups)
+        return list(self._events_by_origin.get((rule["id"], host, application), {}).values())
+
     def cancelling_match(  # pylint: disable=too-many-branches
         self, match_groups: MatchGroups, new_event: Event, event: Event, rule: Rule
     ) -> bool:
@@ -3291,10 +3642,10 @@ class EventStatus:
         # The match_groups of the canceling match only contain the *_ok match groups
         # Since the rewrite definitions are based on the positive match, we need to
         # create some missing keys. O.o
-        match_groups["match_groups_message"] = match_groups["match_groups_message_ok"]
-        match_groups["match_groups_syslog_application"] = match_groups[
-            "match_groups_syslog_application_ok"
-        ]
+        match_groups["match_groups_message"] = match_groups.get("match_groups_message_ok", False)
+        match_groups["match_groups_syslog_application"] = match_groups.get(
+            "match_groups_syslog_application_ok", False
+        )
 
         # Note: before we compare host and application we need to
         # apply the rewrite rules to the event. Because if in the previous
@@ -3410,12 +3761,11 @@ class EventStatus:
                 preserve["comment"] = found["comment"]
             if "contact" in found:
                 preserve["contact"] = found["contact"]
-        found.update(event)
-        found.update(preserve)
+        self._reindex_event(found, event, preserve)
 
     def count_expected_event(self, event_server: EventServer, event: Event) -> None:
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self._events_by_rule.get(event["rule_id"], {}).values():
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -3425,7 +3775,7 @@ class EventStatus:
         event_server.new_event_respecting_limits(event)
 
     def count_event(
-        self, event_server: EventServer, event: Event, rule: str, count: dict[str, int]
+        self, event_server: EventServer, event: Event, rule: Rule, count: dict[str, int]
     ) -> Event | None:
         """
         Find previous occurrence of this event and account for
@@ -3434,33 +3784,36 @@ class EventStatus:
         since the event has been created because the count was too
         low in the specified period of time.
         """
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
+        if count["separate_host"] and count["separate_application"]:
+            candidates = self._events_by_origin.get(self._origin_key(event), {})
+        else:
+            candidates = self._events_by_rule.get(event["rule_id"], {})
+        for ev in list(candidates.values()):
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+            if count["separate_host"] and ev["host"] != event["host"]:
+                continue  # treat events with separated hosts separately
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                if (
-                    count.get("count_duration") is not None
-                    and ev["first"] + count["count_duration"] < event["time"]
-                ):
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            if (
+                count.get("count_duration") is not None
+                and ev["first"] + count["count_duration"] < event["time"]
+            ):
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3955,7 +4308,7 @@ def main() -> None:  # pylint: disable=too-many-branches
         os.close(pipe)  # Close pipe
 
         logger.log(VERBOSE, "Saving final event state")
-        event_status.save_status()
+        event_status.save_status(compact=True)
 
         logger.log(VERBOSE, "Cleaning up sockets")
         settings.paths.unix_socket.value.unlink()
@@ -23,7 +23,9 @@ class Perfcounters:
         "messages",
         "rule_tries",
         "rule_hits",
+        "rule_candidates",  # rules preselected by the rule optimizer, divide by messages
         "drops",
+        "queue_drops",  # received messages dropped because of a full queue
         "overflows",
         "events",
         "connects",
@@ -51,9 +53,9 @@ class Perfcounters:
 
         self._logger = logger.getChild("Perfcounters")
 
-    def count(self, counter: str) -> None:
+    def count(self, counter: str, value: int = 1) -> None:
         with self._lock:
-            self._counters[counter] += 1
+            self._counters[counter] += value
 
     def count_time(self, counter: str, ptime: float) -> None:
         with self._lock:
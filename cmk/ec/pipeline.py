@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Decoupling of receiving, parsing and processing of incoming messages
+
+The event server thread only drains its sockets and hands the raw data
+over to a queue. A pool of parser threads takes the data from the queue and
+turns it into handlers, e.g. for creating an event from a syslog line and
+matching it against the rules. A single commit thread executes these handlers
+strictly in the order the data has been received, because processing an event
+changes the event status (counting, cancelling, ...). The amount of data in
+the pipeline, from being queued until being committed, is bounded.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable, Sequence
+from logging import Logger
+
+from setproctitle import setthreadtitle
+
+Handler = Callable[[], None]
+# Turns received data into the handlers to be executed by the commit stage
+Parser = Callable[[], Sequence[Handler]]
+
+
+class IngestionPipeline:
+    """Bounded pipeline of received data with parser threads and an ordered commit stage"""
+
+    def __init__(
+        self,
+        logger: Logger,
+        *,
+        queue_len: int,
+        num_parsers: int,
+        commit: Callable[[Handler], None],
+    ) -> None:
+        super().__init__()
+        self._logger = logger
+        self._commit = commit
+        self._queue: queue.Queue[tuple[int, Parser] | None] = queue.Queue()
+        # Data being parsed or waiting for its predecessors counts as well, otherwise
+        # slow handlers would let the reorder buffer grow without limit.
+        self._slots = threading.Semaphore(queue_len) if queue_len > 0 else None
+        # Sequence numbers are only consumed by successfully queued data, so
+        # the commit stage never waits for a gap.
+        self._submit_lock = threading.Lock()
+        self._next_seq = 0
+        # Reorder buffer: parsed handlers waiting for their predecessors
+        self._parsed: dict[int, Sequence[Handler]] = {}
+        self._parsed_cond = threading.Condition()
+        self._num_parsers = num_parsers
+        self._parsers_running = 0
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def queue_length(self) -> int:
+        return self._queue.qsize() + len(self._parsed)
+
+    def start(self) -> None:
+        self._parsers_running = self._num_parsers
+        self._threads = [
+            threading.Thread(
+                target=self._parse_loop, name=f"EventParser-{nr}", args=(f"EventParser-{nr}",)
+            )
+            for nr in range(self._num_parsers)
+        ]
+        self._threads.append(threading.Thread(target=self._commit_loop, name="EventCommitter"))
+        for thread in self._threads:
+            thread.start()
+        self._logger.info("Started event pipeline with %d parser threads", self._num_parsers)
+
+    def stop(self) -> None:
+        """Process all pending data and stop the threads"""
+        for _nr in range(self._num_parsers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._logger.info("Stopped event pipeline")
+
+    def submit(self, parser: Parser, *, lossy: bool) -> bool:
+        """Queue received data for parsing
+
+        Datagrams (lossy=True) are dropped when the queue is full, so that
+        the receiver is never blocked and the kernel buffers don't overflow.
+        Data from streams and the pipe blocks the receiver instead, the
+        senders will see the back pressure. Returns False if the data has
+        been dropped."""
+        with self._submit_lock:
+            if self._slots is not None and not self._slots.acquire(blocking=not lossy):
+                return False
+            self._queue.put((self._next_seq, parser))
+            self._next_seq += 1
+            return True
+
+    def _parse_loop(self, name: str) -> None:
+        setthreadtitle(name)
+        try:
+            while (item := self._queue.get()) is not None:
+                seq, parser = item
+                try:
+                    handlers = parser()
+                except Exception:
+                    self._logger.exception("Exception parsing received data (skipping it)")
+                    handlers = []
+                with self._parsed_cond:
+                    self._parsed[seq] = handlers
+                    self._parsed_cond.notify_all()
+        finally:
+            with self._parsed_cond:
+                self._parsers_running -= 1
+                self._parsed_cond.notify_all()
+
+    def _commit_loop(self) -> None:
+        setthreadtitle("EventCommitter")
+        seq = 0
+        while True:
+            with self._parsed_cond:
+                while seq not in self._parsed:
+                    if self._parsers_running == 0 and not self._parsed:
+                        return
+                    self._parsed_cond.wait()
+                handlers = self._parsed.pop(seq)
+            seq += 1
+            for handler in handlers:
+                try:
+                    self._commit(handler)
+                except Exception:
+                    self._logger.exception("Exception processing received data (skipping it)")
+            if self._slots is not None:
+                self._slots.release()
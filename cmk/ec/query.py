@@ -47,9 +47,9 @@ class Query:
 
 
 def filter_operator_in(a: Any, b: Any) -> bool:
-    """Implemented as a named function, as it is used in a second filter
-    cmk.ec.main: StatusTableEvents._enumerate
-    not implemented as regex/IGNORECASE due to performance"""
+    """Implemented as a named function, not as regex/IGNORECASE due to performance
+
+    Needs to be in sync with the host index used by cmk.ec.main: StatusTableEvents._enumerate"""
     return a.lower() in (e.lower() for e in b)
 
 
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Preselection of the rules that can possibly match an event
+
+The rule hash of the event server only buckets the rules by syslog
+facility and priority. Within such a bucket every rule would have to be
+tried against every message. This module computes for each rule the
+literal strings the message text, host name and syslog application *must*
+contain for the rule to match at all. All literals of a bucket are then
+searched with a single alternation regex, and only the rules whose
+requirements are met are handed to the (expensive) rule matcher.
+
+The prefilter is strictly conservative: A rule for which no requirement
+can be derived is always a candidate, so the matching outcome never
+changes, only the number of rules which are tried.
+"""
+
+import re
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+from .config import Rule, TextPattern
+from .event import Event
+
+if sys.version_info < (3, 11):
+    import sre_constants
+    import sre_parse
+else:
+    # The public modules are deprecated since Python 3.11
+    from re import _constants as sre_constants  # type: ignore[attr-defined]
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+
+# A requirement is fulfilled if at least one of the literals is contained.
+Requirement = frozenset[str]
+
+# Only use literals which are long enough to actually reduce the candidates.
+_MIN_LITERAL_LENGTH = 3
+
+
+def _is_usable(requirement: Requirement) -> bool:
+    return all(len(l) >= _MIN_LITERAL_LENGTH and l.isascii() for l in requirement)
+
+
+def _requirements(parsed: sre_parse.SubPattern) -> Iterator[Requirement]:
+    """Yield requirements of a parsed regex sequence, each of them is necessary for a match"""
+    run: list[str] = []
+    op: Any
+    av: Any
+    for op, av in parsed.data:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+
+        if run:
+            yield frozenset(["".join(run).lower()])
+            run = []
+
+        if op is sre_constants.SUBPATTERN:
+            # (group, add_flags, del_flags, pattern)
+            if not (av[1] or av[2]):  # local flags could change the meaning of the literals
+                yield from _requirements(av[3])
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] >= 1:
+            # (min, max, pattern), the pattern is needed at least once
+            yield from _requirements(av[2])
+        elif op is sre_constants.BRANCH:
+            # (None, branches), one of the branches is needed
+            alternatives: set[str] = set()
+            for branch in av[1]:
+                requirement = _best_requirement(branch)
+                if requirement is None:
+                    break
+                alternatives.update(requirement)
+            else:
+                yield frozenset(alternatives)
+
+    if run:
+        yield frozenset(["".join(run).lower()])
+
+
+def _best_requirement(parsed: sre_parse.SubPattern) -> Requirement | None:
+    """Choose the most selective usable requirement, i.e. the one with the longest literals"""
+    usable = [r for r in _requirements(parsed) if _is_usable(r)]
+    if not usable:
+        return None
+    return max(usable, key=lambda r: min(len(l) for l in r))
+
+
+def pattern_requirement(pattern: TextPattern) -> Requirement | None:
+    """Derive the literals one of which a text must contain to match the pattern
+
+    The text is expected to be compared in lower case. None means that
+    nothing can be derived, e.g. because there is no pattern at all.
+
+    >>> sorted(pattern_requirement("Link Down"))
+    ['link down']
+    >>> sorted(pattern_requirement(re.compile("(eth|bond)[0-9]+ is down", re.IGNORECASE)))
+    [' is down']
+    >>> sorted(pattern_requirement(re.compile("^(failed|denied)", re.IGNORECASE)))
+    ['denied', 'failed']
+    >>> pattern_requirement(re.compile("a|.*", re.IGNORECASE)) is None
+    True
+    """
+    if pattern is None:
+        return None
+    if isinstance(pattern, str):
+        requirement = frozenset([pattern.lower()])
+        return requirement if _is_usable(requirement) else None
+    try:
+        return _best_requirement(sre_parse.parse(pattern.pattern, pattern.flags))
+    except (sre_constants.error, RecursionError):
+        return None
+
+
+def _combined_requirement(rule: Rule, keys: Sequence[str]) -> Requirement | None:
+    """The text has to match one of the given patterns, so any of their literals will do"""
+    alternatives: set[str] = set()
+    for key in keys:
+        if key not in rule:
+            continue
+        requirement = pattern_requirement(rule[key])  # type: ignore[literal-required]
+        if requirement is None:
+            return None
+        alternatives.update(requirement)
+    return frozenset(alternatives) if alternatives else None
+
+
+def message_requirement(rule: Rule) -> Requirement | None:
+    # Without a "match" condition every message matches
+    if "match" not in rule:
+        return None
+    return _combined_requirement(rule, ["match", "match_ok"])
+
+
+def application_requirement(rule: Rule) -> Requirement | None:
+    # Contrary to the message, a missing application condition does not match
+    # by itself: If only cancel_application is set, it has to match.
+    return _combined_requirement(rule, ["match_application", "cancel_application"])
+
+
+def host_requirement(rule: Rule) -> str | None:
+    """Hosts are matched completely, so a plain host name needs to be equal"""
+    pattern = rule.get("match_host")
+    if isinstance(pattern, str) and pattern:
+        return pattern.lower()
+    return None
+
+
+class _LiteralSearcher:
+    """Finds all literals contained in a text with one regex scan
+
+    The lookahead makes the regex engine try the alternation at every
+    position of the text. Since the longest alternative is preferred, a
+    literal which is a prefix of another literal at the same position would
+    be hidden. This is handled by remembering for every literal all other
+    literals that are substrings of it.
+    """
+
+    def __init__(self, literals: Iterable[str]) -> None:
+        ordered = sorted(set(literals), key=lambda l: (-len(l), l))
+        self._regex = (
+            re.compile("(?=(%s))" % "|".join(re.escape(l) for l in ordered)) if ordered else None
+        )
+        self._literals = ordered
+        # Computed lazily, most literals will never be found
+        self._implied: dict[str, frozenset[str]] = {}
+
+    def _implied_by(self, literal: str) -> frozenset[str]:
+        try:
+            return self._implied[literal]
+        except KeyError:
+            implied = frozenset(other for other in self._literals if other in literal)
+            self._implied[literal] = implied
+            return implied
+
+    def search(self, text: str) -> set[str]:
+        found: set[str] = set()
+        if self._regex is None:
+            return found
+        for literal in {m.group(1) for m in self._regex.finditer(text)}:
+            found.update(self._implied_by(literal))
+        return found
+
+
+class RulePrefilter:
+    """Preselects the rules of one facility/priority bucket
+
+    The rules keep their original order, which is relevant for the first
+    match and for skipping rule packs.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self._rules = list(rules)
+        self._unfiltered: list[int] = []
+        self._by_literal: dict[str, list[int]] = {}
+        self._by_host: dict[str, list[int]] = {}
+        self._by_application: dict[str, list[int]] = {}
+        # Rules which additionally need a host or application condition
+        self._host_conditions: dict[int, str] = {}
+        self._application_conditions: dict[int, Requirement] = {}
+
+        message_literals: set[str] = set()
+        application_literals: set[str] = set()
+        for index, rule in enumerate(self._rules):
+            if rule.get("invert_matching"):
+                self._unfiltered.append(index)
+                continue
+
+            host = host_requirement(rule)
+            message = message_requirement(rule)
+            application = application_requirement(rule)
+
+            if message is not None:
+                for literal in message:
+                    self._by_literal.setdefault(literal, []).append(index)
+                message_literals.update(message)
+                if host is not None:
+                    self._host_conditions[index] = host
+                if application is not None:
+                    self._application_conditions[index] = application
+                    application_literals.update(application)
+            elif host is not None:
+                self._by_host.setdefault(host, []).append(index)
+                if application is not None:
+                    self._application_conditions[index] = application
+                    application_literals.update(application)
+            elif application is not None:
+                for literal in application:
+                    self._by_application.setdefault(literal, []).append(index)
+                application_literals.update(application)
+            else:
+                self._unfiltered.append(index)
+
+        self._message_searcher = _LiteralSearcher(message_literals)
+        self._application_searcher = _LiteralSearcher(application_literals)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    @property
+    def num_unfiltered(self) -> int:
+        return len(self._unfiltered)
+
+    def candidates(self, event: Event) -> list[Rule]:
+        text = event.get("text", "")
+        application = event.get("application", "")
+        if not (text.isascii() and application.isascii()):
+            # Unicode case folding is not equivalent to re.IGNORECASE, play safe.
+            return self._rules
+
+        found_message = self._message_searcher.search(text.lower())
+        found_application = self._application_searcher.search(application.lower())
+        host = event.get("host", "").lower()
+
+        indices = set(self._unfiltered)
+        indices.update(self._by_host.get(host, ()))
+        for literal in found_message:
+            indices.update(self._by_literal[literal])
+        for literal in found_application:
+            indices.update(self._by_application[literal])
+
+        return [
+            self._rules[index]
+            for index in sorted(indices)
+            if self._host_conditions.get(index, host) == host
+            and (
+                index not in self._application_conditions
+                or not found_application.isdisjoint(self._application_conditions[index])
+            )
+        ]
@@ -34,11 +34,13 @@ class Paths(NamedTuple):
     pid_file: AnnotatedPath
     log_file: AnnotatedPath
     history_dir: AnnotatedPath
+    history_segments_dir: AnnotatedPath
     messages_dir: AnnotatedPath
     master_config_file: AnnotatedPath
     slave_status_file: AnnotatedPath
     spool_dir: AnnotatedPath
     status_file: AnnotatedPath
+    status_journal_file: AnnotatedPath
     status_server_profile: AnnotatedPath
     event_server_profile: AnnotatedPath
     compiled_mibs_dir: AnnotatedPath
@@ -64,11 +66,15 @@ def _default_paths(omd_root: Path, default_config_dir: Path) -> Paths:
         pid_file=AnnotatedPath("PID file", run_dir / "pid"),
         log_file=AnnotatedPath("log file", omd_root / "var/log/mkeventd.log"),
         history_dir=AnnotatedPath("history directory", state_dir / "history"),
+        history_segments_dir=AnnotatedPath(
+            "history segments directory", state_dir / "history_segments"
+        ),
         messages_dir=AnnotatedPath("messages directory", state_dir / "messages"),
         master_config_file=AnnotatedPath("master configuraion", state_dir / "master_config"),
         slave_status_file=AnnotatedPath("slave status", state_dir / "slave_status"),
         spool_dir=AnnotatedPath("spool directory", state_dir / "spool"),
         status_file=AnnotatedPath("status file", state_dir / "status"),
+        status_journal_file=AnnotatedPath("status journal", state_dir / "status.journal"),
         status_server_profile=AnnotatedPath(
             "status server profile", state_dir / "StatusServer.profile"
         ),
@@ -187,6 +193,26 @@ class ECArgumentParser(ArgumentParser):
             action="store_true",
             help="create performance profile for event thread",
         )
+        self.add_argument(
+            "--parser-threads",
+            metavar="N",
+            type=self._non_negative_int,
+            default=2,
+            help=(
+                "number of threads parsing incoming messages, "
+                "0 processes the messages in the event thread (default: %(default)s)"
+            ),
+        )
+        self.add_argument(
+            "--queue-len",
+            metavar="N",
+            type=self._non_negative_int,
+            default=10000,
+            help=(
+                "maximum number of received but not yet processed message blocks, further "
+                "UDP messages are dropped, 0 means unlimited (default: %(default)s)"
+            ),
+        )
 
     @staticmethod
     def _file_descriptor(value: str) -> FileDescriptor:
@@ -199,6 +225,17 @@ class ECArgumentParser(ArgumentParser):
             raise ArgumentTypeError(f"invalid file descriptor value: {repr(value)}") from e
         return FileDescriptor(file_desc)
 
+    @staticmethod
+    def _non_negative_int(value: str) -> int:
+        """A custom argument type for counts, i.e. non-negative integers"""
+        try:
+            number = int(value)
+            if number < 0:
+                raise ValueError
+        except ValueError as e:
+            raise ArgumentTypeError(f"invalid non-negative integer value: {repr(value)}") from e
+        return number
+
 
 # a communication endpoint, e.g. for syslog or SNMP
 EndPoint = PortNumber | FileDescriptor
@@ -226,6 +263,8 @@ class Options(NamedTuple):
     debug: bool
     profile_status: bool
     profile_event: bool
+    parser_threads: int
+    queue_len: int
 
 
 class Settings(NamedTuple):
@@ -250,6 +289,8 @@ def settings(version: str, omd_root: Path, default_config_dir: Path, argv: list[
         debug=args.debug,
         profile_status=args.profile_status,
         profile_event=args.profile_event,
+        parser_threads=args.parser_threads,
+        queue_len=args.queue_len,
     )
     return Settings(paths=paths, options=options)
 
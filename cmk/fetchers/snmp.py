@@ -17,7 +17,7 @@ from cmk.snmplib.type_defs import (
     SNMPHostConfig,
 )
 
-from .snmp_backend import ClassicSNMPBackend, StoredWalkSNMPBackend
+from .snmp_backend import ClassicSNMPBackend, NativeSNMPBackend, StoredWalkSNMPBackend
 
 try:
     from .cee.snmp_backend import inline  # type: ignore[import]
@@ -55,6 +55,9 @@ def make_backend(
     if snmp_config.snmp_backend is SNMPBackendEnum.CLASSIC:
         return ClassicSNMPBackend(snmp_config, logger)
 
+    if snmp_config.snmp_backend is SNMPBackendEnum.NATIVE:
+        return NativeSNMPBackend(snmp_config, logger)
+
     raise NotImplementedError(f"Unknown SNMP backend: {snmp_config.snmp_backend}")
 
 
@@ -5,4 +5,5 @@
 """Home of our open source SNMP backends."""
 
 from .classic import *
+from .native import *
 from .stored_walk import *
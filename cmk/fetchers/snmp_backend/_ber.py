@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""The subset of BER needed to encode and decode SNMP messages (RFC 3416)"""
+
+from collections.abc import Sequence
+from typing import Final, NamedTuple
+
+__all__ = [
+    "BERError",
+    "OIDTuple",
+    "PDU",
+    "VarBind",
+    "decode_elements",
+    "decode_integer",
+    "decode_oid",
+    "decode_pdu",
+    "decode_sequence",
+    "decode_tlv",
+    "encode_integer",
+    "encode_octet_string",
+    "encode_oid",
+    "encode_pdu",
+    "encode_sequence",
+    "encode_tlv",
+    "oid_from_str",
+    "oid_to_str",
+]
+
+INTEGER: Final = 0x02
+OCTET_STRING: Final = 0x04
+NULL: Final = 0x05
+OBJECT_IDENTIFIER: Final = 0x06
+SEQUENCE: Final = 0x30
+
+# Application types
+IP_ADDRESS: Final = 0x40
+COUNTER32: Final = 0x41
+GAUGE32: Final = 0x42
+TIME_TICKS: Final = 0x43
+OPAQUE: Final = 0x44
+COUNTER64: Final = 0x46
+
+# Exceptions of SNMPv2 in place of a value
+NO_SUCH_OBJECT: Final = 0x80
+NO_SUCH_INSTANCE: Final = 0x81
+END_OF_MIB_VIEW: Final = 0x82
+EXCEPTIONS: Final = frozenset((NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW))
+
+# PDU types
+GET_REQUEST: Final = 0xA0
+GET_NEXT_REQUEST: Final = 0xA1
+RESPONSE: Final = 0xA2
+GET_BULK_REQUEST: Final = 0xA5
+REPORT: Final = 0xA8
+
+OIDTuple = tuple[int, ...]
+
+
+class BERError(ValueError):
+    pass
+
+
+class VarBind(NamedTuple):
+    oid: OIDTuple
+    tag: int
+    value: bytes  # the undecoded content
+
+
+class PDU(NamedTuple):
+    tag: int
+    request_id: int
+    # For GETBULK requests these are non-repeaters and max-repetitions
+    error_status: int
+    error_index: int
+    varbinds: Sequence[VarBind]
+
+
+def oid_from_str(oid: str) -> OIDTuple:
+    try:
+        return tuple(int(part) for part in oid.strip(".").split("."))
+    except ValueError:
+        raise BERError(f"Invalid OID {oid}")
+
+
+def oid_to_str(oid: OIDTuple) -> str:
+    return "." + ".".join(map(str, oid))
+
+
+def _encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes((length,))
+    raw = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes((0x80 | len(raw),)) + raw
+
+
+def encode_tlv(tag: int, content: bytes) -> bytes:
+    return bytes((tag,)) + _encode_length(len(content)) + content
+
+
+def encode_integer(value: int, tag: int = INTEGER) -> bytes:
+    # Application types are unsigned, but encoded the same way as INTEGER
+    return encode_tlv(tag, value.to_bytes(value.bit_length() // 8 + 1, "big", signed=True))
+
+
+def encode_octet_string(value: bytes) -> bytes:
+    return encode_tlv(OCTET_STRING, value)
+
+
+def encode_oid(oid: OIDTuple) -> bytes:
+    if len(oid) < 2:
+        oid = (*oid, 0) if oid else (0, 0)
+    content = bytearray()
+    # The first two sub-identifiers are combined into one
+    for sub_id in (oid[0] * 40 + oid[1], *oid[2:]):
+        chunk = [sub_id & 0x7F]
+        sub_id >>= 7
+        while sub_id:
+            chunk.append(0x80 | (sub_id & 0x7F))
+            sub_id >>= 7
+        content.extend(reversed(chunk))
+    return encode_tlv(OBJECT_IDENTIFIER, bytes(content))
+
+
+def encode_sequence(*items: bytes, tag: int = SEQUENCE) -> bytes:
+    return encode_tlv(tag, b"".join(items))
+
+
+def encode_pdu(pdu: PDU) -> bytes:
+    return encode_sequence(
+        encode_integer(pdu.request_id),
+        encode_integer(pdu.error_status),
+        encode_integer(pdu.error_index),
+        encode_sequence(
+            *(
+                encode_sequence(encode_oid(varbind.oid), encode_tlv(varbind.tag, varbind.value))
+                for varbind in pdu.varbinds
+            )
+        ),
+        tag=pdu.tag,
+    )
+
+
+def decode_tlv(data: bytes, offset: int = 0) -> tuple[int, bytes, int]:
+    """Decode the element at offset, return its tag, its content and the next offset"""
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            num_octets = length & 0x7F
+            if not num_octets or offset + num_octets > len(data):
+                raise BERError("Invalid length")
+            length = int.from_bytes(data[offset : offset + num_octets], "big")
+            offset += num_octets
+    except IndexError:
+        raise BERError("Truncated element")
+    end = offset + length
+    if end > len(data):
+        raise BERError("Truncated element")
+    return tag, data[offset:end], end
+
+
+def decode_sequence(data: bytes, tag: int = SEQUENCE) -> list[tuple[int, bytes]]:
+    """Decode a constructed element, return the tags and contents of its elements"""
+    actual_tag, content, _end = decode_tlv(data)
+    if actual_tag != tag:
+        raise BERError(f"Expected tag {tag:#x}, got {actual_tag:#x}")
+    return decode_elements(content)
+
+
+def decode_elements(content: bytes) -> list[tuple[int, bytes]]:
+    """Decode the content of a constructed element"""
+    items = []
+    offset = 0
+    while offset < len(content):
+        item_tag, item_content, offset = decode_tlv(content, offset)
+        items.append((item_tag, item_content))
+    return items
+
+
+def decode_integer(content: bytes, signed: bool = True) -> int:
+    return int.from_bytes(content, "big", signed=signed)
+
+
+def decode_oid(content: bytes) -> OIDTuple:
+    sub_ids = []
+    sub_id = 0
+    for octet in content:
+        sub_id = (sub_id << 7) | (octet & 0x7F)
+        if not octet & 0x80:
+            sub_ids.append(sub_id)
+            sub_id = 0
+    if not sub_ids:
+        return ()
+    first = min(sub_ids[0] // 40, 2)
+    return (first, sub_ids[0] - first * 40, *sub_ids[1:])
+
+
+def decode_pdu(tag: int, content: bytes) -> PDU:
+    items = decode_elements(content)
+    if len(items) != 4:
+        raise BERError("Invalid PDU")
+    varbinds = []
+    for _tag, varbind in decode_elements(items[3][1]):
+        elements = decode_elements(varbind)
+        if len(elements) != 2 or elements[0][0] != OBJECT_IDENTIFIER:
+            raise BERError("Invalid variable binding")
+        (_oid_tag, oid), (value_tag, value) = elements
+        varbinds.append(VarBind(decode_oid(oid), value_tag, value))
+    return PDU(
+        tag=tag,
+        request_id=decode_integer(items[0][1]),
+        error_status=decode_integer(items[1][1]),
+        error_index=decode_integer(items[2][1]),
+        varbinds=varbinds,
+    )
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""SNMPv3 messages with the user-based security model (RFC 3414, RFC 3826, RFC 7860)"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import random
+import time
+from functools import lru_cache
+from typing import Final, NamedTuple
+
+from Cryptodome.Cipher import AES, DES
+
+from cmk.utils.exceptions import MKGeneralException
+
+from ._ber import (
+    BERError,
+    decode_elements,
+    decode_integer,
+    decode_pdu,
+    decode_sequence,
+    encode_integer,
+    encode_octet_string,
+    encode_sequence,
+    OCTET_STRING,
+    PDU,
+    SEQUENCE,
+)
+
+__all__ = [
+    "FLAG_AUTH",
+    "FLAG_PRIV",
+    "UsmMessage",
+    "UsmSecurity",
+    "UsmUser",
+    "localize_key",
+    "password_to_key",
+]
+
+_VERSION_3: Final = 3
+_SECURITY_MODEL_USM: Final = 3
+_MAX_MESSAGE_SIZE: Final = 65507
+
+FLAG_AUTH: Final = 0x01
+FLAG_PRIV: Final = 0x02
+FLAG_REPORTABLE: Final = 0x04
+
+# Name of the hash function and length of the MAC
+_AUTH_PROTOCOLS: Final = {
+    "md5": ("md5", 12),
+    "sha": ("sha1", 12),
+    "SHA-224": ("sha224", 16),
+    "SHA-256": ("sha256", 24),
+    "SHA-384": ("sha384", 32),
+    "SHA-512": ("sha512", 48),
+}
+_PRIV_PROTOCOLS: Final = ("DES", "AES")
+_SECURITY_LEVELS: Final = {
+    "noAuthNoPriv": 0,
+    "authNoPriv": FLAG_AUTH,
+    "authPriv": FLAG_AUTH | FLAG_PRIV,
+}
+
+
+class UsmUser(NamedTuple):
+    flags: int
+    name: bytes
+    auth_protocol: str | None = None
+    auth_password: bytes = b""
+    priv_protocol: str | None = None
+    priv_password: bytes = b""
+
+    @classmethod
+    def from_credentials(cls, credentials: tuple[str, ...]) -> UsmUser:
+        """Create the user from the credentials of a SNMPv3 host
+
+        These are (security level, security name), (security level, auth protocol,
+        security name, auth password) or additionally the privacy protocol and the
+        privacy pass phrase."""
+        if len(credentials) == 2:
+            sec_level, sec_name = credentials
+            return cls(flags=_security_flags(sec_level), name=sec_name.encode())
+        if len(credentials) == 4:
+            sec_level, auth_proto, sec_name, auth_pass = credentials
+            priv_proto, priv_pass = None, ""
+        elif len(credentials) == 6:
+            sec_level, auth_proto, sec_name, auth_pass, priv_proto, priv_pass = credentials
+        else:
+            raise MKGeneralException(f"Invalid SNMPv3 credentials: {credentials!r}")
+
+        flags = _security_flags(sec_level)
+        if auth_proto not in _AUTH_PROTOCOLS:
+            raise MKGeneralException("Invalid SNMP auth protocol: %s" % auth_proto)
+        if flags & FLAG_PRIV and priv_proto not in _PRIV_PROTOCOLS:
+            raise MKGeneralException("Invalid SNMP priv protocol: %s" % priv_proto)
+        return cls(
+            flags=flags,
+            name=sec_name.encode(),
+            auth_protocol=auth_proto if flags & FLAG_AUTH else None,
+            auth_password=auth_pass.encode(),
+            priv_protocol=priv_proto if flags & FLAG_PRIV else None,
+            priv_password=priv_pass.encode(),
+        )
+
+
+def _security_flags(sec_level: str) -> int:
+    try:
+        return _SECURITY_LEVELS[sec_level]
+    except KeyError:
+        raise MKGeneralException("Invalid SNMP security level: %s" % sec_level)
+
+
+@lru_cache
+def password_to_key(password: bytes, hash_name: str) -> bytes:
+    """Hash one MB of the repeated password (RFC 3414 A.2)"""
+    if not password:
+        raise MKGeneralException("Empty SNMPv3 password")
+    count = 1048576
+    return hashlib.new(hash_name, (password * (count // len(password) + 1))[:count]).digest()
+
+
+def localize_key(key: bytes, engine_id: bytes, hash_name: str) -> bytes:
+    return hashlib.new(hash_name, key + engine_id + key).digest()
+
+
+class UsmMessage(NamedTuple):
+    msg_id: int
+    flags: int
+    engine_id: bytes
+    engine_boots: int
+    engine_time: int
+    pdu: PDU
+
+
+class UsmSecurity:
+    """The security state of the communication with one SNMP engine"""
+
+    def __init__(self, user: UsmUser) -> None:
+        super().__init__()
+        self.user = user
+        self.engine_id = b""
+        self.engine_boots = 0
+        self._engine_time = 0
+        self._synced_at = time.monotonic()
+        self._auth_key = b""
+        self._priv_key = b""
+        self._salt = random.getrandbits(64)
+
+    @property
+    def discovered(self) -> bool:
+        return bool(self.engine_id)
+
+    @property
+    def engine_time(self) -> int:
+        return self._engine_time + int(time.monotonic() - self._synced_at)
+
+    def update_engine(self, engine_id: bytes, engine_boots: int, engine_time: int) -> None:
+        if engine_id != self.engine_id:
+            self.engine_id = engine_id
+            self._localize_keys()
+        self.engine_boots = engine_boots
+        self._engine_time = engine_time
+        self._synced_at = time.monotonic()
+
+    def _localize_keys(self) -> None:
+        if self.user.auth_protocol is None:
+            return
+        hash_name = _AUTH_PROTOCOLS[self.user.auth_protocol][0]
+        self._auth_key = localize_key(
+            password_to_key(self.user.auth_password, hash_name), self.engine_id, hash_name
+        )
+        if self.user.priv_protocol is not None:
+            self._priv_key = localize_key(
+                password_to_key(self.user.priv_password, hash_name), self.engine_id, hash_name
+            )
+
+    def _mac(self, message: bytes) -> bytes:
+        assert self.user.auth_protocol is not None
+        hash_name, mac_length = _AUTH_PROTOCOLS[self.user.auth_protocol]
+        return hmac.new(self._auth_key, message, hash_name).digest()[:mac_length]
+
+    def _next_salt(self) -> int:
+        self._salt = (self._salt + 1) & 0xFFFFFFFFFFFFFFFF
+        return self._salt
+
+    def _encrypt(self, scoped_pdu: bytes, engine_time: int) -> tuple[bytes, bytes]:
+        if self.user.priv_protocol == "DES":
+            salt = self.engine_boots.to_bytes(4, "big") + (self._next_salt() & 0xFFFFFFFF).to_bytes(
+                4, "big"
+            )
+            iv = bytes(a ^ b for a, b in zip(self._priv_key[8:16], salt))
+            padded = scoped_pdu + bytes(-len(scoped_pdu) % 8)
+            return DES.new(self._priv_key[:8], DES.MODE_CBC, iv=iv).encrypt(padded), salt
+
+        salt = self._next_salt().to_bytes(8, "big")
+        iv = self.engine_boots.to_bytes(4, "big") + engine_time.to_bytes(4, "big") + salt
+        cipher = AES.new(self._priv_key[:16], AES.MODE_CFB, iv=iv, segment_size=128)
+        return cipher.encrypt(scoped_pdu), salt
+
+    def _decrypt(self, encrypted: bytes, salt: bytes, engine_boots: int, engine_time: int) -> bytes:
+        if len(salt) != 8:
+            raise BERError("Invalid privacy parameters")
+        if self.user.priv_protocol == "DES":
+            if len(encrypted) % 8:
+                raise BERError("Invalid length of encrypted data")
+            iv = bytes(a ^ b for a, b in zip(self._priv_key[8:16], salt))
+            return DES.new(self._priv_key[:8], DES.MODE_CBC, iv=iv).decrypt(encrypted)
+
+        iv = engine_boots.to_bytes(4, "big") + engine_time.to_bytes(4, "big") + salt
+        cipher = AES.new(self._priv_key[:16], AES.MODE_CFB, iv=iv, segment_size=128)
+        return cipher.decrypt(encrypted)
+
+    def encode_message(
+        self,
+        msg_id: int,
+        pdu: bytes,
+        context_name: bytes = b"",
+        *,
+        secure: bool = True,
+        reportable: bool = True,
+    ) -> bytes:
+        """Encode the PDU to a message, which is authenticated and encrypted as configured
+
+        Messages which are not secure are used for the discovery of the engine."""
+        flags = (self.user.flags if secure else 0) | (FLAG_REPORTABLE if reportable else 0)
+        scoped_pdu = encode_sequence(
+            encode_octet_string(self.engine_id), encode_octet_string(context_name), pdu
+        )
+        # Must be the same for the encryption and the security parameters
+        engine_time = self.engine_time if self.engine_id else 0
+        priv_params = b""
+        if flags & FLAG_PRIV:
+            encrypted, priv_params = self._encrypt(scoped_pdu, engine_time)
+            data = encode_octet_string(encrypted)
+        else:
+            data = scoped_pdu
+
+        def build(auth_params: bytes) -> bytes:
+            security_parameters = encode_sequence(
+                encode_octet_string(self.engine_id),
+                encode_integer(self.engine_boots),
+                encode_integer(engine_time),
+                encode_octet_string(self.user.name if secure else b""),
+                encode_octet_string(auth_params),
+                encode_octet_string(priv_params),
+            )
+            return encode_sequence(
+                encode_integer(_VERSION_3),
+                encode_sequence(
+                    encode_integer(msg_id),
+                    encode_integer(_MAX_MESSAGE_SIZE),
+                    encode_octet_string(bytes((flags,))),
+                    encode_integer(_SECURITY_MODEL_USM),
+                ),
+                encode_octet_string(security_parameters),
+                data,
+            )
+
+        if not flags & FLAG_AUTH:
+            return build(b"")
+        # The MAC is computed over the message with zeros in place of the MAC
+        assert self.user.auth_protocol is not None
+        placeholder = bytes(_AUTH_PROTOCOLS[self.user.auth_protocol][1])
+        return build(self._mac(build(placeholder)))
+
+    def decode_message(self, data: bytes) -> UsmMessage:
+        """Decode a message, verify and decrypt it if necessary
+
+        Raises BERError for all messages which can not be decoded or are not authentic."""
+        items = decode_sequence(data)
+        if len(items) != 4 or decode_integer(items[0][1]) != _VERSION_3:
+            raise BERError("Invalid SNMPv3 message")
+        header = decode_elements(items[1][1])
+        if len(header) != 4 or len(header[2][1]) != 1:
+            raise BERError("Invalid SNMPv3 message header")
+        msg_id = decode_integer(header[0][1])
+        flags = header[2][1][0]
+        security_parameters = decode_sequence(items[2][1])
+        if len(security_parameters) != 6:
+            raise BERError("Invalid security parameters")
+        engine_id = security_parameters[0][1]
+        engine_boots = decode_integer(security_parameters[1][1])
+        engine_time = decode_integer(security_parameters[2][1])
+        auth_params = security_parameters[4][1]
+        priv_params = security_parameters[5][1]
+
+        if flags & FLAG_AUTH:
+            if self.user.auth_protocol is None or engine_id != self.engine_id:
+                raise BERError("Unexpected authenticated message")
+            position = data.find(auth_params) if auth_params else -1
+            if position < 0:
+                raise BERError("Missing authentication parameters")
+            zeroed = data[:position] + bytes(len(auth_params)) + data[position + len(auth_params) :]
+            if not hmac.compare_digest(self._mac(zeroed), auth_params):
+                raise BERError("Wrong digest")
+
+        data_tag, scoped_pdu = items[3]
+        if flags & FLAG_PRIV:
+            if data_tag != OCTET_STRING or not flags & FLAG_AUTH or self.user.priv_protocol is None:
+                raise BERError("Unexpected encrypted message")
+            scoped_pdu = self._decrypt(scoped_pdu, priv_params, engine_boots, engine_time)
+            scoped_items = decode_sequence(scoped_pdu)
+        elif data_tag == SEQUENCE:
+            scoped_items = decode_elements(scoped_pdu)
+        else:
+            raise BERError("Invalid scoped PDU")
+        if len(scoped_items) != 3:
+            raise BERError("Invalid scoped PDU")
+        pdu_tag, pdu = scoped_items[2]
+        return UsmMessage(
+            msg_id=msg_id,
+            flags=flags,
+            engine_id=engine_id,
+            engine_boots=engine_boots,
+            engine_time=engine_time,
+            pdu=decode_pdu(pdu_tag, pdu),
+        )
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Sorted index of the entries of a stored walk
+
+The walk file is memory mapped and only the entries found by a lookup are decoded.
+The index is computed once and saved next to the walk. It contains the offsets of
+the entries sorted by their OID and the OIDs themselves as keys, which compare like
+the OIDs, so that lookups are a binary search on the memory mapped index."""
+
+import mmap
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Final
+
+from cmk.utils.exceptions import MKGeneralException
+from cmk.utils.store import BytesSerializer, ObjectStore
+
+__all__ = ["WalkIndex", "oid_key"]
+
+# Also marks the byte order, the index is in native byte order
+_MAGIC: Final = 0x434D4B5749445831
+# magic, size and mtime of the walk, number of entries, length of the keys
+_HEADER: Final = struct.Struct("=QQQQQ")
+_ITEM_SIZE: Final = array("Q").itemsize
+
+# Lines not starting with a dot continue the value of the previous entry
+_ENTRY_START: Final = re.compile(rb"^\.(\S*)", re.MULTILINE)
+
+
+def _sub_id_key(sub_id: int) -> bytes:
+    length = (sub_id.bit_length() + 7) // 8
+    return bytes((length,)) + sub_id.to_bytes(length, "big")
+
+
+class _SubIdKeys(dict[bytes, bytes]):
+    """The keys of the sub-identifiers met while indexing a walk"""
+
+    def __missing__(self, sub_id: bytes) -> bytes:
+        if not sub_id.isdigit():
+            raise MKGeneralException("Invalid OID part %r" % sub_id)
+        key = self[sub_id] = _sub_id_key(int(sub_id))
+        return key
+
+
+def oid_key(oid: str) -> bytes:
+    """Encode the OID so that the keys compare like the tuples of the OIDs
+
+    Every sub-identifier is encoded as its length followed by its big endian bytes.
+    As a consequence an OID is a prefix of another one if and only if its key is a
+    prefix of the key of the other one."""
+    try:
+        return b"".join(_sub_id_key(int(part)) for part in oid.strip(".").split("."))
+    except (ValueError, OverflowError):
+        raise MKGeneralException("Invalid OID %s" % oid)
+
+
+def _map(path: Path) -> mmap.mmap | bytes:
+    with path.open("rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return b""
+
+
+class WalkIndex:
+    def __init__(
+        self,
+        data: mmap.mmap | bytes,
+        starts: memoryview | array,
+        ends: memoryview | array,
+        key_offsets: memoryview | array,
+        keys: memoryview | bytes | bytearray,
+    ) -> None:
+        super().__init__()
+        self._data = data
+        self._starts = starts
+        self._ends = ends
+        self._key_offsets = key_offsets
+        self._keys = keys
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _key(self, index: int) -> bytes:
+        return bytes(self._keys[self._key_offsets[index] : self._key_offsets[index + 1]])
+
+    def lookup(self, oid: str) -> Iterator[str]:
+        """Yield the entries of the OID and all OIDs below it in the order of the OIDs"""
+        key = oid_key(oid)
+        index = bisect_left(range(len(self)), key, key=self._key)
+        while index < len(self) and self._key(index).startswith(key):
+            yield self._data[self._starts[index] : self._ends[index]].decode("utf-8")
+            index += 1
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "WalkIndex":
+        """Index a walk held in memory"""
+        data = "".join(line if line.endswith("\n") else line + "\n" for line in lines).encode()
+        return cls._build(data)
+
+    @classmethod
+    def open(cls, path: Path, index_path: Path) -> "WalkIndex":
+        """Map the walk and its index, the index is computed if it is missing or outdated"""
+        data = _map(path)
+        stat = path.stat()
+        if (index := cls._load(data, index_path, stat.st_size, stat.st_mtime_ns)) is not None:
+            return index
+        index = cls._build(data)
+        try:
+            ObjectStore(index_path, serializer=BytesSerializer()).write_obj(
+                index._serialize(stat.st_size, stat.st_mtime_ns)
+            )
+        except (OSError, MKGeneralException):
+            pass  # Just compute it again next time
+        return index
+
+    @classmethod
+    def _build(cls, data: mmap.mmap | bytes) -> "WalkIndex":
+        sub_id_keys = _SubIdKeys()
+        starts = array("Q")
+        key_offsets = array("Q", [0])
+        keys = bytearray()
+        previous = b""
+        is_sorted = True
+        for match in _ENTRY_START.finditer(data):
+            key = b"".join([sub_id_keys[sub_id] for sub_id in match.group(1).split(b".")])
+            is_sorted = is_sorted and previous <= key
+            previous = key
+            keys += key
+            key_offsets.append(len(keys))
+            starts.append(match.start())
+        ends = starts[1:]
+        ends.append(len(data))
+
+        index = cls(data, starts, ends, key_offsets, keys)
+        if is_sorted:  # as usual
+            return index
+
+        order = sorted(range(len(index)), key=index._key)
+        sorted_key_offsets = array("Q", [0])
+        for nr in order:
+            sorted_key_offsets.append(sorted_key_offsets[-1] + len(index._key(nr)))
+        return cls(
+            data,
+            array("Q", (starts[nr] for nr in order)),
+            array("Q", (ends[nr] for nr in order)),
+            sorted_key_offsets,
+            b"".join(index._key(nr) for nr in order),
+        )
+
+    def _serialize(self, walk_size: int, walk_mtime: int) -> bytes:
+        return b"".join(
+            (
+                _HEADER.pack(_MAGIC, walk_size, walk_mtime, len(self), len(self._keys)),
+                bytes(self._starts),
+                bytes(self._ends),
+                bytes(self._key_offsets),
+                bytes(self._keys),
+            )
+        )
+
+    @classmethod
+    def _load(
+        cls, data: mmap.mmap | bytes, index_path: Path, walk_size: int, walk_mtime: int
+    ) -> "WalkIndex | None":
+        try:
+            raw = _map(index_path)
+        except OSError:
+            return None
+        if len(raw) < _HEADER.size:
+            return None
+        magic, size, mtime, num_entries, keys_length = _HEADER.unpack_from(raw)
+        if (magic, size, mtime) != (_MAGIC, walk_size, walk_mtime):
+            return None
+        if len(raw) != _HEADER.size + (3 * num_entries + 1) * _ITEM_SIZE + keys_length:
+            return None
+
+        view = memoryview(raw)
+        offset = _HEADER.size
+
+        def take(count: int) -> memoryview:
+            nonlocal offset
+            start, offset = offset, offset + count * _ITEM_SIZE
+            return view[start:offset].cast("Q")
+
+        starts = take(num_entries)
+        ends = take(num_entries)
+        key_offsets = take(num_entries + 1)
+        return cls(data, starts, ends, key_offsets, view[offset:])
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""SNMP backend talking to the agent directly via UDP
+
+In contrast to the classic backend no process is created per request. All
+columns of a table are walked in one request stream: every GETNEXT or
+GETBULK request asks for the next OIDs of all columns which are not yet
+complete.
+"""
+
+import logging
+import random
+import socket
+import time
+from collections.abc import Callable, Sequence
+from typing import Final, TypeVar
+
+import cmk.utils.tty as tty
+from cmk.utils.exceptions import MKSNMPError
+from cmk.utils.log import console
+from cmk.utils.type_defs import SectionName
+
+from cmk.snmplib.type_defs import (
+    OID,
+    SNMPBackend,
+    SNMPContextName,
+    SNMPHostConfig,
+    SNMPRawValue,
+    SNMPRowInfo,
+)
+
+from . import _ber as ber
+from ._usm import FLAG_AUTH, UsmMessage, UsmSecurity, UsmUser
+
+__all__ = ["NativeSNMPBackend"]
+
+_VERSION_1: Final = 0
+_VERSION_2C: Final = 1
+
+# Error status of responses
+_TOO_BIG: Final = 1
+_NO_SUCH_NAME: Final = 2
+_ERROR_STATUS_NAMES: Final = {
+    1: "tooBig",
+    2: "noSuchName",
+    3: "badValue",
+    4: "readOnly",
+    5: "genErr",
+    6: "noAccess",
+    16: "authorizationError",
+}
+
+_USM_STATS: Final = (1, 3, 6, 1, 6, 3, 15, 1, 1)
+_USM_STATS_NAMES: Final = {
+    1: "unsupportedSecLevels",
+    2: "notInTimeWindows",
+    3: "unknownUserNames",
+    4: "unknownEngineIDs",
+    5: "wrongDigests",
+    6: "decryptionErrors",
+}
+_NOT_IN_TIME_WINDOWS: Final = 2
+
+_MAX_RESPONSE_SIZE: Final = 65535
+
+_T = TypeVar("_T")
+
+
+def _raw_value(varbind: ber.VarBind) -> SNMPRawValue:
+    """Convert the value to the representation of the classic backend"""
+    if varbind.tag == ber.INTEGER:
+        return str(ber.decode_integer(varbind.value)).encode()
+    if varbind.tag in (ber.COUNTER32, ber.GAUGE32, ber.TIME_TICKS, ber.COUNTER64):
+        return str(ber.decode_integer(varbind.value, signed=False)).encode()
+    if varbind.tag == ber.IP_ADDRESS:
+        return ".".join(map(str, varbind.value)).encode()
+    if varbind.tag == ber.OBJECT_IDENTIFIER:
+        return ber.oid_to_str(ber.decode_oid(varbind.value)).encode()
+    if varbind.tag == ber.NULL:
+        return b""
+    return varbind.value
+
+
+def _in_subtree(root: ber.OIDTuple, oid: ber.OIDTuple) -> bool:
+    return len(oid) > len(root) and oid[: len(root)] == root
+
+
+class _Session:
+    """One UDP socket to the agent with the version specific message handling"""
+
+    def __init__(self, config: SNMPHostConfig, usm: UsmSecurity | None) -> None:
+        super().__init__()
+        self._config = config
+        self._usm = usm
+        if config.is_snmpv3_host:
+            self.version = 3
+        elif config.is_bulkwalk_host or config.is_snmpv2or3_without_bulkwalk_host:
+            self.version = _VERSION_2C
+        else:
+            self.version = _VERSION_1
+        self._timeout = float(config.timing.get("timeout", 1))
+        self._retries = int(config.timing.get("retries", 5))
+        self._request_id = random.randint(1, 0x7FFFFFF)
+        self._socket = socket.socket(
+            socket.AF_INET6 if config.is_ipv6_primary else socket.AF_INET, socket.SOCK_DGRAM
+        )
+        try:
+            self._socket.connect((config.ipaddress or "0.0.0.0", config.port))
+        except OSError as e:
+            self._socket.close()
+            raise MKSNMPError(f"SNMP Error on {config.ipaddress}: {e}")
+
+    def close(self) -> None:
+        self._socket.close()
+
+    def next_request_id(self) -> int:
+        self._request_id = self._request_id % 0x7FFFFFFF + 1
+        return self._request_id
+
+    def request(self, pdu: ber.PDU, context_name: SNMPContextName | None) -> ber.PDU:
+        if self._usm is None:
+            return self._request_community(pdu)
+        return self._request_usm(self._usm, pdu, (context_name or "").encode())
+
+    def _request_community(self, pdu: ber.PDU) -> ber.PDU:
+        if not isinstance(self._config.credentials, str):
+            raise TypeError()
+        message = ber.encode_sequence(
+            ber.encode_integer(self.version),
+            ber.encode_octet_string(self._config.credentials.encode()),
+            ber.encode_pdu(pdu),
+        )
+
+        def decode(data: bytes) -> ber.PDU | None:
+            items = ber.decode_sequence(data)
+            if len(items) != 3 or ber.decode_integer(items[0][1]) != self.version:
+                raise ber.BERError("Invalid message")
+            response = ber.decode_pdu(*items[2])
+            return response if response.request_id == pdu.request_id else None
+
+        return self._exchange(message, decode)
+
+    def _request_usm(self, usm: UsmSecurity, pdu: ber.PDU, context_name: bytes) -> ber.PDU:
+        if not usm.discovered:
+            self._discover(usm)
+
+        for attempt in range(2):
+            message = self._exchange_usm(
+                usm.encode_message(pdu.request_id, ber.encode_pdu(pdu), context_name),
+                pdu.request_id,
+            )
+            if message.pdu.tag != ber.REPORT:
+                return message.pdu
+            counter = self._usm_stats_counter(message.pdu)
+            if counter == _NOT_IN_TIME_WINDOWS and message.flags & FLAG_AUTH and not attempt:
+                # Our notion of the engine time is outdated, the report tells the correct one
+                usm.update_engine(message.engine_id, message.engine_boots, message.engine_time)
+                pdu = pdu._replace(request_id=self.next_request_id())
+                continue
+            raise MKSNMPError(
+                "SNMP Error on %s: %s"
+                % (self._config.ipaddress, _USM_STATS_NAMES.get(counter or 0, "unknown report"))
+            )
+        raise AssertionError("unreachable")
+
+    def _discover(self, usm: UsmSecurity) -> None:
+        """Learn the ID, boots and time of the SNMP engine of the agent"""
+        request_id = self.next_request_id()
+        message = self._exchange_usm(
+            usm.encode_message(
+                request_id,
+                ber.encode_pdu(ber.PDU(ber.GET_REQUEST, request_id, 0, 0, [])),
+                secure=False,
+            ),
+            request_id,
+        )
+        if not message.engine_id:
+            raise MKSNMPError(f"SNMP Error on {self._config.ipaddress}: engine discovery failed")
+        usm.update_engine(message.engine_id, message.engine_boots, message.engine_time)
+
+    def _exchange_usm(self, message: bytes, msg_id: int) -> UsmMessage:
+        assert self._usm is not None
+        usm = self._usm
+
+        def decode(data: bytes) -> UsmMessage | None:
+            response = usm.decode_message(data)
+            return response if response.msg_id == msg_id else None
+
+        return self._exchange(message, decode)
+
+    @staticmethod
+    def _usm_stats_counter(pdu: ber.PDU) -> int | None:
+        for varbind in pdu.varbinds:
+            if varbind.oid[: len(_USM_STATS)] == _USM_STATS and len(varbind.oid) > len(_USM_STATS):
+                return varbind.oid[len(_USM_STATS)]
+        return None
+
+    def _exchange(self, message: bytes, decode: Callable[[bytes], _T | None]) -> _T:
+        """Send the message until a matching response arrives, like the net-snmp tools"""
+        for _attempt in range(self._retries + 1):
+            try:
+                self._socket.send(message)
+            except OSError as e:
+                raise MKSNMPError(f"SNMP Error on {self._config.ipaddress}: {e}")
+            deadline = time.monotonic() + self._timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                self._socket.settimeout(remaining)
+                try:
+                    data = self._socket.recv(_MAX_RESPONSE_SIZE)
+                except socket.timeout:
+                    break
+                except ConnectionRefusedError:
+                    # ICMP port unreachable, treat it like a lost message
+                    time.sleep(remaining)
+                    break
+                try:
+                    response = decode(data)
+                except ber.BERError as e:
+                    console.vverbose(f"Ignoring invalid SNMP message: {e}\n")
+                    continue
+                if response is not None:
+                    return response
+        raise MKSNMPError(f"Timeout: No Response from {self._config.ipaddress}")
+
+
+class NativeSNMPBackend(SNMPBackend):
+    def __init__(self, snmp_config: SNMPHostConfig, logger: logging.Logger) -> None:
+        super().__init__(snmp_config, logger)
+        # Keep the discovered engine of SNMPv3 agents for all requests
+        self._usm = (
+            UsmSecurity(UsmUser.from_credentials(snmp_config.credentials))
+            if isinstance(snmp_config.credentials, tuple)
+            else None
+        )
+
+    def _open_session(self) -> _Session:
+        return _Session(self.config, self._usm)
+
+    def get(self, oid: OID, context_name: SNMPContextName | None = None) -> SNMPRawValue | None:
+        if oid.endswith(".*"):
+            oid_prefix = ber.oid_from_str(oid[:-2])
+            tag = ber.GET_NEXT_REQUEST
+        else:
+            oid_prefix = ber.oid_from_str(oid)
+            tag = ber.GET_REQUEST
+
+        session = self._open_session()
+        try:
+            response = session.request(
+                ber.PDU(tag, session.next_request_id(), 0, 0, [_null_varbind(oid_prefix)]),
+                context_name,
+            )
+        except MKSNMPError as e:
+            console.verbose(tty.red + tty.bold + "ERROR: " + tty.normal + "SNMP error\n")
+            console.verbose(f"{e}\n")
+            return None
+        finally:
+            session.close()
+
+        if response.error_status or len(response.varbinds) != 1:
+            return None
+        varbind = response.varbinds[0]
+        if varbind.tag in ber.EXCEPTIONS:
+            return None
+        # In case of .*, check if prefix is the one we are looking for
+        if tag == ber.GET_NEXT_REQUEST and not _in_subtree(oid_prefix, varbind.oid):
+            return None
+        value = _raw_value(varbind)
+        console.vverbose("SNMP answer: ==> [%r]\n" % value)
+        return value
+
+    def walk(
+        self,
+        oid: OID,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+        context_name: SNMPContextName | None = None,
+    ) -> SNMPRowInfo:
+        return self.walk_columns([oid], section_name, table_base_oid, context_name)[0]
+
+    def walk_columns(
+        self,
+        oids: Sequence[OID],
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+        context_name: SNMPContextName | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        roots = [ber.oid_from_str(oid) for oid in oids]
+        console.vverbose(f"Walking {', '.join(oids)}\n")
+        session = self._open_session()
+        try:
+            columns = self._walk(session, roots, context_name)
+            # Like snmpwalk: Try to get the OID itself if there is nothing below it
+            for root, column in zip(roots, columns):
+                if not column:
+                    column.extend(self._get_scalar(session, root, context_name))
+        finally:
+            session.close()
+        return columns
+
+    def _walk(
+        self,
+        session: _Session,
+        roots: Sequence[ber.OIDTuple],
+        context_name: SNMPContextName | None,
+    ) -> list[SNMPRowInfo]:
+        columns: list[SNMPRowInfo] = [[] for _root in roots]
+        seen: list[set[ber.OIDTuple]] = [set() for _root in roots]
+        current = list(roots)
+        active = list(range(len(roots)))
+        use_bulk = self.config.is_bulkwalk_host and session.version != _VERSION_1
+        max_repetitions = max(1, self.config.bulk_walk_size_of)
+
+        while active:
+            response = session.request(
+                ber.PDU(
+                    ber.GET_BULK_REQUEST if use_bulk else ber.GET_NEXT_REQUEST,
+                    session.next_request_id(),
+                    0,
+                    max_repetitions if use_bulk else 0,
+                    [_null_varbind(current[column]) for column in active],
+                ),
+                context_name,
+            )
+            if response.error_status == _TOO_BIG and use_bulk and max_repetitions > 1:
+                max_repetitions //= 2
+                continue
+            if response.error_status == _NO_SUCH_NAME and session.version == _VERSION_1:
+                # SNMPv1 way to say "end of MIB", the index tells the column
+                index = response.error_index - 1
+                active = (
+                    [c for n, c in enumerate(active) if n != index]
+                    if 0 <= index < len(active)
+                    else []
+                )
+                continue
+            if response.error_status:
+                raise MKSNMPError(
+                    "SNMP Error on %s: %s"
+                    % (
+                        self.config.ipaddress,
+                        _ERROR_STATUS_NAMES.get(response.error_status, response.error_status),
+                    )
+                )
+
+            finished: set[int] = set()
+            progress = False
+            # The variable bindings of GETBULK responses are ordered by repetition
+            for position, varbind in enumerate(response.varbinds):
+                column = active[position % len(active)]
+                if column in finished:
+                    continue
+                if (
+                    varbind.tag in ber.EXCEPTIONS
+                    or not _in_subtree(roots[column], varbind.oid)
+                    # Some agents return OIDs which are not increasing, never loop
+                    or varbind.oid in seen[column]
+                ):
+                    finished.add(column)
+                    continue
+                seen[column].add(varbind.oid)
+                columns[column].append((ber.oid_to_str(varbind.oid), _raw_value(varbind)))
+                current[column] = varbind.oid
+                progress = True
+
+            if not progress and not finished:
+                break
+            active = [column for column in active if column not in finished]
+
+        return columns
+
+    def _get_scalar(
+        self, session: _Session, oid: ber.OIDTuple, context_name: SNMPContextName | None
+    ) -> SNMPRowInfo:
+        response = session.request(
+            ber.PDU(ber.GET_REQUEST, session.next_request_id(), 0, 0, [_null_varbind(oid)]),
+            context_name,
+        )
+        if response.error_status or len(response.varbinds) != 1:
+            return []
+        varbind = response.varbinds[0]
+        if varbind.tag in ber.EXCEPTIONS:
+            return []
+        return [(ber.oid_to_str(varbind.oid), _raw_value(varbind))]
+
+
+def _null_varbind(oid: ber.OIDTuple) -> ber.VarBind:
+    return ber.VarBind(oid, ber.NULL, b"")
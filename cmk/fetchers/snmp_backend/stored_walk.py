@@ -7,18 +7,23 @@
 from pathlib import Path
 
 import cmk.utils.agent_simulator as agent_simulator
+import cmk.utils.cleanup
 import cmk.utils.paths
-from cmk.utils.exceptions import MKGeneralException, MKSNMPError
+from cmk.utils.exceptions import MKSNMPError
 from cmk.utils.log import console
-from cmk.utils.type_defs import AgentRawData, SectionName
+from cmk.utils.type_defs import AgentRawData, HostName, SectionName
 
-import cmk.snmplib.snmp_cache as snmp_cache
 from cmk.snmplib.type_defs import OID, SNMPBackend, SNMPContextName, SNMPRawValue, SNMPRowInfo
 
 from ._utils import strip_snmp_value
+from ._walk_index import WalkIndex
 
 __all__ = ["StoredWalkSNMPBackend"]
 
+_walk_cache: dict[HostName, WalkIndex] = {}
+
+cmk.utils.cleanup.register_cleanup(_walk_cache.clear)
+
 
 class StoredWalkSNMPBackend(SNMPBackend):
     def get(self, oid: OID, context_name: SNMPContextName | None = None) -> SNMPRawValue | None:
@@ -48,110 +53,38 @@ class StoredWalkSNMPBackend(SNMPBackend):
             oid_prefix = oid
             dot_star = False
 
-        host_cache = snmp_cache.host_cache()
         try:
-            lines = host_cache[self.config.hostname]
+            walk = _walk_cache[self.config.hostname]
         except KeyError:
             console.vverbose(f"  Loading {oid}")
-            lines = self.read_walk_data()
-            host_cache[self.config.hostname] = lines
-
-        begin = 0
-        end = len(lines)
-        hit = None
-        while end - begin > 0:
-            current = (begin + end) // 2
-            parts = lines[current].split(None, 1)
-            comp = parts[0]
-            hit = StoredWalkSNMPBackend._compare_oids(oid_prefix, comp)
-            if hit == 0:
-                break
-            if hit == 1:  # we are too low
-                begin = current + 1
+            walk = self.read_walk_data()
+            _walk_cache[self.config.hostname] = walk
+
+        rowinfo = []
+        for entry in walk.lookup(oid_prefix):
+            parts = entry.split(None, 1)
+            o = parts[0][1:]
+            if dot_star and o == oid_prefix:
+                continue
+            if len(parts) > 1:
+                # FIXME: This encoding ping-pong os horrible...
+                value = agent_simulator.process(
+                    AgentRawData(
+                        parts[1].encode(),
+                    ),
+                ).decode()
             else:
-                end = current
-
-        if hit != 0:
-            return []  # not found
-
-        rowinfo = StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current, -1)
-        rowinfo.reverse()
-        rowinfo += StoredWalkSNMPBackend._collect_until(oid, oid_prefix, lines, current + 1, 1)
-
-        if dot_star:
-            return [rowinfo[0]]
+                value = ""
+            rowinfo.append(("." + o, strip_snmp_value(value)))
+            if dot_star:
+                break
 
         return rowinfo
 
-    @staticmethod
-    def read_walk_from_path(path: Path) -> list[str]:
-        console.vverbose(f"  Opening {path}\n")
-        lines = []
-        with path.open() as f:
-            # Sometimes there are newlines in the data of snmpwalks.
-            # Append the data to the last OID rather than throwing it away/skipping it.
-            for line in f.readlines():
-                if line.startswith("."):
-                    lines.append(line)
-                elif lines:
-                    lines[-1] += line
-        return lines
-
-    def read_walk_data(self):  # type:ignore[no-untyped-def]
+    def read_walk_data(self) -> WalkIndex:
         path = Path(cmk.utils.paths.snmpwalks_dir) / self.hostname
+        console.vverbose(f"  Opening {path}\n")
         try:
-            return self.read_walk_from_path(path)
+            return WalkIndex.open(path, path.with_name(f".{path.name}.index"))
         except OSError:
             raise MKSNMPError("No snmpwalk file %s" % path)
-
-    @staticmethod
-    def _compare_oids(a: OID, b: OID) -> int:
-        aa = StoredWalkSNMPBackend._to_bin_string(a)
-        bb = StoredWalkSNMPBackend._to_bin_string(b)
-        if len(aa) <= len(bb) and bb[: len(aa)] == aa:
-            result = 0
-        else:
-            result = (aa > bb) - (aa < bb)
-        return result
-
-    @staticmethod
-    def _to_bin_string(oid: OID) -> tuple[int, ...]:
-        try:
-            return tuple(map(int, oid.strip(".").split(".")))
-        except Exception:
-            raise MKGeneralException("Invalid OID %s" % oid)
-
-    @staticmethod
-    def _collect_until(
-        oid: OID, oid_prefix: OID, lines: list[str], index: int, direction: int
-    ) -> SNMPRowInfo:
-        rows = []
-        # Handle case, where we run after the end of the lines list
-        if index >= len(lines):
-            if direction > 0:
-                return []
-            index -= 1
-        while True:
-            line = lines[index]
-            parts = line.split(None, 1)
-            o = parts[0]
-            if o.startswith("."):
-                o = o[1:]
-            if o == oid or o.startswith(oid_prefix + "."):
-                if len(parts) > 1:
-                    # FIXME: This encoding ping-pong os horrible...
-                    value = agent_simulator.process(
-                        AgentRawData(
-                            parts[1].encode(),
-                        ),
-                    ).decode()
-                else:
-                    value = ""
-                # Fix for missing starting oids
-                rows.append(("." + o, strip_snmp_value(value)))
-                index += direction
-                if index < 0 or index >= len(lines):
-                    break
-            else:
-                break
-        return rows
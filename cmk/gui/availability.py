@@ -6,13 +6,18 @@
 from __future__ import annotations
 
 import functools
+import hashlib
 import itertools
+import marshal
+import operator
 import os
+import shutil
 import time
 from collections.abc import Callable, Iterator
+from pathlib import Path
 from typing import Any, Literal, NamedTuple, Union
 
-from livestatus import LivestatusOutputFormat, OnlySites, SiteId
+from livestatus import LivestatusOutputFormat, LivestatusRow, OnlySites, SiteId
 
 import cmk.utils.defines as defines
 import cmk.utils.paths
@@ -20,7 +25,7 @@ import cmk.utils.store as store
 import cmk.utils.version as cmk_version
 from cmk.utils.cpu_tracking import CPUTracker
 from cmk.utils.prediction import lq_logic
-from cmk.utils.type_defs import HostName, ServiceName
+from cmk.utils.type_defs import HostName, ServiceName, UserId
 
 import cmk.gui.sites as sites
 from cmk.gui.bi import BIManager
@@ -934,6 +939,210 @@ def get_availability_options_from_request(what: AVObjectType) -> AVOptions:
 #   '----------------------------------------------------------------------'
 
 
+# The state history of the days which are over is cached per query. Only the days missing
+# in the cache and the partial days at the borders of a time range are queried.
+
+# The cores may still be writing the history of a day for a while after midnight
+_STATEHIST_CACHE_DELAY = 3600
+# Queries which have not been made for this long are removed from the cache
+_STATEHIST_CACHE_MAX_AGE = 35 * 86400
+
+
+def _statehist_cache_dir() -> Path:
+    return Path(cmk.utils.paths.var_dir, "availability_cache")
+
+
+def query_statehist(
+    columns: list[str],
+    filters: str,
+    time_range: AVTimeRange,
+    only_sites: OnlySites,
+    limit: int | None,
+    timelimit: int | None = None,
+) -> list[LivestatusRow]:
+    """Query the state history of the time range, the site is prepended to each row
+
+    The time range is split at midnight. Spans which continue over midnight are joined
+    again, so the result is the one of a single query. The limit works like with
+    sites.set_limit(). The time limit applies to all the queries together."""
+    now = time.time()
+    deadline = None if timelimit is None else time.monotonic() + timelimit
+    cache_dir = _statehist_cache_query_dir(
+        columns, filters, _statehist_queried_sites(only_sites), sites.livestatus_auth_user()
+    )
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        os.utime(cache_dir)
+
+    positions = _StatehistPositions.make(["site"] + columns)
+    rows: list[LivestatusRow] = []
+    ends: dict[tuple[SiteId, HostName, ServiceName], LivestatusRow] = {}
+    for from_time, until_time, is_day_over in _statehist_segments(time_range, now):
+        remaining = None if limit is None else limit - len(rows)
+        cache_file = (
+            cache_dir / f"{from_time}-{until_time}"
+            if cache_dir is not None and is_day_over
+            else None
+        )
+        segment = None if cache_file is None else _load_statehist_segment(cache_file)
+        if segment is None:
+            segment_timelimit = None
+            if deadline is not None:
+                if (segment_timelimit := int(deadline - time.monotonic())) < 1:
+                    # Like a single query which is interrupted by the time limit
+                    return rows
+            query = "GET statehist\nFilter: time >= %d\nFilter: time < %d\n" % (
+                from_time,
+                until_time,
+            )
+            if segment_timelimit is not None:
+                query += "Timelimit: %d\n" % segment_timelimit
+            query += "Columns: %s\n" % " ".join(columns) + filters
+            segment, complete = _fetch_statehist(query, only_sites, remaining, segment_timelimit)
+            if cache_file is not None and complete and not _exceeds(segment, remaining):
+                _save_statehist_segment(cache_file, segment, now)
+
+        if limit is not None and _exceeds(segment, remaining):
+            # The segment is cut off, the caller has to see that the limit is exceeded
+            rows.extend(segment)
+            return rows[: limit + 1]
+
+        ends = _join_statehist_segment(rows, ends, segment, from_time, until_time, positions)
+    return rows
+
+
+def _exceeds(segment: list[LivestatusRow], remaining: int | None) -> bool:
+    return remaining is not None and len(segment) > remaining
+
+
+def _statehist_queried_sites(only_sites: OnlySites) -> list[SiteId]:
+    """The connected sites, disabled or unreachable sites are not queried"""
+    return sorted(
+        site_id
+        for site_id in sites.live().alive_sites()
+        if only_sites is None or site_id in only_sites
+    )
+
+
+def _statehist_cache_query_dir(
+    columns: list[str], filters: str, queried_sites: list[SiteId], auth_user: UserId | None
+) -> Path | None:
+    if "current_" in filters:
+        return None  # The result depends on the current state of the objects
+    # The rows depend on the sites which answer and on the objects the user is allowed to see
+    query_id = repr((columns, filters, queried_sites, auth_user))
+    return _statehist_cache_dir() / hashlib.sha256(query_id.encode("utf-8")).hexdigest()
+
+
+def _statehist_segments(time_range: AVTimeRange, now: float) -> Iterator[tuple[int, int, bool]]:
+    """Split the time range at midnight, tell which of the segments are complete days which
+    are over"""
+    from_time, until_time = int(time_range[0]), int(time_range[1])
+    while from_time < until_time:
+        year, month, day = time.localtime(from_time)[:3]
+        day_start = int(time.mktime((year, month, day, 0, 0, 0, 0, 0, -1)))
+        day_end = int(time.mktime((year, month, day + 1, 0, 0, 0, 0, 0, -1)))
+        segment_end = min(day_end, until_time)
+        yield (
+            from_time,
+            segment_end,
+            from_time == day_start
+            and segment_end == day_end
+            and day_end <= now - _STATEHIST_CACHE_DELAY,
+        )
+        from_time = segment_end
+
+
+def _fetch_statehist(
+    query: str, only_sites: OnlySites, limit: int | None, timelimit: int | None
+) -> tuple[list[LivestatusRow], bool]:
+    """Query livestatus, tell whether the rows are complete, apart from the limit"""
+    start = time.monotonic()
+    with sites.only_sites(only_sites), sites.prepend_site(), sites.set_limit(limit):
+        rows = sites.live().query(query)
+    duration = time.monotonic() - start
+
+    dead_sites = set(sites.live().dead_sites())
+    if only_sites:
+        dead_sites &= set(only_sites)
+    return rows, not dead_sites and (timelimit is None or duration < timelimit)
+
+
+def _load_statehist_segment(path: Path) -> list[LivestatusRow] | None:
+    try:
+        raw = store.load_bytes_from_file(path)
+        return marshal.loads(raw) if raw else None
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def _save_statehist_segment(path: Path, rows: list[LivestatusRow], now: float) -> None:
+    store.save_bytes_to_file(path, marshal.dumps(rows))
+    for query_dir in path.parent.parent.iterdir():
+        try:
+            if query_dir.stat().st_mtime < now - _STATEHIST_CACHE_MAX_AGE:
+                shutil.rmtree(query_dir)
+        except FileNotFoundError:
+            pass
+
+
+class _StatehistPositions(NamedTuple):
+    host_name: int
+    service_description: int
+    from_: int
+    until: int
+    durations: list[int]
+    # Columns which have to be equal for the spans to be joined
+    attributes: list[int]
+
+    @classmethod
+    def make(cls, columns: list[str]) -> _StatehistPositions:
+        durations = [nr for nr, column in enumerate(columns) if column.startswith("duration")]
+        return cls(
+            host_name=columns.index("host_name"),
+            service_description=columns.index("service_description"),
+            from_=columns.index("from"),
+            until=columns.index("until"),
+            durations=durations,
+            attributes=[
+                nr
+                for nr, column in enumerate(columns)
+                if nr not in durations and column not in ("from", "until")
+            ],
+        )
+
+
+def _join_statehist_segment(
+    rows: list[LivestatusRow],
+    ends: dict[tuple[SiteId, HostName, ServiceName], LivestatusRow],
+    segment: list[LivestatusRow],
+    from_time: int,
+    until_time: int,
+    positions: _StatehistPositions,
+) -> dict[tuple[SiteId, HostName, ServiceName], LivestatusRow]:
+    """Append the rows of the segment, join the first span of each object with the last one
+    of the previous segment if it just continues. Return the spans reaching until the end of
+    the segment."""
+    segment_ends: dict[tuple[SiteId, HostName, ServiceName], LivestatusRow] = {}
+    for row in segment:
+        key = (row[0], row[positions.host_name], row[positions.service_description])
+        previous = ends.pop(key, None)
+        if (
+            previous is not None
+            and row[positions.from_] == from_time
+            and all(previous[nr] == row[nr] for nr in positions.attributes)
+        ):
+            previous[positions.until] = row[positions.until]
+            for nr in positions.durations:
+                previous[nr] += row[nr]
+            row = previous
+        else:
+            rows.append(row)
+        if row[positions.until] == until_time:
+            segment_ends[key] = row
+    return segment_ends
+
+
 # Get raw availability data via livestatus. The result is a list
 # of spans. Each span is a dictionary that describes one span of time where
 # a specific host or service has one specific state.
@@ -959,7 +1168,7 @@ def get_availability_rawdata(
 
     time_range: AVTimeRange = avoptions["range"][0]
 
-    av_filter = "Filter: time >= %d\nFilter: time < %d\n" % time_range
+    av_filter = ""
     if av_object:
         tl_site, tl_host, tl_service = av_object
         av_filter += "Filter: host_name = {}\nFilter: service_description = {}\n".format(
@@ -973,9 +1182,6 @@ def get_availability_rawdata(
     else:
         av_filter += "Filter: service_description =\n"
 
-    query = "GET statehist\n" + av_filter
-    query += "Timelimit: %d\n" % avoptions["timelimit"]
-
     # Add Columns needed for object identification
     columns = ["host_name", "service_description"]
 
@@ -1005,14 +1211,17 @@ def get_availability_rawdata(
     if avoptions["grouping"] not in [None, "host"]:
         columns.append(avoptions["grouping"])
 
-    query += "Columns: %s\n" % " ".join(columns)
-    query += filterheaders
     logrow_limit = avoptions["logrow_limit"]
 
-    with sites.only_sites(only_sites), sites.prepend_site(), sites.set_limit(
-        logrow_limit or None
-    ), CPUTracker() as fetch_rows_tracker:
-        data = sites.live().query(query)
+    with CPUTracker() as fetch_rows_tracker:
+        data = query_statehist(
+            columns,
+            av_filter + filterheaders,
+            time_range,
+            only_sites,
+            logrow_limit or None,
+            avoptions["timelimit"],
+        )
 
     columns = ["site"] + columns
     spans: list[AVSpan] = [dict(zip(columns, span)) for span in data]
@@ -1127,7 +1336,13 @@ def compute_availability(  # pylint: disable=too-many-branches
     what: AVObjectType,
     av_rawdata: AVRawData,
     avoptions: AVOptions,
+    *,
+    summarize: bool = False,
 ) -> AVData:
+    """Pass summarize=True if the timelines are not needed
+
+    The spans of an object are then summed up per state before the computation. The timeline
+    of the entries only consists of these sums."""
     reclassified_rawdata = reclassify_by_annotations(what, av_rawdata)
 
     # Now compute availability table. We have the following possible states:
@@ -1150,6 +1365,21 @@ def compute_availability(  # pylint: disable=too-many-branches
     need_statistics = os_aggrs and os_states
     grouping = avoptions["grouping"]
 
+    # Merging, melting and statistics need the actual spans
+    if (
+        summarize
+        and not need_statistics
+        and not avoptions["short_intervals"]
+        and not avoptions["show_timeline"]
+    ):
+        reclassified_rawdata = {
+            site_host: {
+                service: summarize_spans(service_entry)
+                for service, service_entry in site_host_entry.items()
+            }
+            for site_host, site_host_entry in reclassified_rawdata.items()
+        }
+
     # Note: in case of timeline, we have data from exacly one host/service
     for site_host, site_host_entry in reclassified_rawdata.items():
         for service, service_entry in site_host_entry.items():
@@ -1288,6 +1518,32 @@ def compute_availability(  # pylint: disable=too-many-branches
     return filtered_table
 
 
+def summarize_spans(spans: list[AVSpan]) -> list[AVSpan]:
+    """Sum up the durations of the spans which only differ in their time
+
+    The sums are ordered by their last span, so the last one has the attributes of the last
+    span (e.g. the display name)."""
+    if not spans:
+        return spans
+    names = [name for name in spans[0] if name not in ("from", "until", "duration")]
+    get_attributes = operator.itemgetter(*names)
+    # E.g. the host and service groups
+    has_lists = any(isinstance(spans[0][name], list) for name in names)
+
+    summary: dict[Any, AVSpan] = {}
+    for span in spans:
+        key = get_attributes(span)
+        if has_lists:
+            key = tuple(tuple(value) if isinstance(value, list) else value for value in key)
+        if (entry := summary.pop(key, None)) is None:
+            entry = dict(span)
+        else:
+            entry["until"] = span["until"]
+            entry["duration"] += span["duration"]
+        summary[key] = entry
+    return list(summary.values())
+
+
 # Note: Reclassifications of host/service periods do currently *not* have
 # any impact on BI aggregations.
 def reclassify_by_annotations(what: AVObjectType, av_rawdata: AVRawData) -> AVRawData:
@@ -2428,14 +2684,6 @@ def get_bi_leaf_history(
         "in_service_period",
     ]
 
-    query = (
-        "GET statehist\n"
-        + "Columns: "
-        + " ".join(columns)
-        + "\n"
-        + "Filter: time >= %d\nFilter: time < %d\n" % time_range
-    )
-
     # Create a specific filter. We really only want the services and hosts
     # of the aggregation in question. That prevents status changes
     # irrelevant services from introducing new phases.
@@ -2452,17 +2700,17 @@ def get_bi_leaf_history(
 
         timeline_containers.append(timeline_container)
 
-    for host, services in by_host.items():
-        query += "Filter: host_name = %s\n" % host
-        query += lq_logic("Filter: service_description = ", list(services), "Or")
-        query += "And: 2\n"
+    # Sorted, the filters are part of the cache key of the query
+    filters = ""
+    for host, services in sorted(by_host.items()):
+        filters += "Filter: host_name = %s\n" % host
+        filters += lq_logic("Filter: service_description = ", sorted(services), "Or")
+        filters += "And: 2\n"
     if len(hosts) != 1:
-        query += "Or: %d\n" % len(hosts)
+        filters += "Or: %d\n" % len(hosts)
 
-    with sites.output_format(LivestatusOutputFormat.JSON), sites.only_sites(
-        list(only_sites)
-    ), sites.prepend_site(), sites.set_limit(livestatus_limit):
-        data = sites.live().query(query)
+    with sites.output_format(LivestatusOutputFormat.JSON):
+        data = query_statehist(columns, filters, time_range, list(only_sites), livestatus_limit)
 
     if not data:
         return [], [], 0
@@ -5,7 +5,6 @@
 
 from __future__ import annotations
 
-import ast
 import json
 import os
 import shutil
@@ -25,7 +24,14 @@ import cmk.utils.paths
 import cmk.utils.regex
 import cmk.utils.store as store
 from cmk.utils.exceptions import MKException, MKGeneralException
-from cmk.utils.structured_data import load_tree, make_filter, SDKey, SDPath, StructuredDataNode
+from cmk.utils.structured_data import (
+    deserialize_tree,
+    load_tree,
+    make_filter,
+    SDKey,
+    SDPath,
+    StructuredDataNode,
+)
 from cmk.utils.type_defs import HostName
 
 import cmk.gui.pages
@@ -116,12 +122,16 @@ class InventoryPath:
         return self.path[-1] if self.path else ""
 
 
-def load_filtered_and_merged_tree(row: Row) -> StructuredDataNode | None:
+def load_filtered_and_merged_tree(
+    row: Row, paths: tuple[SDPath, ...] | None = None
+) -> StructuredDataNode | None:
     """Load inventory tree from file, status data tree from row,
-    merge these trees and returns the filtered tree"""
+    merge these trees and returns the filtered tree
+
+    If paths are given, only the subtrees of these paths are loaded."""
     hostname = row.get("host_name")
-    inventory_tree = _load_structured_data_tree("inventory", hostname)
-    status_data_tree = _load_status_data_tree(hostname, row)
+    inventory_tree = _load_structured_data_tree("inventory", hostname, paths)
+    status_data_tree = _load_status_data_tree(hostname, row, paths)
 
     merged_tree = _merge_inventory_and_status_data_tree(inventory_tree, status_data_tree)
     return _filter_tree(merged_tree)
@@ -478,7 +488,9 @@ class LoadStructuredDataError(MKException):
 
 @request_memoize(maxsize=None)
 def _load_structured_data_tree(
-    tree_type: Literal["inventory", "status_data"], hostname: HostName | None
+    tree_type: Literal["inventory", "status_data"],
+    hostname: HostName | None,
+    paths: tuple[SDPath, ...] | None = None,
 ) -> StructuredDataNode | None:
     """Load data of a host, cache it in the current HTTP request"""
     if not hostname:
@@ -495,7 +507,8 @@ def _load_structured_data_tree(
                 if tree_type == "inventory"
                 else cmk.utils.paths.status_data_dir
             )
-            / hostname
+            / hostname,
+            paths=paths,
         )
     except Exception as e:
         if active_config.debug:
@@ -503,13 +516,15 @@ def _load_structured_data_tree(
         raise LoadStructuredDataError()
 
 
-def _load_status_data_tree(hostname: HostName | None, row: Row) -> StructuredDataNode | None:
+def _load_status_data_tree(
+    hostname: HostName | None, row: Row, paths: tuple[SDPath, ...] | None = None
+) -> StructuredDataNode | None:
     # If no data from livestatus could be fetched (CRE) try to load from cache
     # or status dir
     raw_status_data_tree = row.get("host_structured_status")
     if not raw_status_data_tree:
-        return _load_structured_data_tree("status_data", hostname)
-    return StructuredDataNode.deserialize(ast.literal_eval(raw_status_data_tree.decode("utf-8")))
+        return _load_structured_data_tree("status_data", hostname, paths)
+    return deserialize_tree(raw_status_data_tree, paths=paths)
 
 
 def _merge_inventory_and_status_data_tree(
@@ -661,19 +676,27 @@ def inventory_of_host(host_name: HostName, api_request):  # type:ignore[no-untyp
     site = livestatus.SiteId(raw_site) if raw_site is not None else None
     verify_permission(host_name, site)
 
+    inventory_paths = (
+        [InventoryPath.parse(raw_path) for raw_path in api_request["paths"]]
+        if "paths" in api_request
+        else None
+    )
+
     row = get_status_data_via_livestatus(site, host_name)
-    merged_tree = load_filtered_and_merged_tree(row)
+    merged_tree = load_filtered_and_merged_tree(
+        row,
+        None if inventory_paths is None else tuple(p.path for p in inventory_paths),
+    )
     if not merged_tree:
         return {}
 
-    if "paths" in api_request:
+    if inventory_paths is not None:
         merged_tree = merged_tree.get_filtered_node(
             [
                 make_filter(
                     (inventory_path.path, [inventory_path.key] if inventory_path.key else None)
                 )
-                for raw_path in api_request["paths"]
-                for inventory_path in (InventoryPath.parse(raw_path),)
+                for inventory_path in inventory_paths
             ]
         )
 
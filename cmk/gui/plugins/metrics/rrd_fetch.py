@@ -299,6 +299,4 @@ def merge_multicol(
         return TimeSeries([0, 0, 0])
 
     _op_title, op_func = ts.time_series_operators()["MERGE"]
-    single_value_series = [ts.op_func_wrapper(op_func, tsp) for tsp in zip(*relevant_ts)]
-
-    return TimeSeries(single_value_series)
+    return TimeSeries(ts.apply_operator(op_func, relevant_ts))
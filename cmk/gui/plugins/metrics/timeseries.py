@@ -3,14 +3,15 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-import functools
-import operator
 from collections.abc import Callable, Sequence
 from itertools import chain
 from typing import Literal
 
+import numpy as np
+import numpy.typing as npt
+
 import cmk.utils.version as cmk_version
-from cmk.utils.prediction import TimeSeries
+from cmk.utils.prediction import TimeSeries, TimeSeriesValue, TimeSeriesValues, values_from_array
 
 import cmk.gui.utils.escaping as escaping
 from cmk.gui.exceptions import MKGeneralException
@@ -156,16 +157,27 @@ def time_series_math(
     _op_title, op_func = operators[operator_id]
     twindow = operands_evaluated[0].twindow
 
-    return TimeSeries([op_func_wrapper(op_func, tsp) for tsp in zip(*operands_evaluated)], twindow)
+    return TimeSeries(apply_operator(op_func, [ts.values for ts in operands_evaluated]), twindow)
+
+
+TimeSeriesOperator = Callable[[npt.NDArray[np.float64]], npt.NDArray[np.float64]]
 
 
-def op_func_wrapper(op_func, tsp):
-    if tsp.count(None) < len(tsp):  # At least one non-None value
-        try:
-            return op_func(tsp)
-        except ZeroDivisionError:
-            pass
-    return None
+def apply_operator(
+    op_func: TimeSeriesOperator, operands: Sequence[Sequence[TimeSeriesValue]]
+) -> TimeSeriesValues:
+    """Apply the operator to all points of the operands at once
+
+    The operator gets one row per operand, missing values are NaN. Points without any value in
+    all operands result in None, as do invalid results like divisions by zero."""
+    length = min(len(operand) for operand in operands)
+    if any(len(operand) != length for operand in operands):
+        operands = [operand[:length] for operand in operands]
+    data = np.array(operands, dtype=np.float64).reshape(len(operands), length)
+    with np.errstate(all="ignore"):
+        result = op_func(data)
+    result[np.isnan(data).all(axis=0)] = np.nan
+    return values_from_array(result)
 
 
 def clean_time_series_point(tsp: TimeSeries) -> list[float]:
@@ -173,48 +185,40 @@ def clean_time_series_point(tsp: TimeSeries) -> list[float]:
     return [x for x in tsp if x is not None]
 
 
-def time_series_operator_sum(tsp: TimeSeries) -> float:
-    return sum(clean_time_series_point(tsp))
+def time_series_operator_sum(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return np.where(np.isnan(data), 0.0, data).sum(axis=0, initial=0.0)
 
 
-def time_series_operator_product(tsp: TimeSeries) -> float | None:
-    if None in tsp:
-        return None
-    return functools.reduce(operator.mul, tsp, 1)
+def time_series_operator_product(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return data.prod(axis=0, initial=1.0)
 
 
-def time_series_operator_difference(tsp: TimeSeries) -> float | None:
-    if None in tsp:
-        return None
-    assert tsp[0] is not None
-    assert tsp[1] is not None
-    return tsp[0] - tsp[1]
+def time_series_operator_difference(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return data[0] - data[1]
 
 
-def time_series_operator_fraction(tsp: TimeSeries) -> float | None:
-    if None in tsp or tsp[1] == 0:
-        return None
-    assert tsp[0] is not None
-    assert tsp[1] is not None
-    return tsp[0] / tsp[1]
+def time_series_operator_fraction(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return np.where(data[1] == 0, np.nan, data[0] / data[1])
+
+
+def time_series_operator_maximum(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return np.fmax.reduce(data, axis=0)
 
 
-def time_series_operator_maximum(tsp: TimeSeries) -> float:
-    return max(clean_time_series_point(tsp))
+def time_series_operator_minimum(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return np.fmin.reduce(data, axis=0)
 
 
-def time_series_operator_minimum(tsp: TimeSeries) -> float:
-    return min(clean_time_series_point(tsp))
+def time_series_operator_average(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return time_series_operator_sum(data) / np.logical_not(np.isnan(data)).sum(axis=0)
 
 
-def time_series_operator_average(tsp: TimeSeries) -> float:
-    tsp_clean = clean_time_series_point(tsp)
-    return sum(tsp_clean) / len(tsp_clean)
+def time_series_operator_merge(data: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """First non NaN value"""
+    return data[np.isnan(data).argmin(axis=0), np.arange(len(data[0]))]
 
 
-def time_series_operators() -> dict[
-    str, tuple[str, Callable[[TimeSeries], float] | Callable[[TimeSeries], float | None]]
-]:
+def time_series_operators() -> dict[str, tuple[str, TimeSeriesOperator]]:
     return {
         "+": (_("Sum"), time_series_operator_sum),
         "*": (_("Product"), time_series_operator_product),
@@ -223,5 +227,5 @@ def time_series_operators() -> dict[
         "MAX": (_("Maximum"), time_series_operator_maximum),
         "MIN": (_("Minimum"), time_series_operator_minimum),
         "AVERAGE": (_("Average"), time_series_operator_average),
-        "MERGE": ("First non None", lambda x: next(iter(clean_time_series_point(x)))),
+        "MERGE": ("First non None", time_series_operator_merge),
     }
@@ -2839,20 +2839,25 @@ class ConfigVariableUseDNSCache(ConfigVariable):
 
 
 def transform_snmp_backend_default_to_valuespec(
-    backend: Literal["classic", "inline"]
+    backend: Literal["classic", "inline", "native"]
 ) -> SNMPBackendEnum:
     return {
         "classic": SNMPBackendEnum.CLASSIC,
         "inline": SNMPBackendEnum.INLINE,
+        "native": SNMPBackendEnum.NATIVE,
     }[backend]
 
 
-def transform_snmp_backend_from_valuespec(backend: SNMPBackendEnum) -> Literal["classic", "inline"]:
+def transform_snmp_backend_from_valuespec(
+    backend: SNMPBackendEnum,
+) -> Literal["classic", "inline", "native"]:
     match backend:
         case SNMPBackendEnum.CLASSIC:
             return "classic"
         case SNMPBackendEnum.INLINE:
             return "inline"
+        case SNMPBackendEnum.NATIVE:
+            return "native"
         case _:
             raise MKConfigError("SNMPBackendEnum %r not implemented" % backend)
 
@@ -2875,6 +2880,7 @@ class ConfigVariableChooseSNMPBackend(ConfigVariable):
                 choices=[
                     (SNMPBackendEnum.CLASSIC, _("Use Classic SNMP Backend")),
                     (SNMPBackendEnum.INLINE, _("Use Inline SNMP Backend")),
+                    (SNMPBackendEnum.NATIVE, _("Use Native SNMP Backend")),
                 ],
                 help=_(
                     "By default Checkmk uses command line calls of Net-SNMP tools like snmpget or "
@@ -5087,7 +5093,9 @@ def _help_snmp_backend():
         "the load produced by SNMP monitoring on the monitoring host significantly. Inline SNMP "
         "is enabled by default for all SNMP hosts and it is a good idea to keep this default setting. "
         "However, there are SNMP devices which have problems with some SNMP implementations. "
-        "You can use this rule to select the SNMP Backend for these hosts."
+        "You can use this rule to select the SNMP Backend for these hosts. The Native SNMP "
+        "Backend talks to the devices directly without calling the Net-SNMP tools and "
+        "fetches all columns of a table at once."
     )
 
 
@@ -5100,6 +5108,8 @@ def transform_snmp_backend_hosts_to_valuespec(backend):
         # We dropped pysnmp during the 2.1 beta because it is currently slow
         # and unreliable.
         return SNMPBackendEnum.CLASSIC
+    if backend == "native":
+        return SNMPBackendEnum.NATIVE
     raise MKConfigError("SNMPBackendEnum %r not implemented" % backend)
 
 
@@ -5110,6 +5120,7 @@ def _valuespec_snmp_backend():
             choices=[
                 (SNMPBackendEnum.INLINE, _("Use Inline SNMP Backend")),
                 (SNMPBackendEnum.CLASSIC, _("Use Classic Backend")),
+                (SNMPBackendEnum.NATIVE, _("Use Native Backend")),
             ],
         ),
         to_valuespec=transform_snmp_backend_hosts_to_valuespec,
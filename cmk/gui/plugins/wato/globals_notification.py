@@ -165,6 +165,66 @@ class ConfigVariableNotificationPluginTimeout(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableNotificationPluginWorkers(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupNotifications
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainCore
+
+    def ident(self) -> str:
+        return "notification_plugin_workers"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Parallel notification plugin calls"),
+            help=_(
+                "Number of notification plugins which are called in parallel when notifications "
+                "are delivered without the notification spooler. The notifications of one "
+                "contact are still delivered in the order they have been created. With 1 the "
+                "plugins are called one after another."
+            ),
+            minvalue=1,
+        )
+
+
+@config_variable_registry.register
+class ConfigVariableNotificationPluginLimits(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupNotifications
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainCore
+
+    def ident(self) -> str:
+        return "notification_plugin_limits"
+
+    def valuespec(self) -> ValueSpec:
+        return ListOf(
+            valuespec=Tuple(
+                elements=[
+                    TextInput(
+                        title=_("Notification plugin"),
+                        help=_("The name of the plugin script, e.g. <tt>mail</tt>"),
+                        allow_empty=False,
+                    ),
+                    Integer(
+                        title=_("Maximum parallel calls"),
+                        minvalue=1,
+                    ),
+                ],
+                orientation="horizontal",
+            ),
+            title=_("Parallel calls per notification plugin"),
+            help=_(
+                "Limit the number of parallel calls of single notification plugins, e.g. of "
+                "plugins sending to a service which only accepts few connections at a time. "
+                "This only has an effect with more than one parallel notification plugin call."
+            ),
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableNotificationLogging(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
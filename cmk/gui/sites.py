@@ -361,6 +361,7 @@ def _set_initial_site_states(
 # AuthUser: header for livestatus.
 def _set_livestatus_auth(user: LoggedInUser, force_authuser: UserId | None) -> None:
     user_id = _livestatus_auth_user(user, force_authuser)
+    g.livestatus_auth_user = user_id
     if user_id is not None:
         g.live.set_auth_user("read", user_id)
         g.live.set_auth_user("action", user_id)
@@ -377,6 +378,12 @@ def _set_livestatus_auth(user: LoggedInUser, force_authuser: UserId | None) -> N
     g.live.set_auth_domain("read")
 
 
+def livestatus_auth_user() -> UserId | None:
+    """The user the objects of the queries are restricted to, None if not restricted"""
+    live()
+    return g.livestatus_auth_user
+
+
 # Returns either None when no auth user shal be set or the name of the user
 # to be used as livestatus auth user
 def _livestatus_auth_user(user: LoggedInUser, force_authuser: UserId | None) -> UserId | None:
@@ -271,7 +271,9 @@ def show_availability_page(  # pylint: disable=too-many-branches
             avoptions=avoptions,
             view_process_tracking=view.process_tracking,
         )
-        av_data = availability.compute_availability(what, av_rawdata, avoptions)
+        av_data = availability.compute_availability(
+            what, av_rawdata, avoptions, summarize=av_mode != "timeline"
+        )
 
     # Do CSV ouput
     if html.output_format == "csv_export" and user.may("general.csv_export"):
@@ -993,7 +995,9 @@ def show_bi_availability(  # pylint: disable=too-many-branches
 
                     timewarpcode += HTML(output_funnel.drain())
 
-        av_data = availability.compute_availability("bi", av_rawdata, avoptions)
+        av_data = availability.compute_availability(
+            "bi", av_rawdata, avoptions, summarize=av_mode != "timeline"
+        )
 
         # If we abolish the limit we have to fetch the data again
         # with changed logrow_limit = 0, which means no limit
@@ -1486,7 +1486,9 @@ class RowTableInventory(ABCRowTable):
 
     def _get_inv_data(self, hostrow: Row) -> Sequence[SDRow]:
         try:
-            merged_tree = inventory.load_filtered_and_merged_tree(hostrow)
+            merged_tree = inventory.load_filtered_and_merged_tree(
+                hostrow, (self._inventory_path.path,)
+            )
         except inventory.LoadStructuredDataError:
             user_errors.add(
                 MKUserError(
@@ -1596,7 +1598,9 @@ class RowMultiTableInventory(ABCRowTable):
 
     def _get_inv_data(self, hostrow: Row) -> Sequence[tuple[str, Sequence[SDRow]]]:
         try:
-            merged_tree = inventory.load_filtered_and_merged_tree(hostrow)
+            merged_tree = inventory.load_filtered_and_merged_tree(
+                hostrow, tuple(inventory_path.path for _name, inventory_path in self._sources)
+            )
         except inventory.LoadStructuredDataError:
             user_errors.add(
                 MKUserError(
@@ -226,16 +226,14 @@ class ModeAuditLog(WatoMode):
     def page(self) -> None:
         self._options.update(self._get_audit_log_options_from_request())
 
-        audit = self._parse_audit_log()
-
-        if not audit:
+        if not self._has_matching_entry():
             html.show_message(_("Found no matching entry."))
 
         elif self._options["display"] == "daily":
-            self._display_daily_audit_log(audit)
+            self._display_daily_audit_log()
 
         else:
-            self._display_multiple_days_audit_log(audit)
+            self._display_multiple_days_audit_log()
 
     def _get_audit_log_options_from_request(self):
         options = {}
@@ -251,8 +249,8 @@ class ModeAuditLog(WatoMode):
                 user_errors.add(e)
         return options
 
-    def _display_daily_audit_log(self, log):
-        log, times = self._get_next_daily_paged_log(log)
+    def _display_daily_audit_log(self):
+        log, times = self._get_next_daily_paged_log()
 
         self._display_page_controls(*times)
 
@@ -263,8 +261,8 @@ class ModeAuditLog(WatoMode):
 
         self._display_page_controls(*times)
 
-    def _display_multiple_days_audit_log(self, log):
-        log = self._get_multiple_days_log_entries(log)
+    def _display_multiple_days_audit_log(self):
+        log = self._get_multiple_days_log_entries()
 
         if display_options.enabled(display_options.T):
             html.h3(
@@ -306,15 +304,16 @@ class ModeAuditLog(WatoMode):
                     )
                     table.cell(_("Details"), diff_text)
 
-    def _get_next_daily_paged_log(self, log):
+    def _get_next_daily_paged_log(self):
         start = self._get_start_date()
 
         while True:
-            log_today, times = self._paged_log_from(log, start)
-            if len(log) == 0 or len(log_today) > 0:
+            log_today, times = self._paged_log_from(start)
+            previous_log_time = times[2]
+            if len(log_today) > 0 or previous_log_time is None:
                 return log_today, times
-            # No entries today, but log not empty -> go back in time
-            start -= 24 * 3600
+            # No entries today, but older ones -> go back to the day of the previous one
+            start = previous_log_time
 
     def _get_start_date(self):
         if self._options["start"] == "now":
@@ -324,48 +323,29 @@ class ModeAuditLog(WatoMode):
             )
         return int(self._options["start"][1])
 
-    def _get_multiple_days_log_entries(self, log):
+    def _get_multiple_days_log_entries(self):
         start_time = self._get_start_date() + 86399
         end_time = start_time - ((self._options["display"][1] * 86400) + 86399)
+        return self._filter_entries(self._store.read_time_range(end_time, start_time + 1))
 
-        logs = []
-
-        for entry in log:
-            if entry[0] <= start_time and entry[0] >= end_time:
-                logs.append(entry)
-
-        return logs
-
-    def _paged_log_from(self, log, start):
+    def _paged_log_from(self, start):
         start_time, end_time = self._get_timerange(start)
+        log = self._filter_entries(self._store.read_time_range(start_time, end_time))
+
+        # The timestamps of the logs closest to this day for paging
         previous_log_time = None
-        next_log_time = None
-        first_log_index = None
-        last_log_index = None
-        for index, entry in enumerate(log):
-            if entry.time >= end_time:
-                # This log is too new
-                continue
-            if first_log_index is None and start_time <= entry.time < end_time:
-                # This is a log for this day. Save the first index
-                if first_log_index is None:
-                    first_log_index = index
-
-                    # When possible save the timestamp of the previous log
-                    if index > 0:
-                        next_log_time = int(log[index - 1][0])
-
-            elif entry.time < start_time and last_log_index is None:
-                last_log_index = index
-                # This is the next log after this day
-                previous_log_time = int(entry[0])
-                # Finished!
+        for entry in self._store.read_reversed(until=start_time):
+            if self._filter_entry(entry):
+                previous_log_time = int(entry.time)
                 break
 
-        if last_log_index is None:
-            last_log_index = len(log)
+        next_log_time = None
+        for entry in self._store.read_from(end_time):
+            if self._filter_entry(entry):
+                next_log_time = int(entry.time)
+                break
 
-        return log[first_log_index:last_log_index], (
+        return log, (
             start_time,
             end_time,
             previous_log_time,
@@ -587,7 +567,14 @@ class ModeAuditLog(WatoMode):
         return FinalizeRequest(code=200)
 
     def _parse_audit_log(self) -> list[AuditLogStore.Entry]:
-        return list(reversed([e for e in self._store.read() if self._filter_entry(e)]))
+        return [e for e in self._store.read_reversed() if self._filter_entry(e)]
+
+    def _has_matching_entry(self) -> bool:
+        return any(self._filter_entry(e) for e in self._store.read_reversed())
+
+    def _filter_entries(self, entries: list[AuditLogStore.Entry]) -> list[AuditLogStore.Entry]:
+        """Filter the entries of a time range, the newest first"""
+        return [e for e in reversed(entries) if self._filter_entry(e)]
 
     def _filter_entry(self, entry: AuditLogStore.Entry) -> bool:
         if self._options["object_type"] != "":
@@ -483,8 +483,8 @@ class ModeRenameHost(WatoMode):
         local_site = omd_site()
         renamed_host_site = self._host.site_id()
         if (
-            SiteChanges(SiteChanges.make_path(local_site)).read()
-            or SiteChanges(SiteChanges.make_path(renamed_host_site)).read()
+            SiteChanges(SiteChanges.make_path(local_site)).count()
+            or SiteChanges(SiteChanges.make_path(renamed_host_site)).count()
         ):
             raise MKUserError(
                 "newname",
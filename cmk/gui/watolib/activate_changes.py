@@ -21,16 +21,19 @@ import errno
 import hashlib
 import io
 import logging
+import marshal
 import multiprocessing
 import os
 import re
 import shutil
+import stat
 import subprocess
 import time
 import traceback
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Sequence
 from dataclasses import asdict, dataclass
 from itertools import filterfalse
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 from typing import Any, NamedTuple
 
@@ -139,6 +142,12 @@ ACTIVATION_TIME_PROFILE_SYNC = "profile-sync"
 
 var_dir = cmk.utils.paths.var_dir + "/wato/"
 
+# Hashing the files of the config sync
+_CONFIG_SYNC_HASH_THREADS = 8
+_CONFIG_SYNC_HASH_POOL_MIN_FILES = 32
+_CONFIG_SYNC_HASH_RACY_SECONDS = 2
+_CONFIG_SYNC_HASH_MAX_AGE_DAYS = 7
+
 
 # Directories and files to synchronize during replication
 _replication_paths: list[ReplicationPath] = []
@@ -433,7 +442,7 @@ class ActivateChanges:
         # Astroid 2.x bug prevents us from using NewType https://github.com/PyCQA/pylint/issues/2296
         # pylint: disable=not-an-iterable
         for site_id in activation_sites():
-            changes_counter += len(SiteChanges(SiteChanges.make_path(site_id)).read())
+            changes_counter += SiteChanges(SiteChanges.make_path(site_id)).count()
         return changes_counter
 
     @staticmethod
@@ -1693,15 +1702,29 @@ class ActivateChangesSite(multiprocessing.Process, ActivateChanges):
         self._set_sync_state(_("Fetching sync state"))
         self._logger.debug("Starting config sync")
         replication_paths = self._snapshot_settings.snapshot_components
+        start = time.time()
         remote_file_infos, remote_config_generation = self._get_config_sync_state(replication_paths)
-        self._logger.debug("Received %d file infos from remote", len(remote_file_infos))
+        self._logger.debug(
+            "Received %d file infos from remote in %.3f sec",
+            len(remote_file_infos),
+            time.time() - start,
+        )
 
-        # In case we experience performance issues here, we could postpone the hashing of the
-        # central files to only be done ad-hoc in get_file_names_to_sync when the other attributes
-        # are not enough to detect a differing file.
         site_config_dir = Path(self._snapshot_settings.work_dir)
-        central_file_infos = _get_config_sync_file_infos(replication_paths, site_config_dir)
-        self._logger.debug("Got %d file infos from %s", len(remote_file_infos), site_config_dir)
+        start = time.time()
+        hash_cache = ConfigSyncHashCache.load(_config_sync_hash_cache_path())
+        central_file_infos = _get_config_sync_file_infos(
+            replication_paths, site_config_dir, hash_cache
+        )
+        hash_cache.save(_config_sync_hash_cache_path())
+        self._logger.debug(
+            "Got %d file infos from %s in %.3f sec (%d hashes cached, %d computed)",
+            len(central_file_infos),
+            site_config_dir,
+            time.time() - start,
+            hash_cache.hits,
+            hash_cache.misses,
+        )
 
         self._set_sync_state(_("Computing differences"))
         to_sync_new, to_sync_changed, to_delete = get_file_names_to_sync(
@@ -2370,22 +2393,122 @@ class AutomationGetConfigSyncState(AutomationCommand):
 
     def execute(self, api_request: list[ReplicationPath]) -> GetConfigSyncStateResponse:
         with store.lock_checkmk_configuration():
-            file_infos = _get_config_sync_file_infos(api_request, base_dir=cmk.utils.paths.omd_root)
+            start = time.time()
+            hash_cache = ConfigSyncHashCache.load(_config_sync_hash_cache_path())
+            file_infos = _get_config_sync_file_infos(
+                api_request, base_dir=cmk.utils.paths.omd_root, hash_cache=hash_cache
+            )
+            hash_cache.save(_config_sync_hash_cache_path())
+            logger.debug(
+                "Got %d file infos in %.3f sec (%d hashes cached, %d computed)",
+                len(file_infos),
+                time.time() - start,
+                hash_cache.hits,
+                hash_cache.misses,
+            )
             transport_file_infos = {
                 k: (v.st_mode, v.st_size, v.link_target, v.file_hash) for k, v in file_infos.items()
             }
             return (transport_file_infos, _get_current_config_generation())
 
 
+def _config_sync_hash_cache_path() -> Path:
+    return Path(cmk.utils.paths.var_dir) / "wato" / "config_sync_hashes"
+
+
+class ConfigSyncHashCache:
+    """Hashes of the files to be synchronized, remembered from the previous scans
+
+    An entry is looked up by the device and inode of the file and is used as long as the size
+    and the modification time of the file did not change. The site config directories are hard
+    links to the files of the central site, so the entries are shared between all sites and
+    survive the recreation of the directories with every activation.
+
+    Every entry holds the day it has been used last. The entries not used for some days are
+    dropped when saving.
+    """
+
+    def __init__(
+        self, entries: dict[tuple[int, int], tuple[int, int, str, int]] | None = None
+    ) -> None:
+        self._entries = entries or {}
+        self._used: dict[tuple[int, int], tuple[int, int, str, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Path) -> ConfigSyncHashCache:
+        try:
+            return cls(marshal.loads(store.load_bytes_from_file(path, default=marshal.dumps({}))))
+        except (EOFError, ValueError, TypeError):
+            return cls()
+
+    def save(self, path: Path) -> None:
+        """Add the entries of the files seen since loading to the saved ones
+
+        The processes syncing the sites in parallel save their entries one after another."""
+        if all(self._entries.get(key) == entry for key, entry in self._used.items()):
+            return
+        store.makedirs(path.parent)
+        oldest_day = _today() - _CONFIG_SYNC_HASH_MAX_AGE_DAYS
+        with store.locked(path):
+            entries = {
+                key: entry
+                for key, entry in self.load(path)._entries.items()
+                # The entries saved by previous versions have no day
+                if len(entry) == 4 and entry[3] >= oldest_day
+            }
+            entries.update(self._used)
+            store.save_bytes_to_file(path, marshal.dumps(entries))
+
+    def file_hashes(self, files: Sequence[tuple[Path, os.stat_result]]) -> list[str]:
+        # A file modified that recently may be modified again without changing its mtime
+        racy_mtime_ns = time.time_ns() - _CONFIG_SYNC_HASH_RACY_SECONDS * 1_000_000_000
+        today = _today()
+        hashes: list[str] = []
+        missing: list[int] = []
+        for index, (_file_path, stat_result) in enumerate(files):
+            entry = self._entries.get((stat_result.st_dev, stat_result.st_ino))
+            if entry and entry[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+                self._used[(stat_result.st_dev, stat_result.st_ino)] = (*entry[:3], today)
+                hashes.append(entry[2])
+            else:
+                missing.append(index)
+                hashes.append("")
+
+        self.hits += len(files) - len(missing)
+        self.misses += len(missing)
+        for index, file_hash in zip(
+            missing, _create_config_sync_file_hashes([files[index][0] for index in missing])
+        ):
+            hashes[index] = file_hash
+            stat_result = files[index][1]
+            if stat_result.st_mtime_ns < racy_mtime_ns:
+                self._used[(stat_result.st_dev, stat_result.st_ino)] = (
+                    stat_result.st_size,
+                    stat_result.st_mtime_ns,
+                    file_hash,
+                    today,
+                )
+        return hashes
+
+
+def _today() -> int:
+    return int(time.time() // 86400)
+
+
 def _get_config_sync_file_infos(
-    replication_paths: list[ReplicationPath], base_dir: Path
+    replication_paths: list[ReplicationPath],
+    base_dir: Path,
+    hash_cache: ConfigSyncHashCache | None = None,
 ) -> dict[str, ConfigSyncFileInfo]:
     """Scans the given replication paths for the information needed for the config sync
 
     It produces a dictionary of sync file infos. One entry is created for each file.  Directories
-    are not added to the dictionary.
+    are not added to the dictionary. The hashes of the files not found in the hash cache are
+    computed and added to it.
     """
-    infos = {}
+    entries: dict[str, tuple[Path, os.stat_result]] = {}
     general_dir_excludes = ["__pycache__"]
 
     for replication_path in replication_paths:
@@ -2395,11 +2518,12 @@ def _get_config_sync_file_infos(
             continue  # Only report back existing things
 
         if replication_path.ty == "file":
-            infos[replication_path.site_path] = _get_config_sync_file_info(path)
+            entries[replication_path.site_path] = (path, path.lstat())
 
         elif replication_path.ty == "dir":
             for entry in path.glob("**/*"):
-                if entry.is_dir() and not entry.is_symlink():
+                entry_stat = entry.lstat()
+                if stat.S_ISDIR(entry_stat.st_mode):
                     continue  # Do not add directories at all
 
                 if (
@@ -2410,22 +2534,34 @@ def _get_config_sync_file_infos(
                     continue
 
                 entry_site_path = entry.relative_to(base_dir)
-                infos[str(entry_site_path)] = _get_config_sync_file_info(entry)
+                entries[str(entry_site_path)] = (entry, entry_stat)
 
         else:
             raise NotImplementedError()
+
+    file_hashes = iter(
+        (hash_cache or ConfigSyncHashCache()).file_hashes(
+            [entry for entry in entries.values() if not stat.S_ISLNK(entry[1].st_mode)]
+        )
+    )
+    infos = {}
+    for site_path, (file_path, file_stat) in entries.items():
+        is_symlink = stat.S_ISLNK(file_stat.st_mode)
+        infos[site_path] = ConfigSyncFileInfo(
+            file_stat.st_mode,
+            file_stat.st_size,
+            os.readlink(str(file_path)) if is_symlink else None,
+            next(file_hashes) if not is_symlink else None,
+        )
     return infos
 
 
-def _get_config_sync_file_info(file_path: Path) -> ConfigSyncFileInfo:
-    stat = file_path.lstat()
-    is_symlink = file_path.is_symlink()
-    return ConfigSyncFileInfo(
-        stat.st_mode,
-        stat.st_size,
-        os.readlink(str(file_path)) if is_symlink else None,
-        _create_config_sync_file_hash(file_path) if not is_symlink else None,
-    )
+def _create_config_sync_file_hashes(file_paths: list[Path]) -> list[str]:
+    # hashlib releases the GIL while hashing larger chunks, so the threads read and hash in parallel
+    if len(file_paths) < _CONFIG_SYNC_HASH_POOL_MIN_FILES:
+        return [_create_config_sync_file_hash(file_path) for file_path in file_paths]
+    with ThreadPool(_CONFIG_SYNC_HASH_THREADS) as pool:
+        return pool.map(_create_config_sync_file_hash, file_paths)
 
 
 def _create_config_sync_file_hash(file_path: Path) -> str:
@@ -7,8 +7,11 @@ import abc
 import ast
 import errno
 import os
+import struct
+import zlib
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Generic, TypeVar
+from typing import BinaryIO, Generic, NamedTuple, TypeVar
 
 import cmk.utils.store as store
 
@@ -17,11 +20,26 @@ from cmk.gui.i18n import _
 
 _VT = TypeVar("_VT")
 
+_INDEX_RECORD = struct.Struct("<qqdI")
+
+
+class _IndexRecord(NamedTuple):
+    start: int
+    end: int  # Behind the terminating "\0"
+    time: float
+    crc: int  # Of the entry including the terminating "\0"
+
 
 class ABCAppendStore(Generic[_VT], abc.ABC):
     """Managing a file with structured data that can be appended in a cheap way
 
     The file holds basic python structures separated by "\0".
+
+    The positions and times of the entries are recorded in an index file next to it, which
+    is appended together with the file. This way the entries can be counted and read starting
+    from the newest or from a point in time without deserializing all of them. The index is
+    checked against the last entry it knows and catches up with the entries appended without
+    updating it (e.g. by previous versions), so the file stays the only source of truth.
     """
 
     @staticmethod
@@ -58,8 +76,14 @@ class ABCAppendStore(Generic[_VT], abc.ABC):
         Override this to execute some logic after literal_eval() to produce _VT objects"""
         raise NotImplementedError()
 
+    @staticmethod
+    def _entry_time(raw: object) -> float:
+        """The time of a serialized entry, used for reading time ranges"""
+        return float(raw["time"]) if isinstance(raw, dict) else 0.0
+
     def __init__(self, path: Path) -> None:
         self._path = path
+        self._index_path = path.with_name(path.name + ".index")
 
     def exists(self) -> bool:
         return self._path.exists()
@@ -90,10 +114,125 @@ class ABCAppendStore(Generic[_VT], abc.ABC):
 
         return entries
 
+    def count(self) -> int:
+        """Number of entries, usually without deserializing any of them"""
+        num_indexed, missing = self._update_index()
+        return num_indexed + len(missing)
+
+    def read_reversed(self, until: float | None = None) -> Iterator[_VT]:
+        """Deserialize the entries one after another, starting with the last one
+
+        When a time is given, only the entries older than it are read.
+        """
+        records = self._load_index()
+        try:
+            with self._path.open("rb") as f:
+                for record in reversed(records):
+                    if until is None or record.time < until:
+                        yield self._read_entry(f, record)
+        except FileNotFoundError:
+            pass
+
+    def read_from(self, start: float) -> Iterator[_VT]:
+        """Deserialize the entries one after another, starting with the first one not older
+        than the start time"""
+        records = self._load_index()
+        try:
+            with self._path.open("rb") as f:
+                for record in records:
+                    if record.time >= start:
+                        yield self._read_entry(f, record)
+        except FileNotFoundError:
+            pass
+
+    def read_time_range(self, start: float | None = None, end: float | None = None) -> list[_VT]:
+        """Return the entries from the start time (inclusive) until the end time (exclusive)"""
+        records = [
+            record
+            for record in self._load_index()
+            if (start is None or record.time >= start) and (end is None or record.time < end)
+        ]
+        if not records:
+            return []
+        try:
+            with self._path.open("rb") as f:
+                return [self._read_entry(f, record) for record in records]
+        except FileNotFoundError:
+            return []
+
+    def _read_entry(self, f: BinaryIO, record: _IndexRecord) -> _VT:
+        f.seek(record.start)
+        raw = f.read(record.end - record.start - 1)
+        return self._deserialize(ast.literal_eval(raw.decode("utf-8")))
+
+    def _load_index(self) -> list[_IndexRecord]:
+        num_indexed, missing = self._update_index()
+        if not num_indexed:
+            return missing
+        try:
+            with self._index_path.open("rb") as f:
+                raw_index = f.read(num_indexed * _INDEX_RECORD.size)
+        except FileNotFoundError:
+            return []
+        return [
+            _IndexRecord._make(values) for values in _INDEX_RECORD.iter_unpack(raw_index)
+        ] + missing
+
+    def _update_index(self) -> tuple[int, list[_IndexRecord]]:
+        """Check the index of the file and index the entries missing in it
+
+        Returns the number of entries in the index file and the records of the missing entries.
+        The file is locked for updating the index file, unless it is locked already.
+        """
+        try:
+            with self._path.open("rb") as f:
+                data_size = os.fstat(f.fileno()).st_size
+                num_indexed, last = _read_last_index_record(self._index_path)
+                is_valid = num_indexed >= 0 and (last is None or _is_in_place(f, last, data_size))
+                if not is_valid:
+                    num_indexed, last = 0, None
+                missing = self._index_entries(f, 0 if last is None else last.end, data_size)
+        except FileNotFoundError:
+            return 0, []
+
+        if is_valid and not missing:
+            return num_indexed, missing
+
+        if not store.have_lock(self._path):
+            # Someone else may have updated the index in the meantime
+            with store.locked(self._path):
+                return self._update_index()
+
+        if not is_valid:
+            store.save_bytes_to_file(self._index_path, _pack_index(missing))
+        else:
+            with self._index_path.open("ab") as index_file:
+                index_file.write(_pack_index(missing))
+
+        return num_indexed, missing
+
+    def _index_entries(self, f: BinaryIO, offset: int, data_size: int) -> list[_IndexRecord]:
+        f.seek(offset)
+        records = []
+        # The part behind the last separator is an entry being written right now
+        for raw in f.read(data_size - offset).split(b"\0")[:-1]:
+            if raw:
+                records.append(
+                    _IndexRecord(
+                        offset,
+                        offset + len(raw) + 1,
+                        self._entry_time(ast.literal_eval(raw.decode("utf-8"))),
+                        zlib.crc32(raw + b"\0"),
+                    )
+                )
+            offset += len(raw) + 1
+        return records
+
     def write(self, entries: list[_VT]) -> None:
         # First truncate the file
         with self._path.open("wb"):
             pass
+        self._clear_index()
 
         for entry in entries:
             self.append(entry)
@@ -102,14 +241,29 @@ class ABCAppendStore(Generic[_VT], abc.ABC):
         path = self._path
         try:
             store.acquire_lock(path)
+            self._update_index()
 
+            raw = self._serialize(entry)
+            data = repr(raw).encode("utf-8") + b"\0"
             with path.open("ab+") as f:
-                f.write(repr(self._serialize(entry)).encode("utf-8") + b"\0")
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
                 f.flush()
                 os.fsync(f.fileno())
 
             path.chmod(0o660)
 
+            with self._index_path.open("ab") as index_file:
+                index_file.write(
+                    _pack_index(
+                        [
+                            _IndexRecord(
+                                offset, offset + len(data), self._entry_time(raw), zlib.crc32(data)
+                            )
+                        ]
+                    )
+                )
+
         except Exception as e:
             raise MKGeneralException(_('Cannot write file "%s": %s') % (path, e))
 
@@ -124,3 +278,36 @@ class ABCAppendStore(Generic[_VT], abc.ABC):
                 pass  # Not existant -> OK
             else:
                 raise
+        self._clear_index()
+
+    def _clear_index(self) -> None:
+        self._index_path.unlink(missing_ok=True)
+
+
+def _read_last_index_record(index_path: Path) -> tuple[int, _IndexRecord | None]:
+    """Return the number of records and the last one, -1 for a damaged index"""
+    try:
+        with index_path.open("rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size % _INDEX_RECORD.size:
+                return -1, None
+            if not size:
+                return 0, None
+            f.seek(size - _INDEX_RECORD.size)
+            return size // _INDEX_RECORD.size, _IndexRecord._make(
+                _INDEX_RECORD.unpack(f.read(_INDEX_RECORD.size))
+            )
+    except FileNotFoundError:
+        return 0, None
+
+
+def _is_in_place(f: BinaryIO, record: _IndexRecord, data_size: int) -> bool:
+    """Check whether the indexed entry is still found in the file"""
+    if record.end > data_size:
+        return False
+    f.seek(record.start)
+    return zlib.crc32(f.read(record.end - record.start)) == record.crc
+
+
+def _pack_index(records: list[_IndexRecord]) -> bytes:
+    return b"".join(_INDEX_RECORD.pack(*record) for record in records)
@@ -71,9 +71,10 @@ class AuditLogStore(ABCAppendStore["AuditLogStore.Entry"]):
                     break
 
         self._path.rename(newpath)
+        self._clear_index()
 
     def get_entries_since(self, timestamp: int) -> Sequence["AuditLogStore.Entry"]:
-        return [entry for entry in self.read() if entry.time > timestamp]
+        return [entry for entry in self.read_time_range(timestamp) if entry.time > timestamp]
 
     @classmethod
     def to_json(cls, entries: Sequence["AuditLogStore.Entry"]) -> str:
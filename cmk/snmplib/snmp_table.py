@@ -4,7 +4,7 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Provide methods to get an snmp table with or without caching
 """
-from collections.abc import Callable, Iterable, Iterator, MutableMapping, Sequence
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
 from pathlib import Path
 
 import cmk.utils.debug
@@ -149,6 +149,9 @@ def get_snmp_table(
     max_len = 0
     max_len_col = -1
 
+    # Fetch all columns at once, backends may be able to walk them in parallel
+    rowinfos = _get_snmpwalks(section_name, tree, walk_cache=walk_cache, backend=backend)
+
     for oid in tree.oids:
         fetchoid: OID = f"{tree.base}.{oid.column}"
         # column may be integer or string like "1.5.4.2.3"
@@ -169,14 +172,7 @@ def get_snmp_table(
             index_column = len(columns)
             index_format = oid.column
         else:
-            rowinfo = _get_snmpwalk(
-                section_name,
-                tree.base,
-                fetchoid,
-                walk_cache=walk_cache,
-                save_walk_cache=oid.save_to_cache,
-                backend=backend,
-            )
+            rowinfo = rowinfos[fetchoid]
             if len(rowinfo) > max_len:
                 max_len_col = len(columns)
 
@@ -261,63 +257,77 @@ def _key_oid_pairs(pair1: tuple[OID, SNMPRawValue]) -> list[int]:
     return _oid_to_intlist(pair1[0].lstrip("."))
 
 
-def _get_snmpwalk(
+def _get_snmpwalks(
     section_name: SectionName | None,
-    base: str,
-    fetchoid: OID,
+    tree: BackendSNMPTree,
     *,
     walk_cache: MutableMapping[str, tuple[bool, SNMPRowInfo]],
-    save_walk_cache: bool,
     backend: SNMPBackend,
-) -> SNMPRowInfo:
-    try:
-        rowinfo = walk_cache[fetchoid][1]
-        console.vverbose(f"Already fetched OID: {fetchoid}\n")
-        return rowinfo
-    except KeyError:
-        pass
-
-    rowinfo = _perform_snmpwalk(section_name, base, fetchoid, backend=backend)
-    walk_cache[fetchoid] = (save_walk_cache, rowinfo)
-    return rowinfo
-
-
-def _perform_snmpwalk(
+) -> Mapping[OID, SNMPRowInfo]:
+    rowinfos: dict[OID, SNMPRowInfo] = {}
+    # fetchoid -> save to walk cache
+    missing: dict[OID, bool] = {}
+    for oid in tree.oids:
+        if isinstance(oid.column, SpecialColumn):
+            continue
+        fetchoid = f"{tree.base}.{oid.column}"
+        if fetchoid in rowinfos or fetchoid in missing:
+            continue
+        try:
+            rowinfos[fetchoid] = walk_cache[fetchoid][1]
+            console.vverbose(f"Already fetched OID: {fetchoid}\n")
+        except KeyError:
+            missing[fetchoid] = oid.save_to_cache
+
+    if not missing:
+        return rowinfos
+
+    for (fetchoid, save_walk_cache), rowinfo in zip(
+        missing.items(),
+        _perform_snmpwalks(section_name, tree.base, list(missing), backend=backend),
+    ):
+        walk_cache[fetchoid] = (save_walk_cache, rowinfo)
+        rowinfos[fetchoid] = rowinfo
+    return rowinfos
+
+
+def _perform_snmpwalks(
     section_name: SectionName | None,
     base_oid: str,
-    fetchoid: OID,
+    fetchoids: Sequence[OID],
     *,
     backend: SNMPBackend,
-) -> SNMPRowInfo:
-    added_oids: set[OID] = set()
-    rowinfo: SNMPRowInfo = []
+) -> Sequence[SNMPRowInfo]:
+    added_oids: list[set[OID]] = [set() for _oid in fetchoids]
+    rowinfos: list[SNMPRowInfo] = [[] for _oid in fetchoids]
 
     for context_name in backend.config.snmpv3_contexts_of(section_name):
-        rows = backend.walk(
-            oid=fetchoid,
+        columns = backend.walk_columns(
+            fetchoids,
             section_name=section_name,
             table_base_oid=base_oid,
             context_name=context_name,
         )
 
-        # I've seen a broken device (Mikrotik Router), that broke after an
-        # update to RouterOS v6.22. It would return 9 time the same OID when
-        # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
-        # by removing any duplicate OID information
-        if len(rows) > 1 and rows[0][0] == rows[1][0]:
-            console.vverbose(
-                "Detected broken SNMP agent. Ignoring duplicate OID %s.\n" % rows[0][0]
-            )
-            rows = rows[:1]
-
-        for row_oid, val in rows:
-            if row_oid in added_oids:
-                console.vverbose(f"Duplicate OID found: {row_oid} ({val!r})\n")
-            else:
-                rowinfo.append((row_oid, val))
-                added_oids.add(row_oid)
-
-    return rowinfo
+        for rows, added, rowinfo in zip(columns, added_oids, rowinfos):
+            # I've seen a broken device (Mikrotik Router), that broke after an
+            # update to RouterOS v6.22. It would return 9 time the same OID when
+            # .1.3.6.1.2.1.1.1.0 was being walked. We try to detect these situations
+            # by removing any duplicate OID information
+            if len(rows) > 1 and rows[0][0] == rows[1][0]:
+                console.vverbose(
+                    "Detected broken SNMP agent. Ignoring duplicate OID %s.\n" % rows[0][0]
+                )
+                rows = rows[:1]
+
+            for row_oid, val in rows:
+                if row_oid in added:
+                    console.vverbose(f"Duplicate OID found: {row_oid} ({val!r})\n")
+                else:
+                    rowinfo.append((row_oid, val))
+                    added.add(row_oid)
+
+    return rowinfos
 
 
 def _sanitize_snmp_encoding(
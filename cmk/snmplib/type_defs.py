@@ -77,6 +77,7 @@ class SNMPBackendEnum(enum.Enum):
     INLINE = "Inline"
     CLASSIC = "Classic"
     STORED_WALK = "StoredWalk"
+    NATIVE = "Native"
 
     def serialize(self) -> str:
         return self.name
@@ -208,6 +209,27 @@ class SNMPBackend(abc.ABC):
     ) -> SNMPRowInfo:
         return []
 
+    def walk_columns(
+        self,
+        oids: Sequence[OID],
+        section_name: _SectionName | None = None,
+        table_base_oid: OID | None = None,
+        context_name: SNMPContextName | None = None,
+    ) -> Sequence[SNMPRowInfo]:
+        """Walk several columns of a table
+
+        Backends may override this to fetch the columns at the same time.
+        """
+        return [
+            self.walk(
+                oid=oid,
+                section_name=section_name,
+                table_base_oid=table_base_oid,
+                context_name=context_name,
+            )
+            for oid in oids
+        ]
+
 
 class SpecialColumn(enum.IntEnum):
     # Until we remove all but the first, its worth having an enum
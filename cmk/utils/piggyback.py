@@ -3,12 +3,17 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-import errno
 import logging
+import marshal
+import mmap
 import os
+import shutil
+import struct
 import tempfile
-from collections.abc import Container, Iterable, Iterator, Mapping, Sequence
+import time
+from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
 from contextlib import suppress
+from itertools import chain
 from pathlib import Path
 from typing import Final, NamedTuple
 
@@ -44,20 +49,18 @@ PiggybackTimeSettings = Sequence[_PiggybackTimeSetting]
 _PiggybackTimeSettingsMap = Mapping[tuple[str | None, str], int]
 
 # ***** Terminology *****
-# "piggybacked_host_folder":
-# - tmp/check_mk/piggyback/HOST
+# "source_payload_file":
+# - tmp/check_mk/piggyback/SOURCE
+# - The piggyback data of all hosts piggybacked by SOURCE, followed by an index of them
 #
 # "piggybacked_hostname":
-# - Path(tmp/check_mk/piggyback/HOST).name
-#
-# "piggybacked_host_source":
-# - tmp/check_mk/piggyback/HOST/SOURCE
+# - A host in the index of a source payload file
 #
 # "source_state_file":
 # - tmp/check_mk/piggyback_sources/SOURCE
 #
 # "source_hostname":
-# - Path(tmp/check_mk/piggyback/HOST/SOURCE).name
+# - Path(tmp/check_mk/piggyback/SOURCE).name
 # - Path(tmp/check_mk/piggyback_sources/SOURCE).name
 
 
@@ -74,8 +77,8 @@ def get_piggyback_raw_data(
     if not piggybacked_hostname:
         return []
 
-    piggyback_file_infos = _get_piggyback_processed_file_infos(piggybacked_hostname, time_settings)
-    if not piggyback_file_infos:
+    piggyback_payloads = _get_piggyback_processed_payloads(piggybacked_hostname, time_settings)
+    if not piggyback_payloads:
         logger.log(
             VERBOSE,
             "No piggyback files for '%s'. Skip processing.",
@@ -84,53 +87,27 @@ def get_piggyback_raw_data(
         return []
 
     piggyback_data = []
-    for file_info in piggyback_file_infos:
-        try:
-            # Raw data is always stored as bytes. Later the content is
-            # converted to unicode in abstact.py:_parse_info which respects
-            # 'encoding' in section options.
-            raw_data = AgentRawData(store.load_bytes_from_file(file_info.file_path))
-
-        except OSError as e:
-            reason = "Cannot read piggyback raw data from source '%s'" % file_info.source_hostname
-            piggyback_raw_data = PiggybackRawDataInfo(
-                PiggybackFileInfo(
-                    source_hostname=file_info.source_hostname,
-                    file_path=file_info.file_path,
-                    successfully_processed=False,
-                    message=reason,
-                    status=0,
-                ),
-                raw_data=AgentRawData(b""),
-            )
+    for file_info, payloads in piggyback_payloads:
+        if file_info.successfully_processed:
             logger.log(
                 VERBOSE,
-                "Piggyback file '%s': %s, %s",
+                "Piggyback file '%s': %s",
                 file_info.file_path,
-                reason,
-                e,
+                file_info.message,
             )
-
         else:
-            piggyback_raw_data = PiggybackRawDataInfo(
-                file_info,
-                raw_data,
+            logger.log(
+                VERBOSE,
+                "Piggyback file '%s' is outdated (%s). Skip processing.",
+                file_info.file_path,
+                file_info.message,
             )
-            if file_info.successfully_processed:
-                logger.log(
-                    VERBOSE,
-                    "Piggyback file '%s': %s",
-                    file_info.file_path,
-                    file_info.message,
-                )
-            else:
-                logger.log(
-                    VERBOSE,
-                    "Piggyback file '%s' is outdated (%s). Skip processing.",
-                    file_info.file_path,
-                    file_info.message,
-                )
-        piggyback_data.append(piggyback_raw_data)
+        # Raw data is always stored as bytes. Later the content is
+        # converted to unicode in abstact.py:_parse_info which respects
+        # 'encoding' in section options.
+        piggyback_data.append(
+            PiggybackRawDataInfo(file_info, payloads.raw_data(piggybacked_hostname))
+        )
     return piggyback_data
 
 
@@ -139,14 +116,11 @@ def get_source_and_piggyback_hosts(
 ) -> Iterator[tuple[HostName, HostName]]:
     """Generates all piggyback pig/piggybacked host pairs that have up-to-date data"""
 
-    for piggybacked_host_folder in _get_piggybacked_host_folders():
-        for file_info in _get_piggyback_processed_file_infos(
-            HostName(piggybacked_host_folder.name),
-            time_settings,
-        ):
+    for piggybacked_hostname in _get_piggybacked_hostnames():
+        for file_info in _get_piggyback_processed_file_infos(piggybacked_hostname, time_settings):
             if not file_info.successfully_processed:
                 continue
-            yield HostName(file_info.source_hostname), HostName(piggybacked_host_folder.name)
+            yield HostName(file_info.source_hostname), piggybacked_hostname
 
 
 def has_piggyback_raw_data(
@@ -221,40 +195,56 @@ def _get_piggyback_processed_file_infos(
     piggybacked_hostname: HostName,
     time_settings: PiggybackTimeSettings,
 ) -> Sequence[PiggybackFileInfo]:
-    """Gather a list of piggyback files to read for further processing.
+    return [
+        file_info
+        for file_info, _payloads in _get_piggyback_processed_payloads(
+            piggybacked_hostname, time_settings
+        )
+    ]
+
+
+def _get_piggyback_processed_payloads(
+    piggybacked_hostname: HostName,
+    time_settings: PiggybackTimeSettings,
+) -> Sequence[tuple[PiggybackFileInfo, "_SourcePayloads"]]:
+    """Gather the piggyback data of the host for further processing.
 
     Please note that there may be multiple parallel calls executing the
-    _get_piggyback_processed_file_infos(), store_piggyback_raw_data() or cleanup_piggyback_files()
-    functions. Therefor all these functions needs to deal with suddenly vanishing or
-    updated files/directories.
+    _get_piggyback_processed_payloads(), store_piggyback_raw_data() or cleanup_piggyback_files()
+    functions. The payload files are replaced as a whole and the data of an already
+    loaded payload file stays available, but the source status files may vanish or
+    be updated at any time.
     """
-    source_hostnames = get_source_hostnames(piggybacked_hostname)
-    expanded_time_settings = _TimeSettingsMap(source_hostnames, piggybacked_hostname, time_settings)
+    source_payloads = _get_source_payloads_of(piggybacked_hostname)
+    expanded_time_settings = _TimeSettingsMap(source_payloads, piggybacked_hostname, time_settings)
     return [
-        _get_piggyback_processed_file_info(
-            source_hostname,
-            piggybacked_hostname,
-            _get_piggybacked_file_path(source_hostname, piggybacked_hostname),
-            expanded_time_settings,
+        (
+            _get_piggyback_processed_file_info(
+                source_hostname,
+                piggybacked_hostname,
+                payloads,
+                expanded_time_settings,
+            ),
+            payloads,
         )
-        for source_hostname in source_hostnames
-        if not source_hostname.startswith(".")
+        for source_hostname, payloads in source_payloads.items()
     ]
 
 
 def _get_piggyback_processed_file_info(
     source_hostname: HostName,
     piggybacked_hostname: HostName,
-    piggyback_file_path: Path,
+    payloads: "_SourcePayloads",
     settings: _TimeSettingsMap,
 ) -> PiggybackFileInfo:
-
+    piggyback_file_path = payloads.path
     try:
-        file_age = cmk.utils.cachefile_age(piggyback_file_path)
-    except FileNotFoundError:
+        payload_mtime = payloads.mtime(piggybacked_hostname)
+    except KeyError:
         return PiggybackFileInfo(
             source_hostname, piggyback_file_path, False, "Piggyback file is missing", 0
         )
+    file_age = time.time() - payload_mtime
 
     if (outdated := file_age - settings.max_cache_age(source_hostname, piggybacked_hostname)) > 0:
         return PiggybackFileInfo(
@@ -279,7 +269,7 @@ def _get_piggyback_processed_file_info(
             validity_state if valid_msg else 0,
         )
 
-    if _is_piggyback_file_outdated(status_file_path, piggyback_file_path):
+    if _is_piggyback_file_outdated(status_file_path, payload_mtime):
         valid_msg = _validity_period_message(file_age, validity_period)
         return PiggybackFileInfo(
             source_hostname,
@@ -309,14 +299,14 @@ def _validity_period_message(
 
 def _is_piggyback_file_outdated(
     status_file_path: Path,
-    piggyback_file_path: Path,
+    payload_mtime: float,
 ) -> bool:
     try:
         # TODO use Path.stat() but be aware of:
         # On POSIX platforms Python reads atime and mtime at nanosecond resolution
         # but only writes them at microsecond resolution.
         # (We're using os.utime() in _store_status_file_of())
-        return os.stat(str(status_file_path))[8] > os.stat(str(piggyback_file_path))[8]
+        return os.stat(str(status_file_path))[8] > payload_mtime
     except FileNotFoundError:
         return True
 
@@ -336,51 +326,84 @@ def remove_source_status_file(source_hostname: HostName) -> bool:
     return _remove_piggyback_file(source_status_path)
 
 
+def remove_piggybacked_host_data(piggybacked_hostname: HostName) -> None:
+    """Remove the piggyback data of this host received from all sources"""
+    for source_hostname in _get_source_payloads_of(piggybacked_hostname):
+        _remove_payloads(
+            source_hostname,
+            lambda hostname, _payloads: hostname == piggybacked_hostname,
+        )
+
+
+def rename_piggybacked_host(oldname: HostName, newname: HostName) -> bool:
+    """Move the piggyback data of this host received from all sources to the new name"""
+    source_hostnames = list(_get_source_payloads_of(oldname))
+    for source_hostname in source_hostnames:
+        payload_file_path = _get_source_payload_file_path(source_hostname)
+        if not payload_file_path.exists():
+            continue  # Removed in the meantime, locking it would create an empty file
+        with store.locked(payload_file_path):
+            payloads = _SourcePayloads.load(payload_file_path)
+            if oldname not in payloads.index:
+                continue
+            _SourcePayloads.save(
+                payload_file_path,
+                (
+                    (
+                        newname if hostname == oldname else hostname,
+                        payloads.raw_data(hostname),
+                        payloads.mtime(hostname),
+                    )
+                    for hostname in payloads.index
+                    if hostname != newname
+                ),
+            )
+    return bool(source_hostnames)
+
+
 def store_piggyback_raw_data(
     source_hostname: HostName,
     piggybacked_raw_data: Mapping[HostName, Sequence[bytes]],
 ) -> None:
-    piggyback_file_paths = []
-    for piggybacked_hostname, lines in piggybacked_raw_data.items():
-        piggyback_file_path = _get_piggybacked_file_path(source_hostname, piggybacked_hostname)
-        logger.log(
-            VERBOSE,
-            "Storing piggyback data for: %s",
-            piggybacked_hostname,
-        )
-        # Raw data is always stored as bytes. Later the content is
-        # converted to unicode in abstact.py:_parse_info which respects
-        # 'encoding' in section options.
-        store.save_bytes_to_file(piggyback_file_path, b"%s\n" % b"\n".join(lines))
-        piggyback_file_paths.append(piggyback_file_path)
-
     # Store the last contact with this piggyback source to be able to filter outdated data later
     # We use the mtime of this file later for comparison.
     # Only do this for hosts that sent piggyback data this turn, cleanup the status file when no
     # piggyback data was sent this turn.
-    if piggybacked_raw_data:
-        logger.log(VERBOSE, "Received piggyback data for %d hosts", len(piggybacked_raw_data))
-
-        status_file_path = _get_source_status_file_path(source_hostname)
-        _store_status_file_of(status_file_path, piggyback_file_paths)
-    else:
+    if not piggybacked_raw_data:
         logger.debug("Received no piggyback data")
         remove_source_status_file(source_hostname)
+        return
+
+    for piggybacked_hostname in piggybacked_raw_data:
+        logger.log(
+            VERBOSE,
+            "Storing piggyback data for: %s",
+            piggybacked_hostname,
+        )
+    logger.log(VERBOSE, "Received piggyback data for %d hosts", len(piggybacked_raw_data))
+
+    status_file_path = _get_source_status_file_path(source_hostname)
+    _store_status_file_of(
+        status_file_path,
+        lambda status_file_mtime: _store_payloads(
+            source_hostname, piggybacked_raw_data, status_file_mtime
+        ),
+    )
 
 
 def _store_status_file_of(
     status_file_path: Path,
-    piggyback_file_paths: Iterable[Path],
+    store_payloads: Callable[[float], None],
 ) -> None:
     store.makedirs(status_file_path.parent)
 
     # Cannot use store.save_bytes_to_file like:
     # 1. store.save_bytes_to_file(status_file_path, b"")
-    # 2. set utime of piggybacked host files
+    # 2. store the payloads with the mtime of the status file
     # Between 1. and 2.:
-    # - the piggybacked host may check its files
-    # - status file is newer (before utime of piggybacked host files is set)
-    # => piggybacked host file is outdated
+    # - the piggybacked host may check its data
+    # - status file is newer (before the payloads are stored)
+    # => piggybacked host data is outdated
     with tempfile.NamedTemporaryFile(
         "wb",
         dir=str(status_file_path.parent),
@@ -391,20 +414,71 @@ def _store_status_file_of(
         os.chmod(tmp_path, 0o660)
         tmp.write(b"")
 
-        tmp_stats = os.stat(tmp_path)
-        status_file_times = (tmp_stats.st_atime, tmp_stats.st_mtime)
-        for piggyback_file_path in piggyback_file_paths:
-            try:
-                # TODO use Path.stat() but be aware of:
-                # On POSIX platforms Python reads atime and mtime at nanosecond resolution
-                # but only writes them at microsecond resolution.
-                # (We're using os.utime() in _store_status_file_of())
-                os.utime(str(piggyback_file_path), status_file_times)
-            except FileNotFoundError:
-                continue
+        # TODO use Path.stat() but be aware of:
+        # On POSIX platforms Python reads atime and mtime at nanosecond resolution
+        # but only writes them at microsecond resolution.
+        store_payloads(os.stat(tmp_path)[8])
     os.rename(tmp_path, str(status_file_path))
 
 
+def _store_payloads(
+    source_hostname: HostName,
+    piggybacked_raw_data: Mapping[HostName, Sequence[bytes]],
+    payload_mtime: float,
+) -> None:
+    payload_file_path = _get_source_payload_file_path(source_hostname)
+    store.makedirs(payload_file_path.parent)
+    with store.locked(payload_file_path):
+        previous = _SourcePayloads.load(payload_file_path)
+        _SourcePayloads.save(
+            payload_file_path,
+            chain(
+                (
+                    # Raw data is always stored as bytes. Later the content is
+                    # converted to unicode in abstact.py:_parse_info which respects
+                    # 'encoding' in section options.
+                    (piggybacked_hostname, b"%s\n" % b"\n".join(lines), payload_mtime)
+                    for piggybacked_hostname, lines in piggybacked_raw_data.items()
+                ),
+                # The data of the hosts not piggybacked this turn is kept until it is cleaned
+                # up, but it is outdated from now on (like a file not updated by the source).
+                (
+                    (hostname, previous.raw_data(hostname), previous.mtime(hostname))
+                    for hostname in previous.index
+                    if hostname not in piggybacked_raw_data
+                ),
+            ),
+        )
+
+
+def _remove_payloads(
+    source_hostname: HostName,
+    is_obsolete: Callable[[HostName, "_SourcePayloads"], bool],
+) -> None:
+    payload_file_path = _get_source_payload_file_path(source_hostname)
+    with store.locked(payload_file_path):
+        # Load it again, the source may have stored new data in the meantime
+        payloads = _SourcePayloads.load(payload_file_path)
+        remaining = [hostname for hostname in payloads.index if not is_obsolete(hostname, payloads)]
+        if remaining:
+            if len(remaining) < len(payloads.index):
+                _SourcePayloads.save(
+                    payload_file_path,
+                    (
+                        (hostname, payloads.raw_data(hostname), payloads.mtime(hostname))
+                        for hostname in remaining
+                    ),
+                )
+            return
+
+        _remove_piggyback_file(payload_file_path)
+        logger.log(
+            VERBOSE,
+            "Piggyback file '%s' is empty. Removed it.",
+            payload_file_path,
+        )
+
+
 #   .--folders/files-------------------------------------------------------.
 #   |         __       _     _                  ____ _ _                   |
 #   |        / _| ___ | | __| | ___ _ __ ___   / / _(_) | ___  ___         |
@@ -414,21 +488,150 @@ def _store_status_file_of(
 #   |                                                                      |
 #   '----------------------------------------------------------------------'
 
+_PAYLOAD_MAGIC: Final = b"CMKPIGGY"
+# magic, offset of the index
+_PAYLOAD_HEADER: Final = struct.Struct("=8sQ")
+
+# Changes of a directory within this time can not be told apart by its mtime
+_MTIME_RESOLUTION_NS: Final = 1_000_000_000
+
+
+class _SourcePayloads:
+    """The piggyback data of one source for all the hosts piggybacked by it
+
+    The payloads are stored one after another and followed by the index, which maps the
+    piggybacked hosts to the offset, the length and the modification time of their
+    payload. The file is memory mapped, only the payloads actually used are read."""
+
+    def __init__(
+        self,
+        path: Path,
+        data: mmap.mmap | bytes,
+        index: Mapping[HostName, tuple[int, int, float]],
+    ) -> None:
+        self.path: Final = path
+        self.index: Final = index
+        self._data = data
+
+    @classmethod
+    def load(cls, path: Path) -> "_SourcePayloads":
+        try:
+            with path.open("rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):  # missing or empty, e.g. a lock file
+            return cls(path, b"", {})
+
+        if len(data) < _PAYLOAD_HEADER.size:
+            return cls(path, b"", {})
+        magic, index_offset = _PAYLOAD_HEADER.unpack_from(data)
+        if magic != _PAYLOAD_MAGIC:
+            logger.debug("Ignoring invalid piggyback file '%s'", path)
+            return cls(path, b"", {})
+        return cls(path, data, marshal.loads(data[index_offset:]))
+
+    @staticmethod
+    def save(path: Path, payloads: Iterable[tuple[HostName, bytes, float]]) -> None:
+        chunks = [b""]
+        index: dict[HostName, tuple[int, int, float]] = {}
+        offset = _PAYLOAD_HEADER.size
+        for piggybacked_hostname, payload, payload_mtime in payloads:
+            index[piggybacked_hostname] = (offset, len(payload), payload_mtime)
+            chunks.append(payload)
+            offset += len(payload)
+        chunks[0] = _PAYLOAD_HEADER.pack(_PAYLOAD_MAGIC, offset)
+        chunks.append(marshal.dumps(index))
+        store.ObjectStore(path, serializer=store.BytesSerializer()).write_obj(b"".join(chunks))
+
+    def mtime(self, piggybacked_hostname: HostName) -> float:
+        return self.index[piggybacked_hostname][2]
+
+    def raw_data(self, piggybacked_hostname: HostName) -> AgentRawData:
+        offset, length, _mtime = self.index[piggybacked_hostname]
+        return AgentRawData(self._data[offset : offset + length])
+
+
+class _PiggybackIndex:
+    """The payload files of all sources
+
+    A payload file is only loaded again after it has been replaced. The directory is
+    only scanned again after it has been modified."""
+
+    def __init__(self) -> None:
+        self._path: Path | None = None
+        self._dir_mtime: int | None = None
+        self._identities: dict[HostName, tuple[int, int, int]] = {}
+        self._payloads: dict[HostName, _SourcePayloads] = {}
+
+    def source_payloads(self) -> Mapping[HostName, "_SourcePayloads"]:
+        path = cmk.utils.paths.piggyback_dir
+        try:
+            dir_mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+
+        if path != self._path or dir_mtime is None or dir_mtime != self._dir_mtime:
+            self._scan(path)
+        self._path = path
+        # Modifications right after the scan may not change the mtime of the directory
+        self._dir_mtime = (
+            dir_mtime
+            if dir_mtime is not None and time.time_ns() - dir_mtime > _MTIME_RESOLUTION_NS
+            else None
+        )
+        return self._payloads
+
+    def _scan(self, path: Path) -> None:
+        identities: dict[HostName, tuple[int, int, int]] = {}
+        payloads: dict[HostName, _SourcePayloads] = {}
+        for payload_file_path in _files_in(path):
+            source_hostname = HostName(payload_file_path.name)
+            try:
+                stat = payload_file_path.stat()
+            except FileNotFoundError:
+                continue  # Removed in the meantime
+            identity = identities[source_hostname] = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if (
+                source_hostname in self._payloads
+                and self._identities.get(source_hostname) == identity
+            ):
+                payloads[source_hostname] = self._payloads[source_hostname]
+            else:
+                payloads[source_hostname] = _SourcePayloads.load(payload_file_path)
+        self._identities = identities
+        self._payloads = payloads
+
+
+_piggyback_index = _PiggybackIndex()
+
 
 def get_source_hostnames(piggybacked_hostname: HostName | None = None) -> Sequence[HostName]:
     if piggybacked_hostname is None:
         return [
-            HostName(source_host.name)
-            for piggybacked_host_folder in _get_piggybacked_host_folders()
-            for source_host in _files_in(piggybacked_host_folder)
+            source_hostname
+            for source_hostname, payloads in _piggyback_index.source_payloads().items()
+            if payloads.index
         ]
+    return list(_get_source_payloads_of(piggybacked_hostname))
 
-    piggybacked_host_folder = cmk.utils.paths.piggyback_dir / Path(piggybacked_hostname)
-    return [HostName(source_host.name) for source_host in _files_in(piggybacked_host_folder)]
 
-
-def _get_piggybacked_host_folders() -> Sequence[Path]:
-    return _files_in(cmk.utils.paths.piggyback_dir)
+def _get_source_payloads_of(
+    piggybacked_hostname: HostName,
+) -> Mapping[HostName, _SourcePayloads]:
+    return {
+        source_hostname: payloads
+        for source_hostname, payloads in _piggyback_index.source_payloads().items()
+        if piggybacked_hostname in payloads.index
+    }
+
+
+def _get_piggybacked_hostnames() -> Sequence[HostName]:
+    return list(
+        {
+            piggybacked_hostname: None
+            for payloads in _piggyback_index.source_payloads().values()
+            for piggybacked_hostname in payloads.index
+        }
+    )
 
 
 def _get_source_state_files() -> Sequence[Path]:
@@ -437,7 +640,7 @@ def _get_source_state_files() -> Sequence[Path]:
 
 def _files_in(path: Path) -> Sequence[Path]:
     try:
-        return [f for f in path.iterdir() if not f.name.startswith(".")]
+        return [f for f in path.iterdir() if not f.name.startswith(".") and not f.is_dir()]
     except FileNotFoundError:
         return []
 
@@ -446,11 +649,8 @@ def _get_source_status_file_path(source_hostname: HostName) -> Path:
     return cmk.utils.paths.piggyback_source_dir / str(source_hostname)
 
 
-def _get_piggybacked_file_path(
-    source_hostname: HostName,
-    piggybacked_hostname: HostName,
-) -> Path:
-    return cmk.utils.paths.piggyback_dir / piggybacked_hostname / source_hostname
+def _get_source_payload_file_path(source_hostname: HostName) -> Path:
+    return cmk.utils.paths.piggyback_dir / str(source_hostname)
 
 
 # .
@@ -468,7 +668,7 @@ def cleanup_piggyback_files(time_settings: PiggybackTimeSettings) -> None:
     """This is a housekeeping job to clean up different old files from the
     piggyback directories.
 
-    # Source status files and/or piggybacked data files are cleaned up/deleted
+    # Source status files and/or piggybacked data are cleaned up/deleted
     # if and only if they have exceeded the maximum cache age configured in the
     # global settings or in the rule 'Piggybacked Host Files'."""
 
@@ -478,50 +678,64 @@ def cleanup_piggyback_files(time_settings: PiggybackTimeSettings) -> None:
         time_settings,
     )
 
-    piggybacked_hosts_settings = _get_piggybacked_hosts_settings(time_settings)
+    _cleanup_legacy_piggybacked_host_folders()
+
+    source_payloads = _piggyback_index.source_payloads()
+    piggybacked_hosts_settings = _get_piggybacked_hosts_settings(source_payloads, time_settings)
 
-    _cleanup_old_source_status_files(piggybacked_hosts_settings)
-    _cleanup_old_piggybacked_files(piggybacked_hosts_settings)
+    _cleanup_old_source_status_files(source_payloads, piggybacked_hosts_settings)
+    _cleanup_old_piggybacked_files(source_payloads, piggybacked_hosts_settings)
+
+
+def _cleanup_legacy_piggybacked_host_folders() -> None:
+    """Remove the folders of the piggybacked hosts used by previous versions"""
+    try:
+        folders = [f for f in cmk.utils.paths.piggyback_dir.iterdir() if f.is_dir()]
+    except FileNotFoundError:
+        return
+    for piggybacked_host_folder in folders:
+        logger.log(VERBOSE, "Removing legacy piggyback folder '%s'.", piggybacked_host_folder)
+        shutil.rmtree(piggybacked_host_folder, ignore_errors=True)
 
 
 def _get_piggybacked_hosts_settings(
+    source_payloads: Mapping[HostName, _SourcePayloads],
     time_settings: PiggybackTimeSettings,
-) -> Sequence[tuple[Path, Sequence[Path], _TimeSettingsMap]]:
-    piggybacked_hosts_settings = []
-    for piggybacked_host_folder in _get_piggybacked_host_folders():
-        source_hosts = _files_in(piggybacked_host_folder)
-        time_settings_map = _TimeSettingsMap(
-            [HostName(source_host.name) for source_host in source_hosts],
-            HostName(piggybacked_host_folder.name),
-            time_settings,
-        )
-        piggybacked_hosts_settings.append(
-            (piggybacked_host_folder, source_hosts, time_settings_map)
+) -> Mapping[HostName, _TimeSettingsMap]:
+    source_hostnames_of: dict[HostName, list[HostName]] = {}
+    for source_hostname, payloads in source_payloads.items():
+        for piggybacked_hostname in payloads.index:
+            source_hostnames_of.setdefault(piggybacked_hostname, []).append(source_hostname)
+    return {
+        piggybacked_hostname: _TimeSettingsMap(
+            source_hostnames, piggybacked_hostname, time_settings
         )
-    return piggybacked_hosts_settings
+        for piggybacked_hostname, source_hostnames in source_hostnames_of.items()
+    }
 
 
 def _cleanup_old_source_status_files(
-    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path], _TimeSettingsMap]]
+    source_payloads: Mapping[HostName, _SourcePayloads],
+    piggybacked_hosts_settings: Mapping[HostName, _TimeSettingsMap],
 ) -> None:
     """Remove source status files which exceed configured maximum cache age.
     There may be several 'Piggybacked Host Files' rules where the max age is configured.
     We simply use the greatest one per source."""
 
     max_cache_age_by_sources: dict[str, int] = {}
-    for piggybacked_host_folder, source_hosts, time_settings in piggybacked_hosts_settings:
-        for source_host in source_hosts:
-            max_cache_age = time_settings.max_cache_age(
-                HostName(source_host.name),
-                HostName(piggybacked_host_folder.name),
+    for source_hostname, payloads in source_payloads.items():
+        for piggybacked_hostname in payloads.index:
+            max_cache_age = piggybacked_hosts_settings[piggybacked_hostname].max_cache_age(
+                source_hostname,
+                piggybacked_hostname,
             )
 
-            max_cache_age_of_source = max_cache_age_by_sources.get(source_host.name)
+            max_cache_age_of_source = max_cache_age_by_sources.get(source_hostname)
             if max_cache_age_of_source is None:
-                max_cache_age_by_sources[source_host.name] = max_cache_age
+                max_cache_age_by_sources[source_hostname] = max_cache_age
 
             elif max_cache_age >= max_cache_age_of_source:
-                max_cache_age_by_sources[source_host.name] = max_cache_age
+                max_cache_age_by_sources[source_hostname] = max_cache_age
 
     for source_state_file in _get_source_state_files():
         try:
@@ -550,38 +764,31 @@ def _cleanup_old_source_status_files(
 
 
 def _cleanup_old_piggybacked_files(
-    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path], _TimeSettingsMap]]
+    source_payloads: Mapping[HostName, _SourcePayloads],
+    piggybacked_hosts_settings: Mapping[HostName, _TimeSettingsMap],
 ) -> None:
-    """Remove piggybacked data files which exceed configured maximum cache age."""
+    """Remove piggybacked data which exceeds configured maximum cache age."""
 
-    for piggybacked_host_folder, source_hosts, time_settings in piggybacked_hosts_settings:
-        for piggybacked_host_source in source_hosts:
+    for source_hostname in source_payloads:
+
+        def is_outdated(piggybacked_hostname: HostName, payloads: _SourcePayloads) -> bool:
+            if (time_settings := piggybacked_hosts_settings.get(piggybacked_hostname)) is None:
+                return False  # Stored in the meantime
             file_info = _get_piggyback_processed_file_info(
-                HostName(piggybacked_host_source.name),
-                HostName(piggybacked_host_folder.name),
-                piggybacked_host_source,
+                source_hostname,
+                piggybacked_hostname,
+                payloads,
                 time_settings,
             )
-
-            if not file_info.successfully_processed:
-                logger.log(
-                    VERBOSE,
-                    "Piggyback file '%s' is outdated (%s). Remove it.",
-                    piggybacked_host_source,
-                    file_info.message,
-                )
-                _remove_piggyback_file(piggybacked_host_source)
-
-        # Remove empty backed host directory
-        try:
-            piggybacked_host_folder.rmdir()
-        except OSError as e:
-            if e.errno == errno.ENOTEMPTY:
-                continue
-            raise
-        else:
+            if file_info.successfully_processed:
+                return False
             logger.log(
                 VERBOSE,
-                "Piggyback folder '%s' is empty. Removed it.",
-                piggybacked_host_folder,
+                "Piggyback data of '%s' in '%s' is outdated (%s). Remove it.",
+                piggybacked_hostname,
+                payloads.path,
+                file_info.message,
             )
+            return True
+
+        _remove_payloads(source_hostname, is_outdated)
@@ -12,6 +12,9 @@ from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Any, Literal, NewType
 
+import numpy as np
+import numpy.typing as npt
+
 import livestatus
 
 import cmk.utils.debug
@@ -133,6 +136,36 @@ def aggregation_functions(
     raise ValueError("Invalid Aggregation function %s, only max, min, average allowed" % aggr)
 
 
+def _aggregate_buckets(
+    values: npt.NDArray[np.float64],
+    starts: npt.NDArray[np.intp],
+    aggr: ConsolidationFunctionName | None,
+) -> npt.NDArray[np.float64]:
+    """Aggregate the consecutive buckets of values beginning at starts like aggregation_functions
+
+    NaN values are dropped, buckets without any value result in NaN."""
+    aggr = "max" if aggr is None else aggr.lower()
+    if aggr == "max":
+        return np.fmax.reduceat(values, starts)
+    if aggr == "min":
+        return np.fmin.reduceat(values, starts)
+    if aggr == "average":
+        defined = np.logical_not(np.isnan(values))
+        sums = np.add.reduceat(np.where(defined, values, 0.0), starts)
+        counts = np.add.reduceat(defined.astype(np.int64), starts)
+        with np.errstate(invalid="ignore"):
+            return sums / counts
+
+    raise ValueError("Invalid Aggregation function %s, only max, min, average allowed" % aggr)
+
+
+def values_from_array(array: npt.NDArray[np.float64]) -> TimeSeriesValues:
+    """Convert NaN back to None"""
+    values = array.astype(object)
+    values[np.isnan(array)] = None
+    return values.tolist()
+
+
 class TimeSeries:
     """Describes the returned time series returned by livestatus
 
@@ -176,25 +209,30 @@ class TimeSeries:
     def twindow(self) -> TimeWindow:
         return self.start, self.end, self.step
 
+    def to_array(self) -> npt.NDArray[np.float64]:
+        """The values of the series, missing values are NaN"""
+        return np.array(self.values, dtype=np.float64)
+
     def bfill_upsample(self, twindow: TimeWindow, shift: Seconds) -> TimeSeriesValues:
         """Upsample by backward filling values
 
         twindow : 3-tuple, (start, end, step)
              description of target time interval
         """
-        upsa = []
-        i = 0
+        if twindow == self.twindow:
+            return self.values
+        return values_from_array(self.bfill_upsample_array(twindow, shift))
+
+    def bfill_upsample_array(self, twindow: TimeWindow, shift: Seconds) -> npt.NDArray[np.float64]:
+        """Like bfill_upsample, missing values are NaN"""
+        values = self.to_array()
+        if twindow == self.twindow or not len(values):
+            return values
         start, end, step = twindow
-        current_times = rrd_timestamps(self.twindow)
-        if start != self.start or end != self.end or step != self.step:
-            for t in range(start, end, step):
-                if t >= current_times[i] + shift:
-                    i += 1
-                upsa.append(self.values[i])
-
-            return upsa
-
-        return self.values
+        # The value of a timestamp is valid until the end of its interval
+        current_times = np.array(rrd_timestamps(self.twindow), dtype=np.int64)
+        indices = np.searchsorted(current_times + shift, np.arange(start, end, step), side="right")
+        return values[np.minimum(indices, len(values) - 1)]
 
     def downsample(
         self, twindow: TimeWindow, cf: ConsolidationFunctionName = "max"
@@ -206,26 +244,31 @@ class TimeSeries:
         cf : str ('max', 'average', 'min')
              consolidation function imitating RRD methods
         """
-        dwsa = []
-        i = 0
-        co: TimeSeriesValues = []
-        start, end, step = twindow
-        desired_times = rrd_timestamps(twindow)
-        if start != self.start or end != self.end or step != self.step:
-            for t, val in self.time_data_pairs():
-                if t > desired_times[i]:
-                    dwsa.append(aggregation_functions(co, cf))
-                    co = []
-                    i += 1
-                co.append(val)
-
-            diff_len = len(desired_times) - len(dwsa)
-            if diff_len > 0:
-                dwsa.append(aggregation_functions(co, cf))
-                dwsa = dwsa + [None] * (diff_len - 1)
-
-            return dwsa
-        return self.values
+        if twindow == self.twindow:
+            return self.values
+        return values_from_array(self.downsample_array(twindow, cf))
+
+    def downsample_array(
+        self, twindow: TimeWindow, cf: ConsolidationFunctionName = "max"
+    ) -> npt.NDArray[np.float64]:
+        """Like downsample, missing values are NaN"""
+        values = self.to_array()
+        if twindow == self.twindow:
+            return values
+        desired_times = np.array(rrd_timestamps(twindow), dtype=np.int64)
+        current_times = np.array(rrd_timestamps(self.twindow), dtype=np.int64)
+        length = min(len(values), len(current_times))
+        # A value belongs to the first desired interval ending at or after its timestamp.
+        # Values after the last desired interval are dropped.
+        buckets = np.searchsorted(desired_times, current_times[:length], side="left")
+        in_range = buckets < len(desired_times)
+        values, buckets = values[:length][in_range], buckets[in_range]
+
+        downsampled = np.full(len(desired_times), np.nan)
+        if len(values):
+            starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+            downsampled[buckets[starts]] = _aggregate_buckets(values, starts, cf)
+        return downsampled
 
     def time_data_pairs(self) -> list[tuple[Timestamp, TimeSeriesValue]]:
         return list(zip(rrd_timestamps(self.twindow), self.values))
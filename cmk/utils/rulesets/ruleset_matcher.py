@@ -4,7 +4,9 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """This module provides generic Check_MK ruleset processing functionality"""
 
-from collections.abc import Callable, Generator, Iterable
+import re
+from collections.abc import Callable, Collection, Generator, Iterable, Iterator
+from itertools import compress
 from re import Pattern
 from typing import Any, cast, NamedTuple
 
@@ -45,10 +47,6 @@ from cmk.utils.type_defs import (
 LabelConditions = dict  # TODO: Optimize this
 LabelSources = dict[str, str]
 PreprocessedHostRuleset = dict[HostName, list[T]]
-PreprocessedPattern = tuple[bool, Pattern[str]]
-PreprocessedServiceRuleset = list[
-    tuple[object, set[HostName], LabelConditions, tuple, PreprocessedPattern]
-]
 
 
 class LabelManager(NamedTuple):
@@ -141,8 +139,6 @@ class RulesetMatcher:
         self.label_sources_of_host = self.ruleset_optimizer.label_sources_of_host
         self.label_sources_of_service = self.ruleset_optimizer.label_sources_of_service
 
-        self._service_match_cache: dict = {}
-
     def is_matching_host_ruleset(
         self, match_object: RulesetMatchObject, ruleset: Ruleset[bool]
     ) -> bool:
@@ -227,74 +223,12 @@ class RulesetMatcher:
     ) -> Generator:
         """Returns a generator of the values of the matched rules
         Replaces service_extra_conf"""
-        self.tuple_transformer.transform_in_place(ruleset, is_service=True, is_binary=is_binary)
-
         with_foreign_hosts = (
             match_object.host_name not in self.ruleset_optimizer.all_processed_hosts()
         )
-        optimized_ruleset = self.ruleset_optimizer.get_service_ruleset(ruleset, with_foreign_hosts)
-
-        for (
-            value,
-            hosts,
-            service_labels_condition,
-            service_labels_condition_cache_id,
-            service_description_condition,
-        ) in optimized_ruleset:
-            if match_object.service_description is None:
-                continue
-
-            if match_object.host_name not in hosts:
-                continue
-
-            service_cache_id = (
-                match_object.service_cache_id,
-                service_description_condition,
-                service_labels_condition_cache_id,
-            )
-
-            if service_cache_id in self._service_match_cache:
-                match = self._service_match_cache[service_cache_id]
-            else:
-                match = self._matches_service_conditions(
-                    service_description_condition, service_labels_condition, match_object
-                )
-                self._service_match_cache[service_cache_id] = match
-
-            if match:
-                yield value
-
-    def _matches_service_conditions(
-        self,
-        service_description_condition: tuple[bool, Pattern[str]],
-        service_labels_condition: dict[str, str],
-        match_object: RulesetMatchObject,
-    ) -> bool:
-        if not self._matches_service_description_condition(
-            service_description_condition, match_object
-        ):
-            return False
-
-        if service_labels_condition and not matches_labels(
-            match_object.service_labels, service_labels_condition
-        ):
-            return False
-
-        return True
-
-    def _matches_service_description_condition(
-        self,
-        service_description_condition: tuple[bool, Pattern[str]],
-        match_object: RulesetMatchObject,
-    ) -> bool:
-        negate, pattern = service_description_condition
-
-        if (
-            match_object.service_description is not None
-            and pattern.match(match_object.service_description) is not None
-        ):
-            return not negate
-        return negate
+        yield from self.ruleset_optimizer.get_service_ruleset(
+            ruleset, with_foreign_hosts, is_binary=is_binary
+        ).values(match_object)
 
     def get_values_for_generic_agent(
         self, ruleset: Ruleset[object], path_for_rule_matching: str
@@ -332,6 +266,202 @@ class RulesetMatcher:
         return entries
 
 
+# Maps the digits of a binary number to the bytes 0 and 1
+_BINARY_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+
+class _HostIndex:
+    """Dense integer IDs of the hosts for bitsets of hosts
+
+    A set of hosts is represented by a Python integer, in which the bit of the ID of every
+    host in the set is set. This way the conditions of the rules are evaluated by bitwise
+    operations on all hosts at once."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._hostnames: list[HostName] = []
+        self._ids: dict[HostName, int] = {}
+        self.all_bits = 0
+
+    @property
+    def hostnames(self) -> Collection[HostName]:
+        return self._ids.keys()
+
+    def add(self, hostname: HostName) -> None:
+        if hostname in self._ids:
+            return
+        self._ids[hostname] = len(self._hostnames)
+        self._hostnames.append(hostname)
+        self.all_bits = (1 << len(self._hostnames)) - 1
+
+    def bits(self, hostnames: Iterable[HostName]) -> int:
+        """The bitset of the hosts, unknown hosts are ignored"""
+        # Setting the bits one by one in the integer would copy it for every host
+        raw = bytearray(len(self._hostnames) // 8 + 1)
+        for hostname in hostnames:
+            if (host_id := self._ids.get(hostname)) is not None:
+                raw[host_id >> 3] |= 1 << (host_id & 7)
+        return int.from_bytes(raw, "little")
+
+    def hosts(self, bits: int) -> set[HostName]:
+        # The digits of the reversed binary number select the hosts by their ID
+        return set(compress(self._hostnames, bin(bits)[:1:-1].encode().translate(_BINARY_DIGITS)))
+
+
+# Characters which may end the literal prefix of a regular expression
+_REGEX_SPECIAL_CHARS = frozenset(".?*+^$|[](){}\\")
+# Flags like "(?i)" in the middle of the pattern apply to the whole pattern
+_GLOBAL_REGEX_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _literal_prefix(pattern: str) -> tuple[str, bool]:
+    """The text every string matching the pattern starts with
+
+    The second element tells whether the pattern is nothing but this text."""
+    for idx, char in enumerate(pattern):
+        if char in _REGEX_SPECIAL_CHARS:
+            break
+    else:
+        return pattern, True
+
+    if "|" in pattern or _GLOBAL_REGEX_FLAGS.search(pattern):
+        return "", False
+    # The quantifier may refer to the last character of the prefix
+    return pattern[: max(idx - 1, 0)] if char in "?*{" else pattern[:idx], False
+
+
+class _PrefixTrieNode:
+    __slots__ = ["children", "literal_bits", "patterns"]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.children: dict[str, _PrefixTrieNode] = {}
+        # Rules matched by reaching this node
+        self.literal_bits = 0
+        # Patterns to check for the rules once this node is reached
+        self.patterns: list[tuple[Pattern[str], int]] = []
+
+
+class _ServiceDescriptionMatcher:
+    """Matches a service description against the service conditions of all rules at once
+
+    The patterns are stored in a trie by their literal prefix. Looking up a service
+    description walks down the trie along the description, so only the patterns
+    which may match the description at all are checked. Most of the patterns are
+    plain text and need no regex match at all."""
+
+    def __init__(self, conditions: Iterable[HostOrServiceConditions | None]) -> None:
+        super().__init__()
+        self._root = _PrefixTrieNode()
+        self._negated_bits = 0
+        for nr, condition in enumerate(conditions):
+            self._add(1 << nr, condition)
+
+    def _add(self, bit: int, condition: HostOrServiceConditions | None) -> None:
+        negate, patterns = parse_negated_condition_list(condition) if condition else (False, [])
+        if negate:
+            self._negated_bits |= bit
+        # This function assumes either all or no pattern is negated (like WATO creates the
+        # rules). No pattern at all matches everything.
+        for entry in patterns or [""]:
+            pattern = entry["$regex"] if isinstance(entry, dict) else entry
+            prefix, is_literal = _literal_prefix(pattern)
+            node = self._root
+            for char in prefix:
+                node = node.children.setdefault(char, _PrefixTrieNode())
+            if is_literal:
+                node.literal_bits |= bit
+            else:
+                node.patterns.append((regex(pattern), bit))
+
+    def match_bits(self, service_description: ServiceName) -> int:
+        """The bitset of the rules matching the service description"""
+        matched = 0
+        node = self._root
+        chars = iter(service_description)
+        while True:
+            matched |= node.literal_bits
+            for pattern, bit in node.patterns:
+                if not matched & bit and pattern.match(service_description):
+                    matched |= bit
+            if (char := next(chars, None)) is None or (child := node.children.get(char)) is None:
+                return matched ^ self._negated_bits
+            node = child
+
+
+class _ServiceRuleset:
+    """A service ruleset prepared for matching
+
+    The rules are represented by a bitset of their positions in the ruleset. The rules
+    matching the host, the service description and the service labels are looked up
+    independently of each other, which makes most lookups shareable between the hosts
+    and the services."""
+
+    def __init__(self, rules: Iterable[tuple[object, set[HostName], RuleConditionsSpec]]) -> None:
+        super().__init__()
+        self._values: list[object] = []
+        self._hosts: list[set[HostName]] = []
+        service_conditions: list[HostOrServiceConditions | None] = []
+        self._label_conditions: list[tuple[int, LabelConditions]] = []
+        self._label_rule_bits = 0
+        for nr, (value, hosts, condition) in enumerate(rules):
+            self._values.append(value)
+            self._hosts.append(hosts)
+            service_conditions.append(condition.get("service_description"))
+            if service_labels_condition := condition.get("service_labels"):
+                self._label_conditions.append((1 << nr, service_labels_condition))
+                self._label_rule_bits |= 1 << nr
+        self._description_matcher = _ServiceDescriptionMatcher(service_conditions)
+
+        # Most of the time the services of one host are looked up one after another
+        self._last_host: tuple[HostName | None, int] = (None, 0)
+        self._description_bits: dict[ServiceName, int] = {}
+        self._labels_bits: dict[int, int] = {}
+
+    def _host_bits(self, hostname: HostName) -> int:
+        if self._last_host[0] == hostname:
+            return self._last_host[1]
+        bits = sum(1 << nr for nr, hosts in enumerate(self._hosts) if hostname in hosts)
+        self._last_host = (hostname, bits)
+        return bits
+
+    def values(self, match_object: RulesetMatchObject) -> Iterator[object]:
+        """The values of the matching rules in the order of the rules"""
+        if match_object.host_name is None or match_object.service_description is None:
+            return iter(())
+
+        if not (bits := self._host_bits(match_object.host_name)):
+            return iter(())
+
+        try:
+            bits &= self._description_bits[match_object.service_description]
+        except KeyError:
+            description_bits = self._description_matcher.match_bits(
+                match_object.service_description
+            )
+            self._description_bits[match_object.service_description] = description_bits
+            bits &= description_bits
+
+        if bits & self._label_rule_bits:
+            bits &= ~self._label_rule_bits | self._matching_labels_bits(match_object)
+
+        # The digits of the reversed binary number select the values by the rule position
+        return compress(self._values, bin(bits)[:1:-1].encode().translate(_BINARY_DIGITS))
+
+    def _matching_labels_bits(self, match_object: RulesetMatchObject) -> int:
+        labels_id = match_object.service_cache_id[1]
+        try:
+            return self._labels_bits[labels_id]
+        except KeyError:
+            pass
+        bits = 0
+        for bit, service_labels_condition in self._label_conditions:
+            if matches_labels(match_object.service_labels, service_labels_condition):
+                bits |= bit
+        self._labels_bits[labels_id] = bits
+        return bits
+
+
 class RulesetOptimizer:
     """Performs some precalculations on the configured rulesets to improve the
     processing performance"""
@@ -349,7 +479,7 @@ class RulesetOptimizer:
         super().__init__()
         self._ruleset_matcher = ruleset_matcher
         self._labels = labels
-        self._host_tags = {hn: set(tags_of_host.items()) for hn, tags_of_host in host_tags.items()}
+        self._host_tags = host_tags
         self._host_paths = host_paths
         self._clusters_of = clusters_of
         self._nodes_of = nodes_of
@@ -362,24 +492,25 @@ class RulesetOptimizer:
         # may contain a reduced set of hosts, since each process handles a subset
         self._all_processed_hosts = self._all_configured_hosts
 
-        # A factor which indicates how much hosts share the same host tag configuration (excluding folders).
-        # len(all_processed_hosts) / len(different tag combinations)
-        # It is used to determine the best rule evualation method
-        self._all_processed_hosts_similarity = 1.0
-
         self._service_ruleset_cache: dict = {}
         self._host_ruleset_cache: dict = {}
         self._all_matching_hosts_match_cache: dict = {}
 
+        # The conditions are evaluated on bitsets of the hosts, see _HostIndex
+        self._host_index = _HostIndex()
+        self._configured_bits = 0
+        self._processed_bits = 0
+        self._tag_bits: dict[tuple[TaggroupID, TagID | None], int] = {}
+        self._path_bits: dict[str, int] = {}
         # Reference dirname -> hosts in this dir including subfolders
-        self._folder_host_lookup: dict[tuple[bool, str], set[HostName]] = {}
-
-        # Provides a list of hosts with the same hosttags, excluding the folder
-        self._hosts_grouped_by_tags: dict[tuple[tuple[TaggroupID, TagID], ...], set[HostName]] = {}
-        # Reference hostname -> tag group reference
-        self._host_grouped_ref: dict[HostName, tuple[tuple[TaggroupID, TagID], ...]] = {}
+        self._folder_bits: dict[str, int] = {}
+        self._host_regex_bits: dict[str, int] = {}
+        # The labels are only looked up for the hosts in question
+        self._labels_indexed = 0
+        self._label_bits: dict[tuple[str, str], int] = {}
+        # Share the sets of the hosts between equal results
+        self._host_sets: dict[int, set[HostName]] = {}
 
-        # TODO: Clean this one up?
         self._initialize_host_lookup()
 
     def clear_ruleset_caches(self) -> None:
@@ -389,6 +520,9 @@ class RulesetOptimizer:
     def clear_caches(self) -> None:
         self._host_ruleset_cache.clear()
         self._all_matching_hosts_match_cache.clear()
+        self._host_sets.clear()
+        self._labels_indexed = 0
+        self._label_bits.clear()
 
     def all_processed_hosts(self) -> set[HostName]:
         """Returns a set of all processed hosts"""
@@ -407,29 +541,9 @@ class RulesetOptimizer:
 
         self._all_processed_hosts.update(nodes_and_clusters)
 
-        # The folder host lookup includes a list of all -processed- hosts within a given
-        # folder. Any update with set_all_processed hosts invalidates this cache, because
-        # the scope of relevant hosts has changed. This is -good-, since the values in this
-        # lookup are iterated one by one later on in all_matching_hosts
-        self._folder_host_lookup = {}
-
-        self._adjust_processed_hosts_similarity()
-
-    def _adjust_processed_hosts_similarity(self) -> None:
-        """This function computes the tag similarities between of the processed hosts
-        The result is a similarity factor, which helps finding the most perfomant operation
-        for the current hostset"""
-        used_groups = {
-            self._host_grouped_ref.get(hostname, ()) for hostname in self._all_processed_hosts
-        }
-
-        if not used_groups:
-            self._all_processed_hosts_similarity = 1.0
-            return
-
-        self._all_processed_hosts_similarity = (
-            1.0 * len(self._all_processed_hosts) / len(used_groups)
-        )
+        if unknown_hosts := self._all_processed_hosts.difference(self._host_index.hostnames):
+            self._index_hosts(unknown_hosts)
+        self._processed_bits = self._host_index.bits(self._all_processed_hosts)
 
     def get_host_ruleset(
         self, ruleset: Ruleset[T], with_foreign_hosts: bool, is_binary: bool
@@ -464,73 +578,33 @@ class RulesetOptimizer:
         return host_values
 
     def get_service_ruleset(
-        self, ruleset: Ruleset[T], with_foreign_hosts: bool
-    ) -> PreprocessedServiceRuleset:
+        self, ruleset: Ruleset[T], with_foreign_hosts: bool, is_binary: bool
+    ) -> _ServiceRuleset:
         cache_id = id(ruleset), with_foreign_hosts
 
         if cache_id in self._service_ruleset_cache:
             return self._service_ruleset_cache[cache_id]
 
-        cached_ruleset = self._convert_service_ruleset(
-            ruleset, with_foreign_hosts=with_foreign_hosts
+        # The services are looked up far too often to check the ruleset every time
+        self._ruleset_matcher.tuple_transformer.transform_in_place(
+            ruleset, is_service=True, is_binary=is_binary
         )
-        self._service_ruleset_cache[cache_id] = cached_ruleset
-        return cached_ruleset
-
-    def _convert_service_ruleset(
-        self, ruleset: Ruleset[T], with_foreign_hosts: bool
-    ) -> PreprocessedServiceRuleset:
-        new_rules: PreprocessedServiceRuleset = []
-        for rule in ruleset:
-            if _is_disabled(rule):
-                continue
 
+        cached_ruleset = _ServiceRuleset(
             # Directly compute set of all matching hosts here, this will avoid
             # recomputation later
-            hosts = self._all_matching_hosts(rule["condition"], with_foreign_hosts)
-
-            # Prepare cache id
-            service_labels_condition = rule["condition"].get("service_labels", {})
-            service_labels_condition_cache_id = tuple(
-                (label_id, _tags_or_labels_cache_id(label_spec))
-                for label_id, label_spec in service_labels_condition.items()
-            )
-
-            # And now preprocess the configured patterns in the servlist
-            new_rules.append(
-                (
-                    rule["value"],
-                    hosts,
-                    service_labels_condition,
-                    service_labels_condition_cache_id,
-                    self._convert_pattern_list(rule["condition"].get("service_description")),
-                )
+            (
+                rule["value"],
+                self._all_matching_hosts(rule["condition"], with_foreign_hosts),
+                rule["condition"],
             )
-        return new_rules
-
-    def _convert_pattern_list(
-        self, patterns: HostOrServiceConditions | None
-    ) -> PreprocessedPattern:
-        """Compiles a list of service match patterns to a to a single regex
-
-        Reducing the number of individual regex matches improves the performance dramatically.
-        This function assumes either all or no pattern is negated (like WATO creates the rules).
-        """
-        if not patterns:
-            return False, regex("")  # Match everything
-
-        negate, parsed_patterns = parse_negated_condition_list(patterns)
-
-        pattern_parts = []
-        for p in parsed_patterns:
-            if isinstance(p, dict):
-                pattern_parts.append(p["$regex"])
-            else:
-                pattern_parts.append(p)
-
-        return negate, regex("(?:%s)" % "|".join("(?:%s)" % p for p in pattern_parts))
+            for rule in ruleset
+            if not _is_disabled(rule)
+        )
+        self._service_ruleset_cache[cache_id] = cached_ruleset
+        return cached_ruleset
 
-    def _all_matching_hosts(  # pylint: disable=too-many-branches
+    def _all_matching_hosts(
         self, condition: RuleConditionsSpec, with_foreign_hosts: bool
     ) -> set[HostName]:
         """Returns a set containing the names of hosts that match the given
@@ -555,69 +629,88 @@ class RulesetOptimizer:
         except KeyError:
             pass
 
-        if with_foreign_hosts:
-            valid_hosts = self._all_configured_hosts
-        else:
-            valid_hosts = self._all_processed_hosts
+        matching = self._configured_bits if with_foreign_hosts else self._processed_bits
+        matching &= self._hosts_within_folder_bits(rule_path)
+        if hostlist is not None:
+            matching &= self._host_name_bits(hostlist)
+        for taggroup_id, tag_condition in tag_conditions.items():
+            matching &= self._tag_condition_bits(taggroup_id, tag_condition)
+        if labels and matching:
+            # Last, the labels of fewer hosts are needed
+            matching = self._label_conditions_bits(labels, matching)
 
-        # Thin out the valid hosts further. If the rule is located in a folder
-        # we only need the intersection of the folders hosts and the previously determined valid_hosts
-        valid_hosts = self.get_hosts_within_folder(rule_path, with_foreign_hosts).intersection(
-            valid_hosts
-        )
+        try:
+            hosts = self._host_sets[matching]
+        except KeyError:
+            hosts = self._host_sets[matching] = self._host_index.hosts(matching)
+        self._all_matching_hosts_match_cache[cache_id] = hosts
+        return hosts
 
-        if tag_conditions and hostlist is None and not labels:
-            # TODO: Labels could also be optimized like the tags
-            matched_by_tags = self._match_hosts_by_tags(cache_id, valid_hosts, tag_conditions)
-            if matched_by_tags is not None:
-                return matched_by_tags
-
-        matching: set[HostName] = set()
-        only_specific_hosts = (
-            hostlist is not None
-            and not isinstance(hostlist, dict)
-            and all(not isinstance(x, dict) for x in hostlist)
-        )
+    def _host_name_bits(self, hostlist: HostOrServiceConditions) -> int:
+        negate, host_entries = parse_negated_condition_list(hostlist)
+        bits = 0
+        for entry in host_entries:
+            if isinstance(entry, dict):
+                bits |= self._host_regex_match_bits(entry["$regex"])
+            else:
+                bits |= self._host_index.bits((entry,))
+        return self._host_index.all_bits & ~bits if negate else bits
+
+    def _host_regex_match_bits(self, pattern: str) -> int:
+        try:
+            return self._host_regex_bits[pattern]
+        except KeyError:
+            compiled = regex(pattern)
+            bits = self._host_regex_bits[pattern] = self._host_index.bits(
+                hostname for hostname in self._host_index.hostnames if compiled.match(hostname)
+            )
+            return bits
 
-        if hostlist == []:
-            pass  # Empty host list -> Nothing matches
+    def _tag_condition_bits(self, taggroup_id: TaggroupID, tag_condition: TagCondition) -> int:
+        if isinstance(tag_condition, dict):
+            if "$ne" in tag_condition:
+                tag_id = cast(TagConditionNE, tag_condition)["$ne"]
+                return self._host_index.all_bits & ~self._tag_bits.get((taggroup_id, tag_id), 0)
 
-        elif not tag_conditions and not labels and not hostlist:
-            # If no tags are specified and the hostlist only include @all (all hosts)
-            matching = valid_hosts
+            if "$or" in tag_condition:
+                return self._any_tag_bits(taggroup_id, cast(TagConditionOR, tag_condition)["$or"])
 
-        elif not tag_conditions and not labels and only_specific_hosts and hostlist is not None:
-            # If no tags are specified and there are only specific hosts we already have the matches
-            matching = valid_hosts.intersection(hostlist)
+            if "$nor" in tag_condition:
+                return self._host_index.all_bits & ~self._any_tag_bits(
+                    taggroup_id, cast(TagConditionNOR, tag_condition)["$nor"]
+                )
 
-        else:
-            # If the rule has only exact host restrictions, we can thin out the list of hosts to check
-            if only_specific_hosts and hostlist is not None:
-                hosts_to_check = valid_hosts.intersection(hostlist)
-            else:
-                hosts_to_check = valid_hosts
-
-            for hostname in hosts_to_check:
-                # When no tag matching is requested, do not filter by tags. Accept all hosts
-                # and filter only by hostlist
-                if tag_conditions and not self.matches_host_tags(
-                    self._host_tags[hostname],
-                    tag_conditions,
-                ):
-                    continue
+            raise NotImplementedError()
 
-                if labels:
-                    host_labels = self.labels_of_host(hostname)
-                    if not matches_labels(host_labels, labels):
-                        continue
+        return self._tag_bits.get((taggroup_id, tag_condition), 0)
 
-                if not self.matches_host_name(hostlist, hostname):
-                    continue
+    def _any_tag_bits(self, taggroup_id: TaggroupID, tag_ids: Iterable[TagID | None]) -> int:
+        bits = 0
+        for tag_id in tag_ids:
+            bits |= self._tag_bits.get((taggroup_id, tag_id), 0)
+        return bits
 
-                matching.add(hostname)
+    def _label_conditions_bits(self, labels: LabelConditions, candidates: int) -> int:
+        self._index_labels(candidates)
+        for label_id, label_spec in labels.items():
+            if isinstance(label_spec, dict):
+                candidates &= ~self._label_bits.get((label_id, label_spec["$ne"]), 0)
+            else:
+                candidates &= self._label_bits.get((label_id, label_spec), 0)
+        return candidates
 
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
+    def _index_labels(self, candidates: int) -> None:
+        if not (missing := candidates & ~self._labels_indexed):
+            return
+        hosts_by_label: dict[tuple[str, str], list[HostName]] = {}
+        for hostname in self._host_index.hosts(missing):
+            for label in self.labels_of_host(hostname).items():
+                hosts_by_label.setdefault(label, []).append(hostname)
+        for label, hostnames in hosts_by_label.items():
+            self._label_bits[label] = self._label_bits.get(label, 0) | self._host_index.bits(
+                hostnames
+            )
+        self._labels_indexed |= missing
 
     def matches_host_name(
         self, host_entries: HostOrServiceConditions | None, hostname: HostName
@@ -655,7 +748,9 @@ class RulesetOptimizer:
         tag_conditions: TaggroupIDToTagCondition,
         labels: Any,
         rule_path: Any,
-    ) -> tuple[tuple[str, ...], tuple[tuple[str, Any], ...], tuple[tuple[Any, Any], ...], Any]:
+    ) -> tuple[
+        tuple[str, ...] | None, tuple[tuple[str, Any], ...], tuple[tuple[Any, Any], ...], Any
+    ]:
         host_parts: list[str] = []
 
         if hostlist is not None:
@@ -673,7 +768,8 @@ class RulesetOptimizer:
                 host_parts.append(h)
 
         return (
-            tuple(sorted(host_parts)),
+            # An empty host list matches no host, no host list matches all of them
+            None if hostlist is None else tuple(sorted(host_parts)),
             tuple(
                 (taggroup_id, _tags_or_labels_cache_id(tag_condition))
                 for taggroup_id, tag_condition in tag_conditions.items()
@@ -685,101 +781,45 @@ class RulesetOptimizer:
             rule_path,
         )
 
-    # TODO: Generalize this optimization: Build some kind of key out of the tag conditions
-    # (positive, negative, ...). Make it work with the new tag group based "$or" handling.
-    def _match_hosts_by_tags(
-        self,
-        cache_id: tuple[
-            tuple[tuple[str, ...], tuple[tuple[str, Any], ...], tuple[tuple[Any, Any], ...], Any],
-            bool,
-        ],
-        valid_hosts: set[HostName],
-        tag_conditions: TaggroupIDToTagCondition,
-    ) -> set | None:
-        matching = set()
-        negative_match_tags = set()
-        positive_match_tags = set()
-        for taggroup_id, tag_condition in tag_conditions.items():
-            if isinstance(tag_condition, dict):
-                if "$ne" in tag_condition:
-                    negative_match_tags.add(
-                        (
-                            taggroup_id,
-                            cast(TagConditionNE, tag_condition)["$ne"],
-                        )
-                    )
-                    continue
-
-                if "$or" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                if "$nor" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                raise NotImplementedError()
-
-            positive_match_tags.add((taggroup_id, tag_condition))
-
-        # TODO:
-        # if has_specific_folder_tag or self._all_processed_hosts_similarity < 3.0:
-        if self._all_processed_hosts_similarity < 3.0:
-            # Without shared folders
-            for hostname in valid_hosts:
-                if positive_match_tags <= self._host_tags[
-                    hostname
-                ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                    matching.add(hostname)
-
-            self._all_matching_hosts_match_cache[cache_id] = matching
-            return matching
-
-        # With shared folders
-        checked_hosts: set[str] = set()
-        for hostname in valid_hosts:
-            if hostname in checked_hosts:
-                continue
-
-            hosts_with_same_tag = self._filter_hosts_with_same_tags_as_host(hostname, valid_hosts)
-            checked_hosts.update(hosts_with_same_tag)
-
-            if positive_match_tags <= self._host_tags[
-                hostname
-            ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                matching.update(hosts_with_same_tag)
-
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
-
-    def _filter_hosts_with_same_tags_as_host(
-        self,
-        hostname: HostName,
-        hosts: set[HostName],
-    ) -> set[HostName]:
-        return self._hosts_grouped_by_tags[self._host_grouped_ref[hostname]].intersection(hosts)
-
     def get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> set[HostName]:
-        cache_id = with_foreign_hosts, folder_path
-        if cache_id not in self._folder_host_lookup:
-            hosts_in_folder = set()
-            relevant_hosts = (
-                self._all_configured_hosts if with_foreign_hosts else self._all_processed_hosts
-            )
-
-            for hostname in relevant_hosts:
-                host_path = self._host_paths.get(hostname, "/")
-                if host_path.startswith(folder_path):
-                    hosts_in_folder.add(hostname)
-
-            self._folder_host_lookup[cache_id] = hosts_in_folder
-            return hosts_in_folder
+        valid_hosts = self._configured_bits if with_foreign_hosts else self._processed_bits
+        return self._host_index.hosts(valid_hosts & self._hosts_within_folder_bits(folder_path))
 
-        return self._folder_host_lookup[cache_id]
+    def _hosts_within_folder_bits(self, folder_path: str) -> int:
+        try:
+            return self._folder_bits[folder_path]
+        except KeyError:
+            bits = 0
+            for path, path_bits in self._path_bits.items():
+                if path.startswith(folder_path):
+                    bits |= path_bits
+            self._folder_bits[folder_path] = bits
+            return bits
 
     def _initialize_host_lookup(self) -> None:
-        for hostname in self._all_configured_hosts:
-            group_ref = tuple(sorted(self._host_tags[hostname]))
-            self._hosts_grouped_by_tags.setdefault(group_ref, set()).add(hostname)
-            self._host_grouped_ref[hostname] = group_ref
+        self._index_hosts(self._all_configured_hosts)
+        self._configured_bits = self._host_index.bits(self._all_configured_hosts)
+        self._processed_bits = self._configured_bits
+
+    def _index_hosts(self, hostnames: Iterable[HostName]) -> None:
+        hosts_by_tag: dict[tuple[TaggroupID, TagID | None], list[HostName]] = {}
+        hosts_by_path: dict[str, list[HostName]] = {}
+        for hostname in sorted(hostnames):
+            self._host_index.add(hostname)
+            for tag in self._host_tags.get(hostname, {}).items():
+                hosts_by_tag.setdefault(tag, []).append(hostname)
+            hosts_by_path.setdefault(self._host_paths.get(hostname, "/"), []).append(hostname)
+        for tag_key, tagged_hosts in hosts_by_tag.items():
+            self._tag_bits[tag_key] = self._tag_bits.get(tag_key, 0) | self._host_index.bits(
+                tagged_hosts
+            )
+        for path, hosts_in_path in hosts_by_path.items():
+            self._path_bits[path] = self._path_bits.get(path, 0) | self._host_index.bits(
+                hosts_in_path
+            )
+        # Computed for all hosts of the index
+        self._folder_bits.clear()
+        self._host_regex_bits.clear()
 
     def labels_of_host(self, hostname: HostName) -> Labels:
         """Returns the effective set of host labels from all available sources
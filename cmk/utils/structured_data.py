@@ -147,18 +147,39 @@ class UpdateResult(NamedTuple):
 #   - status_data/HOSTNAME, status_data/HOSTNAME.gz
 
 
-def load_tree(filepath: Path) -> StructuredDataNode:
-    if raw_tree := store.load_object_from_file(filepath, default=None):
-        return StructuredDataNode.deserialize(raw_tree)
-    return StructuredDataNode()
+def deserialize_tree(raw: bytes, *, paths: Iterable[SDPath] | None = None) -> StructuredDataNode:
+    """Deserialize the tree or only the subtrees of the given paths, e.g. a tree served by
+    Livestatus"""
+    if not raw:
+        return StructuredDataNode()
+    tree = StructuredDataNode.deserialize(store.DimSerializer.deserialize(raw))
+    return tree if paths is None else _get_subtrees(tree, paths)
+
+
+def _get_subtrees(tree: StructuredDataNode, paths: Iterable[SDPath]) -> StructuredDataNode:
+    subtrees = StructuredDataNode()
+    for path in paths:
+        if (node := tree.get_node(tuple(path))) is None:
+            continue
+        if not path:
+            return tree
+        subtrees.setdefault_node(tuple(path[:-1])).add_node(node)
+    return subtrees
+
+
+def load_tree(filepath: Path, *, paths: Iterable[SDPath] | None = None) -> StructuredDataNode:
+    """Load the tree or only the subtrees of the given paths, see `deserialize_tree()`"""
+    return deserialize_tree(store.load_bytes_from_file(filepath), paths=paths)
 
 
 class TreeStore:
     def __init__(self, tree_dir: Path | str) -> None:
         self._tree_dir = Path(tree_dir)
 
-    def load(self, *, host_name: HostName | str) -> StructuredDataNode:
-        return load_tree(self._tree_file(host_name))
+    def load(
+        self, *, host_name: HostName | str, paths: Iterable[SDPath] | None = None
+    ) -> StructuredDataNode:
+        return load_tree(self._tree_file(host_name), paths=paths)
 
     def save(self, *, host_name: HostName, tree: StructuredDataNode, pretty: bool = False) -> None:
         self._tree_dir.mkdir(parents=True, exist_ok=True)
@@ -180,7 +201,7 @@ class TreeStore:
         self._tree_file(host_name).unlink(missing_ok=True)
         self._gz_file(host_name).unlink(missing_ok=True)
 
-    def _tree_file(self, host_name: HostName) -> Path:
+    def _tree_file(self, host_name: HostName | str) -> Path:
         return self._tree_dir / str(host_name)
 
     def _gz_file(self, host_name: HostName) -> Path:
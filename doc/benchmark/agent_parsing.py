@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure parsing agent outputs with all sections and with a selection of sections
+
+Pass recorded agent outputs (e.g. saved with "cmk -d HOST"). Without files an output
+looking like the one of a large Windows host is made up. The peak of the memory
+allocated while parsing is measured in a separate run:
+
+    doc/benchmark/agent_parsing.py --size 20 --selection uptime mem
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Sequence
+from pathlib import Path
+
+from cmk.utils.translations import TranslationOptions
+from cmk.utils.type_defs import AgentRawData, HostName, SectionName
+
+from cmk.fetchers.cache import SectionStore
+
+from cmk.checkers import AgentParser
+from cmk.checkers.type_defs import AgentRawDataSection, NO_SELECTION, SectionNameCollection
+
+
+def _make_output(size: int) -> AgentRawData:
+    """Sections of a Windows agent, the event log makes up most of the output"""
+    chunks = [
+        b"<<<check_mk>>>\nVersion: 2.2.0\nAgentOS: windows\n",
+        b"<<<uptime>>>\n123456\n",
+        b"<<<mem>>>\nMemTotal:  16777216 kB\nMemFree:  8388608 kB\n",
+        b"<<<winperf_processor>>>\n"
+        + b"".join(b"%d 0 0 0 0 0 0 counter\n" % nr for nr in range(500)),
+        b"<<<services>>>\n"
+        + b"".join(b"svc%d running/auto Service number %d\n" % (nr, nr) for nr in range(400)),
+        b"<<<<piggybacked-vm>>>>\n<<<uptime>>>\n4711\n<<<<>>>>\n",
+        b"<<<logwatch>>>\n[[[Application]]]\n",
+    ]
+    line = b"W Nov 10 10:00:00 0.1234 MsiInstaller Product: Some product -- Installation done\n"
+    used = sum(len(chunk) for chunk in chunks)
+    chunks.append(line * max(0, (size - used) // len(line)))
+    return AgentRawData(b"".join(chunks))
+
+
+def _parse(
+    raw_data: AgentRawData, selection: SectionNameCollection, store_path: Path
+) -> tuple[float, int]:
+    logger = logging.getLogger("benchmark")
+    parser = AgentParser(
+        HostName("benchmark"),
+        SectionStore[AgentRawDataSection](store_path, logger=logger),
+        check_interval=60,
+        keep_outdated=True,
+        translation=TranslationOptions(case=None, drop_domain=False, mapping=[], regex=[]),
+        encoding_fallback="ascii",
+        simulation=False,
+        logger=logger,
+    )
+    start = time.perf_counter()
+    host_sections = parser.parse(raw_data, selection=selection)
+    return time.perf_counter() - start, len(host_sections.sections)
+
+
+def _measure(
+    name: str, raw_data: AgentRawData, selection: SectionNameCollection, repeat: int
+) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = Path(tmp, "store")
+        durations = []
+        for _run in range(repeat):
+            duration, num_sections = _parse(raw_data, selection, store_path)
+            durations.append(duration)
+        tracemalloc.start()
+        _parse(raw_data, selection, store_path)
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(
+        f"{name:<30} {len(raw_data) / 2**20:7.1f} MB  "
+        f"{'all' if selection is NO_SELECTION else 'selection':<9} {num_sections:>4} sections  "
+        f"{min(durations) * 1000:9.1f} ms  peak {peak / 2**20:7.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="*", type=Path, help="recorded agent outputs")
+    parser.add_argument("--size", type=int, default=20, help="size of the made up output in MB")
+    parser.add_argument("--selection", nargs="*", default=["uptime", "mem"], help="sections")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per variant")
+    args = parser.parse_args()
+
+    outputs: Sequence[tuple[str, AgentRawData]] = (
+        [(path.name, AgentRawData(path.read_bytes())) for path in args.files]
+        if args.files
+        else [("made up", _make_output(args.size * 2**20))]
+    )
+    selection = frozenset(SectionName(name) for name in args.selection)
+    for name, raw_data in outputs:
+        _measure(name, raw_data, NO_SELECTION, args.repeat)
+        _measure(name, raw_data, selection, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
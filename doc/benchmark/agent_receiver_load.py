@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the throughput of agent data pushed to the agent receiver
+
+The requests are passed directly to the ASGI application, so neither a web server nor
+the network is involved. A site with registered push hosts is made up in a temporary
+directory. To compare with looking up the registration of each host on every request:
+
+    PYTHONPATH=agent-receiver doc/benchmark/agent_receiver_load.py --hosts 500 --uncached
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+_BOUNDARY = b"benchmark-boundary"
+
+
+def _make_site(omd_root: Path, num_hosts: int) -> Sequence[uuid.UUID]:
+    received_outputs = omd_root / "var/agent-receiver/received-outputs"
+    received_outputs.mkdir(parents=True)
+    (r4r := omd_root / "var/check_mk/wato/requests-for-registration/READY").mkdir(parents=True)
+    (omd_root / "var/log/agent-receiver").mkdir(parents=True)
+
+    uuids = [uuid.uuid4() for _nr in range(num_hosts)]
+    for nr, host_uuid in enumerate(uuids):
+        (target_dir := omd_root / f"push-agent/host{nr}").mkdir(parents=True)
+        (received_outputs / str(host_uuid)).symlink_to(target_dir)
+
+    # The registrations are cached only once they are older than the granularity of mtime
+    for path in (received_outputs, r4r):
+        os.utime(path, (time.time() - 60, time.time() - 60))
+    return uuids
+
+
+def _body(agent_output: bytes) -> bytes:
+    return b"".join(
+        [
+            b"--%s\r\n" % _BOUNDARY,
+            b'Content-Disposition: form-data; name="monitoring_data"; filename="data"\r\n',
+            b"Content-Type: application/octet-stream\r\n\r\n",
+            zlib.compress(agent_output),
+            b"\r\n--%s--\r\n" % _BOUNDARY,
+        ]
+    )
+
+
+async def _post(app: Any, host_uuid: uuid.UUID, body: bytes) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "https",
+        "path": f"/agent_data/{host_uuid}",
+        "raw_path": f"/agent_data/{host_uuid}".encode(),
+        "query_string": b"",
+        "root_path": "",
+        "server": ("localhost", 8000),
+        "client": ("127.0.0.1", 4711),
+        "headers": [
+            (b"content-type", b"multipart/form-data; boundary=%s" % _BOUNDARY),
+            (b"content-length", b"%d" % len(body)),
+            (b"compression", b"zlib"),
+            (b"verified-uuid", str(host_uuid).encode()),
+        ],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive() -> dict[str, Any]:
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    if status != [204]:
+        raise RuntimeError(f"Unexpected response: {status}")
+    return time.perf_counter() - start
+
+
+async def _run(
+    app: Any, uuids: Sequence[uuid.UUID], body: bytes, rounds: int, concurrency: int
+) -> Sequence[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(host_uuid: uuid.UUID) -> float:
+        async with semaphore:
+            return await _post(app, host_uuid, body)
+
+    return await asyncio.gather(*(limited(u) for _round in range(rounds) for u in uuids))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=200, help="number of registered hosts")
+    parser.add_argument("--rounds", type=int, default=5, help="pushes per host")
+    parser.add_argument("--concurrency", type=int, default=50, help="requests in parallel")
+    parser.add_argument("--size", type=int, default=100, help="size of agent output in kB")
+    parser.add_argument(
+        "--uncached", action="store_true", help="look up the registration on each request"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["OMD_ROOT"] = tmp
+        os.environ["OMD_SITE"] = "benchmark"
+        uuids = _make_site(Path(tmp), args.hosts)
+
+        # pylint: disable=import-outside-toplevel
+        from agent_receiver import endpoints
+        from agent_receiver.apps_and_routers import AGENT_RECEIVER_APP
+        from agent_receiver.main import main_app
+        from agent_receiver.utils import Host
+
+        main_app()
+        if args.uncached:
+            endpoints.registered_host = Host
+
+        body = _body(b"<<<local>>>\n0 Service - OK\n" * (args.size * 1024 // 27))
+        start = time.perf_counter()
+        durations = asyncio.run(
+            _run(AGENT_RECEIVER_APP, uuids, body, args.rounds, args.concurrency)
+        )
+        elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(durations, n=100)
+    sys.stdout.write(
+        f"{len(durations)} requests in {elapsed:.2f} s ({len(durations) / elapsed:.0f}/s), "
+        f"latency p50 {quantiles[49] * 1000:.1f} ms, p99 {quantiles[98] * 1000:.1f} ms\n"
+    )
+
+
+if __name__ == "__main__":
+    main()
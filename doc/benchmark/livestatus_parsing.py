@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compare receiving a large Livestatus response at once and row by row
+
+A fake site answers with a response looking like the services table of a large
+site. Every variant runs in a fresh interpreter, which reports the increase of its
+peak RSS and the time needed for the query:
+
+    PYTHONPATH=livestatus/api/python doc/benchmark/livestatus_parsing.py --rows 300000
+"""
+
+import argparse
+import multiprocessing
+import resource
+import socket
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import livestatus
+
+QUERY = "GET services\nColumns: host_name description state plugin_output perf_data"
+
+
+def _make_body(num_rows: int) -> bytes:
+    return (
+        "["
+        + ",\n".join(
+            repr(
+                [
+                    f"host{nr // 50}",
+                    f"Service {nr % 50}",
+                    nr % 4,
+                    f"OK - Everything is fine with service {nr} " + "x" * 60,
+                    f"load1={nr % 7};5;10;0; load5={nr % 5};5;10;0;",
+                ]
+            )
+            for nr in range(num_rows)
+        )
+        + "]\n"
+    ).encode("utf-8")
+
+
+def _serve(listener: socket.socket, response: bytes, num_queries: int) -> None:
+    for _nr in range(num_queries):
+        conn, _addr = listener.accept()
+        with conn:
+            query = b""
+            while not query.endswith(b"\n\n"):
+                query += conn.recv(4096)
+            conn.sendall(response)
+
+
+def _peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _query_at_once(live: livestatus.SingleSiteConnection) -> int:
+    return len(live.query(QUERY))
+
+
+def _query_rows(live: livestatus.SingleSiteConnection) -> int:
+    return sum(1 for _row in live.query_rows(QUERY))
+
+
+VARIANTS: dict[str, Callable[[livestatus.SingleSiteConnection], int]] = {
+    "query": _query_at_once,
+    "query_rows": _query_rows,
+}
+
+
+def _run_variant(name: str, socketurl: str, results: "multiprocessing.Queue[str]") -> None:
+    live = livestatus.SingleSiteConnection(socketurl)
+    rss_before = _peak_rss_kb()
+    start = time.perf_counter()
+    num_rows = VARIANTS[name](live)
+    duration = time.perf_counter() - start
+    live.disconnect()
+    results.put(
+        f"{name:<12} {num_rows:>9} rows {duration:8.3f} s "
+        f"{(_peak_rss_kb() - rss_before) / 1024:10.1f} MB peak RSS increase"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=300000, help="number of rows of the response")
+    args = parser.parse_args()
+
+    body = _make_body(args.rows)
+    response = b"200 %11d\n" % len(body) + body
+    print(f"Response size: {len(body) / 1024 / 1024:.1f} MB")
+
+    # Fresh interpreters, so the response built here does not count
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "live"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(path))
+            listener.listen(1)
+            server = threading.Thread(target=_serve, args=(listener, response, len(VARIANTS)))
+            server.start()
+            results: "multiprocessing.Queue[str]" = ctx.Queue()
+            for name in VARIANTS:
+                process = ctx.Process(target=_run_variant, args=(name, f"unix:{path}", results))
+                process.start()
+                process.join()
+                print(results.get())
+            server.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compare computing the prediction data with lists and with NumPy
+
+The RRD data is made up with the resolutions of the default RRA configuration, so
+the older slices are coarser and have to be upsampled. All periods are computed
+with a horizon of one year:
+
+    doc/benchmark/prediction.py --horizon 365
+"""
+
+import argparse
+import math
+import random
+import time
+from collections.abc import Callable
+
+from cmk.utils.prediction import DataStats, Timestamp, TimeSeries, TimeSeriesValues
+
+from cmk.base import prediction
+
+_Windows = list[tuple[Timestamp, Timestamp]]
+_Columns = dict[tuple[Timestamp, Timestamp], TimeSeries]
+
+NOW = 1668000000
+
+# Age and step of the consolidated data
+RESOLUTIONS = [(2 * 86400, 60), (10 * 86400, 300), (90 * 86400, 1800), (None, 21600)]
+
+
+def _rrd_column(start: Timestamp, end: Timestamp) -> TimeSeries:
+    age = NOW - start
+    step = next(step for max_age, step in RESOLUTIONS if max_age is None or age < max_age)
+    rng = random.Random(start)
+    values = [None if rng.random() < 0.01 else rng.gauss(50, 10) for _t in range(start, end, step)]
+    return TimeSeries(values, (start, end, step))
+
+
+def _std_dev(point_line: list[float], average: float) -> float:
+    samples = len(point_line)
+    if samples == 1:
+        return abs(average)
+    return math.sqrt(
+        abs(sum(p**2 for p in point_line) - average**2 * samples) / float(samples - 1)
+    )
+
+
+def _with_lists(columns: _Columns, windows: _Windows) -> DataStats:
+    """The computation before NumPy"""
+    from_time = windows[0][0]
+    slices = [(columns[window], from_time - window[0]) for window in windows]
+    twindow = slices[0][0].twindow
+    upsampled: list[TimeSeriesValues] = [ts.bfill_upsample(twindow, shift) for ts, shift in slices]
+    descriptors: DataStats = []
+    for time_column in zip(*upsampled):
+        point_line = [x for x in time_column if x is not None]
+        if point_line:
+            average = sum(point_line) / float(len(point_line))
+            descriptors.append(
+                [average, min(point_line), max(point_line), _std_dev(point_line, average)]
+            )
+        else:
+            descriptors.append([None, None, None, None])
+    return descriptors
+
+
+def _with_numpy(columns: _Columns, windows: _Windows) -> DataStats:
+    return prediction._calculate_data_for_prediction(windows, lambda s, e: columns[(s, e)]).points
+
+
+VARIANTS: dict[str, Callable[[_Columns, _Windows], DataStats]] = {
+    "lists": _with_lists,
+    "numpy": _with_numpy,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--horizon", type=int, default=365, help="horizon in days")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per variant")
+    args = parser.parse_args()
+
+    for period, period_info in prediction._PREDICTION_PERIODS.items():
+        timegroup = period_info.groupby(NOW)[0]
+        windows = prediction._time_slices(NOW, args.horizon * 86400, period_info, timegroup)
+        # Not part of the measurement, the RRD data is fetched the same way for both
+        columns = {window: _rrd_column(*window) for window in windows}
+        results = {}
+        for name, variant in VARIANTS.items():
+            durations = []
+            for _run in range(args.repeat):
+                start = time.perf_counter()
+                results[name] = variant(columns, windows)
+                durations.append(time.perf_counter() - start)
+            print(
+                f"{period:<7} {len(windows):>5} slices {len(results[name]):>6} points  "
+                f"{name:<6} {min(durations) * 1000:9.1f} ms"
+            )
+        for row_a, row_b in zip(results["lists"], results["numpy"]):
+            for a, b in zip(row_a, row_b):
+                assert a == b or (
+                    a is not None and b is not None and math.isclose(a, b, rel_tol=1e-6)
+                )
+
+
+if __name__ == "__main__":
+    main()
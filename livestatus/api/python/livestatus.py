@@ -12,6 +12,7 @@ import json
 import os
 import re
 import select
+import selectors
 import socket
 import ssl
 import threading
@@ -495,6 +496,96 @@ def _parse_socket_url(url: str) -> tuple[socket.AddressFamily, str | tuple[str,
     )
 
 
+_RESPONSE_HEADER_LENGTH = 16
+_RECEIVE_CHUNK_SIZE = 65536
+# Timeout for receiving the content once the response header has arrived. The data is
+# already available at this point, see SingleSiteConnection.receive_raw_response().
+_RESPONSE_DATA_TIMEOUT = 30
+
+
+def _response_data(code: str, data: bytes) -> bytes:
+    """Return the data of a successful response, raise the matching exception otherwise"""
+    if code == "200":
+        return data
+
+    error_info = data.decode("utf-8")
+    if code == "404":
+        raise MKLivestatusTableNotFoundError("Not Found (%s): %r" % (code, error_info))
+
+    if code == "502":
+        raise MKLivestatusBadGatewayError(error_info)
+
+    raise MKLivestatusQueryError("%s: %s" % (code, error_info))
+
+
+def _parse_response_line(line: bytes, first: bool, query: Query) -> LivestatusResponse:
+    """Parse one line of a response in JSON or Python 3 format
+
+    Livestatus puts every row on a line of its own: The first line starts with the
+    opening bracket of the response, every line ends with the separating comma or with
+    the closing bracket. Lines with several rows are parsed as well."""
+    if first:
+        if not line.startswith(b"["):
+            raise MKLivestatusQueryError("Malformed raw response output")
+        line = line[1:]
+    if not line:
+        return LivestatusResponse([])
+    if not line.endswith((b",", b"]")):
+        raise MKLivestatusQueryError("Malformed raw response output")
+    data = b"[" + line[:-1] + b"]"
+    try:
+        rows: LivestatusResponse = (
+            json.loads(data)
+            if query.supports_json_format()
+            else ast.literal_eval(data.decode("utf-8"))
+        )
+        return rows
+    except (ValueError, SyntaxError):
+        raise MKLivestatusQueryError("Malformed raw response output")
+
+
+def _iter_response_rows(
+    sock: socket.socket, length: int, query: Query, timeout: float | None
+) -> Iterator[LivestatusRow]:
+    """Receive the body of a response and yield the rows as soon as they are complete
+
+    The data is received into a reusable buffer, which only needs to hold the
+    incomplete last line. It only grows if a single row does not fit into it."""
+    buf = bytearray(_RECEIVE_CHUNK_SIZE)
+    view = memoryview(buf)
+    filled = 0
+    remaining = length
+    first = True
+    sock.settimeout(timeout)
+    try:
+        while remaining > 0:
+            if filled == len(buf):
+                view.release()
+                buf.extend(bytes(len(buf)))
+                view = memoryview(buf)
+            received = sock.recv_into(view[filled:], min(remaining, len(buf) - filled))
+            if not received:
+                raise MKLivestatusSocketClosed(
+                    "Read zero data from socket, remote peer closed connection."
+                )
+            line_start = 0
+            search_start = filled
+            filled += received
+            remaining -= received
+            while (line_end := buf.find(b"\n", search_start, filled)) != -1:
+                yield from _parse_response_line(bytes(view[line_start:line_end]), first, query)
+                first = False
+                line_start = search_start = line_end + 1
+            if line_start:
+                buf[: filled - line_start] = bytes(view[line_start:filled])
+                filled -= line_start
+        if filled:
+            # The last line is not terminated by a newline
+            yield from _parse_response_line(bytes(view[:filled]), first, query)
+    finally:
+        view.release()
+
+
 class SingleSiteConnection(Helpers):
 
     # So we only collect in a specific thread, and not in all of them. We also use
@@ -684,6 +775,70 @@ class SingleSiteConnection(Helpers):
                 self.disconnect()
                 raise
 
+    def query_rows(self, query: QueryTypes, add_headers: str = "") -> Iterator[LivestatusRow]:
+        """Like query(), but yields the rows while the response is received
+
+        The rows are parsed one by one, so the memory needed is bounded by the size
+        of the largest row instead of a multiple of the whole response. Error
+        responses are raised like with query(). Stopping the iteration early closes
+        the connection, because the rest of the response can not be skipped."""
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        if self.limit is not None:
+            normalized_query = Query(
+                "%sLimit: %d\n" % (normalized_query, self.limit),
+                normalized_query.suppress_exceptions,
+            )
+
+        with _livestatus_output_format_switcher(normalized_query, self):
+            str_query = self.build_query(normalized_query, add_headers)
+            self.send_query(str_query)
+            complete = False
+            try:
+                code, length = self._receive_response_header(str_query)
+                if self.socket is None:
+                    raise MKLivestatusSocketError(
+                        "Socket to '%s' is not connected" % self.socketurl
+                    )
+                if code != "200":
+                    # The error response is received completely, keep the connection
+                    complete = True
+                    _response_data(code, self.receive_data(length, 30))
+                # Same timeout for the content as in receive_raw_response()
+                for row in _iter_response_rows(self.socket, length, normalized_query, 30):
+                    if self.prepend_site:
+                        row.insert(0, b"")
+                    yield row
+                complete = True
+            except (MKLivestatusSocketClosed, IOError) as e:
+                raise MKLivestatusSocketError(str(e))
+            finally:
+                if not complete:
+                    self.disconnect()
+
+    def _receive_response_header(self, query: str) -> tuple[str, int]:
+        """Receive the header of a response, retry once if the connection has been closed
+
+        See receive_raw_response() for the details of the retry."""
+        for attempt in range(2):
+            try:
+                resp = self.receive_data(_RESPONSE_HEADER_LENGTH)
+                break
+            except (MKLivestatusSocketClosed, IOError) as e:
+                self.disconnect()
+                if attempt or (self.socket and self.socket.family == socket.AF_UNIX):
+                    raise MKLivestatusSocketError(str(e))
+                time.sleep(0.1)
+                self.connect()
+                self.send_query(query)
+
+        try:
+            return resp[0:3].decode("ascii"), int(resp[4:15].lstrip())
+        except Exception:
+            raise MKLivestatusSocketError(
+                "Malformed output. Livestatus TCP socket might be unreachable or wrong"
+                "encryption settings are used."
+            )
+
     def build_query(self, query_obj: Query, add_headers: str) -> str:
         # Prevent injection of further livestatus commands inside AuthUser header.
         if "\n" in self.auth_header[:-1]:
@@ -753,18 +908,7 @@ class SingleSiteConnection(Helpers):
             # while the data from a standard connection can still take some time.
             # 30 seconds should be more than enough for the maximum telegram size of 100MB
             data = self.receive_data(length, 30)
-
-            if code == "200":
-                return data
-
-            error_info = data.decode("utf-8")
-            if code == "404":
-                raise MKLivestatusTableNotFoundError("Not Found (%s): %r" % (code, error_info))
-
-            if code == "502":
-                raise MKLivestatusBadGatewayError(error_info)
-
-            raise MKLivestatusQueryError("%s: %s" % (code, error_info))
+            return _response_data(code, data)
 
         except (MKLivestatusSocketClosed, IOError) as e:
             # In case of an IO error or the other side having
@@ -915,6 +1059,80 @@ class ConnectedSite(NamedTuple):
 ConnectedSites = list[ConnectedSite]
 
 
+@dataclass(eq=False)
+class _PendingResponse:
+    """The response of one site to a parallel query, received in chunks"""
+
+    connected_site: ConnectedSite
+    query: str
+    deadline: float | None
+    reconnected: bool = False
+    header: bytes = b""
+    length: int | None = None
+    data: BytesIO = field(default_factory=BytesIO)
+
+    @property
+    def socket(self) -> socket.socket:
+        if (sock := self.connected_site.connection.socket) is None:
+            raise MKLivestatusSocketError(
+                "Socket to '%s' is not connected" % self.connected_site.connection.socketurl
+            )
+        return sock
+
+    @property
+    def started(self) -> bool:
+        return bool(self.header)
+
+    def receive(self) -> bool:
+        """Receive the available data, return whether the response is complete
+
+        Must only be called when the socket is readable."""
+        if self.length is None:
+            packet = self.socket.recv(_RESPONSE_HEADER_LENGTH - len(self.header))
+            if not packet:
+                raise MKLivestatusSocketClosed(
+                    "Read zero data from socket, remote peer closed connection."
+                )
+            self.header += packet
+            if len(self.header) < _RESPONSE_HEADER_LENGTH:
+                return False
+            try:
+                self.length = int(self.header[4:15].lstrip())
+            except ValueError:
+                raise MKLivestatusSocketError(
+                    "Malformed output. Livestatus TCP socket might be unreachable or wrong"
+                    "encryption settings are used."
+                )
+            data_deadline = time.time() + _RESPONSE_DATA_TIMEOUT
+            if self.deadline is None or data_deadline < self.deadline:
+                self.deadline = data_deadline
+            return self.length == 0
+
+        packet = self.socket.recv(min(self.length - self.data.tell(), _RECEIVE_CHUNK_SIZE))
+        if not packet:
+            raise MKLivestatusSocketClosed(
+                "Read zero data from socket, remote peer closed connection."
+            )
+        self.data.write(packet)
+        return self.data.tell() >= self.length
+
+    def response_data(self) -> bytes:
+        return _response_data(self.header[0:3].decode("ascii"), self.data.getvalue())
+
+    def resend(self) -> None:
+        """Send the query again on a new connection"""
+        self.connected_site.connection.disconnect()
+        self.connected_site.connection.connect()
+        self.connected_site.connection.send_query(self.query)
+        self.reconnected = True
+
+
+def _is_pending_readable(pending: _PendingResponse) -> bool:
+    # SSL sockets may have buffered data while the file descriptor is not readable
+    sock = pending.connected_site.connection.socket
+    return isinstance(sock, ssl.SSLSocket) and sock.pending() > 0
+
+
 class MultiSiteConnection(Helpers):
     def __init__(  # pylint: disable=too-many-branches
         self, sites: SiteConfigurations, disabled_sites: SiteConfigurations | None = None
@@ -1180,16 +1398,45 @@ class MultiSiteConnection(Helpers):
     # New parallelized version of query(). The semantics differs in the handling
     # of Limit: since all sites are queried in parallel, the Limit: is simply
     # applied to all sites - resulting in possibly more results then Limit requests.
-    def query_parallel(  # pylint: disable=too-many-branches
+    def query_parallel(
         self,
         query: Query,
         add_headers: str = "",
     ) -> LivestatusResponse:
-        stillalive = []
+        # Keep the order of the sites, regardless of which one answered first
+        rows_by_site = dict(self.iter_query_parallel(query, add_headers))
+        result = LivestatusResponse([])
+        for connected_site in self.connections:
+            result.extend(rows_by_site.get(connected_site.id, []))
+        return result
+
+    def query_iter(
+        self, query: QueryTypes, add_headers: str = "", timeout: float | None = None
+    ) -> Iterator[tuple[SiteId, LivestatusResponse]]:
+        """Query all sites in parallel, yield the rows of every site as soon as they arrived
+
+        This allows to start processing the data before the slowest site has answered.
+        See iter_query_parallel() for the details."""
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        with _livestatus_output_format_switcher(normalized_query, self):
+            yield from self.iter_query_parallel(normalized_query, add_headers, timeout)
+
+    def iter_query_parallel(  # pylint: disable=too-many-branches
+        self,
+        query: Query,
+        add_headers: str = "",
+        timeout: float | None = None,
+    ) -> Iterator[tuple[SiteId, LivestatusResponse]]:
+        """Send the query to all sites, then receive and parse the responses concurrently
+
+        The rows of a site are yielded as soon as its complete response has arrived.
+        A site which has not answered within the given timeout (in seconds) or which does
+        not send the announced content in time is considered dead. The timeout configured
+        for a site only applies to connecting to it, like for the sequential queries. Sites which have not answered when the iteration
+        is stopped early are disconnected, but not considered dead.
+        """
         if self.only_sites is not None:
             connect_to_sites = [c for c in self.connections if c[0] in self.only_sites]
-            # Unused sites are assumed to be alive
-            stillalive.extend([c for c in self.connections if c[0] not in self.only_sites])
         else:
             connect_to_sites = self.connections
 
@@ -1199,70 +1446,121 @@ class MultiSiteConnection(Helpers):
         else:
             limit_header = ""
 
+        now = time.time()
+        query_deadline = None if timeout is None else now + timeout
+        dead: set[SiteId] = set()
+
+        def mark_dead(connected_site: ConnectedSite, e: Exception) -> None:
+            connected_site.connection.disconnect()
+            dead.add(connected_site.id)
+            self.deadsites[connected_site.id] = {
+                "exception": e,
+                "site": connected_site.config,
+            }
+
         # First send all queries
-        retrieve_responses: list[tuple[str, ConnectedSite]] = []
+        pending: list[_PendingResponse] = []
         for connected_site in connect_to_sites:
             try:
                 str_query = connected_site.connection.build_query(query, add_headers + limit_header)
                 connected_site.connection.send_query(str_query)
-                retrieve_responses.append((str_query, connected_site))
             except LivestatusTestingError:
                 raise
             except Exception as e:
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+                mark_dead(connected_site, e)
+                continue
+            pending.append(
+                _PendingResponse(
+                    connected_site=connected_site, query=str_query, deadline=query_deadline
+                )
+            )
 
-        # Then retrieve all raw responses. We will be as slow as the slowest of all connections.
-        site_responses: list[tuple[ConnectedSite, bytes]] = []
-        for str_query, connected_site in retrieve_responses:
-            try:
-                site_responses.append(
-                    (
-                        connected_site,
-                        connected_site.connection.receive_raw_response(
-                            str_query, query.suppress_exceptions
-                        ),
+        # Then receive the responses of all sites at the same time
+        selector = selectors.DefaultSelector()
+        for response in pending:
+            selector.register(response.socket, selectors.EVENT_READ, response)
+
+        def finish(response: _PendingResponse) -> None:
+            pending.remove(response)
+            with contextlib.suppress(KeyError, ValueError):
+                selector.unregister(response.socket)
+
+        try:
+            while pending:
+                now = time.time()
+                for response in [
+                    r for r in pending if r.deadline is not None and r.deadline <= now
+                ]:
+                    finish(response)
+                    mark_dead(
+                        response.connected_site,
+                        MKLivestatusSocketError("Timeout while waiting for the response"),
                     )
-                )
-            except query.suppress_exceptions:
-                # Mostly handles exception types MKLivestatusTableNotFoundError
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+                if not pending:
+                    break
+
+                deadlines = [r.deadline for r in pending if r.deadline is not None]
+                if any(_is_pending_readable(r) for r in pending):
+                    select_timeout: float | None = 0
+                elif deadlines:
+                    select_timeout = max(0, min(deadlines) - now)
+                else:
+                    select_timeout = None
+                readable = {key.data for key, _mask in selector.select(select_timeout)}
+                readable.update(r for r in pending if _is_pending_readable(r))
 
-        # Convert responses to python format
-        result = LivestatusResponse([])
-        for connected_site, raw_response in site_responses:
-            try:
-                rows = connected_site.connection.parse_raw_response(raw_response, query)
-                stillalive.append(connected_site)
-                if self.prepend_site:
-                    for row in rows:
-                        row.insert(0, connected_site.id)
-                result.extend(rows)
-            except query.suppress_exceptions:
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+                # Keep the order of the sites for the responses which are complete at once
+                for response in [r for r in pending if r in readable]:
+                    connected_site = response.connected_site
+                    try:
+                        if not response.receive():
+                            continue
+                    except LivestatusTestingError:
+                        raise
+                    except (MKLivestatusSocketClosed, IOError) as e:
+                        # The site may have closed a persisted connection in the meantime.
+                        # Like SingleSiteConnection.receive_raw_response(), try once again.
+                        selector.unregister(response.socket)
+                        try:
+                            if response.started or response.reconnected:
+                                raise
+                            response.resend()
+                            selector.register(response.socket, selectors.EVENT_READ, response)
+                        except LivestatusTestingError:
+                            raise
+                        except Exception:
+                            pending.remove(response)
+                            mark_dead(connected_site, e)
+                        continue
+                    except Exception as e:
+                        finish(response)
+                        mark_dead(connected_site, e)
+                        continue
 
-        self.connections = stillalive
-        return result
+                    finish(response)
+                    try:
+                        rows = connected_site.connection.parse_raw_response(
+                            response.response_data(), query
+                        )
+                    except query.suppress_exceptions:
+                        # Mostly handles exception types MKLivestatusTableNotFoundError
+                        continue
+                    except LivestatusTestingError:
+                        raise
+                    except Exception as e:
+                        mark_dead(connected_site, e)
+                        continue
+
+                    if self.prepend_site:
+                        for row in rows:
+                            row.insert(0, connected_site.id)
+                    yield connected_site.id, rows
+        finally:
+            # The responses of the remaining sites would confuse the following queries
+            for response in pending:
+                response.connected_site.connection.disconnect()
+            selector.close()
+            self.connections = [c for c in self.connections if c.id not in dead]
 
     def command(self, command: str, sitename: SiteId | None = SiteId("local")) -> None:
         if sitename in self.deadsites:
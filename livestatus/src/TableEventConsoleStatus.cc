@@ -27,6 +27,10 @@ TableEventConsoleStatus::TableEventConsoleStatus(MonitoringCore *mc)
     addColumn(ECRow::makeIntColumn("status_virtual_memory_size",
                                    "The current virtual memory size in bytes",
                                    offsets));
+    addColumn(ECRow::makeIntColumn(
+        "status_queue_length",
+        "The number of received message blocks waiting to be processed",
+        offsets));
 
     addColumn(ECRow::makeIntColumn(
         "status_messages",
@@ -57,6 +61,14 @@ TableEventConsoleStatus::TableEventConsoleStatus(MonitoringCore *mc)
         ECRow::makeDoubleColumn("status_drop_rate", "The drop rate", offsets));
     addColumn(ECRow::makeDoubleColumn("status_average_drop_rate",
                                       "The average drop rate", offsets));
+    addColumn(ECRow::makeIntColumn(
+        "status_queue_drops",
+        "The number of received messages dropped because the queue of the Event Console was full",
+        offsets));
+    addColumn(ECRow::makeDoubleColumn("status_queue_drop_rate",
+                                      "The queue drop rate", offsets));
+    addColumn(ECRow::makeDoubleColumn("status_average_queue_drop_rate",
+                                      "The average queue drop rate", offsets));
     addColumn(ECRow::makeIntColumn(
         "status_overflows",
         "The number of message overflows, i.e. messages simply dropped due to an overflow of the Event Console",
@@ -82,6 +94,16 @@ TableEventConsoleStatus::TableEventConsoleStatus(MonitoringCore *mc)
     addColumn(ECRow::makeDoubleColumn("status_average_rule_hit_rate",
                                       "The average rule hit rate", offsets));
 
+    addColumn(ECRow::makeIntColumn(
+        "status_rule_candidates",
+        "The number of rules preselected by the rule optimizer since startup of the Event Console",
+        offsets));
+    addColumn(ECRow::makeDoubleColumn("status_rule_candidate_rate",
+                                      "The rule candidate rate", offsets));
+    addColumn(ECRow::makeDoubleColumn("status_average_rule_candidate_rate",
+                                      "The average rule candidate rate",
+                                      offsets));
+
     addColumn(ECRow::makeDoubleColumn(
         "status_average_processing_time",
         "The average incoming message processing time", offsets));
@@ -497,7 +497,9 @@ static ColumnDefinitions event_console_status_columns() {
         {"status_average_message_rate", ColumnType::double_},
         {"status_average_overflow_rate", ColumnType::double_},
         {"status_average_processing_time", ColumnType::double_},
+        {"status_average_queue_drop_rate", ColumnType::double_},
         {"status_average_request_time", ColumnType::double_},
+        {"status_average_rule_candidate_rate", ColumnType::double_},
         {"status_average_rule_hit_rate", ColumnType::double_},
         {"status_average_rule_trie_rate", ColumnType::double_},
         {"status_average_sync_time", ColumnType::double_},
@@ -519,9 +521,14 @@ static ColumnDefinitions event_console_status_columns() {
         {"status_num_open_events", ColumnType::int_},
         {"status_overflow_rate", ColumnType::double_},
         {"status_overflows", ColumnType::int_},
+        {"status_queue_drop_rate", ColumnType::double_},
+        {"status_queue_drops", ColumnType::int_},
+        {"status_queue_length", ColumnType::int_},
         {"status_replication_last_sync", ColumnType::time},
         {"status_replication_slavemode", ColumnType::string},
         {"status_replication_success", ColumnType::int_},
+        {"status_rule_candidate_rate", ColumnType::double_},
+        {"status_rule_candidates", ColumnType::int_},
         {"status_rule_hit_rate", ColumnType::double_},
         {"status_rule_hits", ColumnType::int_},
         {"status_rule_trie_rate", ColumnType::double_},
@@ -13,6 +13,7 @@ from cmk.snmplib.type_defs import BackendSNMPTree, SNMPBackendEnum, SNMPHostConf
 from cmk.snmplib.utils import evaluate_snmp_detection
 
 from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
+from cmk.fetchers.snmp_backend._walk_index import WalkIndex
 
 import cmk.base.api.agent_based.register as agent_based_register
 from cmk.base.api.agent_based.type_defs import SNMPSectionPlugin
@@ -43,8 +44,8 @@ class _StringSNMPBackend(StoredWalkSNMPBackend):
             logging.getLogger("tbd"),
         )
 
-    def read_walk_data(self) -> list[str]:
-        return self.lines
+    def read_walk_data(self) -> WalkIndex:
+        return WalkIndex.from_lines(self.lines)
 
 
 def snmp_is_detected(section_name: SectionName, snmp_walk: str) -> bool:
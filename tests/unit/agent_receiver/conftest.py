@@ -6,7 +6,7 @@
 from uuid import UUID, uuid4
 
 import pytest
-from agent_receiver import site_context
+from agent_receiver import endpoints, site_context, utils
 from agent_receiver.apps_and_routers import AGENT_RECEIVER_APP
 from agent_receiver.main import main_app
 from fastapi.testclient import TestClient
@@ -17,6 +17,8 @@ def setup_site_context() -> None:
     site_context.agent_output_dir().mkdir(parents=True)
     site_context.r4r_dir().mkdir(parents=True)
     site_context.log_path().parent.mkdir(parents=True)
+    utils._registered_hosts.cache_clear()
+    endpoints._missing_ready_files.cache_clear()
 
 
 @pytest.fixture(name="client")
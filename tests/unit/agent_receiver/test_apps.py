@@ -3,9 +3,13 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import logging
+
+import pytest
+from agent_receiver import metrics
 from agent_receiver.apps_and_routers import _UUIDValidationRoute, AGENT_RECEIVER_APP
 from agent_receiver.main import main_app
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, FastAPI, HTTPException
 from fastapi.testclient import TestClient
 from starlette.routing import Mount
 
@@ -38,6 +42,48 @@ def test_uuid_validation_route() -> None:
     }
 
 
+def test_uuid_validation_route_metrics(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(metrics, "_METRICS", {})
+    app = FastAPI()
+    uuid_validation_router = APIRouter(route_class=_UUIDValidationRoute)
+
+    @uuid_validation_router.post("/endpoint/{uuid}")
+    def endpoint(uuid: str) -> dict[str, str]:
+        if uuid == "5678":
+            raise HTTPException(status_code=403)
+        return {"Hello": "World"}
+
+    app.include_router(uuid_validation_router)
+    client = TestClient(app)
+
+    client.post("/endpoint/1234", headers={"verified-uuid": "1234"}, data=b"x" * 10)
+    client.post("/endpoint/5678", headers={"verified-uuid": "5678"}, data=b"x" * 20)
+
+    endpoint_metrics = metrics._METRICS["/endpoint/{uuid}"]
+    assert endpoint_metrics.requests == 2
+    assert endpoint_metrics.failed == 1
+    assert endpoint_metrics.bytes_received == 30
+    assert 0 < endpoint_metrics.max_seconds <= endpoint_metrics.seconds
+
+
+def test_metrics_report(monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture) -> None:
+    monkeypatch.setattr(metrics, "_METRICS", {})
+    monkeypatch.setattr(metrics, "_interval_start", None)
+    caplog.set_level(logging.INFO)
+
+    monkeypatch.setattr(metrics.time, "monotonic", lambda: 1000.0)
+    metrics.record_request("/agent_data/{uuid}", 0.5, 3 * 2**20, False)
+    assert not caplog.records
+
+    monkeypatch.setattr(metrics.time, "monotonic", lambda: 1300.0)
+    metrics.record_request("/agent_data/{uuid}", 1.5, 2**20, True)
+    assert [record.message for record in caplog.records] == [
+        "Metrics of /agent_data/{uuid}: 2 requests (1 failed, 0.0/s), 1000.0 ms avg, "
+        "1500.0 ms max, 4.0 MiB received (2.0 MiB/s per request)"
+    ]
+    assert not metrics._METRICS
+
+
 def test_main_app_structure() -> None:
     main_app_ = main_app()
     # we only want one route, namely the one to the sub-app which is mounted under the site name
@@ -6,7 +6,9 @@
 import io
 import json
 import logging
+import os
 import stat
+import time
 from collections.abc import Mapping
 from pathlib import Path
 from unittest import mock
@@ -14,7 +16,7 @@ from uuid import UUID
 from zlib import compress
 
 import pytest
-from agent_receiver import site_context
+from agent_receiver import endpoints, site_context
 from agent_receiver.checkmk_rest_api import CMKEdition, HostConfiguration
 from agent_receiver.models import HostTypeEnum
 from fastapi import HTTPException
@@ -417,6 +419,45 @@ def test_agent_data_success(
     assert response.status_code == 204
 
 
+@pytest.mark.usefixtures("symlink_push_host")
+def test_agent_data_chunked(
+    tmp_path: Path,
+    client: TestClient,
+    uuid: UUID,
+    agent_data_headers: Mapping[str, str],
+) -> None:
+    agent_output = b"".join(b"<<<section_%d>>>\n%d\n" % (nr, nr**3) for nr in range(200000))
+    assert len(compress(agent_output)) > endpoints._AGENT_DATA_CHUNK_SIZE
+    assert len(agent_output) > 3 * endpoints._AGENT_DATA_CHUNK_SIZE
+
+    response = client.post(
+        f"/agent_data/{uuid}",
+        headers=typeshed_issue_7724(agent_data_headers),
+        files={"monitoring_data": ("filename", io.BytesIO(compress(agent_output)))},
+    )
+
+    assert response.status_code == 204
+    assert (tmp_path / "push-agent" / "hostname" / "agent_output").read_bytes() == agent_output
+
+
+@pytest.mark.usefixtures("symlink_push_host")
+def test_agent_data_truncated(
+    tmp_path: Path,
+    client: TestClient,
+    uuid: UUID,
+    agent_data_headers: Mapping[str, str],
+) -> None:
+    response = client.post(
+        f"/agent_data/{uuid}",
+        headers=typeshed_issue_7724(agent_data_headers),
+        files={"monitoring_data": ("filename", io.BytesIO(compress(b"mock file" * 100)[:-4]))},
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Decompression of agent data failed"}
+    assert not list((tmp_path / "push-agent" / "hostname").iterdir())
+
+
 @pytest.mark.usefixtures("symlink_push_host")
 def test_agent_data_move_error(
     caplog: pytest.LogCaptureFixture,
@@ -571,3 +612,25 @@ def test_registration_status_pull_host(
         "type": HostTypeEnum.PULL.value,
         "message": "Host registered",
     }
+
+
+@pytest.mark.usefixtures("symlink_push_host")
+def test_agent_data_missing_ready_file_cached(
+    client: TestClient,
+    uuid: UUID,
+    agent_data_headers: Mapping[str, str],
+) -> None:
+    (path_ready := site_context.r4r_dir() / "READY").mkdir()
+    os.utime(path_ready, (time.time() - 60, time.time() - 60))
+
+    with mock.patch.object(Path, "rename", autospec=True, side_effect=Path.rename) as move_mock:
+        for _post in range(3):
+            response = client.post(
+                f"/agent_data/{uuid}",
+                headers=typeshed_issue_7724(agent_data_headers),
+                files={"monitoring_data": ("filename", io.BytesIO(compress(b"mock file")))},
+            )
+            assert response.status_code == 204
+
+    # The READY file is only looked for once
+    assert move_mock.call_count == 1
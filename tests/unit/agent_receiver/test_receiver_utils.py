@@ -3,13 +3,19 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import os
 import time
 from pathlib import Path
 from uuid import UUID
 
 from agent_receiver import site_context
 from agent_receiver.models import HostTypeEnum
-from agent_receiver.utils import Host, update_file_access_time
+from agent_receiver.utils import (
+    DirectoryChangeCache,
+    Host,
+    registered_host,
+    update_file_access_time,
+)
 
 
 def test_host_not_registered(uuid: UUID) -> None:
@@ -46,6 +52,44 @@ def test_push_host_registered(tmp_path: Path, uuid: UUID) -> None:
     assert host.source_path == source
 
 
+def _make_old(path: Path) -> None:
+    os.utime(path, (time.time() - 60, time.time() - 60))
+
+
+def test_directory_change_cache_dropped_on_change(tmp_path: Path) -> None:
+    _make_old(tmp_path)
+    cache = DirectoryChangeCache[int](tmp_path, poll_interval=0)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    (tmp_path / "a").touch()
+    assert cache.get("a") is None
+
+
+def test_directory_change_cache_not_caching_recent_changes(tmp_path: Path) -> None:
+    cache = DirectoryChangeCache[int](tmp_path, poll_interval=0)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_registered_host_cached(tmp_path: Path, uuid: UUID) -> None:
+    source = site_context.agent_output_dir() / str(uuid)
+    source.symlink_to(tmp_path / "push-agent" / "hostname")
+    _make_old(site_context.agent_output_dir())
+
+    assert (host := registered_host(uuid)).registered is True
+    assert registered_host(uuid) is host
+
+
+def test_registered_host_not_registered_not_cached(uuid: UUID) -> None:
+    _make_old(site_context.agent_output_dir())
+
+    assert registered_host(uuid).registered is False
+    assert registered_host(uuid) is not registered_host(uuid)
+
+
 def test_update_file_access_time_success(tmp_path: Path) -> None:
     file_path = tmp_path / "my_file"
     file_path.touch()
@@ -22,9 +22,11 @@ def test_load_host_value_store_loads_file(monkeypatch) -> None:  # type:ignore[n
 
     monkeypatch.setattr(
         store,
-        "load_text_from_file",
-        lambda *_a, **_kw: "{('test_load_host_value_store_loads_file', '%s', %r, 'loaded_file'): True}"
-        % service_id,
+        "load_bytes_from_file",
+        lambda *_a, **_kw: (
+            "{('test_load_host_value_store_loads_file', '%s', %r, 'loaded_file'): True}"
+            % service_id
+        ).encode("utf-8"),
     )
 
     with load_host_value_store(
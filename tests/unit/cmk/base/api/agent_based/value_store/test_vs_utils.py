@@ -3,15 +3,17 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-from ast import literal_eval
 from pathlib import Path
+from typing import Any
 
 # pylint: disable=protected-access
 import pytest
+from pytest_mock import MockerFixture
 
-from cmk.utils import store
+from cmk.utils.exceptions import MKGeneralException
 from cmk.utils.type_defs import CheckPluginName
 
+from cmk.base.api.agent_based.value_store import _utils
 from cmk.base.api.agent_based.value_store._utils import (
     _DiskSyncedMapping,
     _DynamicDiskSyncedMapping,
@@ -77,99 +79,99 @@ class Test_DynamicDiskSyncedMapping:
 
 
 class Test_StaticDiskSyncedMapping:
-    def _mock_load(self, mocker):
-        stored_item_states = (
-            '{("check1", None, "stored-user-key-1"): 23,'
-            ' ("check2", "item", "stored-user-key-2"): 42}'
-        )
-
-        mocker.patch.object(
-            store,
-            "load_text_from_file",
-            side_effect=lambda *a, **kw: stored_item_states,
-        )
-
-    def _mock_store(self, mocker):
-        mocker.patch.object(
-            store,
-            "save_text_to_file",
-            autospec=True,
-        )
-
     @staticmethod
-    def _get_sdsm(
-        tmp_path: Path,
-    ) -> _StaticDiskSyncedMapping[tuple[str, str | None, str], object]:
-        return _StaticDiskSyncedMapping(
-            path=tmp_path / "test-host",
-            log_debug=lambda msg: None,
-            serializer=repr,
-            deserializer=literal_eval,
+    def _get_sdsm(tmp_path: Path) -> _StaticDiskSyncedMapping:
+        return _StaticDiskSyncedMapping(path=tmp_path / "test-host", log_debug=lambda msg: None)
+
+    def test_load_legacy_format(self, tmp_path: Path) -> None:
+        (tmp_path / "test-host").write_text(
+            "{('host', 'check1', None, 'stored-user-key-1'): 23,"
+            " ('host', 'check2', 'item', 'stored-user-key-2'): 42,"
+            " ('host', 'check2', 'item', 'stored-user-key-3'): (1.0, 2)}"
         )
-
-    def test_mapping_features(self, mocker, tmp_path: Path) -> None:  # type:ignore[no-untyped-def]
-
-        self._mock_load(mocker)
         sdsm = self._get_sdsm(tmp_path)
-        assert sdsm.get(("check_no", None, "moo")) is None
+        assert sdsm.get(("host", "check_no", None)) is None
         with pytest.raises(KeyError):
-            _ = sdsm[("check_no", None, "moo")]
-        assert len(sdsm) == 2
+            _ = sdsm[("host", "check_no", None)]
 
-        assert sdsm.get(("check1", None, "stored-user-key-1")) == 23
-        assert sdsm[("check2", "item", "stored-user-key-2")] == 42
-        assert list(sdsm) == [
-            ("check1", None, "stored-user-key-1"),
-            ("check2", "item", "stored-user-key-2"),
-        ]
+        assert list(sdsm) == [("host", "check1", None), ("host", "check2", "item")]
         assert len(sdsm) == 2
+        assert sdsm[("host", "check1", None)] == {"stored-user-key-1": 23}
+        assert sdsm[("host", "check2", "item")] == {
+            "stored-user-key-2": 42,
+            "stored-user-key-3": (1.0, 2),
+        }
 
-    def test_store(self, mocker, tmp_path: Path) -> None:  # type:ignore[no-untyped-def]
-
-        self._mock_load(mocker)
-        self._mock_store(mocker)
-
+    def test_store(self, tmp_path: Path) -> None:
         sdsm = self._get_sdsm(tmp_path)
+        assert not sdsm
+
+        class StrSubclass(str):
+            pass
 
         sdsm.disksync(
-            removed={("check2", "item", "stored-user-key-2")},
-            updated=[(("check3", "el Barto", "Ay caramba"), "ASDF")],
+            updated=[
+                (("host", "check1", None), {"key": 23}),
+                (("host", "check2", "item"), {"key": 42}),
+                (("host", "check3", "el Barto"), {"Ay caramba": StrSubclass("ASDF")}),
+            ]
         )
+        sdsm.disksync(removed={("host", "check2", "item")})
+        assert (tmp_path / "test-host").read_bytes().startswith(b"CMKVS\x01")
 
         expected_values = {
-            ("check1", None, "stored-user-key-1"): 23,
-            ("check3", "el Barto", "Ay caramba"): "ASDF",
+            ("host", "check1", None): {"key": 23},
+            ("host", "check3", "el Barto"): {"Ay caramba": "ASDF"},
         }
-        written = store.save_text_to_file.call_args.args[1]  # type: ignore[attr-defined]
-        assert written == repr(expected_values)
-        assert list(sdsm.items()) == list(expected_values.items())
+        assert dict(sdsm.items()) == expected_values
+        assert dict(self._get_sdsm(tmp_path).items()) == expected_values
+
+    def test_namespaces_are_loaded_lazily(self, mocker: MockerFixture, tmp_path: Path) -> None:
+        self._get_sdsm(tmp_path).disksync(
+            updated=[(("host", "check1", None), {"key": 23}), (("host", "check2", None), {})]
+        )
+        deserialize = mocker.spy(_utils, "_deserialize_namespace")
+        serialize = mocker.spy(_utils, "_serialize_namespace")
+
+        sdsm = self._get_sdsm(tmp_path)
+        assert sdsm[("host", "check1", None)] == {"key": 23}
+        sdsm.disksync(updated=[(("host", "check1", None), {"key": 42})])
+        assert deserialize.call_count == 1
+        assert serialize.call_count == 1
+
+    def test_unknown_version(self, tmp_path: Path) -> None:
+        (tmp_path / "test-host").write_bytes(b"CMKVS\x99")
+        with pytest.raises(MKGeneralException):
+            self._get_sdsm(tmp_path)
 
 
 class Test_DiskSyncedMapping:
     @staticmethod
     def _get_dsm() -> _DiskSyncedMapping:
-        dynstore: _DynamicDiskSyncedMapping[tuple[str, str, str], str] = _DynamicDiskSyncedMapping()
+        dynstore: _DynamicDiskSyncedMapping[
+            tuple[str, str, str | None], Any
+        ] = _DynamicDiskSyncedMapping()
         dynstore.update(
             {
-                ("dyn", "key", "1"): "dyn-val-1",
-                ("dyn", "key", "2"): "dyn-val-2",
+                ("dyn", "key", "1"): {"value": "dyn-val-1"},
+                ("dyn", "key", "2"): {"value": "dyn-val-2"},
             }
         )
         return _DiskSyncedMapping(
             dynamic=dynstore,
             static={  # type: ignore[arg-type]
-                ("stat", "key", "1"): "stat-val-1",
-                ("stat", "key", "2"): "stat-val-2",
+                ("stat", "key", "1"): {"value": "stat-val-1"},
+                ("stat", "key", "2"): {"value": "stat-val-2"},
             },
         )
 
     def test_getitem(self) -> None:
         dsm = self._get_dsm()
-        assert dsm[("stat", "key", "1")] == "stat-val-1"
-        assert dsm.get(("stat", "key", "2")) == "stat-val-2"
+        assert dsm[("stat", "key", "1")] == {"value": "stat-val-1"}
+        assert dsm.get(("stat", "key", "2")) == {"value": "stat-val-2"}
         assert dsm.get(("stat", "key", "3")) is None
-        assert dsm[("dyn", "key", "1")] == "dyn-val-1"
-        assert dsm.get(("dyn", "key", "2")) == "dyn-val-2"
+        assert dsm[("dyn", "key", "1")] == {"value": "dyn-val-1"}
+        assert dsm.get(("dyn", "key", "2")) == {"value": "dyn-val-2"}
         assert dsm.get(("dyn", "key", "3")) is None
 
     def test_delitem(self) -> None:
@@ -215,12 +217,14 @@ class Test_DiskSyncedMapping:
 
 class Test_ValueStore:
     @staticmethod
-    def _get_store() -> _ValueStore:
+    def _get_store(data: dict[tuple[str, str, str | None], Any] | None = None) -> _ValueStore:
         return _ValueStore(
             data={
-                ("moritz", "check1", "item", "key1"): 42,
-                ("moritz", "check2", "item", "key2"): 23,
-            },
+                ("moritz", "check1", "item"): {"key1": 42},
+                ("moritz", "check2", "item"): {"key2": 23},
+            }
+            if data is None
+            else data,
             service_id=(CheckPluginName("check1"), "item"),
             host_name="moritz",
         )
@@ -229,6 +233,27 @@ class Test_ValueStore:
         s_store = self._get_store()
         assert "key1" in s_store
         assert "key2" not in s_store
+        assert list(s_store) == ["key1"]
+        assert len(s_store) == 1
+
+    def test_stored_namespace_is_not_changed(self) -> None:
+        stored = {"key1": 42}
+        data: dict[tuple[str, str, str | None], Any] = {("moritz", "check1", "item"): stored}
+        s_store = self._get_store(data)
+        s_store["key2"] = 23
+        s_store["key3"] = 5
+        assert stored == {"key1": 42}
+        assert data == {("moritz", "check1", "item"): {"key1": 42, "key2": 23, "key3": 5}}
+
+    def test_empty_namespace_is_removed(self) -> None:
+        data: dict[tuple[str, str, str | None], Any] = {}
+        s_store = self._get_store(data)
+        s_store["key"] = 1
+        assert data
+        assert s_store.pop("key") == 1
+        assert not data
+        with pytest.raises(KeyError):
+            del s_store["key"]
 
     def test_invalid_key(self) -> None:
         s_store = self._get_store()
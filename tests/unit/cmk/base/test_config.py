@@ -2680,6 +2680,33 @@ class TestPackedConfigStore:
         assert precompiled_check_config.exists()
         assert store.read() == {"abc": 1}
 
+    def test_host_variables(self, store: config.PackedConfigStore) -> None:
+        helper_config = {
+            "abc": 1,
+            "ipaddresses": {HostName("a"): "1.2.3.4", HostName("b"): "1.2.3.5"},
+            "host_attributes": {HostName("b"): {"alias": "B"}},
+            "ipv6addresses": {},
+        }
+        store.write(helper_config)
+
+        packed_config = store.read()
+        assert packed_config == helper_config
+        assert packed_config["ipaddresses"]["b"] == "1.2.3.5"
+        assert packed_config["host_attributes"].get("a") is None
+        assert "a" not in packed_config["host_attributes"]
+        assert "b" in packed_config["host_attributes"]
+        assert sorted(packed_config["ipaddresses"]) == ["a", "b"]
+        assert not packed_config["ipv6addresses"]
+        with pytest.raises(KeyError):
+            _ = packed_config["ipaddresses"]["c"]
+
+    def test_read_host_records_on_demand(self, store: config.PackedConfigStore) -> None:
+        store.write({"ipaddresses": {HostName(f"host{nr}"): f"10.0.0.{nr}" for nr in range(3)}})
+
+        ipaddresses = store.read()["ipaddresses"]
+        assert ipaddresses["host1"] == "10.0.0.1"
+        assert list(ipaddresses._records._records) == ["host1"]
+
 
 def test__extract_check_plugins(monkeypatch: MonkeyPatch) -> None:
     duplicate_plugin = {
@@ -4,7 +4,13 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import os
+import shutil
+import threading
+import time
+from collections import Counter
 from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import pytest
 from _pytest.monkeypatch import MonkeyPatch
@@ -12,8 +18,9 @@ from _pytest.monkeypatch import MonkeyPatch
 from tests.testlib.base import Scenario
 
 from cmk.utils.type_defs import ContactgroupName, ContactName
-from cmk.utils.type_defs.notify import NotificationContext
+from cmk.utils.type_defs.notify import NotificationContext, NotifyBulk, NotifyBulkParameters
 
+import cmk.base.core
 from cmk.base import notify
 
 
@@ -103,3 +110,199 @@ def test_rbn_groups_contacts(
     assert notify.rbn_groups_contacts(["all"]) == {"dong"}
     assert notify.rbn_groups_contacts(["foo"]) == {"ding", "harry"}
     assert notify.rbn_groups_contacts(["foo", "all"]) == {"ding", "dong", "harry"}
+
+
+class _Plugins:
+    """Record the order and the parallelism of the plugin calls, which block until released"""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+        self.running: Counter[str] = Counter()
+        self.max_running: Counter[str] = Counter()
+        self.released = threading.Event()
+        self._changed = threading.Condition()
+
+    def call(self, plugin_name: str, plugin_context: NotificationContext) -> int:
+        with self._changed:
+            self.calls.append((plugin_context["CONTACTNAME"], plugin_context["NR"]))
+            self.running[plugin_name] += 1
+            self.max_running[plugin_name] = max(
+                self.max_running[plugin_name], self.running[plugin_name]
+            )
+            self._changed.notify_all()
+        self.released.wait(timeout=30)
+        with self._changed:
+            self.running[plugin_name] -= 1
+        return 0
+
+    def wait_running(self, **expected: int) -> None:
+        with self._changed:
+            assert self._changed.wait_for(
+                lambda: all(self.running[name] == num for name, num in expected.items()),
+                timeout=30,
+            )
+
+
+def test_dispatcher_keeps_order_per_contact(monkeypatch: MonkeyPatch) -> None:
+    plugins = _Plugins()
+    monkeypatch.setattr(notify, "call_notification_script", plugins.call)
+
+    dispatcher = notify.NotificationDispatcher(4, {})
+    for nr in range(10):
+        for contact in ("ding", "dong", "harry"):
+            dispatcher.dispatch(
+                "mail", NotificationContext({"CONTACTNAME": contact, "NR": str(nr)})
+            )
+    plugins.wait_running(mail=3)
+    plugins.released.set()
+    dispatcher.shutdown()
+
+    for contact in ("ding", "dong", "harry"):
+        assert [nr for name, nr in plugins.calls if name == contact] == [
+            str(nr) for nr in range(10)
+        ]
+    assert plugins.max_running["mail"] == 3
+
+
+def test_dispatcher_orders_by_each_contact(monkeypatch: MonkeyPatch) -> None:
+    plugins = _Plugins()
+    monkeypatch.setattr(notify, "call_notification_script", plugins.call)
+
+    dispatcher = notify.NotificationDispatcher(4, {})
+    for nr, contacts in enumerate(["ding,dong", "ding", "dong", "harry"]):
+        dispatcher.dispatch("mail", NotificationContext({"CONTACTNAME": contacts, "NR": str(nr)}))
+    plugins.wait_running(mail=2)
+    assert plugins.calls == [("ding,dong", "0"), ("harry", "3")]
+    plugins.released.set()
+    dispatcher.shutdown()
+
+    assert sorted(plugins.calls[2:]) == [("ding", "1"), ("dong", "2")]
+
+
+def test_dispatcher_plugin_limits(monkeypatch: MonkeyPatch) -> None:
+    plugins = _Plugins()
+    monkeypatch.setattr(notify, "call_notification_script", plugins.call)
+
+    dispatcher = notify.NotificationDispatcher(3, {"sms": 1})
+    for contact in ("ding", "dong", "harry"):
+        dispatcher.dispatch("sms", NotificationContext({"CONTACTNAME": contact, "NR": "0"}))
+    dispatcher.dispatch("mail", NotificationContext({"CONTACTNAME": "ding", "NR": "1"}))
+    dispatcher.dispatch("mail", NotificationContext({"CONTACTNAME": "harald", "NR": "2"}))
+    # The notifications waiting for the sms plugin do not occupy the workers
+    plugins.wait_running(sms=1, mail=1)
+    assert plugins.calls == [("ding", "0"), ("harald", "2")]
+    plugins.released.set()
+    dispatcher.shutdown()
+
+    assert len(plugins.calls) == 5
+    assert plugins.max_running["sms"] == 1
+
+
+def test_call_notification_script_timeout_in_worker(
+    monkeypatch: MonkeyPatch, tmp_path: Path
+) -> None:
+    (script := tmp_path / "slow").write_text("#!/bin/sh\necho started\nexec sleep 60\n")
+    script.chmod(0o755)
+    monkeypatch.setattr(notify, "path_to_notification_script", lambda plugin_name: str(script))
+    monkeypatch.setattr(notify, "log_to_history", lambda message: None)
+    monkeypatch.setattr(notify.config, "notification_plugin_timeout", 1, raising=False)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(
+            notify.call_notification_script,
+            "slow",
+            NotificationContext(
+                {"CONTACTNAME": "ding", "HOSTNAME": "heute", "HOSTSTATE": "DOWN", "HOSTOUTPUT": ""}
+            ),
+        )
+        assert future.result(timeout=30) == 1
+
+
+@pytest.fixture(name="bulks")
+def fixture_bulks(monkeypatch: MonkeyPatch, tmp_path: Path) -> list[str]:
+    monkeypatch.setattr(notify, "notification_bulkdir", str(tmp_path))
+    sent: list[str] = []
+    monkeypatch.setattr(
+        notify, "notify_bulk", lambda dirname, uuids: sent.append(dirname.split("/")[-1])
+    )
+    return sent
+
+
+def _store_bulk_notification(hostname: str, interval: int | str, count: int = 10) -> None:
+    bulk: NotifyBulkParameters = {"groupby": ["host"], "count": count}
+    bulk["timeperiod" if isinstance(interval, str) else "interval"] = interval
+    notify.do_bulk_notify(
+        "mail",
+        {},
+        NotificationContext({"WHAT": "HOST", "CONTACTNAME": "harry", "HOSTNAME": hostname}),
+        bulk,
+    )
+
+
+def test_send_ripe_bulks_by_index(bulks: list[str], monkeypatch: MonkeyPatch) -> None:
+    notify.send_ripe_bulks()  # builds the empty index
+    _store_bulk_notification("ripe", 0)
+    _store_bulk_notification("not_ripe", 3600)
+    _store_bulk_notification("full", 3600, count=2)
+    _store_bulk_notification("full", 3600, count=2)
+
+    checked: list[notify.BulkKey] = []
+    check_bulk = notify._check_bulk
+
+    def _check_bulk(
+        key: notify.BulkKey, now: float, timeperiods: notify._TimeperiodStates
+    ) -> tuple[NotifyBulk, bool] | None:
+        checked.append(key)
+        return check_bulk(key, now, timeperiods)
+
+    monkeypatch.setattr(notify, "_check_bulk", _check_bulk)
+    notify.send_ripe_bulks()
+
+    assert sorted(bulks) == ["0,10,host,ripe", "3600,2,host,full"]
+    assert sorted(key[2] for key in checked) == ["0,10,host,ripe", "3600,2,host,full"]
+
+
+def test_send_ripe_bulks_rebuilds_index(bulks: list[str], tmp_path: Path) -> None:
+    _store_bulk_notification("ripe", 0)
+    _store_bulk_notification("not_ripe", 3600)
+    (tmp_path / ".index").unlink(missing_ok=True)
+    (tmp_path / ".journal").unlink()
+
+    notify.send_ripe_bulks()
+
+    assert bulks == ["0,10,host,ripe"]
+    entries = notify.BulkIndex(tmp_path).load(time.time())
+    assert entries is not None
+    assert sorted(key[2] for key in entries) == ["0,10,host,ripe", "3600,10,host,not_ripe"]
+
+
+def test_bulk_index_drops_removed_bulks(bulks: list[str], tmp_path: Path) -> None:
+    notify.send_ripe_bulks()
+    _store_bulk_notification("ripe", 0)
+    shutil.rmtree(tmp_path / "harry")
+
+    notify.send_ripe_bulks()
+
+    assert not bulks
+    assert notify.BulkIndex(tmp_path).load(time.time()) == {}
+
+
+def test_send_ripe_bulks_fetches_time_periods_once(
+    bulks: list[str], monkeypatch: MonkeyPatch
+) -> None:
+    calls: list[None] = []
+
+    def _timeperiod_states() -> dict[str, bool]:
+        calls.append(None)
+        return {"night": False, "day": True}
+
+    monkeypatch.setattr(cmk.base.core, "timeperiod_states", _timeperiod_states)
+    notify.send_ripe_bulks()
+    for hostname in ("a", "b"):
+        _store_bulk_notification(hostname, "night")
+    _store_bulk_notification("c", "day")
+
+    notify.send_ripe_bulks()
+
+    assert sorted(bulks) == ["timeperiod:night,10,host,a", "timeperiod:night,10,host,b"]
+    assert len(calls) == 1
@@ -12,7 +12,14 @@ import pytest
 
 from tests.testlib import on_time
 
-from cmk.utils.prediction import DataStats, Seconds, Timegroup, TimeSeriesValues, Timestamp
+from cmk.utils.prediction import (
+    DataStats,
+    Seconds,
+    Timegroup,
+    TimeSeries,
+    TimeSeriesValues,
+    Timestamp,
+)
 
 from cmk.base import prediction
 
@@ -197,3 +204,16 @@ def test_time_slices(
 )
 def test_data_stats(slices: list[TimeSeriesValues], result: DataStats) -> None:
     assert prediction._data_stats(slices) == result
+
+
+def test_retrieve_grouped_data_from_rrd() -> None:
+    def rrd_column(start: Timestamp, end: Timestamp) -> TimeSeries:
+        step = 60 if start == 86400 else 300
+        return TimeSeries([start / 86400] * ((end - start) // step), (start, end, step))
+
+    twindow, slices = prediction._retrieve_grouped_data_from_rrd(
+        rrd_column, [(86400, 172800), (0, 86400)]
+    )
+    assert twindow == (86400, 172800, 60)
+    assert slices.shape == (2, 1440)
+    assert prediction._data_stats(slices)[0] == [0.5, 0.0, 1.0, pytest.approx(math.sqrt(0.5))]
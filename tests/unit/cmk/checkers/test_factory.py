@@ -12,7 +12,7 @@ from cmk.utils.type_defs import HostAddress, HostName
 from cmk.snmplib.type_defs import SNMPBackendEnum, SNMPHostConfig
 
 from cmk.fetchers.snmp import make_backend
-from cmk.fetchers.snmp_backend import ClassicSNMPBackend
+from cmk.fetchers.snmp_backend import ClassicSNMPBackend, NativeSNMPBackend
 
 try:
     from cmk.fetchers.cee.snmp_backend.inline import InlineSNMPBackend  # type: ignore[import]
@@ -49,6 +49,11 @@ def test_factory_snmp_backend_inline(snmp_config: SNMPHostConfig) -> None:
         assert isinstance(make_backend(snmp_config, logging.getLogger()), InlineSNMPBackend)
 
 
+def test_factory_snmp_backend_native(snmp_config: SNMPHostConfig) -> None:
+    snmp_config = snmp_config._replace(snmp_backend=SNMPBackendEnum.NATIVE)
+    assert isinstance(make_backend(snmp_config, logging.getLogger()), NativeSNMPBackend)
+
+
 def test_factory_snmp_backend_unknown_backend(snmp_config: SNMPHostConfig) -> None:
     with pytest.raises(NotImplementedError, match="Unknown SNMP backend"):
         snmp_config = snmp_config._replace(snmp_backend="bla")  # type: ignore[arg-type]
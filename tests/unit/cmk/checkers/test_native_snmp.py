@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import socket
+import threading
+from collections.abc import Iterator, Sequence
+
+import pytest
+
+from cmk.utils.exceptions import MKSNMPError
+from cmk.utils.log import logger
+from cmk.utils.type_defs import HostName
+
+from cmk.snmplib.snmp_table import get_snmp_table
+from cmk.snmplib.type_defs import (
+    BackendOIDSpec,
+    BackendSNMPTree,
+    SNMPBackendEnum,
+    SNMPCredentials,
+    SNMPHostConfig,
+    SpecialColumn,
+)
+
+import cmk.fetchers.snmp_backend._ber as ber
+from cmk.fetchers.snmp_backend import NativeSNMPBackend
+from cmk.fetchers.snmp_backend._usm import localize_key, password_to_key, UsmSecurity, UsmUser
+
+IF_DESCR = (1, 3, 6, 1, 2, 1, 2, 2, 1, 2)
+IF_SPEED = (1, 3, 6, 1, 2, 1, 2, 2, 1, 5)
+
+WALK = [
+    ((1, 3, 6, 1, 2, 1, 1, 1, 0), ber.OCTET_STRING, b"Linux switch"),
+    (
+        (1, 3, 6, 1, 2, 1, 1, 2, 0),
+        ber.OBJECT_IDENTIFIER,
+        ber.encode_oid((1, 3, 6, 1, 4, 1, 8072))[2:],
+    ),
+    ((1, 3, 6, 1, 2, 1, 1, 3, 0), ber.TIME_TICKS, (4000000000).to_bytes(5, "big")),
+    *(((*IF_DESCR, nr), ber.OCTET_STRING, b"eth%d" % nr) for nr in range(1, 8)),
+    *(
+        ((*IF_SPEED, nr), ber.GAUGE32, (1000000000).to_bytes(5, "big"))
+        for nr in range(1, 8)
+        if nr != 4  # a hole in the table
+    ),
+    ((1, 3, 6, 1, 2, 1, 4, 20, 1, 1, 10, 0, 0, 1), ber.IP_ADDRESS, bytes((10, 0, 0, 1))),
+    (
+        (1, 3, 6, 1, 2, 1, 4, 20, 1, 2, 10, 0, 0, 1),
+        ber.INTEGER,
+        (-1).to_bytes(1, "big", signed=True),
+    ),
+]
+
+ENGINE_ID = bytes.fromhex("80001f8804636d6b")
+
+
+class FakeAgent:
+    """Serves a walk via UDP like an SNMP agent"""
+
+    def __init__(self, walk: Sequence[tuple[ber.OIDTuple, int, bytes]], version: int) -> None:
+        self._walk = sorted(walk)
+        self._version = version
+        self.usm: UsmSecurity | None = None
+        self.requests: list[ber.PDU] = []
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(0.05)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve)
+
+    @property
+    def port(self) -> int:
+        return self.socket.getsockname()[1]
+
+    def __enter__(self) -> "FakeAgent":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.socket.close()
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data, address = self.socket.recvfrom(65535)
+            except socket.timeout:
+                continue
+            if (response := self._handle(data)) is not None:
+                self.socket.sendto(response, address)
+
+    def _handle(self, data: bytes) -> bytes | None:
+        if self.usm is None:
+            _version, (_tag, community), (pdu_tag, pdu) = ber.decode_sequence(data)
+            if community != b"public":
+                return None
+            request = ber.decode_pdu(pdu_tag, pdu)
+            return ber.encode_sequence(
+                ber.encode_integer(self._version),
+                ber.encode_octet_string(community),
+                ber.encode_pdu(self._respond(request)),
+            )
+
+        message = self.usm.decode_message(data)
+        if not message.engine_id:
+            # Discovery: tell our engine ID
+            report = ber.PDU(
+                ber.REPORT,
+                message.pdu.request_id,
+                0,
+                0,
+                [ber.VarBind((1, 3, 6, 1, 6, 3, 15, 1, 1, 4, 0), ber.COUNTER32, b"\x01")],
+            )
+            return self.usm.encode_message(
+                message.msg_id, ber.encode_pdu(report), secure=False, reportable=False
+            )
+        return self.usm.encode_message(
+            message.msg_id, ber.encode_pdu(self._respond(message.pdu)), reportable=False
+        )
+
+    def _next(self, oid: ber.OIDTuple) -> tuple[ber.OIDTuple, int, bytes] | None:
+        return next((entry for entry in self._walk if entry[0] > oid), None)
+
+    def _respond(self, request: ber.PDU) -> ber.PDU:
+        self.requests.append(request)
+        varbinds: list[ber.VarBind] = []
+        if request.tag == ber.GET_REQUEST:
+            for varbind in request.varbinds:
+                entry = next((e for e in self._walk if e[0] == varbind.oid), None)
+                varbinds.append(
+                    ber.VarBind(*entry)
+                    if entry
+                    else ber.VarBind(varbind.oid, ber.NO_SUCH_INSTANCE, b"")
+                )
+            return request._replace(tag=ber.RESPONSE, varbinds=varbinds)
+
+        repetitions = request.error_index if request.tag == ber.GET_BULK_REQUEST else 1
+        current = [varbind.oid for varbind in request.varbinds]
+        for _repetition in range(repetitions):
+            for index, oid in enumerate(current):
+                if (entry := self._next(oid)) is None:
+                    if self._version == 0:
+                        return request._replace(
+                            tag=ber.RESPONSE, error_status=2, error_index=index + 1
+                        )
+                    varbinds.append(ber.VarBind(oid, ber.END_OF_MIB_VIEW, b""))
+                    continue
+                varbinds.append(ber.VarBind(*entry))
+                current[index] = entry[0]
+        return request._replace(tag=ber.RESPONSE, error_status=0, error_index=0, varbinds=varbinds)
+
+
+def _config(
+    port: int,
+    credentials: SNMPCredentials = "public",
+    bulk: bool = True,
+    v2c: bool = True,
+    timing: dict | None = None,
+) -> SNMPHostConfig:
+    return SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("switch"),
+        ipaddress="127.0.0.1",
+        credentials=credentials,
+        port=port,
+        is_bulkwalk_host=bulk,
+        is_snmpv2or3_without_bulkwalk_host=v2c and not bulk,
+        bulk_walk_size_of=3,
+        timing=timing or {"timeout": 1, "retries": 1},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.NATIVE,
+    )
+
+
+@pytest.fixture(name="agent")
+def fixture_agent() -> Iterator[FakeAgent]:
+    with FakeAgent(WALK, version=1) as agent:
+        yield agent
+
+
+EXPECTED_COLUMNS = [
+    [(f".1.3.6.1.2.1.2.2.1.2.{nr}", b"eth%d" % nr) for nr in range(1, 8)],
+    [(f".1.3.6.1.2.1.2.2.1.5.{nr}", b"1000000000") for nr in range(1, 8) if nr != 4],
+]
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_walk_columns(agent: FakeAgent, bulk: bool) -> None:
+    backend = NativeSNMPBackend(_config(agent.port, bulk=bulk), logger)
+    assert (
+        backend.walk_columns([".1.3.6.1.2.1.2.2.1.2", ".1.3.6.1.2.1.2.2.1.5"]) == EXPECTED_COLUMNS
+    )
+    # Both columns are fetched by the same requests
+    assert len({varbind.oid[:10] for varbind in agent.requests[0].varbinds}) == 2
+    assert len(agent.requests) == (3 if bulk else 8)
+    assert {request.tag for request in agent.requests} == {
+        ber.GET_BULK_REQUEST if bulk else ber.GET_NEXT_REQUEST
+    }
+
+
+def test_walk_values(agent: FakeAgent) -> None:
+    backend = NativeSNMPBackend(_config(agent.port), logger)
+    assert backend.walk(".1.3.6.1.2.1.1") == [
+        (".1.3.6.1.2.1.1.1.0", b"Linux switch"),
+        (".1.3.6.1.2.1.1.2.0", b".1.3.6.1.4.1.8072"),
+        (".1.3.6.1.2.1.1.3.0", b"4000000000"),
+    ]
+    assert backend.walk(".1.3.6.1.2.1.4.20.1") == [
+        (".1.3.6.1.2.1.4.20.1.1.10.0.0.1", b"10.0.0.1"),
+        (".1.3.6.1.2.1.4.20.1.2.10.0.0.1", b"-1"),
+    ]
+    # Like snmpwalk, get the OID itself if there is nothing below it
+    assert backend.walk(".1.3.6.1.2.1.1.1.0") == [(".1.3.6.1.2.1.1.1.0", b"Linux switch")]
+    assert not backend.walk(".1.3.6.1.2.1.99")
+
+
+def test_walk_snmpv1() -> None:
+    with FakeAgent(WALK, version=0) as agent:
+        backend = NativeSNMPBackend(_config(agent.port, bulk=False, v2c=False), logger)
+        # The end of the MIB is reached while walking
+        assert backend.walk_columns([".1.3.6.1.2.1.2.2.1.2", ".1.3.6.1.2.1.4.20.1.2"]) == [
+            EXPECTED_COLUMNS[0],
+            [(".1.3.6.1.2.1.4.20.1.2.10.0.0.1", b"-1")],
+        ]
+
+
+def test_get(agent: FakeAgent) -> None:
+    backend = NativeSNMPBackend(_config(agent.port), logger)
+    assert backend.get(".1.3.6.1.2.1.1.1.0") == b"Linux switch"
+    assert backend.get(".1.3.6.1.2.1.2.2.1.5.*") == b"1000000000"
+    assert backend.get(".1.3.6.1.2.1.1.4.0") is None
+    assert backend.get(".1.3.6.1.2.1.3.*") is None
+
+
+def test_snmp_table(agent: FakeAgent) -> None:
+    backend = NativeSNMPBackend(_config(agent.port), logger)
+    table = get_snmp_table(
+        section_name=None,
+        tree=BackendSNMPTree(
+            base=".1.3.6.1.2.1.2.2.1",
+            oids=[
+                BackendOIDSpec(SpecialColumn.END, "string", False),
+                BackendOIDSpec("2", "string", False),
+                BackendOIDSpec("5", "string", False),
+            ],
+        ),
+        walk_cache={},
+        backend=backend,
+    )
+    assert table[3] == ["4", "eth4", ""]
+    assert len(table) == 7
+    assert len(agent.requests) == 3
+
+
+def test_timeout() -> None:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as silent:
+        silent.bind(("127.0.0.1", 0))
+        config = _config(silent.getsockname()[1], timing={"timeout": 0.05, "retries": 1})
+        backend = NativeSNMPBackend(config, logger)
+        with pytest.raises(MKSNMPError, match="Timeout"):
+            backend.walk(".1.3.6.1.2.1.1")
+        assert backend.get(".1.3.6.1.2.1.1.1.0") is None
+
+
+def test_localize_key() -> None:
+    # RFC 3414 A.3
+    engine_id = bytes.fromhex("000000000000000000000002")
+    assert (
+        localize_key(password_to_key(b"maplesyrup", "md5"), engine_id, "md5").hex()
+        == "526f5eed9fcce26f8964c2930787d82b"
+    )
+    assert (
+        localize_key(password_to_key(b"maplesyrup", "sha1"), engine_id, "sha1").hex()
+        == "6695febc9288e36282235fc7151f128497b38f3f"
+    )
+
+
+@pytest.mark.parametrize(
+    "credentials",
+    [
+        ("noAuthNoPriv", "monitoring"),
+        ("authNoPriv", "SHA-256", "monitoring", "authpass"),
+        ("authPriv", "md5", "monitoring", "authpass", "DES", "privpass"),
+        ("authPriv", "sha", "monitoring", "authpass", "AES", "privpass"),
+    ],
+)
+def test_snmpv3(credentials: tuple[str, ...]) -> None:
+    with FakeAgent(WALK, version=3) as agent:
+        agent.usm = UsmSecurity(UsmUser.from_credentials(credentials))
+        agent.usm.update_engine(ENGINE_ID, 7, 123456)
+        backend = NativeSNMPBackend(_config(agent.port, credentials=credentials), logger)
+        assert (
+            backend.walk_columns([".1.3.6.1.2.1.2.2.1.2", ".1.3.6.1.2.1.2.2.1.5"])
+            == EXPECTED_COLUMNS
+        )
+        assert backend.get(".1.3.6.1.2.1.1.1.0") == b"Linux switch"
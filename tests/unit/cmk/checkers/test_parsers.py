@@ -607,6 +607,32 @@ class TestAgentParser:
         assert ahs.piggybacked_raw_data == {}
         assert store.load() == {}
 
+    def test_crlf_blank_lines_and_selection(  # type:ignore[no-untyped-def]
+        self, parser, store
+    ) -> None:
+        raw_data = AgentRawData(
+            b"\r\n".join(
+                (
+                    b"<<<section>>>",
+                    b" a 1 ",
+                    b"",
+                    b"  ",
+                    b"<<<other:nostrip>>>",
+                    b" b 2 ",
+                    b"<<<bad",
+                    b"<<<section>>>",
+                    b"c 3",
+                    b"",
+                )
+            )
+        )
+
+        ahs = parser.parse(raw_data, selection={SectionName("section")})
+        assert ahs.sections == {SectionName("section"): [["a", "1"], ["c", "3"]]}
+
+        ahs = parser.parse(raw_data, selection={SectionName("other")})
+        assert ahs.sections == {SectionName("other"): [["b", "2"], ["<<<bad"]]}
+
     def test_section_lines_are_correctly_ordered_with_different_separators_and_piggyback(
         self, parser, store, monkeypatch
     ):
@@ -3,10 +3,12 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from pathlib import Path
+
 import pytest
 
 import cmk.fetchers.snmp_backend._utils as utils
-from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
+from cmk.fetchers.snmp_backend._walk_index import oid_key, WalkIndex
 
 
 @pytest.mark.parametrize(
@@ -22,38 +24,59 @@ def test_strip_snmp_value(value, expected) -> None:  # type:ignore[no-untyped-de
     assert utils.strip_snmp_value(value) == expected
 
 
-@pytest.mark.usefixtures("create_files")
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("1.2.3", "1.2.4"),
+        ("1.2.3", "1.2.3.0"),
+        ("1.2.3", "1.10"),
+        ("1.2.255", "1.2.256"),
+        ("1.2.3.4", "2"),
+        ("0", "0.0"),
+    ],
+)
+def test_oid_key_order(a: str, b: str) -> None:
+    assert oid_key(a) < oid_key(b)
+
+
+def test_oid_key_prefix() -> None:
+    assert oid_key(".1.2.3") == oid_key("1.2.3")
+    assert oid_key("1.2.3.4").startswith(oid_key("1.2.3"))
+    assert not oid_key("1.2.34").startswith(oid_key("1.2.3"))
+    assert not oid_key("1.2.256").startswith(oid_key("1.2.1"))
+
+
 class TestStoredWalkSNMPBackend:
-    @pytest.mark.parametrize(
-        "a, b, result",
-        [
-            ("1.2.3", "1.2.3", 0),
-            ("1.2.3", ".1.2.3", 0),
-            (".1.2.3", "1.2.3", 0),
-            (".1.2.3", ".1.2.3", 0),
-            ("1.2.3", "1.2.3.4", 0),
-            ("1.2.3.4", "1.2.3", 1),
-            ("1.2.3", "4.5.6", -1),
-        ],
-    )
-    def test_compare_oids(self, a, b, result) -> None:  # type:ignore[no-untyped-def]
-        assert StoredWalkSNMPBackend._compare_oids(a, b) == result
-
-    def test_read_walk_data(self, tmpdir) -> None:  # type:ignore[no-untyped-def]
-        assert StoredWalkSNMPBackend.read_walk_from_path(tmpdir / "walkdata" / "1.txt") == [
-            ".1.2.3 foo\n",
-            ".1.2.4 bar\nfoobar\n",
-        ]
-        assert StoredWalkSNMPBackend.read_walk_from_path(tmpdir / "walkdata" / "2.txt") == [
+    def test_read_walk_data(self, tmp_path: Path) -> None:
+        walk_path = tmp_path / "walk"
+        walk_path.write_text(".1.2.4 bar\nfoobar\n.1.2.3 foo\n\n\n.1.2.10.1 test\n.1.3 x\n")
+        index_path = tmp_path / ".walk.index"
+
+        walk = WalkIndex.open(walk_path, index_path)
+        assert index_path.exists()
+        assert list(walk.lookup("1.2")) == [
             ".1.2.3 foo\n\n\n",
-            ".1.2.5 test\n",
+            ".1.2.4 bar\nfoobar\n",
+            ".1.2.10.1 test\n",
         ]
+        assert list(walk.lookup(".1.2.10")) == [".1.2.10.1 test\n"]
+        assert list(walk.lookup("1.2.1")) == []
+
+        # Now loaded from the index file
+        index_mtime = index_path.stat().st_mtime_ns
+        assert list(WalkIndex.open(walk_path, index_path).lookup("1.3")) == [".1.3 x\n"]
+        assert index_path.stat().st_mtime_ns == index_mtime
+
+        # Outdated, the index is computed again
+        walk_path.write_text(".1.3 y\n")
+        assert list(WalkIndex.open(walk_path, index_path).lookup("1.3")) == [".1.3 y\n"]
 
+    def test_read_empty_walk(self, tmp_path: Path) -> None:
+        walk_path = tmp_path / "walk"
+        walk_path.touch()
+        assert list(WalkIndex.open(walk_path, tmp_path / ".walk.index").lookup("1")) == []
 
-@pytest.fixture
-def create_files(tmpdir):
-    tmpdir.mkdir("walkdata")
-    p1 = (tmpdir / "walkdata").join("1.txt")
-    p1.write(".1.2.3 foo\n.1.2.4 bar\nfoobar\n")
-    p2 = (tmpdir / "walkdata").join("2.txt")
-    p2.write(".1.2.3 foo\n\n\n.1.2.5 test\n")
+    def test_walk(self) -> None:
+        walk = WalkIndex.from_lines([".1.2.3 foo", ".1.2.4 bar\nfoobar", ".1.2.5"])
+        assert list(walk.lookup("1.2.3")) == [".1.2.3 foo\n"]
+        assert len(walk) == 3
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Secondary indexes of the open events"""
+
+import logging
+import re
+import time
+from typing import cast
+
+from tests.testlib import CMKEventConsole
+
+from cmk.utils.site import omd_site
+
+from cmk.ec.config import Config, Rule
+from cmk.ec.history import History
+from cmk.ec.main import (
+    Event,
+    EventServer,
+    EventStatus,
+    MatchGroups,
+    MatchSuccess,
+    Perfcounters,
+    RuleMatcher,
+    StatusTableEvents,
+)
+from cmk.ec.settings import Settings
+
+
+def _new_event(event_status: EventStatus, **attrs: str) -> Event:
+    event = CMKEventConsole.new_event(cast(Event, {"core_host": None, **attrs}))
+    event_status.new_event(event)
+    return event
+
+
+def test_event_indexes(event_status: EventStatus) -> None:
+    _new_event(event_status, host="Host1", rule_id="r1")
+    _new_event(event_status, host="host2", rule_id="r2")
+    _new_event(event_status, host="HOST1", rule_id="r1")
+
+    assert event_status.event(2) is not None
+    assert [e["id"] for e in event_status.events_of_rule("r1")] == [1, 3]
+    assert [e["id"] for e in event_status.events_of_hosts({"host1", "Host2"})] == [1, 2, 3]
+
+    event_to_remove = event_status.event(1)
+    assert event_to_remove is not None
+    event_status.remove_event(event_to_remove, "DELETE")
+    assert event_status.event(1) is None
+    assert [e["id"] for e in event_status.events_of_rule("r1")] == [3]
+    assert [e["id"] for e in event_status.events_of_hosts({"host1"})] == [3]
+
+    event_status.unpack_status(event_status.pack_status())
+    assert [e["id"] for e in event_status.events_of_rule("r1")] == [3]
+
+
+def test_count_event_reindexes_counted_event(
+    event_status: EventStatus, event_server: EventServer
+) -> None:
+    event_server.compile_rules([])
+    count = {
+        "count": 3,
+        "count_ack": False,
+        "separate_host": False,
+        "separate_application": False,
+        "separate_match_groups": False,
+    }
+    for host in ["host1", "host2"]:
+        event = CMKEventConsole.new_event(
+            {"host": host, "core_host": None, "host_in_downtime": False}
+        )
+        assert event_status.count_event(event_server, event, {"id": "815"}, count) is None
+
+    assert [(e["id"], e["host"], e["count"]) for e in event_status.events()] == [(1, "host2", 2)]
+    assert not event_status.events_of_hosts({"host1"})
+    assert [e["id"] for e in event_status.events_of_hosts({"host2"})] == [1]
+
+
+def test_absent_event_merge_reindexes_rewritten_event(
+    event_status: EventStatus, event_server: EventServer
+) -> None:
+    _new_event(event_status, host="old-host", application="app", rule_id="815")
+    rule = cast(
+        Rule,
+        {
+            "id": "815",
+            "expect": {"merge": "open"},
+            "state": 2,
+            "sl": {"value": 0, "precedence": "message"},
+            "set_host": "new-host",
+        },
+    )
+    event_server._handle_absent_event(rule, 0, 1, time.time())
+
+    assert [(e["id"], e["count"]) for e in event_status.events()] == [(1, 2)]
+    assert not event_status.events_of_hosts({"old-host"})
+    assert [e["id"] for e in event_status.events_of_hosts({"new-host"})] == [1]
+
+
+def test_cancel_events_of_same_origin(event_status: EventStatus, event_server: EventServer) -> None:
+    _new_event(event_status, host="host1", application="app1")
+    _new_event(event_status, host="host1", application="app2")
+    _new_event(event_status, host="host2", application="app1")
+    _new_event(event_status, host="host1", application="app1", rule_id="other")
+
+    match_groups: MatchGroups = {
+        "match_groups_message_ok": (),
+        "match_groups_syslog_application_ok": (),
+    }
+    event_status.cancel_events(
+        event_server,
+        StatusTableEvents.columns,
+        CMKEventConsole.new_event({"host": "host1", "application": "app1"}),
+        match_groups,
+        cast(Rule, {"id": "815"}),
+    )
+
+    assert [e["id"] for e in event_status.events()] == [2, 3, 4]
+
+
+def test_cancel_events_with_match_groups_of_rule_matching(
+    event_status: EventStatus, event_server: EventServer
+) -> None:
+    _new_event(event_status, host="host1", application="app1")
+    _new_event(event_status, host="host1", application="app2")
+    # Only a message for cancelling, no application
+    rule = cast(
+        Rule,
+        {"id": "815", "pack": "default", "match": re.compile("down"), "match_ok": re.compile("up")},
+    )
+    cancelling_event = CMKEventConsole.new_event(
+        {"host": "host1", "application": "app1", "text": "link up"}
+    )
+    result = RuleMatcher(logging.getLogger("cmk.mkeventd"), False, omd_site()).event_rule_matches(
+        rule, cancelling_event
+    )
+    assert isinstance(result, MatchSuccess) and result.cancelling
+
+    event_status.cancel_events(
+        event_server, StatusTableEvents.columns, cancelling_event, result.match_groups, rule
+    )
+
+    assert [e["id"] for e in event_status.events()] == [2]
+
+
+def _reloaded(
+    settings: Settings, config: Config, history: History, event_server: EventServer
+) -> EventStatus:
+    reloaded = EventStatus(
+        settings,
+        config,
+        Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters")),
+        history,
+        logging.getLogger("cmk.mkeventd.EventStatus"),
+    )
+    reloaded.load_status(event_server)
+    return reloaded
+
+
+def test_status_journal(
+    settings: Settings,
+    config: Config,
+    history: History,
+    event_status: EventStatus,
+    event_server: EventServer,
+) -> None:
+    paths = settings.paths
+    paths.status_file.value.parent.mkdir(parents=True, exist_ok=True)
+    for host in ["host1", "host2", "host3"]:
+        _new_event(event_status, host=host)
+    event_status.save_status()
+    assert not paths.status_journal_file.value.exists()
+    snapshot = paths.status_file.value.read_bytes()
+
+    changed_event = event_status.event(1)
+    assert changed_event is not None
+    changed_event["comment"] = "changed"
+    event_status.event_changed(changed_event)
+    removed_event = event_status.event(2)
+    assert removed_event is not None
+    event_status.remove_event(removed_event, "DELETE")
+    _new_event(event_status, host="host4")
+    event_status.save_status()
+    assert paths.status_file.value.read_bytes() == snapshot
+
+    with paths.status_journal_file.value.open("ab") as f:
+        f.write(b"{'journal_generation': 1, 'next_eve")  # incomplete entry
+
+    reloaded = _reloaded(settings, config, history, event_server)
+    assert reloaded.pack_status() == event_status.pack_status()
+    assert [(e["id"], e["comment"]) for e in reloaded.events()] == [
+        (1, "changed"),
+        (3, ""),
+        (4, ""),
+    ]
+
+    event_status.save_status(compact=True)
+    assert not paths.status_journal_file.value.exists()
+    assert (
+        _reloaded(settings, config, history, event_server).pack_status()
+        == event_status.pack_status()
+    )
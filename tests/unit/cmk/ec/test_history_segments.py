@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Literal
+
+import pytest
+
+from tests.testlib import CMKEventConsole
+
+from tests.unit.cmk.ec.helpers import FakeStatusSocket
+
+from cmk.ec.config import Config
+from cmk.ec.history import History
+from cmk.ec.history_segments import SegmentedHistoryStore
+from cmk.ec.main import StatusServer
+from cmk.ec.query import QueryGET
+
+logger = logging.getLogger("cmk.mkeventd")
+
+# time, what, host, rule_id
+_HOST = 2
+_RULE_ID = 3
+
+
+def _store(path: Path) -> SegmentedHistoryStore:
+    return SegmentedHistoryStore(
+        path, logger, host_column=_HOST, rule_id_column=_RULE_ID, max_records=3, max_span=100
+    )
+
+
+def _accept_all(_row: Sequence[Any]) -> bool:
+    return True
+
+
+def _in_range(row: Sequence[Any]) -> bool:
+    return bool(1002.0 <= row[1] <= 1004.0)
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path: Path) -> SegmentedHistoryStore:
+    store = _store(tmp_path)
+    for nr in range(10):
+        store.append([1000.0 + nr, "NEW", f"host{nr % 2}", f"rule{nr % 3}"])
+    return store
+
+
+def test_segments_are_sealed(tmp_path: Path, store: SegmentedHistoryStore) -> None:
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "000000000001.idx",
+        "000000000001.seg",
+        "000000000004.idx",
+        "000000000004.seg",
+        "000000000007.idx",
+        "000000000007.seg",
+        "000000000010.seg",
+    ]
+
+
+def test_query_all_youngest_first(store: SegmentedHistoryStore) -> None:
+    entries = store.query((None, None), None, None, _accept_all, None)
+    assert [e[0] for e in entries] == list(range(10, 0, -1))
+    assert entries[0] == [10, 1009.0, "NEW", "host1", "rule0"]
+
+
+def test_query_limit(store: SegmentedHistoryStore) -> None:
+    assert [e[0] for e in store.query((None, None), None, None, _accept_all, 4)] == [10, 9, 8, 7]
+
+
+def test_query_time_range(store: SegmentedHistoryStore) -> None:
+    entries = store.query((1002.0, 1004.0), None, None, _in_range, None)
+    assert [e[1] for e in entries] == [1004.0, 1003.0, 1002.0]
+
+
+def test_query_indexes(store: SegmentedHistoryStore) -> None:
+    entries = store.query((None, None), {"HOST1"}, {"rule0"}, _accept_all, None)
+    assert [(e[3], e[4]) for e in entries] == [("host1", "rule0"), ("host1", "rule0")]
+    assert [e[0] for e in entries] == [10, 4]
+    assert not store.query((None, None), {"unknown"}, None, _accept_all, None)
+
+
+def test_reload_keeps_entries(tmp_path: Path, store: SegmentedHistoryStore) -> None:
+    reloaded = _store(tmp_path)
+    assert reloaded.query((None, None), None, None, _accept_all, None) == store.query(
+        (None, None), None, None, _accept_all, None
+    )
+    reloaded.append([1010.0, "NEW", "host0", "rule1"])
+    assert reloaded.query((None, None), None, None, _accept_all, 1)[0][0] == 11
+
+
+def test_reload_truncates_partial_record(tmp_path: Path, store: SegmentedHistoryStore) -> None:
+    active = tmp_path / "000000000010.seg"
+    size = active.stat().st_size
+    with active.open("ab") as f:
+        f.write(b"\x20\x00\x00\x00garbage")
+    reloaded = _store(tmp_path)
+    assert active.stat().st_size == size
+    assert len(reloaded.query((None, None), None, None, _accept_all, None)) == 10
+
+
+def test_expire(tmp_path: Path, store: SegmentedHistoryStore) -> None:
+    store.expire(1005.0)
+    assert [e[0] for e in store.query((None, None), None, None, _accept_all, None)] == [
+        10,
+        9,
+        8,
+        7,
+        6,
+        5,
+        4,
+    ]
+    store.expire(None)
+    assert not store.query((None, None), None, None, _accept_all, None)
+    assert not list(tmp_path.iterdir())
+
+
+def test_history_query_via_status_server(
+    config: Config, history: History, status_server: StatusServer
+) -> None:
+    config["archive_mode"] = "segments"
+    history.reload_configuration(config)
+    for num in range(5):
+        history.add(CMKEventConsole.new_event({"host": f"heute-{num}", "text": "bla"}), "NEW")
+
+    s = FakeStatusSocket(
+        b"GET history\nColumns: history_line event_host\nFilter: event_host = heute-3\n"
+    )
+    status_server.handle_client(s, True, "127.0.0.1")
+    assert s.get_response() == [["history_line", "event_host"], [4, "heute-3"]]
+
+    history.flush()
+    s = FakeStatusSocket(b"GET history\nColumns: history_line\n")
+    status_server.handle_client(s, True, "127.0.0.1")
+    assert s.get_response() == [["history_line"]]
+
+
+@pytest.mark.parametrize("archive_mode", ["file", "segments"])
+def test_history_get_limit(
+    config: Config,
+    history: History,
+    status_server: StatusServer,
+    archive_mode: Literal["file", "segments"],
+) -> None:
+    config["archive_mode"] = archive_mode
+    history.reload_configuration(config)
+    for num in range(5):
+        history.add(CMKEventConsole.new_event({"host": f"heute-{num}", "text": "bla"}), "NEW")
+
+    query = QueryGET(status_server, ["GET history", "Columns: history_line", "Limit: 2"], logger)
+    # One row more than the limit shows that it is exceeded
+    assert [row[0] for row in history.get(query)] == [5, 4, 3]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import random
+import threading
+import time
+from functools import partial
+
+from cmk.ec.pipeline import Handler, IngestionPipeline
+
+logger = logging.getLogger("cmk.mkeventd")
+
+
+def test_pipeline_commits_in_order() -> None:
+    committed: list[int] = []
+
+    def parser(nr: int) -> list[Handler]:
+        time.sleep(random.uniform(0, 0.002))  # shuffle the parser threads a bit
+        return [partial(committed.append, nr * 10), partial(committed.append, nr * 10 + 1)]
+
+    pipeline = IngestionPipeline(logger, queue_len=10, num_parsers=4, commit=lambda h: h())
+    pipeline.start()
+    for nr in range(100):
+        assert pipeline.submit(partial(parser, nr), lossy=False)
+    pipeline.stop()
+
+    assert committed == [nr * 10 + i for nr in range(100) for i in range(2)]
+    assert pipeline.queue_length == 0
+
+
+def test_pipeline_drops_lossy_data_when_full() -> None:
+    blocked = threading.Event()
+    committed: list[int] = []
+
+    def blocking_parser() -> list[Handler]:
+        blocked.wait()
+        return [partial(committed.append, 0)]
+
+    pipeline = IngestionPipeline(logger, queue_len=2, num_parsers=1, commit=lambda h: h())
+    pipeline.start()
+    assert pipeline.submit(blocking_parser, lossy=True)
+    # Wait until the parser has taken the first item from the queue
+    while pipeline.queue_length:
+        time.sleep(0.001)
+    # The data being parsed counts as well
+    assert pipeline.submit(lambda: [partial(committed.append, 1)], lossy=True)
+    assert not pipeline.submit(lambda: [partial(committed.append, 2)], lossy=True)
+    blocked.set()
+    pipeline.stop()
+
+    assert committed == [0, 1]
+
+
+def test_pipeline_bounds_the_data_waiting_for_commit() -> None:
+    blocked = threading.Event()
+    committed: list[int] = []
+
+    def commit(handler: Handler) -> None:
+        blocked.wait()
+        handler()
+
+    pipeline = IngestionPipeline(logger, queue_len=3, num_parsers=2, commit=commit)
+    pipeline.start()
+    for nr in range(3):
+        assert pipeline.submit(partial(lambda nr: [partial(committed.append, nr)], nr), lossy=True)
+    # Wait until all the data has been parsed
+    while pipeline.queue_length < 2:
+        time.sleep(0.001)
+    assert not pipeline.submit(lambda: [partial(committed.append, 3)], lossy=True)
+    blocked.set()
+    pipeline.stop()
+
+    assert committed == [0, 1, 2]
+
+
+def test_pipeline_survives_failing_parser() -> None:
+    committed: list[int] = []
+
+    def failing_parser() -> list[Handler]:
+        raise ValueError("broken message")
+
+    pipeline = IngestionPipeline(logger, queue_len=0, num_parsers=2, commit=lambda h: h())
+    pipeline.start()
+    assert pipeline.submit(lambda: [partial(committed.append, 1)], lossy=False)
+    assert pipeline.submit(failing_parser, lossy=False)
+    assert pipeline.submit(lambda: [partial(committed.append, 3)], lossy=False)
+    pipeline.stop()
+
+    assert committed == [1, 3]
@@ -4,14 +4,19 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import logging
+from typing import cast
 
 import pytest
 
+from tests.testlib import CMKEventConsole
+
 from cmk.utils.site import omd_site
 
+from cmk.ec.config import ECRulePack
 from cmk.ec.main import (
     Event,
     EventServer,
+    EventStatus,
     MatchFailure,
     MatchGroups,
     MatchPriority,
@@ -375,3 +380,41 @@ def test_match_ipaddress(m: RuleMatcher, result: MatchResult, rule: Rule, event:
 )
 def test_match_facility(m: RuleMatcher, result: MatchResult, rule: Rule, event: Event) -> None:
     assert m.event_rule_matches_facility(rule, event) == result
+
+
+def _rule_pack(pack_id: str, rules: list[Rule]) -> ECRulePack:
+    return cast(ECRulePack, {"id": pack_id, "disabled": False, "rules": rules})
+
+
+def test_match_rules_skips_rule_pack(event_server: EventServer) -> None:
+    event_server.compile_rules(
+        [
+            _rule_pack(
+                "pack1",
+                [
+                    {"id": "skip", "drop": "skip_pack", "match": "skip"},
+                    {"id": "skipped", "drop": True},
+                ],
+            ),
+            _rule_pack("pack2", [{"id": "hit", "drop": True}]),
+        ]
+    )
+    matches = event_server.match_rules(
+        CMKEventConsole.new_event(cast(Event, {"text": "skip me", "core_host": None}))
+    )
+
+    assert [rule["id"] for rule, _result in matches.hits] == ["skip", "hit"]
+    assert matches.num_candidates == 3
+    assert matches.num_tries == 2
+
+
+def test_process_event_matches_again_after_compiling_the_rules(
+    event_server: EventServer, event_status: EventStatus
+) -> None:
+    event_server.compile_rules([_rule_pack("pack", [{"id": "old", "drop": True}])])
+    event = CMKEventConsole.new_event(cast(Event, {"text": "hello", "core_host": None}))
+    matches = event_server.match_rules(event)
+    event_server.compile_rules([_rule_pack("pack", [{"id": "new", "drop": True}])])
+    event_server.process_event(event, matches)
+
+    assert event_status.get_rule_stats() == [("new", 1)]
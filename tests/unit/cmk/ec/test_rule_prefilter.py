@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import re
+from typing import Any, cast
+
+import pytest
+
+from cmk.utils.site import omd_site
+
+from cmk.ec.config import Rule, TextPattern
+from cmk.ec.event import Event
+from cmk.ec.main import EventServer, MatchSuccess, RuleMatcher
+from cmk.ec.rule_prefilter import pattern_requirement, RulePrefilter
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        (None, None),
+        ("ab", None),
+        ("Link DOWN", {"link down"}),
+        (re.compile("link down", re.IGNORECASE), {"link down"}),
+        (re.compile("^(eth|bond)[0-9]+ is down$", re.IGNORECASE), {" is down"}),
+        (re.compile("(failed|denied) login attempt", re.IGNORECASE), {" login attempt"}),
+        (re.compile("(failed|denied)", re.IGNORECASE), {"failed", "denied"}),
+        (re.compile("(failed|no) login", re.IGNORECASE), {" login"}),
+        (re.compile("failed|.*", re.IGNORECASE), None),
+        (re.compile("(?:error)+", re.IGNORECASE), {"error"}),
+        (re.compile("(?:error)*", re.IGNORECASE), None),
+        (re.compile("[a-z]+", re.IGNORECASE), None),
+        (re.compile("(?-i:Error)", re.IGNORECASE), None),
+        (re.compile("Störung", re.IGNORECASE), None),
+    ],
+)
+def test_pattern_requirement(pattern: TextPattern, expected: set[str] | None) -> None:
+    assert pattern_requirement(pattern) == (None if expected is None else frozenset(expected))
+
+
+def _rule(rule_id: str, **kwargs: Any) -> Rule:
+    rule: dict[str, Any] = {"id": rule_id, "pack": "pack", **kwargs}
+    for key in ["match", "match_ok", "match_host", "match_application", "cancel_application"]:
+        if key in rule:
+            value = EventServer._compile_matching_value(key, rule[key])
+            if value is None:
+                del rule[key]
+            else:
+                rule[key] = value
+    return cast(Rule, rule)
+
+
+RULES = [
+    _rule("unspecific"),
+    _rule("link", match="link down"),
+    _rule("link_cancel", match="link down", match_ok="link up"),
+    _rule("iface", match="(eth|bond)[0-9]+ is down"),
+    _rule("any_regex", match="^[a-z]+$"),
+    _rule("host_only", match_host="Switch01"),
+    _rule("host_and_text", match_host="switch02", match="fan failure"),
+    _rule("app_only", match_application="sshd"),
+    _rule("cancel_app_only", cancel_application="cron"),
+    _rule("inverted", match="link down", invert_matching=True),
+    _rule("prefix", match="link"),
+]
+
+
+def _event(text: str, host: str = "", application: str = "") -> Event:
+    return Event(
+        text=text,
+        host=host,
+        application=application,
+        ipaddress="",
+        facility=1,
+        priority=3,
+    )
+
+
+@pytest.mark.parametrize(
+    "event, expected_ids",
+    [
+        (_event("nothing special"), {"unspecific", "any_regex", "inverted"}),
+        (
+            _event("Interface eth0: LINK DOWN"),
+            {"unspecific", "any_regex", "link", "link_cancel", "inverted", "prefix"},
+        ),
+        (
+            _event("link up again"),
+            {"unspecific", "any_regex", "link_cancel", "inverted", "prefix"},
+        ),
+        (_event("bond1 is down"), {"unspecific", "any_regex", "iface", "inverted"}),
+        (
+            _event("fan failure", host="SWITCH02"),
+            {"unspecific", "any_regex", "host_and_text", "inverted"},
+        ),
+        (_event("fan failure", host="switch03"), {"unspecific", "any_regex", "inverted"}),
+        (_event("bla", host="switch01"), {"unspecific", "any_regex", "host_only", "inverted"}),
+        (
+            _event("bla", application="sshd[123]"),
+            {"unspecific", "any_regex", "app_only", "inverted"},
+        ),
+        (
+            _event("bla", application="CRON"),
+            {"unspecific", "any_regex", "cancel_app_only", "inverted"},
+        ),
+        (_event("link down ü"), {rule["id"] for rule in RULES}),
+    ],
+)
+def test_rule_prefilter_candidates(event: Event, expected_ids: set[str]) -> None:
+    candidates = RulePrefilter(RULES).candidates(event)
+    assert {rule["id"] for rule in candidates} == expected_ids
+    assert candidates == [rule for rule in RULES if rule in candidates]
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        _event("Interface eth0: LINK DOWN"),
+        _event("link up again"),
+        _event("bond1 is down"),
+        _event("fan failure", host="SWITCH02"),
+        _event("bla", host="switch01"),
+        _event("bla", application="sshd[123]"),
+        _event("bla", application="cron"),
+        _event("abc"),
+    ],
+)
+def test_rule_prefilter_keeps_all_matches(event: Event) -> None:
+    matcher = RuleMatcher(logging.getLogger("cmk.mkeventd"), False, omd_site())
+    candidates = RulePrefilter(RULES).candidates(event)
+    for rule in RULES:
+        if isinstance(matcher.event_rule_matches(rule, event), MatchSuccess):
+            assert rule in candidates
@@ -3,9 +3,12 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from typing import Literal
+
 import pytest
 
 from cmk.utils.exceptions import MKGeneralException
+from cmk.utils.prediction import TimeSeriesValues
 
 import cmk.gui.plugins.metrics.timeseries as ts
 
@@ -43,3 +46,29 @@ def test_time_series_math_exc(args) -> None:  # type:ignore[no-untyped-def]
 def test_time_series_math_stable_singles(operator) -> None:  # type:ignore[no-untyped-def]
     test_ts = ts.TimeSeries([0, 180, 60, 6, 5, 10, None, -2, -3.14])
     assert ts.time_series_math(operator, [test_ts]) == test_ts
+
+
+@pytest.mark.parametrize(
+    "operator, operands, result",
+    [
+        pytest.param("+", [[1, None, None, 4], [2, 3, None, None]], [3, 3, None, 4], id="sum"),
+        pytest.param("*", [[1, None, None, 4], [2, 3, None, 5]], [2, None, None, 20], id="product"),
+        pytest.param("-", [[1, None, 5, 4], [2, 3, None, 1]], [-1, None, None, 3], id="difference"),
+        pytest.param(
+            "/", [[1, 2, None, 4], [2, 0, 1, None]], [0.5, None, None, None], id="fraction"
+        ),
+        pytest.param("MAX", [[1, None, None, 4], [2, 3, None, 1]], [2, 3, None, 4], id="maximum"),
+        pytest.param("MIN", [[1, None, None, 4], [2, 3, None, 1]], [1, 3, None, 1], id="minimum"),
+        pytest.param("AVERAGE", [[1, None, None], [2, 3, None], [None, 5, None]], [1.5, 4, None]),
+        pytest.param("MERGE", [[None, None, 1, None], [None, 2, 3, None]], [None, 2, 1, None]),
+        pytest.param("+", [[1, 2, 3], [1, 2]], [2, 4], id="shortest operand"),
+    ],
+)
+def test_time_series_math_missing_values(
+    operator: Literal["+", "*", "-", "/", "MAX", "MIN", "AVERAGE", "MERGE"],
+    operands: list[TimeSeriesValues],
+    result: TimeSeriesValues,
+) -> None:
+    assert ts.time_series_math(
+        operator, [ts.TimeSeries(values, (0, 240, 60)) for values in operands]
+    ) == ts.TimeSeries(result, (0, 240, 60))
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import datetime
+import re
+from collections.abc import Callable
+from pathlib import Path
+
+import freezegun
+import pytest
+
+from tests.testlib import on_time, set_timezone
+
+from livestatus import LivestatusRow, OnlySites, SiteId
+
+import cmk.utils.paths
+from cmk.utils.type_defs import UserId
+
+import cmk.gui.availability as availability
+
+COLUMNS = ["host_name", "service_description", "duration", "from", "until", "state"]
+# 2022-11-08 00:00:00 - 2022-11-11 00:00:00 CET
+DAY = 86400
+MIDNIGHT = 1667862000
+
+
+class _History:
+    """The history of one service: CRIT from the state change on, before that OK"""
+
+    def __init__(self, state_change: int) -> None:
+        self.state_change = state_change
+        self.queries: list[tuple[int, int]] = []
+        self.timelimits: list[int | None] = []
+        self.auth_user: UserId | None = None
+        self.sites = [SiteId("heute")]
+        self.on_fetch: Callable[[], object] = lambda: None
+
+    def fetch(
+        self, query: str, only_sites: OnlySites, limit: int | None, timelimit: int | None
+    ) -> tuple[list[LivestatusRow], bool]:
+        from_match = re.search(r"Filter: time >= (\d+)", query)
+        until_match = re.search(r"Filter: time < (\d+)", query)
+        assert from_match and until_match
+        from_time, until_time = int(from_match.group(1)), int(until_match.group(1))
+        self.queries.append((from_time, until_time))
+        self.timelimits.append(timelimit)
+        self.on_fetch()
+
+        rows = []
+        for start, end, state in [
+            (from_time, min(until_time, self.state_change), 0),
+            (max(from_time, self.state_change), until_time, 2),
+        ]:
+            if start < end:
+                rows.append(
+                    LivestatusRow(["heute", "heute", "CPU load", end - start, start, end, state])
+                )
+        return rows, True
+
+    def alive_sites(self) -> list[SiteId]:
+        return self.sites
+
+
+@pytest.fixture(name="history")
+def fixture_history(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> _History:
+    monkeypatch.setattr(cmk.utils.paths, "var_dir", str(tmp_path))
+    history = _History(state_change=MIDNIGHT + DAY + 3600)
+    monkeypatch.setattr(availability, "_fetch_statehist", history.fetch)
+    monkeypatch.setattr(availability.sites, "livestatus_auth_user", lambda: history.auth_user)
+    monkeypatch.setattr(availability.sites, "live", lambda: history)
+    return history
+
+
+def test_statehist_segments() -> None:
+    with on_time(MIDNIGHT + 3 * DAY + 1800, "CET"):
+        assert list(
+            availability._statehist_segments(
+                (MIDNIGHT - 600, MIDNIGHT + 3 * DAY + 60), MIDNIGHT + 3 * DAY + 1800
+            )
+        ) == [
+            (MIDNIGHT - 600, MIDNIGHT, False),
+            (MIDNIGHT, MIDNIGHT + DAY, True),
+            (MIDNIGHT + DAY, MIDNIGHT + 2 * DAY, True),
+            (MIDNIGHT + 2 * DAY, MIDNIGHT + 3 * DAY, False),  # not yet over for long enough
+            (MIDNIGHT + 3 * DAY, MIDNIGHT + 3 * DAY + 60, False),
+        ]
+
+
+def test_query_statehist_joins_the_days(history: _History) -> None:
+    time_range = (MIDNIGHT - 600, MIDNIGHT + 3 * DAY - 600)
+    with on_time(MIDNIGHT + 4 * DAY, "CET"):
+        rows = availability.query_statehist(COLUMNS, "", time_range, None, None)
+
+    state_change = MIDNIGHT + DAY + 3600
+    assert rows == [
+        [
+            "heute",
+            "heute",
+            "CPU load",
+            state_change - time_range[0],
+            time_range[0],
+            state_change,
+            0,
+        ],
+        [
+            "heute",
+            "heute",
+            "CPU load",
+            time_range[1] - state_change,
+            state_change,
+            time_range[1],
+            2,
+        ],
+    ]
+    assert len(history.queries) == 4
+
+
+def test_query_statehist_uses_the_cache(history: _History) -> None:
+    time_range = (MIDNIGHT - 600, MIDNIGHT + 3 * DAY - 600)
+    with on_time(MIDNIGHT + 4 * DAY, "CET"):
+        rows = availability.query_statehist(COLUMNS, "", time_range, None, None)
+        history.queries.clear()
+        assert availability.query_statehist(COLUMNS, "", time_range, None, None) == rows
+
+    # Only the partial days at the borders are queried again
+    assert history.queries == [
+        (MIDNIGHT - 600, MIDNIGHT),
+        (MIDNIGHT + 2 * DAY, MIDNIGHT + 3 * DAY - 600),
+    ]
+
+
+def test_query_statehist_cached_per_auth_user(history: _History) -> None:
+    time_range = (MIDNIGHT, MIDNIGHT + 3 * DAY)
+    with on_time(MIDNIGHT + 4 * DAY, "CET"):
+        availability.query_statehist(COLUMNS, "", time_range, None, None)
+        history.auth_user = UserId("guest")
+        history.queries.clear()
+        availability.query_statehist(COLUMNS, "", time_range, None, None)
+        assert len(history.queries) == 3  # Nothing of the admin's result is used
+
+        history.queries.clear()
+        availability.query_statehist(COLUMNS, "", time_range, None, None)
+        assert not history.queries
+
+
+def test_query_statehist_cached_per_queried_sites(history: _History) -> None:
+    time_range = (MIDNIGHT, MIDNIGHT + 3 * DAY)
+    with on_time(MIDNIGHT + 4 * DAY, "CET"):
+        availability.query_statehist(COLUMNS, "", time_range, None, None)
+        # A site which was disabled before has been enabled
+        history.sites = [SiteId("heute"), SiteId("morgen")]
+        history.queries.clear()
+        availability.query_statehist(COLUMNS, "", time_range, None, None)
+        assert len(history.queries) == 3
+
+        history.queries.clear()
+        availability.query_statehist(COLUMNS, "", time_range, [SiteId("heute")], None)
+        assert not history.queries
+
+
+def test_query_statehist_timelimit_shared(history: _History) -> None:
+    time_range = (MIDNIGHT, MIDNIGHT + 3 * DAY)
+    with set_timezone("CET"), freezegun.freeze_time(
+        datetime.datetime.utcfromtimestamp(MIDNIGHT + 4 * DAY)
+    ) as frozen_time:
+        history.on_fetch = lambda: frozen_time.tick(12)
+        availability.query_statehist(COLUMNS, "", time_range, None, None, 30)
+
+    assert history.timelimits == [30, 18, 6]
+    history.timelimits.clear()
+
+    with set_timezone("CET"), freezegun.freeze_time(
+        datetime.datetime.utcfromtimestamp(MIDNIGHT + 4 * DAY)
+    ) as frozen_time:
+        history.on_fetch = lambda: frozen_time.tick(20)
+        availability.query_statehist(COLUMNS, "", (MIDNIGHT - 3 * DAY, MIDNIGHT), None, None, 30)
+
+    # The time is up before the last day
+    assert history.timelimits == [30, 10]
+
+
+def test_query_statehist_not_cached_with_current_state_filter(history: _History) -> None:
+    time_range = (MIDNIGHT, MIDNIGHT + 2 * DAY)
+    with on_time(MIDNIGHT + 4 * DAY, "CET"):
+        availability.query_statehist(
+            COLUMNS, "Filter: current_host_state = 0\n", time_range, None, None
+        )
+        availability.query_statehist(
+            COLUMNS, "Filter: current_host_state = 0\n", time_range, None, None
+        )
+
+    assert len(history.queries) == 4
+
+
+def test_query_statehist_limit(history: _History) -> None:
+    time_range = (MIDNIGHT, MIDNIGHT + 3 * DAY)
+    with on_time(MIDNIGHT + 4 * DAY, "CET"):
+        assert len(availability.query_statehist(COLUMNS, "", time_range, None, 1)) == 2
+        history.queries.clear()
+        assert len(availability.query_statehist(COLUMNS, "", time_range, None, None)) == 2
+
+    # The day which has been cut off has not been cached
+    assert history.queries == [
+        (MIDNIGHT + DAY, MIDNIGHT + 2 * DAY),
+        (MIDNIGHT + 2 * DAY, MIDNIGHT + 3 * DAY),
+    ]
+
+
+def test_query_statehist_limit_applies_to_cached_days(history: _History) -> None:
+    time_range = (MIDNIGHT, MIDNIGHT + 3 * DAY)
+    with on_time(MIDNIGHT + 4 * DAY, "CET"):
+        assert len(availability.query_statehist(COLUMNS, "", time_range, None, None)) == 2
+        history.queries.clear()
+        assert len(availability.query_statehist(COLUMNS, "", time_range, None, 0)) == 1
+
+    assert not history.queries
+
+
+def test_summarize_spans() -> None:
+    spans = [
+        {"from": 0, "until": 10, "duration": 10, "state": 0, "service_display_name": "CPU"},
+        {"from": 10, "until": 15, "duration": 5, "state": 2, "service_display_name": "CPU"},
+        {"from": 15, "until": 35, "duration": 20, "state": 0, "service_display_name": "CPU"},
+    ]
+    assert availability.summarize_spans(spans) == [
+        {"from": 10, "until": 15, "duration": 5, "state": 2, "service_display_name": "CPU"},
+        {"from": 0, "until": 35, "duration": 30, "state": 0, "service_display_name": "CPU"},
+    ]
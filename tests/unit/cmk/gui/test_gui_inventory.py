@@ -146,7 +146,7 @@ def test__load_status_data_tree(
     monkeypatch.setattr(
         cmk.gui.inventory,
         "_load_structured_data_tree",
-        lambda t, hostname: StructuredDataNode.deserialize({"loaded": "tree"}),
+        lambda t, hostname, paths: StructuredDataNode.deserialize({"loaded": "tree"}),
     )
     status_data_tree = cmk.gui.inventory._load_status_data_tree(hostname, row)
     assert status_data_tree is not None
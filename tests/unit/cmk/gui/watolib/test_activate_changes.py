@@ -5,6 +5,7 @@
 
 import io
 import logging
+import os
 import tarfile
 from pathlib import Path
 
@@ -344,6 +345,105 @@ def test_get_config_sync_file_infos() -> None:
     }
 
 
+def _create_config_sync_hash_cache_test_files(base_dir: Path, num_files: int) -> None:
+    base_dir.joinpath("etc/check_mk").mkdir(parents=True, exist_ok=True)
+    for nr in range(num_files):
+        file_path = base_dir.joinpath("etc/check_mk/file%d.mk" % nr)
+        file_path.write_text("content %d" % nr, encoding="utf-8")
+        os.utime(file_path, (1667862000, 1667862000))
+
+
+def test_config_sync_hash_cache_shared_by_hard_links(tmp_path: Path) -> None:
+    central_dir = tmp_path / "central"
+    _create_config_sync_hash_cache_test_files(central_dir, 40)
+    replication_paths = [ReplicationPath("dir", "check_mk", "etc/check_mk", [])]
+    cache_path = tmp_path / "config_sync_hashes"
+
+    hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+    central_infos = activate_changes._get_config_sync_file_infos(
+        replication_paths, central_dir, hash_cache
+    )
+    hash_cache.save(cache_path)
+    assert (hash_cache.hits, hash_cache.misses) == (0, 40)
+    assert central_infos == activate_changes._get_config_sync_file_infos(
+        replication_paths, central_dir
+    )
+
+    # The site config directories are hard links to the files of the central site
+    site_dir = tmp_path / "site"
+    site_dir.joinpath("etc/check_mk").mkdir(parents=True)
+    for file_path in central_dir.joinpath("etc/check_mk").iterdir():
+        os.link(file_path, site_dir / file_path.relative_to(central_dir))
+    changed_path = central_dir.joinpath("etc/check_mk/file0.mk")
+    changed_path.write_text("changed", encoding="utf-8")
+    os.utime(changed_path, (1667865600, 1667865600))
+
+    hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+    site_infos = activate_changes._get_config_sync_file_infos(
+        replication_paths, site_dir, hash_cache
+    )
+    assert (hash_cache.hits, hash_cache.misses) == (39, 1)
+    assert site_infos == activate_changes._get_config_sync_file_infos(replication_paths, site_dir)
+    assert site_infos["etc/check_mk/file0.mk"] != central_infos["etc/check_mk/file0.mk"]
+
+
+def test_config_sync_hash_cache_skips_recently_modified_files(tmp_path: Path) -> None:
+    _create_config_sync_hash_cache_test_files(tmp_path, 2)
+    tmp_path.joinpath("etc/check_mk/file1.mk").touch()
+    replication_paths = [ReplicationPath("dir", "check_mk", "etc/check_mk", [])]
+    cache_path = tmp_path / "config_sync_hashes"
+
+    hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+    activate_changes._get_config_sync_file_infos(replication_paths, tmp_path, hash_cache)
+    hash_cache.save(cache_path)
+
+    hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+    activate_changes._get_config_sync_file_infos(replication_paths, tmp_path, hash_cache)
+    assert (hash_cache.hits, hash_cache.misses) == (1, 1)
+
+
+def test_config_sync_hash_cache_merges_parallel_saves(tmp_path: Path) -> None:
+    site_dirs = [tmp_path / "site1", tmp_path / "site2"]
+    for site_dir in site_dirs:
+        _create_config_sync_hash_cache_test_files(site_dir, 2)
+    replication_paths = [ReplicationPath("dir", "check_mk", "etc/check_mk", [])]
+    cache_path = tmp_path / "config_sync_hashes"
+
+    # The sites are synchronized in parallel
+    hash_caches = [activate_changes.ConfigSyncHashCache.load(cache_path) for _dir in site_dirs]
+    for site_dir, hash_cache in zip(site_dirs, hash_caches):
+        activate_changes._get_config_sync_file_infos(replication_paths, site_dir, hash_cache)
+    for hash_cache in hash_caches:
+        hash_cache.save(cache_path)
+
+    for site_dir in site_dirs:
+        hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+        activate_changes._get_config_sync_file_infos(replication_paths, site_dir, hash_cache)
+        assert (hash_cache.hits, hash_cache.misses) == (2, 0)
+
+
+def test_config_sync_hash_cache_drops_unused_entries(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    site_dirs = [tmp_path / "site1", tmp_path / "site2"]
+    for site_dir in site_dirs:
+        _create_config_sync_hash_cache_test_files(site_dir, 2)
+    replication_paths = [ReplicationPath("dir", "check_mk", "etc/check_mk", [])]
+    cache_path = tmp_path / "config_sync_hashes"
+
+    for day, synced_dirs in [(100, site_dirs), (105, site_dirs[:1]), (108, site_dirs[:1])]:
+        monkeypatch.setattr(activate_changes, "_today", lambda day=day: day)
+        hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+        for site_dir in synced_dirs:
+            activate_changes._get_config_sync_file_infos(replication_paths, site_dir, hash_cache)
+        hash_cache.save(cache_path)
+
+    hash_cache = activate_changes.ConfigSyncHashCache.load(cache_path)
+    for site_dir in site_dirs:
+        activate_changes._get_config_sync_file_infos(replication_paths, site_dir, hash_cache)
+    assert (hash_cache.hits, hash_cache.misses) == (2, 2)
+
+
 def _create_get_config_sync_file_infos_test_config(base_dir):
     base_dir.joinpath("etc/d1").mkdir(parents=True, exist_ok=True)
 
@@ -20,6 +20,7 @@ from tests.unit.cmk.gui.test_i18n import (  # pylint: disable=unused-import
 from livestatus import SiteId
 
 from cmk.utils.object_diff import make_diff_text
+from cmk.utils.store import have_lock
 from cmk.utils.type_defs import UserId
 
 import cmk.gui.i18n as i18n
@@ -131,6 +132,74 @@ class TestAuditLogStore:
 
                 assert archive_path.exists()
 
+    def test_count_and_read_reversed(self, store: AuditLogStore) -> None:
+        entries = [
+            AuditLogStore.Entry(1000 + nr, None, "user", "action", "Mässädsch %d" % nr, None)
+            for nr in range(5)
+        ]
+        for entry in entries:
+            store.append(entry)
+
+        assert store.count() == 5
+        assert list(store.read_reversed()) == entries[::-1]
+        assert list(store.read_reversed(until=1002)) == entries[1::-1]
+
+    def test_read_time_range(self, store: AuditLogStore) -> None:
+        entries = [
+            AuditLogStore.Entry(1000 + nr, None, "user", "action", "Mässädsch %d" % nr, None)
+            for nr in range(5)
+        ]
+        for entry in entries:
+            store.append(entry)
+
+        assert store.read_time_range(1001, 1003) == entries[1:3]
+        assert store.read_time_range(1003) == entries[3:]
+        assert store.read_time_range(end=1001) == entries[:1]
+        assert list(store.read_from(1003)) == entries[3:]
+        assert store.get_entries_since(1003) == entries[4:]
+
+    def test_index_catches_up_with_unindexed_entries(self, store: AuditLogStore) -> None:
+        entries = [
+            AuditLogStore.Entry(1000 + nr, None, "user", "action", "Mässädsch %d" % nr, None)
+            for nr in range(3)
+        ]
+        store.append(entries[0])
+        # Appended without updating the index, e.g. by a previous version, and an entry which
+        # is being written right now
+        with store._path.open("ab") as f:
+            f.write(repr(store._serialize(entries[1])).encode("utf-8") + b"\0{'time': 10")
+
+        assert store.count() == 2
+        assert list(store.read_reversed()) == entries[1::-1]
+
+        with store._path.open("rb+") as f:
+            f.truncate(f.seek(-len(b"{'time': 10"), 2))
+        store.append(entries[2])
+        assert store._index_path.stat().st_size == 3 * 28
+        assert store.read_time_range(1001) == entries[1:]
+
+    def test_count_saves_the_index(self, store: AuditLogStore) -> None:
+        for nr in range(3):
+            store.append(
+                AuditLogStore.Entry(1000 + nr, None, "user", "action", "Mässädsch %d" % nr, None)
+            )
+        store._clear_index()
+
+        assert store.count() == 3
+        assert store._index_path.stat().st_size == 3 * 28
+        assert not have_lock(store._path)
+
+    def test_index_of_replaced_file(self, store: AuditLogStore) -> None:
+        entry = AuditLogStore.Entry(1000, None, "user", "action", "Mässädsch", None)
+        store.append(entry)
+        store.append(entry)
+
+        other_entry = entry._replace(time=2000, text="Änderung")
+        store._path.write_bytes(repr(store._serialize(other_entry)).encode("utf-8") + b"\0")
+
+        assert store.count() == 1
+        assert list(store.read_reversed()) == [other_entry]
+
 
 class TestSiteChanges:
     @pytest.fixture(name="store")
@@ -168,6 +237,8 @@ class TestSiteChanges:
 
         store.write([entry2])
         assert list(store.read()) == [entry2]
+        assert store.count() == 1
+        assert list(store.read_reversed()) == [entry2]
 
     def test_append(self, store: SiteChanges, entry: ChangeSpec) -> None:
         store.append(entry)
@@ -132,7 +132,9 @@ def test_registered_configvars() -> None:
         "notification_fallback_email",
         "notification_fallback_format",
         "notification_logging",
+        "notification_plugin_limits",
         "notification_plugin_timeout",
+        "notification_plugin_workers",
         "page_heading",
         "pagetitle_date_format",
         "password_policy",
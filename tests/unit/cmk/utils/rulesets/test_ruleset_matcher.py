@@ -3,6 +3,7 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import re
 from collections.abc import Sequence
 from pathlib import Path
 
@@ -12,11 +13,23 @@ from _pytest.monkeypatch import MonkeyPatch
 from tests.testlib.base import Scenario
 
 import cmk.utils.paths
-from cmk.utils.rulesets.ruleset_matcher import matches_tag_condition, RulesetMatchObject
+from cmk.utils.labels import Labels
+from cmk.utils.rulesets.ruleset_matcher import (
+    _HostIndex,
+    _literal_prefix,
+    _ServiceDescriptionMatcher,
+    LabelManager,
+    matches_labels,
+    matches_tag_condition,
+    parse_negated_condition_list,
+    RulesetMatcher,
+    RulesetMatchObject,
+)
 from cmk.utils.tags import TagConfig
 from cmk.utils.type_defs import (
     CheckPluginName,
     HostName,
+    HostOrServiceConditions,
     RuleConditionsSpec,
     Ruleset,
     RuleSpec,
@@ -822,7 +835,7 @@ def test_ruleset_matcher_get_service_ruleset_values_labels(
 def test_ruleset_optimizer_clear_ruleset_caches(monkeypatch: MonkeyPatch) -> None:
     config_cache = Scenario().apply(monkeypatch)
     ruleset_optimizer = config_cache.ruleset_matcher.ruleset_optimizer
-    ruleset_optimizer.get_service_ruleset(ruleset, False)
+    ruleset_optimizer.get_service_ruleset(ruleset, False, False)
     ruleset_optimizer.get_host_ruleset(ruleset, False, False)
     assert ruleset_optimizer._host_ruleset_cache
     assert ruleset_optimizer._service_ruleset_cache
@@ -926,3 +939,125 @@ def test_matches_tag_condition(
         )
         is expected_result
     )
+
+
+def test_host_index() -> None:
+    host_index = _HostIndex()
+    for hostname in ["a", "b", "c", "b"]:
+        host_index.add(HostName(hostname))
+    assert host_index.all_bits == 0b111
+    assert host_index.bits([HostName("c"), HostName("a"), HostName("unknown")]) == 0b101
+    assert host_index.hosts(0b110) == {"b", "c"}
+    assert host_index.hosts(0) == set()
+
+
+def test_all_matching_hosts_bitsets() -> None:
+    hostnames = {HostName(f"host{nr}") for nr in range(30)}
+    host_tags = {
+        hostname: {"criticality": ["prod", "test", "offline"][nr % 3], "site": f"s{nr % 2}"}
+        for nr, hostname in enumerate(sorted(hostnames))
+    }
+    host_paths = {hostname: f"/wato/f{int(hostname[4:]) % 4}/" for hostname in hostnames}
+    explicit_labels: dict[str, Labels] = {
+        hostname: {"os": ["linux", "windows"][len(hostname) % 2]} for hostname in hostnames
+    }
+    matcher = RulesetMatcher(
+        tag_to_group_map={},
+        host_tags=host_tags,  # type: ignore[arg-type]
+        host_paths=host_paths,
+        labels=LabelManager(explicit_labels, [], [], lambda *_args: {}),
+        all_configured_hosts=hostnames,
+        clusters_of={},
+        nodes_of={},
+    )
+    optimizer = matcher.ruleset_optimizer
+    optimizer.set_all_processed_hosts(sorted(hostnames)[:20])
+
+    conditions: list[RuleConditionsSpec] = [
+        {},
+        {"host_name": []},
+        {"host_name": ["host1", "host25", "unknown"]},
+        {"host_name": {"$nor": [{"$regex": "host1"}]}},
+        {"host_tags": {"criticality": {"$or": ["prod", "offline"]}}},
+        {"host_tags": {"criticality": {"$nor": ["prod"]}, "site": "s1"}},
+        {"host_tags": {"criticality": {"$ne": "test"}}, "host_folder": "/wato/f1/"},
+        {"host_labels": {"os": "linux"}, "host_tags": {"site": {"$ne": "s0"}}},
+        {"host_labels": {"os": {"$ne": "linux"}}, "host_name": [{"$regex": ".*2"}]},
+    ]
+    for condition in conditions:
+        for with_foreign_hosts in (True, False):
+            valid_hosts = hostnames if with_foreign_hosts else optimizer.all_processed_hosts()
+            expected = {
+                hostname
+                for hostname in valid_hosts
+                if host_paths[hostname].startswith(condition.get("host_folder", "/"))
+                and condition.get("host_name") != []
+                and optimizer.matches_host_name(condition.get("host_name"), hostname)
+                and optimizer.matches_host_tags(
+                    set(host_tags[hostname].items()), condition.get("host_tags", {})
+                )
+                and matches_labels(explicit_labels[hostname], condition.get("host_labels", {}))
+            }
+            assert optimizer._all_matching_hosts(condition, with_foreign_hosts) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern, expected_result",
+    [
+        ("CPU load", ("CPU load", True)),
+        ("", ("", True)),
+        ("Interface .*", ("Interface ", False)),
+        ("Interface 1$", ("Interface 1", False)),
+        ("Filesystems?", ("Filesystem", False)),
+        ("ab{2}", ("a", False)),
+        ("{x", ("", False)),
+        (r"C:\\", ("C:", False)),
+        ("CPU|Memory", ("", False)),
+        ("CPU(?i)", ("", False)),
+        ("CPU (?i:load)", ("CPU ", False)),
+    ],
+)
+def test_literal_prefix(pattern: str, expected_result: tuple[str, bool]) -> None:
+    assert _literal_prefix(pattern) == expected_result
+
+
+def test_service_description_matcher() -> None:
+    conditions: list[HostOrServiceConditions | None] = [
+        None,
+        [],
+        ["CPU"],
+        ["CPU load$"],
+        [{"$regex": "Interface [0-9]+$"}, "Memory"],
+        [{"$regex": ".*load"}],
+        {"$nor": ["CPU", {"$regex": "Interface 1"}]},
+        {"$nor": []},
+        ["Filesystems?"],
+        ["CPU|Memory"],
+    ]
+    matcher = _ServiceDescriptionMatcher(conditions)
+
+    for service_description in [
+        "",
+        "CPU",
+        "CPU load",
+        "CPU loads",
+        "CPU utilization",
+        "Memory",
+        "Interface 1",
+        "Interface 12",
+        "Interface 12a",
+        "Filesystem /",
+        "Disk load",
+    ]:
+        bits = matcher.match_bits(ServiceName(service_description))
+        for nr, condition in enumerate(conditions):
+            if not condition:
+                expected = True
+            else:
+                # The patterns were matched as one regex before
+                negate, patterns = parse_negated_condition_list(condition)
+                pattern = "|".join(
+                    "(?:%s)" % (p["$regex"] if isinstance(p, dict) else p) for p in patterns
+                )
+                expected = negate is not bool(re.match(f"(?:{pattern})", service_description))
+            assert bool(bits & (1 << nr)) is expected, (service_description, condition)
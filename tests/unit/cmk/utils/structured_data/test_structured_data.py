@@ -3,6 +3,7 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import ast
 import gzip
 import shutil
 from collections.abc import Iterable, Mapping, Sequence
@@ -15,6 +16,7 @@ from tests.testlib import cmk_path
 
 from cmk.utils.structured_data import (
     Attributes,
+    deserialize_tree,
     make_filter,
     parse_visible_raw_path,
     RetentionIntervals,
@@ -551,7 +553,7 @@ def test_structured_data_StructuredDataTree_load_from(tree_name: HostName) -> No
     _get_tree_store().load(host_name=tree_name)
 
 
-def test_real_save_gzip(tmp_path: Path) -> None:
+def test_real_save(tmp_path: Path) -> None:
     host_name = HostName("heute")
     target = tmp_path / "inventory" / str(host_name)
     raw_tree = {
@@ -564,13 +566,65 @@ def test_real_save_gzip(tmp_path: Path) -> None:
     tree_store = TreeStore(tmp_path / "inventory")
     tree_store.save(host_name=host_name, tree=tree)
 
-    assert target.exists()
+    # Served by Livestatus as mk_inventory (structured_status for status data) and
+    # mk_inventory_gz
+    for raw in [target.read_bytes(), gzip.decompress(target.with_suffix(".gz").read_bytes())]:
+        assert StructuredDataNode.deserialize(ast.literal_eval(raw.decode("utf-8"))).is_equal(tree)
+        assert deserialize_tree(raw).is_equal(tree)
+    assert (tmp_path / "inventory" / ".last").exists()
 
-    gzip_filepath = target.with_suffix(".gz")
-    assert gzip_filepath.exists()
+    tree_store.remove(host_name=host_name)
+    assert not list(target.parent.glob(f"{host_name}*"))
 
-    with gzip.open(str(gzip_filepath), "rb") as f:
-        f.read()
+
+def test_real_load_partially(tmp_path: Path) -> None:
+    tree = _get_tree_store().load(host_name=HostName("tree_new_heute"))
+    tree_store = TreeStore(tmp_path / "inventory")
+    tree_store.save(host_name=HostName("foo"), tree=tree)
+
+    loaded_tree = tree_store.load(
+        host_name=HostName("foo"),
+        paths=[("hardware", "cpu"), ("networking", "routes"), ("not", "existing")],
+    )
+
+    assert {node.name for node in loaded_tree.nodes} == {"hardware", "networking"}
+    for parent_path in [("hardware",), ("networking",)]:
+        node = loaded_tree.get_node(parent_path)
+        assert node is not None
+        assert node.attributes.is_empty() and node.table.is_empty()
+    for path in [("hardware", "cpu"), ("networking", "routes")]:
+        node = loaded_tree.get_node(path)
+        expected_node = tree.get_node(path)
+        assert node is not None and expected_node is not None
+        assert node.is_equal(expected_node)
+        assert not node.is_empty()
+
+
+@pytest.mark.parametrize(
+    "paths, expected_paths",
+    [
+        (None, [("hardware", "cpu"), ("software", "packages")]),
+        ([()], [("hardware", "cpu"), ("software", "packages")]),
+        ([("hardware", "cpu")], [("hardware", "cpu")]),
+        ([("software",), ("software", "packages")], [("software", "packages")]),
+    ],
+)
+def test_deserialize_tree(
+    paths: list[tuple[str, ...]] | None, expected_paths: list[tuple[str, ...]]
+) -> None:
+    tree = _get_tree_store().load(host_name=HostName("tree_new_heute"))
+    deserialized_tree = deserialize_tree(repr(tree.serialize()).encode(), paths=paths)
+    for path in expected_paths:
+        node = deserialized_tree.get_node(path)
+        expected_node = tree.get_node(path)
+        assert node is not None and expected_node is not None
+        assert node.is_equal(expected_node)
+    if paths is None:
+        assert deserialized_tree.is_equal(tree)
+
+
+def test_deserialize_tree_empty() -> None:
+    assert deserialize_tree(b"").is_empty()
 
 
 def test_real_is_empty() -> None:
@@ -27,24 +27,40 @@ _REF_TIME = 1640000000.0
 _FREEZE_DATETIME = datetime.utcfromtimestamp(_REF_TIME + 10.0)
 
 
+def _store_payloads(
+    source_hostname: str, payloads: Iterable[tuple[HostName, bytes, float]]
+) -> None:
+    piggyback._SourcePayloads.save(cmk.utils.paths.piggyback_dir / source_hostname, payloads)
+
+
+def _set_payload_mtime(source_hostname: str, piggybacked_hostname: HostName, mtime: float) -> None:
+    payloads = piggyback._SourcePayloads.load(cmk.utils.paths.piggyback_dir / source_hostname)
+    _store_payloads(
+        source_hostname,
+        [
+            (
+                hostname,
+                payloads.raw_data(hostname),
+                mtime if hostname == piggybacked_hostname else payloads.mtime(hostname),
+            )
+            for hostname in payloads.index
+        ],
+    )
+
+
 @pytest.fixture(name="setup_files")
 def fixture_setup_files(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
     monkeypatch.setattr("cmk.utils.paths.piggyback_dir", tmp_path / "piggyback")
     monkeypatch.setattr("cmk.utils.paths.piggyback_source_dir", tmp_path / "piggyback_source")
 
-    host_dir = cmk.utils.paths.piggyback_dir / str(_TEST_HOST_NAME)
-    host_dir.mkdir(parents=True, exist_ok=False)
-
-    source_file = host_dir / "source1"
-    with source_file.open(mode="wb") as f2:
-        f2.write(_PAYLOAD)
+    cmk.utils.paths.piggyback_dir.mkdir(parents=True, exist_ok=False)
+    _store_payloads("source1", [(_TEST_HOST_NAME, _PAYLOAD, _REF_TIME)])
 
     cmk.utils.paths.piggyback_source_dir.mkdir(parents=True, exist_ok=False)
     source_status_file = cmk.utils.paths.piggyback_source_dir / "source1"
     with source_status_file.open("wb") as f3:
         f3.write(b"")
 
-    os.utime(str(source_file), (_REF_TIME, _REF_TIME))
     os.utime(str(source_status_file), (_REF_TIME, _REF_TIME))
 
 
@@ -60,10 +76,7 @@ def test_piggyback_default_time_settings() -> None:
 
 def test_cleanup_piggyback_files() -> None:
     piggyback.cleanup_piggyback_files([(None, "max_cache_age", -1)])
-    assert not any(
-        list(piggybacked_dir.glob("*"))
-        for piggybacked_dir in cmk.utils.paths.piggyback_dir.glob("*")
-    )
+    assert not list(cmk.utils.paths.piggyback_dir.glob("*"))
     assert not list(cmk.utils.paths.piggyback_source_dir.glob("*"))
 
 
@@ -153,7 +166,7 @@ def test_get_piggyback_raw_data_successful(time_settings: piggyback.PiggybackTim
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is True
     assert raw_data.info.message == "Successfully processed from source 'source1'"
     assert raw_data.info.status == 0
@@ -166,16 +179,13 @@ def test_get_piggyback_raw_data_not_updated() -> None:
         (None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)
     ]
 
-    # Fake age the test-host piggyback file
-    os.utime(
-        str(cmk.utils.paths.piggyback_dir / str(_TEST_HOST_NAME) / "source1"),
-        (_REF_TIME - 10, _REF_TIME - 10),
-    )
+    # Fake age the test-host piggyback data
+    _set_payload_mtime("source1", _TEST_HOST_NAME, _REF_TIME - 10)
 
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is False
     assert raw_data.info.message == "Piggyback file not updated by source 'source1'"
     assert raw_data.info.status == 0
@@ -195,7 +205,7 @@ def test_get_piggyback_raw_data_not_sending() -> None:
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is False
     assert raw_data.info.message == "Source 'source1' not sending piggyback data"
     assert raw_data.info.status == 0
@@ -209,7 +219,7 @@ def test_get_piggyback_raw_data_too_old_global() -> None:
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is False
     assert raw_data.info.message.startswith("Piggyback file too old:")
     assert raw_data.info.status == 0
@@ -226,7 +236,7 @@ def test_get_piggyback_raw_data_too_old_source() -> None:
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is False
     assert raw_data.info.message.startswith("Piggyback file too old:")
     assert raw_data.info.status == 0
@@ -244,7 +254,7 @@ def test_get_piggyback_raw_data_too_old_piggybacked_host() -> None:
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is False
     assert raw_data.info.message.startswith("Piggyback file too old:")
     assert raw_data.info.status == 0
@@ -294,7 +304,7 @@ def test_store_piggyback_raw_data_new_host() -> None:
     raw_data = _get_only_raw_data_element(HostName("pig"), time_settings)
 
     assert raw_data.info.source_hostname == "source2"
-    assert raw_data.info.file_path.parts[-2:] == ("pig", "source2")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source2"
     assert raw_data.info.successfully_processed is True
     assert raw_data.info.message.startswith("Successfully processed from source 'source2'")
     assert raw_data.info.status == 0
@@ -326,13 +336,13 @@ def test_store_piggyback_raw_data_second_source() -> None:
 
     raw_data1, raw_data2 = raw_data_map["source1"], raw_data_map["source2"]
 
-    assert raw_data1.info.file_path.parts[-2:] == (str(_TEST_HOST_NAME), "source1")
+    assert raw_data1.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data1.info.successfully_processed is True
     assert raw_data1.info.message.startswith("Successfully processed from source 'source1'")
     assert raw_data1.info.status == 0
     assert raw_data1.raw_data == _PAYLOAD
 
-    assert raw_data2.info.file_path.parts[-2:] == (str(_TEST_HOST_NAME), "source2")
+    assert raw_data2.info.file_path == cmk.utils.paths.piggyback_dir / "source2"
     assert raw_data2.info.successfully_processed is True
     assert raw_data2.info.message.startswith("Successfully processed from source 'source2'")
     assert raw_data2.info.status == 0
@@ -358,11 +368,8 @@ def test_get_source_and_piggyback_hosts() -> None:
         },
     )
 
-    # Fake age the test-host piggyback file
-    os.utime(
-        str(cmk.utils.paths.piggyback_dir / "test-host" / "source1"),
-        (_REF_TIME - 10, _REF_TIME - 10),
-    )
+    # Fake age the test-host piggyback data
+    _set_payload_mtime("source1", _TEST_HOST_NAME, _REF_TIME - 10)
 
     piggyback.store_piggyback_raw_data(
         HostName("source1"),
@@ -435,7 +442,7 @@ def test_get_piggyback_raw_data_source_validity(
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is successfully_processed
     assert raw_data.info.message.startswith(reason)
     assert raw_data.info.status == reason_status
@@ -470,7 +477,7 @@ def test_get_piggyback_raw_data_source_validity2(
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is successfully_processed
     assert raw_data.info.message == reason
     assert raw_data.info.status == reason_status
@@ -511,16 +518,13 @@ def test_get_piggyback_raw_data_piggybacked_host_validity(
     reason: str,
     reason_status: int,
 ) -> None:
-    # Fake age the test-host piggyback file
-    os.utime(
-        str(cmk.utils.paths.piggyback_dir / "test-host" / "source1"),
-        (_REF_TIME - 10, _REF_TIME - 10),
-    )
+    # Fake age the test-host piggyback data
+    _set_payload_mtime("source1", _TEST_HOST_NAME, _REF_TIME - 10)
 
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is successfully_processed
     assert raw_data.info.message.startswith(reason)
     assert raw_data.info.status == reason_status
@@ -551,16 +555,13 @@ def test_get_piggyback_raw_data_piggybacked_host_validity2(
     reason: str,
     reason_status: int,
 ) -> None:
-    # Fake age the test-host piggyback file
-    os.utime(
-        str(cmk.utils.paths.piggyback_dir / "test-host" / "source1"),
-        (_REF_TIME - 10, _REF_TIME - 10),
-    )
+    # Fake age the test-host piggyback data
+    _set_payload_mtime("source1", _TEST_HOST_NAME, _REF_TIME - 10)
 
     raw_data = _get_only_raw_data_element(_TEST_HOST_NAME, time_settings)
 
     assert raw_data.info.source_hostname == "source1"
-    assert raw_data.info.file_path.parts[-2:] == ("test-host", "source1")
+    assert raw_data.info.file_path == cmk.utils.paths.piggyback_dir / "source1"
     assert raw_data.info.successfully_processed is successfully_processed
     assert raw_data.info.message.startswith(reason)
     assert raw_data.info.status == reason_status
@@ -589,3 +590,80 @@ def test_get_piggyback_matching_time_settings(
             [HostName("source-host")], HostName("piggybacked-host"), time_settings
         )._expanded_settings.keys()
     ) == sorted(expected_time_setting_keys)
+
+
+@pytest.mark.usefixtures("setup_files")
+def test_store_piggyback_raw_data_keeps_other_hosts() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostName("source1"), {HostName("test-host2"): [b"<<<check_mk>>>", b"lulu"]}
+    )
+
+    payloads = piggyback._SourcePayloads.load(cmk.utils.paths.piggyback_dir / "source1")
+    assert sorted(payloads.index) == ["test-host", "test-host2"]
+    assert payloads.raw_data(_TEST_HOST_NAME) == _PAYLOAD
+    assert payloads.mtime(_TEST_HOST_NAME) == _REF_TIME
+    assert payloads.raw_data(HostName("test-host2")) == b"<<<check_mk>>>\nlulu\n"
+
+
+@pytest.mark.usefixtures("setup_files")
+def test_cleanup_piggyback_files_keeps_current_data() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostName("source1"), {HostName("test-host2"): [b"<<<check_mk>>>", b"lulu"]}
+    )
+
+    piggyback.cleanup_piggyback_files([(None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)])
+
+    assert piggyback.get_source_hostnames(_TEST_HOST_NAME) == []
+    assert piggyback.get_source_hostnames(HostName("test-host2")) == ["source1"]
+
+
+@pytest.mark.usefixtures("setup_files")
+def test_get_piggyback_raw_data_reloads_replaced_file() -> None:
+    time_settings: piggyback.PiggybackTimeSettings = [
+        (None, "max_cache_age", _PIGGYBACK_MAX_CACHEFILE_AGE)
+    ]
+    assert _get_only_raw_data_element(_TEST_HOST_NAME, time_settings).raw_data == _PAYLOAD
+
+    _store_payloads("source1", [(_TEST_HOST_NAME, b"<<<check_mk>>>\nlulu\n", _REF_TIME)])
+
+    assert (
+        _get_only_raw_data_element(_TEST_HOST_NAME, time_settings).raw_data
+        == b"<<<check_mk>>>\nlulu\n"
+    )
+
+
+@pytest.mark.usefixtures("setup_files")
+def test_remove_piggybacked_host_data() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostName("source2"),
+        {
+            _TEST_HOST_NAME: [b"<<<check_mk>>>", b"lulu"],
+            HostName("test-host2"): [b"<<<check_mk>>>", b"lulu"],
+        },
+    )
+
+    piggyback.remove_piggybacked_host_data(_TEST_HOST_NAME)
+
+    assert piggyback.get_source_hostnames(_TEST_HOST_NAME) == []
+    assert piggyback.get_source_hostnames() == ["source2"]
+    assert not (cmk.utils.paths.piggyback_dir / "source1").exists()
+
+
+@pytest.mark.usefixtures("setup_files")
+def test_rename_piggybacked_host() -> None:
+    assert piggyback.rename_piggybacked_host(_TEST_HOST_NAME, HostName("new-host")) is True
+
+    assert piggyback.get_source_hostnames(_TEST_HOST_NAME) == []
+    payloads = piggyback._SourcePayloads.load(cmk.utils.paths.piggyback_dir / "source1")
+    assert payloads.raw_data(HostName("new-host")) == _PAYLOAD
+    assert payloads.mtime(HostName("new-host")) == _REF_TIME
+
+
+@pytest.mark.usefixtures("setup_files")
+def test_rename_piggybacked_host_removed_in_the_meantime(monkeypatch: MonkeyPatch) -> None:
+    source_payloads = piggyback._get_source_payloads_of(_TEST_HOST_NAME)
+    monkeypatch.setattr(piggyback, "_get_source_payloads_of", lambda hostname: source_payloads)
+    (cmk.utils.paths.piggyback_dir / "source1").unlink()
+
+    assert piggyback.rename_piggybacked_host(_TEST_HOST_NAME, HostName("new-host")) is True
+    assert not list(cmk.utils.paths.piggyback_dir.iterdir())
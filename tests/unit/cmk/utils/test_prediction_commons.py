@@ -3,6 +3,7 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import math
 from collections.abc import Mapping
 
 import pytest
@@ -118,6 +119,9 @@ def test_time_series_upsampling(
         ([10, 45, 5, 15, 20, 25, 30, 35, 40, 45], (0, 60, 10), "max", [None, 20, 30, 40, 45, None]),
         ([10, 45, 5, 15, 20, 25, 30, 35, 40, 45], (10, 40, 10), "average", [17.5, 27.5, 37.5]),
         ([10, 45, 5, 15, 20, 25, 30, None, 40, 45], (10, 40, 10), "average", [17.5, 27.5, 40.0]),
+        ([10, 45, 5, 15, 20, None, None, 35, 40, 45], (10, 40, 10), "MIN", [15, None, 35]),
+        ([10, 45, 5, 15, 20, 25, 30, 35, 40, 45], (10, 45, 5), "max", [15, 20, 25, 30, 35, 40, 45]),
+        ([10, 10, 5], (10, 40, 10), "average", [None, None, None]),
     ],
 )
 def test_time_series_downsampling(
@@ -130,6 +134,28 @@ def test_time_series_downsampling(
     assert ts.downsample(twindow, cf) == downsampled
 
 
+def test_time_series_resampling_arrays() -> None:
+    ts = prediction.TimeSeries([0, 40, 10, 1, None, 3, 4])
+    assert ts.to_array().tolist()[0] == 1
+    assert math.isnan(ts.to_array()[1])
+    assert prediction.values_from_array(ts.bfill_upsample_array((0, 40, 5), 0)) == [
+        1,
+        1,
+        None,
+        None,
+        3,
+        3,
+        4,
+        4,
+    ]
+    assert prediction.values_from_array(ts.downsample_array((0, 40, 20), "average")) == [1, 3.5]
+
+
+def test_time_series_downsample_invalid_function() -> None:
+    with pytest.raises(ValueError):
+        prediction.TimeSeries([10, 25, 5, 15, 20, 25]).downsample((10, 30, 10), "last")
+
+
 def test__get_reference_deviation_absolute() -> None:
     factor = 3.1415
     assert (
@@ -8,7 +8,10 @@
 import errno
 import socket
 import ssl
-from contextlib import closing
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import closing, suppress
 from pathlib import Path
 
 import pytest
@@ -273,3 +276,198 @@ def test_set_auth_user(
             return
 
         livestatus.LocalConnection().set_auth_user("mydomain", user_id)
+
+
+def _serve_site(listener: socket.socket, response: bytes, delay: float) -> None:
+    conn, _addr = listener.accept()
+    # The client may close the connection at any time
+    with closing(conn), suppress(OSError):
+        query = b""
+        while not query.endswith(b"\n\n"):
+            if not (data := conn.recv(4096)):
+                return
+            query += data
+        time.sleep(delay)
+        # Send the response in pieces to exercise the incremental receiving
+        for offset in range(0, len(response), 7):
+            conn.sendall(response[offset : offset + 7])
+        # Wait for the client to close the connection
+        conn.recv(1)
+
+
+@pytest.fixture
+def fake_sites(tmp_path: Path) -> Iterator[livestatus.SiteConfigurations]:
+    # site id -> (response, delay in seconds)
+    responses = {
+        "slow": (b"[['slow1'], ['slow2']]", 0.3),
+        "fast": (b"[['fast']]", 0.0),
+        "missing": (b"Table 'xyz' does not exist", 0.0),
+    }
+    threads = []
+    sites = {}
+    for site_id, (body, delay) in responses.items():
+        code = b"404" if site_id == "missing" else b"200"
+        response = code + b" %11d\n" % len(body) + body
+        path = tmp_path / site_id
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(path))
+        listener.listen(1)
+        thread = threading.Thread(target=_serve_site, args=(listener, response, delay))
+        thread.start()
+        threads.append((thread, listener))
+        sites[livestatus.SiteId(site_id)] = livestatus.SiteConfiguration(socket=f"unix:{path}")
+    yield livestatus.SiteConfigurations(sites)
+    for thread, listener in threads:
+        thread.join(timeout=5)
+        listener.close()
+
+
+def test_query_iter_yields_sites_as_they_answer(
+    fake_sites: livestatus.SiteConfigurations,
+) -> None:
+    live = livestatus.MultiSiteConnection(fake_sites)
+    live.set_prepend_site(True)
+    query = livestatus.Query("GET hosts\nColumns: name", suppress_exceptions=(KeyError,))
+    result = list(live.query_iter(query))
+    live.disconnect()
+
+    assert result == [
+        ("fast", [["fast", "fast"]]),
+        ("slow", [["slow", "slow1"], ["slow", "slow2"]]),
+    ]
+    assert list(live.deadsites) == ["missing"]
+    assert isinstance(
+        live.deadsites[livestatus.SiteId("missing")]["exception"],
+        livestatus.MKLivestatusTableNotFoundError,
+    )
+
+
+def test_query_parallel_keeps_site_order(fake_sites: livestatus.SiteConfigurations) -> None:
+    live = livestatus.MultiSiteConnection(fake_sites)
+    query = livestatus.Query(
+        "GET hosts\nColumns: name",
+        suppress_exceptions=(livestatus.MKLivestatusTableNotFoundError,),
+    )
+    assert live.query_parallel(query) == [["slow1"], ["slow2"], ["fast"]]
+    assert not live.deadsites
+    assert live.alive_sites() == ["slow", "fast", "missing"]
+    live.disconnect()
+
+
+def test_query_iter_timeout(fake_sites: livestatus.SiteConfigurations) -> None:
+    live = livestatus.MultiSiteConnection(fake_sites)
+    query = livestatus.Query(
+        "GET hosts\nColumns: name",
+        suppress_exceptions=(livestatus.MKLivestatusTableNotFoundError,),
+    )
+    assert list(live.query_iter(query, timeout=0.1)) == [("fast", [["fast"]])]
+    assert list(live.deadsites) == ["slow"]
+    live.disconnect()
+
+
+def test_query_parallel_site_slower_than_connect_timeout(tmp_path: Path) -> None:
+    path = tmp_path / "site"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen(1)
+    body = b"[['x']]"
+    thread = threading.Thread(
+        target=_serve_site, args=(listener, b"200 %11d\n" % len(body) + body, 1.5)
+    )
+    thread.start()
+    try:
+        live = livestatus.MultiSiteConnection(
+            livestatus.SiteConfigurations(
+                {
+                    livestatus.SiteId("site"): livestatus.SiteConfiguration(
+                        socket=f"unix:{path}", timeout=1
+                    )
+                }
+            )
+        )
+        assert live.query_parallel(livestatus.Query("GET hosts\nColumns: name")) == [["x"]]
+        assert not live.deadsites
+        live.disconnect()
+    finally:
+        thread.join(timeout=5)
+        listener.close()
+
+
+@pytest.fixture
+def serve_response(tmp_path: Path) -> Iterator[Callable[[bytes, bytes], str]]:
+    threads = []
+
+    def serve(code: bytes, body: bytes) -> str:
+        path = tmp_path / f"site{len(threads)}"
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(path))
+        listener.listen(1)
+        response = code + b" %11d\n" % len(body) + body
+        thread = threading.Thread(target=_serve_site, args=(listener, response, 0.0))
+        thread.start()
+        threads.append((thread, listener))
+        return f"unix:{path}"
+
+    yield serve
+    for thread, listener in threads:
+        thread.join(timeout=5)
+        listener.close()
+
+
+def test_query_rows(serve_response: Callable[[bytes, bytes], str]) -> None:
+    live = livestatus.SingleSiteConnection(
+        serve_response(
+            b"200", "[['host1', 1],\n['ho\\nst2', [2, 3]],\n['host3', 'ä']]\n".encode("utf-8")
+        )
+    )
+    assert list(live.query_rows("GET hosts\nColumns: name state")) == [
+        ["host1", 1],
+        ["ho\nst2", [2, 3]],
+        ["host3", "ä"],
+    ]
+    live.disconnect()
+
+
+def test_query_rows_empty_response(serve_response: Callable[[bytes, bytes], str]) -> None:
+    live = livestatus.SingleSiteConnection(serve_response(b"200", b"[]\n"))
+    assert not list(live.query_rows("GET hosts\nColumns: name"))
+    live.disconnect()
+
+
+def test_query_rows_grows_buffer(
+    monkeypatch: MonkeyPatch, serve_response: Callable[[bytes, bytes], str]
+) -> None:
+    monkeypatch.setattr(livestatus, "_RECEIVE_CHUNK_SIZE", 8)
+    live = livestatus.SingleSiteConnection(
+        serve_response(b"200", b"[['%s'],\n['b']]\n" % (b"a" * 100))
+    )
+    assert list(live.query_rows("GET hosts\nColumns: name")) == [["a" * 100], ["b"]]
+    live.disconnect()
+
+
+def test_query_rows_stopped_early(serve_response: Callable[[bytes, bytes], str]) -> None:
+    live = livestatus.SingleSiteConnection(serve_response(b"200", b"[['host1'],\n['host2']]\n"))
+    for _row in live.query_rows("GET hosts\nColumns: name"):
+        break
+    # The rest of the response would be read by the next query
+    assert live.socket is None
+
+
+def test_query_rows_error(serve_response: Callable[[bytes, bytes], str]) -> None:
+    live = livestatus.SingleSiteConnection(serve_response(b"404", b"Table 'xyz' does not exist"))
+    with pytest.raises(livestatus.MKLivestatusTableNotFoundError):
+        list(live.query_rows("GET xyz\nColumns: name"))
+    live.disconnect()
+
+
+def test_query_rows_mocked(mock_livestatus: MockLiveStatusConnection) -> None:
+    mock_livestatus.set_sites(["local"])
+    mock_livestatus.add_table("status", [{"program_start": 1}, {"program_start": 2}])
+    mock_livestatus.expect_query("GET status\nColumns: program_start")
+    with mock_livestatus(expect_status_query=False):
+        assert list(
+            livestatus.LocalConnection().query_rows("GET status\nColumns: program_start")
+        ) == [
+            [1],
+            [2],
+        ]